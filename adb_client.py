@@ -1,7 +1,10 @@
 """ADB client wrapper for Android device communication."""
 
+import queue
 import subprocess
-from typing import Optional, List, Tuple
+import threading
+import time
+from typing import Iterator, Optional, List, Tuple
 
 
 class ADBClient:
@@ -28,15 +31,9 @@ class ADBClient:
             Tuple[bool, str]: (success, output/error)
         """
         try:
-            # Build full command
-            if self.device_id:
-                full_cmd = f"adb -s {self.device_id} {command}"
-            else:
-                full_cmd = f"adb {command}"
-
             # Execute command
             result = subprocess.run(
-                full_cmd,
+                self._build_command(command),
                 shell=True,
                 capture_output=True,
                 text=True,
@@ -53,6 +50,66 @@ class ADBClient:
         except Exception as e:
             return False, f"Error executing command: {str(e)}"
 
+    def execute_bytes(self, command: str, timeout: int = 30, input: Optional[bytes] = None) -> Tuple[bool, bytes]:
+        """
+        Execute ADB command with binary-safe stdin/stdout.
+
+        Args:
+            command: ADB command to execute (e.g. "exec-out screencap")
+            timeout: Command timeout in seconds
+            input: Optional bytes to feed to the command's stdin
+
+        Returns:
+            Tuple[bool, bytes]: (success, raw output or encoded error)
+        """
+        try:
+            result = subprocess.run(
+                self._build_command(command),
+                shell=True,
+                capture_output=True,
+                input=input,
+                timeout=timeout
+            )
+
+            if result.returncode == 0:
+                return True, result.stdout
+            else:
+                return False, result.stderr.strip()
+
+        except subprocess.TimeoutExpired:
+            return False, f"Command timeout after {timeout}s".encode()
+        except Exception as e:
+            return False, f"Error executing command: {str(e)}".encode()
+
+    def popen(self, command: str, stdin: bool = False) -> subprocess.Popen:
+        """
+        Start a long-running ADB command with its stdout piped back.
+
+        Args:
+            command: ADB command to start (e.g. "shell getevent -t")
+            stdin: Also open a pipe to the command's stdin
+
+        Returns:
+            subprocess.Popen: Running process (binary pipes)
+        """
+        return subprocess.Popen(
+            self._build_command(command),
+            shell=True,
+            stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def stream(self, command: str) -> "ADBStream":
+        """Start a long-running ADB command and read its output line by line."""
+        return ADBStream(self.popen(command))
+
+    def _build_command(self, command: str) -> str:
+        """Prefix command with adb binary and device selector."""
+        if self.device_id:
+            return f"adb -s {self.device_id} {command}"
+        return f"adb {command}"
+
     def get_devices(self) -> List[str]:
         """
         Get list of connected devices.
@@ -80,3 +137,93 @@ class ADBClient:
     def shell(self, command: str, timeout: int = 30) -> Tuple[bool, str]:
         """Execute shell command on device."""
         return self.execute(f"shell {command}", timeout)
+
+
+class ADBStream:
+    """Line reader over the stdout of a long-running ADB command."""
+
+    def __init__(self, process: subprocess.Popen, max_pending: int = 10000):
+        """
+        Initialize stream and start the background reader.
+
+        Args:
+            process: Process started by ADBClient.popen
+            max_pending: Maximum unread lines before the reader blocks
+        """
+        self.process = process
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._reader = threading.Thread(target=self._pump, daemon=True)
+        self._reader.start()
+
+    def _pump(self):
+        """Move stdout lines into the queue until EOF."""
+        try:
+            for raw in self.process.stdout:
+                self._lines.put(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        finally:
+            self._lines.put(None)
+
+    def readline(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Read next output line.
+
+        Args:
+            timeout: Seconds to wait (blocks forever if None)
+
+        Returns:
+            str or None: Line without newline, None at end of stream
+
+        Raises:
+            TimeoutError: If no line arrived within timeout
+        """
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No output within {timeout}s")
+        if line is None:
+            # Keep the EOF marker for later readers
+            self._lines.put(None)
+        return line
+
+    def lines(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Iterate over output lines until EOF or overall timeout.
+
+        Args:
+            timeout: Overall deadline in seconds (no deadline if None)
+
+        Yields:
+            str: Output lines
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+            try:
+                line = self.readline(remaining)
+            except TimeoutError:
+                return
+            if line is None:
+                return
+            yield line
+
+    @property
+    def alive(self) -> bool:
+        """Check if the underlying command is still running."""
+        return self.process.poll() is None
+
+    def close(self):
+        """Terminate the command and release its pipes."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
@@ -0,0 +1,538 @@
+"""APK manifest parsing on the host: binary AndroidManifest.xml and resources.arsc.
+
+Only the zip central directory and the two needed entries are read, so
+APKs on the device are parsed through a handful of range reads instead
+of a full pull. Parsed manifests are cached by APK SHA-256.
+"""
+
+import hashlib
+import io
+import shlex
+import struct
+import zipfile
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .adb_client import ADBClient
+
+APK_CACHE_SIZE = 128
+# Device reads are done in aligned blocks of this size
+RANGE_BLOCK = 64 * 1024
+
+# Chunk types (ResourceTypes.h)
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_XML_TYPE = 0x0003
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+
+UTF8_FLAG = 0x100
+NO_ENTRY = 0xFFFFFFFF
+
+# Res_value data types
+TYPE_REFERENCE = 0x01
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+TYPE_FIRST_COLOR = 0x1C
+TYPE_LAST_COLOR = 0x1F
+
+# android: attribute resource ids, for manifests with stripped attribute names
+ANDROID_ATTRS = {
+    0x01010001: "label", 0x01010002: "icon", 0x01010003: "name", 0x01010006: "permission",
+    0x01010009: "protectionLevel", 0x0101000E: "enabled", 0x0101000F: "debuggable",
+    0x01010010: "exported", 0x01010011: "process", 0x01010018: "authorities",
+    0x0101020C: "minSdkVersion", 0x0101021B: "versionCode", 0x0101021C: "versionName",
+    0x01010270: "targetSdkVersion", 0x01010271: "maxSdkVersion", 0x0101028E: "required",
+    0x01010572: "compileSdkVersion", 0x01010573: "compileSdkVersionCodename",
+}
+
+COMPONENT_TAGS = ("activity", "activity-alias", "service", "receiver", "provider")
+
+
+def _string_pool(data: bytes, start: int) -> List[str]:
+    """Decode a ResStringPool chunk starting at start."""
+    header_size, = struct.unpack_from("<H", data, start + 2)
+    count, _, flags, strings_start = struct.unpack_from("<IIII", data, start + 8)
+    offsets = struct.unpack_from(f"<{count}I", data, start + header_size)
+    base = start + strings_start
+    utf8 = bool(flags & UTF8_FLAG)
+    strings = []
+    for offset in offsets:
+        pos = base + offset
+        if utf8:
+            # UTF-16 length, then UTF-8 byte length, each 1 or 2 bytes
+            pos += 2 if data[pos] & 0x80 else 1
+            length = data[pos]
+            if length & 0x80:
+                length = ((length & 0x7F) << 8) | data[pos + 1]
+                pos += 1
+            pos += 1
+            strings.append(data[pos:pos + length].decode("utf-8", "replace"))
+        else:
+            length, = struct.unpack_from("<H", data, pos)
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7FFF) << 16) | struct.unpack_from("<H", data, pos)[0]
+                pos += 2
+            strings.append(data[pos:pos + length * 2].decode("utf-16-le", "replace"))
+    return strings
+
+
+def _typed_value(data_type: int, value: int, strings: List[str]):
+    """Convert a Res_value to a Python value; references become "@0x7f..." strings."""
+    if data_type == TYPE_STRING:
+        return strings[value] if value < len(strings) else ""
+    if data_type == TYPE_INT_BOOLEAN:
+        return value != 0
+    if data_type == TYPE_REFERENCE:
+        return f"@0x{value:08x}"
+    if data_type == TYPE_FLOAT:
+        return struct.unpack("<f", struct.pack("<I", value))[0]
+    if data_type == TYPE_INT_HEX or TYPE_FIRST_COLOR <= data_type <= TYPE_LAST_COLOR:
+        return f"0x{value:08x}"
+    # Decimal ints and anything exotic (dimensions, fractions) as signed int
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def parse_axml(data: bytes) -> Dict:
+    """
+    Parse binary XML into an element tree.
+
+    Args:
+        data: Compiled XML (e.g. AndroidManifest.xml from an APK)
+
+    Returns:
+        Dict: Root element {"tag", "attrs", "children"}
+
+    Raises:
+        ValueError: If data is not binary XML
+    """
+    if len(data) < 8 or struct.unpack_from("<H", data, 0)[0] != RES_XML_TYPE:
+        raise ValueError("Not a binary XML document")
+    strings: List[str] = []
+    resource_ids: List[int] = []
+    root: Optional[Dict] = None
+    stack: List[Dict] = []
+
+    pos = struct.unpack_from("<H", data, 2)[0]
+    while pos + 8 <= len(data):
+        chunk_type, header_size, size = struct.unpack_from("<HHI", data, pos)
+        if size < 8:
+            break
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = _string_pool(data, pos)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            resource_ids = list(struct.unpack_from(f"<{(size - header_size) // 4}I", data, pos + header_size))
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            ext = pos + header_size
+            _, name, attr_start, attr_size, attr_count = struct.unpack_from("<IIHHH", data, ext)
+            attrs = {}
+            for i in range(attr_count):
+                a_ns, a_name, raw, _, _, data_type, value = struct.unpack_from(
+                    "<IIIHBBI", data, ext + attr_start + i * attr_size)
+                key = strings[a_name] if a_name < len(strings) else ""
+                if not key and a_name < len(resource_ids):
+                    key = ANDROID_ATTRS.get(resource_ids[a_name], f"0x{resource_ids[a_name]:08x}")
+                attrs[key] = strings[raw] if raw != NO_ENTRY and raw < len(strings) else \
+                    _typed_value(data_type, value, strings)
+            element = {"tag": strings[name] if name < len(strings) else "?", "attrs": attrs, "children": []}
+            if stack:
+                stack[-1]["children"].append(element)
+            elif root is None:
+                root = element
+            stack.append(element)
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE and stack:
+            stack.pop()
+        pos += size
+
+    if root is None:
+        raise ValueError("Binary XML has no elements")
+    return root
+
+
+class ResourceTable:
+    """Resolves resource ids to values from resources.arsc, preferring the default configuration."""
+
+    def __init__(self, data: bytes):
+        """
+        Initialize table.
+
+        Args:
+            data: resources.arsc contents
+        """
+        self.data = data
+        self.strings: List[str] = []
+        # package id -> package chunk offset
+        self._packages: Dict[int, int] = {}
+        if len(data) < 12 or struct.unpack_from("<H", data, 0)[0] != RES_TABLE_TYPE:
+            raise ValueError("Not a resource table")
+        pos = struct.unpack_from("<H", data, 2)[0]
+        while pos + 8 <= len(data):
+            chunk_type, _, size = struct.unpack_from("<HHI", data, pos)
+            if size < 8:
+                break
+            if chunk_type == RES_STRING_POOL_TYPE:
+                self.strings = _string_pool(data, pos)
+            elif chunk_type == RES_TABLE_PACKAGE_TYPE:
+                self._packages[struct.unpack_from("<I", data, pos + 8)[0]] = pos
+            pos += size
+
+    def resolve(self, res_ids: List[int]) -> Dict[int, object]:
+        """
+        Resolve resource ids in one pass over the table.
+
+        Args:
+            res_ids: Resource ids (0xPPTTEEEE)
+
+        Returns:
+            Dict[int, object]: Resolved values (ids that cannot be resolved are left out)
+        """
+        wanted: Dict[Tuple[int, int], Dict[int, int]] = {}
+        for res_id in res_ids:
+            wanted.setdefault((res_id >> 24, (res_id >> 16) & 0xFF), {})[res_id & 0xFFFF] = res_id
+        found: Dict[int, Tuple[bool, object]] = {}
+
+        data = self.data
+        for package_id, start in self._packages.items():
+            header_size, size = struct.unpack_from("<HI", data, start + 2)
+            pos, end = start + header_size, start + size
+            while pos + 8 <= end:
+                chunk_type, chunk_header, chunk_size = struct.unpack_from("<HHI", data, pos)
+                if chunk_size < 8:
+                    break
+                if chunk_type == RES_TABLE_TYPE_TYPE:
+                    type_id = data[pos + 8]
+                    entries = wanted.get((package_id, type_id))
+                    if entries:
+                        self._read_type(pos, chunk_header, entries, found)
+                pos += chunk_size
+        return {res_id: value for res_id, (_, value) in found.items()}
+
+    def _read_type(self, pos: int, header_size: int, entries: Dict[int, int], found: Dict):
+        data = self.data
+        flags = data[pos + 9]
+        count, entries_start = struct.unpack_from("<II", data, pos + 12)
+        # Default configuration: no locale, density or other qualifiers
+        config_size = struct.unpack_from("<I", data, pos + 20)[0]
+        default = not any(data[pos + 24:pos + 20 + config_size])
+
+        offsets = {}
+        table = pos + header_size
+        if flags & 0x01:
+            # Sparse: (entry index, offset / 4) pairs
+            for i in range(count):
+                index, offset = struct.unpack_from("<HH", data, table + i * 4)
+                offsets[index] = offset * 4
+        elif flags & 0x02:
+            # 16-bit offsets / 4
+            for index in entries:
+                if index < count:
+                    offset = struct.unpack_from("<H", data, table + index * 2)[0]
+                    if offset != 0xFFFF:
+                        offsets[index] = offset * 4
+        else:
+            for index in entries:
+                if index < count:
+                    offset = struct.unpack_from("<I", data, table + index * 4)[0]
+                    if offset != NO_ENTRY:
+                        offsets[index] = offset
+
+        for index, res_id in entries.items():
+            if index not in offsets or found.get(res_id, (False, None))[0]:
+                continue
+            entry = pos + entries_start + offsets[index]
+            entry_size, entry_flags = struct.unpack_from("<HH", data, entry)
+            if entry_flags & 0x08:
+                # Compact entry: key, flags (type in high byte), data
+                value = _typed_value(entry_flags >> 8, struct.unpack_from("<I", data, entry + 4)[0], self.strings)
+            elif entry_flags & 0x01:
+                # Complex (bag) entries, e.g. styles, have no single value
+                continue
+            else:
+                _, _, data_type, raw = struct.unpack_from("<HBBI", data, entry + entry_size)
+                value = _typed_value(data_type, raw, self.strings)
+            found[res_id] = (default, value)
+
+
+def _manifest_summary(root: Dict, resources: Optional[ResourceTable]) -> Dict:
+    """Reduce a manifest element tree to the facts tools report."""
+    attrs = root["attrs"]
+    info: Dict = {
+        "package": attrs.get("package", ""),
+        # Set for split APKs of an app bundle
+        "split": attrs.get("split"),
+        "version_code": attrs.get("versionCode"),
+        "version_name": attrs.get("versionName"),
+        "compile_sdk": attrs.get("compileSdkVersion"),
+        "min_sdk": None,
+        "target_sdk": None,
+        "permissions": [],
+        "declared_permissions": [],
+        "features": [],
+        "application": {},
+        "components": [],
+    }
+    for child in root["children"]:
+        tag, child_attrs = child["tag"], child["attrs"]
+        if tag == "uses-sdk":
+            info["min_sdk"] = child_attrs.get("minSdkVersion", 1)
+            info["target_sdk"] = child_attrs.get("targetSdkVersion", info["min_sdk"])
+        elif tag in ("uses-permission", "uses-permission-sdk-23"):
+            info["permissions"].append(child_attrs.get("name", ""))
+        elif tag == "permission":
+            info["declared_permissions"].append((child_attrs.get("name", ""), child_attrs.get("protectionLevel")))
+        elif tag == "uses-feature" and "name" in child_attrs:
+            info["features"].append((child_attrs["name"], child_attrs.get("required", True)))
+        elif tag == "application":
+            info["application"] = {key: child_attrs[key] for key in
+                                   ("label", "icon", "name", "debuggable", "allowBackup", "usesCleartextTraffic",
+                                    "extractNativeLibs", "networkSecurityConfig") if key in child_attrs}
+            for component in child["children"]:
+                if component["tag"] in COMPONENT_TAGS:
+                    info["components"].append(_component(info["package"], component))
+
+    # Resolve @0x7f... references of the application label and icon
+    references = [value for value in info["application"].values() if isinstance(value, str) and value.startswith("@0x")]
+    if resources is not None and references:
+        resolved = resources.resolve([int(ref[1:], 16) for ref in references])
+        for key, value in info["application"].items():
+            if isinstance(value, str) and value.startswith("@0x") and int(value[1:], 16) in resolved:
+                info["application"][key] = resolved[int(value[1:], 16)]
+    return info
+
+
+def _component(package: str, element: Dict) -> Dict:
+    attrs = element["attrs"]
+    name = str(attrs.get("name", ""))
+    if name.startswith("."):
+        name = package + name
+    elif name and "." not in name:
+        name = f"{package}.{name}"
+    filters = []
+    for intent_filter in element["children"]:
+        if intent_filter["tag"] == "intent-filter":
+            filters.append({
+                "actions": [c["attrs"].get("name", "") for c in intent_filter["children"] if c["tag"] == "action"],
+                "categories": [c["attrs"].get("name", "") for c in intent_filter["children"] if c["tag"] == "category"],
+            })
+    exported = attrs.get("exported")
+    if exported is None:
+        # Pre-S default: exported when it has intent filters
+        exported = bool(filters)
+    return {"type": element["tag"], "name": name, "exported": exported, "permission": attrs.get("permission"),
+            "authorities": attrs.get("authorities"), "filters": filters}
+
+
+def parse_apk(apk) -> Dict:
+    """
+    Parse the manifest of an APK.
+
+    Args:
+        apk: Path or seekable binary file object of the APK
+
+    Returns:
+        Dict: Manifest summary (package, versions, SDKs, permissions, components)
+
+    Raises:
+        ValueError: If the file is not an APK
+    """
+    try:
+        with zipfile.ZipFile(apk) as archive:
+            names = set(archive.namelist())
+            if "AndroidManifest.xml" not in names:
+                raise ValueError("No AndroidManifest.xml in archive")
+            root = parse_axml(archive.read("AndroidManifest.xml"))
+            resources = None
+            if "resources.arsc" in names:
+                try:
+                    resources = ResourceTable(archive.read("resources.arsc"))
+                except ValueError:
+                    resources = None
+            return _manifest_summary(root, resources)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not an APK: {e}")
+
+
+class DeviceFile(io.RawIOBase):
+    """Seekable read-only view of a device file, fetched in blocks with dd over exec-out."""
+
+    def __init__(self, client: ADBClient, path: str, size: int, cache_blocks: int = 64):
+        """
+        Initialize reader.
+
+        Args:
+            client: ADB client of the device
+            path: File path on the device
+            size: File size in bytes
+            cache_blocks: Blocks kept in memory
+        """
+        super().__init__()
+        self.client = client
+        self.path = path
+        self.size = size
+        self.reads = 0
+        self._pos = 0
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def _fetch(self, first: int, last: int):
+        """Fetch missing blocks first..last (inclusive) in one command."""
+        missing = [b for b in range(first, last + 1) if b not in self._blocks]
+        if not missing:
+            for block in range(first, last + 1):
+                self._blocks.move_to_end(block)
+            return
+        start, count = missing[0], missing[-1] - missing[0] + 1
+        command = f"dd if={shlex.quote(self.path)} bs={RANGE_BLOCK} skip={start} count={count} 2>/dev/null"
+        success, data = self.client.execute_bytes(f"exec-out {shlex.quote(command)}", timeout=120)
+        if not success:
+            raise OSError(f"Failed to read {self.path}: {data.decode('utf-8', 'replace')}")
+        self.reads += 1
+        for i in range(count):
+            self._blocks[start + i] = data[i * RANGE_BLOCK:(i + 1) * RANGE_BLOCK]
+        for block in range(first, last + 1):
+            self._blocks.move_to_end(block)
+        while len(self._blocks) > max(self._cache_blocks, last - first + 1):
+            self._blocks.popitem(last=False)
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self.size - self._pos)
+        if length <= 0:
+            return 0
+        first, last = self._pos // RANGE_BLOCK, (self._pos + length - 1) // RANGE_BLOCK
+        self._fetch(first, last)
+        data = b"".join(self._blocks[b] for b in range(first, last + 1))
+        offset = self._pos - first * RANGE_BLOCK
+        chunk = data[offset:offset + length]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+_manifest_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+
+def _cached(sha256: str, load) -> Dict:
+    if sha256 in _manifest_cache:
+        _manifest_cache.move_to_end(sha256)
+        return _manifest_cache[sha256]
+    info = load()
+    info["sha256"] = sha256
+    _manifest_cache[sha256] = info
+    if len(_manifest_cache) > APK_CACHE_SIZE:
+        _manifest_cache.popitem(last=False)
+    return info
+
+
+def local_apk_manifest(path: str) -> Dict:
+    """
+    Parse the manifest of an APK on the host, cached by SHA-256.
+
+    Args:
+        path: Local APK path
+
+    Returns:
+        Dict: Manifest summary
+    """
+    return _cached(file_sha256(path), lambda: parse_apk(path))
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 hex digest of a local file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def device_apk_manifest(client: ADBClient, path: str) -> Dict:
+    """
+    Parse the manifest of an APK on the device, cached by SHA-256.
+
+    The hash is computed on the device; on a cache miss only the zip
+    directory, AndroidManifest.xml and resources.arsc are transferred.
+
+    Args:
+        client: ADB client of the device
+        path: APK path on the device
+
+    Returns:
+        Dict: Manifest summary
+
+    Raises:
+        OSError: If the APK cannot be read
+    """
+    quoted = shlex.quote(path)
+    success, output = client.shell(shlex.quote(f"stat -c %s {quoted} && sha256sum {quoted}"), timeout=120)
+    lines = output.split()
+    if not success or len(lines) < 2 or not lines[0].isdigit():
+        raise OSError(f"Cannot read {path}: {output.strip()}")
+    size, sha256 = int(lines[0]), lines[1]
+    return _cached(sha256, lambda: parse_apk(io.BufferedReader(DeviceFile(client, path, size), RANGE_BLOCK)))
+
+
+def format_manifest(info: Dict, max_components: int = 40) -> str:
+    """Render a manifest summary."""
+    app = info["application"]
+    lines = [
+        f"Package: {info['package']}",
+        f"Version: {info['version_name']} ({info['version_code']})",
+        f"SDK: min {info['min_sdk']}, target {info['target_sdk']}, compile {info['compile_sdk']}",
+    ]
+    for key, title in (("label", "Label"), ("name", "Application class"), ("icon", "Icon")):
+        if key in app:
+            lines.append(f"{title}: {app[key]}")
+    flags = [f"{key}={app[key]}" for key in ("debuggable", "allowBackup", "usesCleartextTraffic",
+                                              "extractNativeLibs") if key in app]
+    if flags:
+        lines.append("Flags: " + " ".join(flags))
+
+    lines.append(f"Permissions ({len(info['permissions'])}):")
+    lines.extend(f"  {permission}" for permission in info["permissions"])
+    if info["declared_permissions"]:
+        lines.append("Declared permissions: " + ", ".join(name for name, _ in info["declared_permissions"]))
+    if info["features"]:
+        lines.append("Features: " + ", ".join(name + ("" if required else " (optional)")
+                                               for name, required in info["features"]))
+
+    components = info["components"]
+    lines.append(f"Components ({len(components)}, exported: {sum(1 for c in components if c['exported'])}):")
+    for component in components[:max_components]:
+        actions = [a for f in component["filters"] for a in f["actions"]]
+        launcher = any("android.intent.category.LAUNCHER" in f["categories"] for f in component["filters"])
+        detail = []
+        if component["exported"]:
+            detail.append("exported")
+        if launcher:
+            detail.append("launcher")
+        if component["permission"]:
+            detail.append(f"permission={component['permission']}")
+        if component["authorities"]:
+            detail.append(f"authorities={component['authorities']}")
+        if actions:
+            detail.append(", ".join(actions[:3]))
+        lines.append(f"  {component['type']} {component['name']}" + (f" [{'; '.join(detail)}]" if detail else ""))
+    if len(components) > max_components:
+        lines.append(f"  ... {len(components) - max_components} more")
+    if "sha256" in info:
+        lines.append(f"SHA-256: {info['sha256']}")
+    return "\n".join(lines)
@@ -1,11 +1,41 @@
 """App management tools for Android."""
 
+import os
+import shlex
+import threading
+import time
 from langchain.tools import tool
-from typing import Optional
+from typing import Dict, List, Optional
+from ..adb_client import ADBClient
+from ..apk_parser import device_apk_manifest, format_manifest, local_apk_manifest
 from ..device_manager import DeviceManager
+from ..fleet import resolve_devices, run_on_devices
+from ..package_inventory import PackageInventory, refresh_inventory
+from ..package_index import (
+    COMPONENT_TYPES,
+    format_package_info,
+    get_package_index,
+    lookup_package,
+    notify_package_changed,
+)
 
 _device_manager = DeviceManager()
 
+# Concurrent installs per fan-out; transfers share the host's USB bandwidth
+INSTALL_PARALLEL = 8
+INSTALL_TIMEOUT = 600
+INSTALL_CHUNK = 1024 * 1024
+
+_inventory: Optional[PackageInventory] = None
+
+
+def _package_inventory() -> PackageInventory:
+    """Open the shared package inventory on first use."""
+    global _inventory
+    if _inventory is None:
+        _inventory = PackageInventory()
+    return _inventory
+
 
 @tool
 def list_packages(device_id: Optional[str] = None, include_system: bool = False) -> str:
@@ -22,15 +52,12 @@ def list_packages(device_id: Optional[str] = None, include_system: bool = False)
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    cmd = "pm list packages"
-    if not include_system:
-        cmd += " -3"  # Third-party apps only
+    try:
+        index = get_package_index(client)
+    except (RuntimeError, TimeoutError) as e:
+        return f"Failed to list packages: {e}"
 
-    success, output = client.shell(cmd)
-    if not success:
-        return f"Failed to list packages: {output}"
-
-    packages = [line.replace("package:", "") for line in output.split("\n") if line.startswith("package:")]
+    packages = sorted(name for name, record in index.records.items() if include_system or not record.system)
     return f"Found {len(packages)} package(s):\n" + "\n".join(packages)
 
 
@@ -59,9 +86,149 @@ def install_app(apk_path: str, device_id: Optional[str] = None, reinstall: bool
     cmd += f" {apk_path}"
 
     success, output = client.execute(cmd)
+    if success:
+        try:
+            package_name = local_apk_manifest(apk_path)["package"] or None
+        except (OSError, ValueError):
+            package_name = None
+        notify_package_changed(client.device_id, package_name, client=client)
     return output if success else f"Installation failed: {output}"
 
 
+def _installed_hashes(client: ADBClient, package_name: str) -> List[str]:
+    """Sorted SHA-256 of every installed APK of a package (empty if not installed)."""
+    script = f"for p in $(pm path {shlex.quote(package_name)} | sed 's/^package://'); do sha256sum \"$p\"; done"
+    success, output = client.shell(shlex.quote(script), timeout=120)
+    if not success:
+        return []
+    return sorted(line.split()[0] for line in output.splitlines() if len(line.split()) == 2)
+
+
+def _stream_install(client: ADBClient, apk_path: str, flags: str) -> str:
+    """Stream one APK into `pm install -S` over stdin, killing it after INSTALL_TIMEOUT."""
+    size = os.path.getsize(apk_path)
+    process = client.popen(f"shell pm install -S {size} {flags}", stdin=True)
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        process.kill()
+
+    # Unblocks a stalled write as well as a pm that never answers
+    watchdog = threading.Timer(INSTALL_TIMEOUT, expire)
+    watchdog.start()
+    try:
+        try:
+            with open(apk_path, "rb") as apk:
+                for block in iter(lambda: apk.read(INSTALL_CHUNK), b""):
+                    process.stdin.write(block)
+        except BrokenPipeError:
+            # pm rejected the session early (or was killed); its reason is on stdout
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        output = process.stdout.read().decode("utf-8", "replace").strip()
+        process.wait()
+    finally:
+        watchdog.cancel()
+        if process.poll() is None:
+            process.kill()
+    if expired.is_set():
+        return f"Failure [timed out after {INSTALL_TIMEOUT}s]"
+    return output
+
+
+def _install_on_device(client: ADBClient, apk_paths: List[str], package_name: str, local_hashes: List[str],
+                       flags: str, force: bool) -> Dict:
+    """Install unless the identical APK set is present; returns status, message and timings."""
+    started = time.monotonic()
+    if not force and _installed_hashes(client, package_name) == local_hashes:
+        return {"status": "skipped", "check": time.monotonic() - started, "install": 0.0}
+    checked = time.monotonic()
+
+    if len(apk_paths) == 1:
+        output = _stream_install(client, apk_paths[0], flags)
+        success = "Success" in output
+    else:
+        paths = " ".join(shlex.quote(path) for path in apk_paths)
+        success, output = client.execute(f"install-multiple {flags} {paths}", timeout=INSTALL_TIMEOUT)
+        success = success and "Success" in output
+    finished = time.monotonic()
+    if success:
+        notify_package_changed(client.device_id, package_name, client=client)
+    return {"status": "installed" if success else "failed", "message": (output.strip().splitlines() or [""])[-1],
+            "check": checked - started, "install": finished - checked}
+
+
+@tool
+def install_app_fleet(apk_paths: str, device_id: Optional[str] = "all", grant_permissions: bool = False,
+                      force: bool = False, max_parallel: int = INSTALL_PARALLEL) -> str:
+    """Install an APK (or base + split APKs) on many devices in parallel.
+
+    Devices that already have byte-identical APKs installed are skipped
+    (compared by SHA-256 on the device). Single APKs are streamed into
+    `pm install`; split sets use install-multiple.
+
+    Args:
+        apk_paths: Local APK path, or comma-separated base and split APK paths
+        device_id: Comma-separated serials or "all" (default: all)
+        grant_permissions: Grant all runtime permissions (default: False)
+        force: Reinstall even if identical APKs are installed (default: False)
+        max_parallel: Maximum devices installing at once (default: 8)
+
+    Returns:
+        str: Per-device result with check and install timing
+    """
+    paths = [path.strip() for path in apk_paths.split(",") if path.strip()]
+    try:
+        manifests = [local_apk_manifest(path) for path in paths]
+    except OSError as e:
+        return f"Cannot read APK: {e}"
+    except ValueError as e:
+        return f"Failed to parse APK: {e}"
+    bases = [m for m in manifests if not m["split"]]
+    if len(bases) != 1:
+        return f"Expected exactly one base APK, found {len(bases)}"
+    package_name = bases[0]["package"]
+    if any(m["package"] != package_name for m in manifests):
+        return "All APKs must belong to the same package"
+
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    flags = "-r -g" if grant_permissions else "-r"
+    local_hashes = sorted(m["sha256"] for m in manifests)
+    started = time.monotonic()
+    results = run_on_devices(clients, lambda client: _install_on_device(
+        client, paths, package_name, local_hashes, flags, force), max_workers=max_parallel)
+    elapsed = time.monotonic() - started
+
+    counts = {"installed": 0, "skipped": 0, "failed": len(missing)}
+    lines = []
+    for device, success, result in results:
+        if not success:
+            counts["failed"] += 1
+            lines.append(f"  {device}: FAILED: {result}")
+            continue
+        counts[result["status"]] += 1
+        if result["status"] == "skipped":
+            lines.append(f"  {device}: skipped, identical APK installed (check {result['check']:.1f}s)")
+        elif result["status"] == "installed":
+            lines.append(f"  {device}: installed in {result['install']:.1f}s (check {result['check']:.1f}s)")
+        else:
+            lines.append(f"  {device}: FAILED after {result['install']:.1f}s: {result['message']}")
+    lines += [f"  {device}: FAILED: device not found" for device in missing]
+
+    version = f"{bases[0]['version_name']} ({bases[0]['version_code']})"
+    header = (f"{package_name} {version} on {len(clients) + len(missing)} device(s) in {elapsed:.1f}s: "
+              f"{counts['installed']} installed, {counts['skipped']} skipped, {counts['failed']} failed")
+    return "\n".join([header] + lines)
+
+
 @tool
 def uninstall_app(package_name: str, device_id: Optional[str] = None, keep_data: bool = False) -> str:
     """Uninstall application from device.
@@ -84,6 +251,8 @@ def uninstall_app(package_name: str, device_id: Optional[str] = None, keep_data:
     cmd += f" {package_name}"
 
     success, output = client.execute(cmd)
+    if success:
+        notify_package_changed(client.device_id, package_name, removed=True)
     return output if success else f"Uninstallation failed: {output}"
 
 
@@ -165,45 +334,64 @@ def get_app_info(package_name: str, device_id: Optional[str] = None) -> str:
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    success, output = client.shell(f"dumpsys package {package_name}")
-    if not success:
-        return f"Failed to get app info: {output}"
-
-    # Extract key information
-    lines = output.split("\n")
-    info = []
-    for line in lines[:50]:  # First 50 lines usually have key info
-        if "versionName" in line or "versionCode" in line or "targetSdk" in line:
-            info.append(line.strip())
-
-    return "\n".join(info) if info else output[:500]
+    try:
+        record = lookup_package(client, package_name)
+    except (RuntimeError, TimeoutError) as e:
+        return f"Failed to get app info: {e}"
+    if record is None:
+        return f"Package not found: {package_name}"
+    return format_package_info(record)
 
 
 @tool
 def get_app_manifest(package_name: str, device_id: Optional[str] = None) -> str:
-    """Extract AndroidManifest.xml details.
+    """Extract AndroidManifest.xml details of an installed app.
+
+    The manifest is parsed on the host from the installed base APK; only
+    the needed zip entries are transferred and results are cached by APK hash.
 
     Args:
         package_name: Package name
         device_id: Device serial number (uses default if None)
 
     Returns:
-        str: Manifest information
+        str: Package, versions, SDKs, permissions and components
     """
     client = _device_manager.get_device(device_id)
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    # Get APK path first
+    # Get APK path first; split installs list base.apk among the splits
     success, path_output = client.shell(f"pm path {package_name}")
-    if not success or not path_output:
+    paths = [line.replace("package:", "").strip() for line in path_output.splitlines() if line.startswith("package:")]
+    if not success or not paths:
         return f"Package not found: {package_name}"
+    apk_path = next((path for path in paths if path.endswith("/base.apk")), paths[0])
 
-    apk_path = path_output.replace("package:", "").strip()
+    try:
+        info = device_apk_manifest(client, apk_path)
+    except (OSError, ValueError) as e:
+        return f"Failed to get manifest: {e}"
+    return format_manifest(info)
 
-    # Dump manifest
-    success, output = client.shell(f"aapt dump badging {apk_path}")
-    return output[:1000] if success else f"Failed to get manifest: {output}"
+
+@tool
+def inspect_apk(apk_path: str) -> str:
+    """Read the manifest of a local APK file without installing it.
+
+    Args:
+        apk_path: Local path to APK file
+
+    Returns:
+        str: Package, versions, SDKs, permissions and components
+    """
+    try:
+        info = local_apk_manifest(apk_path)
+    except OSError as e:
+        return f"Cannot read APK: {e}"
+    except ValueError as e:
+        return f"Failed to parse APK: {e}"
+    return format_manifest(info)
 
 
 @tool
@@ -221,24 +409,164 @@ def get_app_permissions(package_name: str, device_id: Optional[str] = None) -> s
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    success, output = client.shell(f"dumpsys package {package_name} | grep permission")
-    return output if success else f"Failed to get permissions: {output}"
+    try:
+        record = lookup_package(client, package_name)
+    except (RuntimeError, TimeoutError) as e:
+        return f"Failed to get permissions: {e}"
+    if record is None:
+        return f"Package not found: {package_name}"
+
+    lines = [f"{len(record.requested)} requested permission(s):"]
+    for permission in record.requested:
+        granted, kind = record.permissions.get(permission, (False, ""))
+        state = f"{'granted' if granted else 'denied'} ({kind})" if kind else "not granted"
+        lines.append(f"  {permission}: {state}")
+    # Granted without being requested (shared uid, platform defaults)
+    extra = sorted(p for p, (granted, _) in record.permissions.items() if granted and p not in record.requested)
+    if extra:
+        lines.append("Also granted: " + ", ".join(extra))
+    return "\n".join(lines)
 
 
 @tool
 def get_app_activities(package_name: str, device_id: Optional[str] = None) -> str:
-    """List all activities in an application.
+    """List activities of an application, plus services, receivers and providers with intent filters.
 
     Args:
         package_name: Package name
         device_id: Device serial number (uses default if None)
 
     Returns:
-        str: List of activities
+        str: Components with their intent actions; launcher activities are marked
     """
     client = _device_manager.get_device(device_id)
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    success, output = client.shell(f"dumpsys package {package_name} | grep Activity")
-    return output[:1000] if success else f"Failed to get activities: {output}"
+    try:
+        record = lookup_package(client, package_name)
+    except (RuntimeError, TimeoutError) as e:
+        return f"Failed to get activities: {e}"
+    if record is None:
+        return f"Package not found: {package_name}"
+
+    launchers = set(record.launcher_activities())
+    lines = []
+    for kind in COMPONENT_TYPES:
+        components = record.components[kind]
+        if not components:
+            continue
+        lines.append(f"{kind.capitalize()} ({len(components)}):")
+        for name in sorted(components):
+            info = components[name]
+            detail = sorted(info["actions"]) + sorted(info["authorities"])
+            marker = " [launcher]" if name in launchers else ""
+            lines.append(f"  {name}{marker}" + (f"  {', '.join(detail[:4])}" if detail else ""))
+    return "\n".join(lines) if lines else f"No components with intent filters in {package_name}"
+
+
+def _version_change(change: str, before: Optional[int], after: Optional[int]) -> str:
+    if change == "added":
+        return f"added (versionCode {after})"
+    if change == "removed":
+        return f"removed (was {before})"
+    return f"{change} {before} -> {after}"
+
+
+@tool
+def refresh_package_inventory(device_id: Optional[str] = "all") -> str:
+    """Snapshot installed packages and report only what changed since the last snapshot.
+
+    The first snapshot of a device is stored as its baseline. Changes
+    (added, removed, updated, downgraded) are kept as history for
+    package_changes and package_versions.
+
+    Args:
+        device_id: Device serial, comma-separated serials, or "all" (default: all)
+
+    Returns:
+        str: Per-device package deltas
+    """
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    inventory = _package_inventory()
+    lines = [f"Device not found: {d}" for d in missing]
+    for device, success, result in run_on_devices(clients, lambda client: refresh_inventory(client, inventory)):
+        if not success:
+            lines.append(f"{device}: failed: {result}")
+            continue
+        changes, first, count = result
+        if first:
+            lines.append(f"{device}: baseline recorded ({count} packages)")
+        elif not changes:
+            lines.append(f"{device}: no changes ({count} packages)")
+        else:
+            lines.append(f"{device}: {len(changes)} change(s)")
+            lines.extend(f"  {package}: {_version_change(change, before, after)}"
+                         for package, change, before, after in changes)
+    return "\n".join(lines)
+
+
+@tool
+def package_changes(device_id: Optional[str] = None, package_name: Optional[str] = None,
+                    hours: Optional[int] = 24, limit: int = 50) -> str:
+    """List recorded package changes across devices without querying them.
+
+    Args:
+        device_id: Only changes on this device
+        package_name: Only changes of this package
+        hours: Only changes in the last N hours (default: 24, None for all)
+        limit: Maximum changes to list (default: 50)
+
+    Returns:
+        str: Changes, newest first
+    """
+    since = time.time() - hours * 3600 if hours else None
+    rows = _package_inventory().history(device_id, package_name, since, limit)
+    if not rows:
+        return "No package changes recorded (run refresh_package_inventory to take snapshots)"
+    lines = []
+    for timestamp, device, package, change, before, after in rows:
+        seen = time.strftime("%m-%d %H:%M:%S", time.localtime(timestamp))
+        lines.append(f"{seen}  {device}  {package}: {_version_change(change, before, after)}")
+    return "\n".join(lines)
+
+
+@tool
+def package_versions(package_name: str, version_code: Optional[int] = None, below: bool = False) -> str:
+    """Show which version of a package each tracked device has, from the last snapshots.
+
+    Answers questions like "which devices are still on version X" without
+    querying devices; run refresh_package_inventory first for fresh data.
+
+    Args:
+        package_name: Package to look up
+        version_code: Only devices on this versionCode
+        below: With version_code, list devices below it (or without the package) instead
+
+    Returns:
+        str: Devices grouped by installed versionCode
+    """
+    rows = _package_inventory().versions(package_name)
+    if not rows:
+        return "No devices tracked (run refresh_package_inventory first)"
+    if version_code is not None:
+        if below:
+            rows = [row for row in rows if row[1] is None or row[1] < version_code]
+        else:
+            rows = [row for row in rows if row[1] == version_code]
+        if not rows:
+            return f"No tracked devices match versionCode {'<' if below else '=='} {version_code}"
+
+    groups: Dict[Optional[int], List[str]] = {}
+    for device, version, since, refreshed in rows:
+        age = time.strftime("%m-%d %H:%M", time.localtime(refreshed))
+        groups.setdefault(version, []).append(f"{device} (snapshot {age})")
+    lines = [f"{package_name}:"]
+    for version, devices in groups.items():
+        title = "not installed" if version is None else f"versionCode {version}"
+        lines.append(f"  {title}: {len(devices)} device(s)")
+        lines.extend(f"    {device}" for device in devices)
+    return "\n".join(lines)
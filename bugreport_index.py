@@ -0,0 +1,364 @@
+"""Lazy bugreport reader with an offset index of its sections.
+
+The main text entry of a bugreport zip is memory-mapped (extracted once
+to a cache file when compressed) and indexed in a single pass over the
+section markers. The index is saved next to the zip so later sessions
+skip the scan; indexing runs in a process pool.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import zipfile
+from concurrent import futures
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+SECTION_MARKER = b"\n------ "
+SERVICE_MARKER = b"\nDUMP OF SERVICE "
+_SECTION_TITLE = re.compile(r"^------ (.+?)(?: \((.*)\))? ------$")
+_DURATION = re.compile(r"^[\d.]+s was the duration of ")
+_SERVICE_PRIORITY = ("CRITICAL ", "HIGH ", "NORMAL ")
+
+# Size of the ZIP local file header before name and extra field
+_LOCAL_HEADER_SIZE = 30
+
+
+def _cache_path(path: str) -> str:
+    return path + ".txt"
+
+
+def _index_path(path: str) -> str:
+    return path + ".index.json"
+
+
+def _source_key(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _main_entry(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    """Pick the dumpstate text entry of a bugreport zip."""
+    names = archive.namelist()
+    if "main_entry.txt" in names:
+        name = archive.read("main_entry.txt").decode().strip()
+        if name in names:
+            return archive.getinfo(name)
+    texts = [info for info in archive.infolist() if info.filename.endswith(".txt")]
+    if not texts:
+        raise ValueError("No text entry in bugreport zip")
+    preferred = [info for info in texts if os.path.basename(info.filename).startswith("bugreport")]
+    return max(preferred or texts, key=lambda info: info.file_size)
+
+
+def _map_text(path: str) -> Tuple[mmap.mmap, int, int]:
+    """
+    Memory-map the bugreport text.
+
+    Plain text files and stored zip entries are mapped in place; a
+    compressed entry is streamed once to a cache file next to the zip.
+
+    Args:
+        path: Bugreport .zip or .txt path
+
+    Returns:
+        Tuple[mmap.mmap, int, int]: (mapping, text start offset, text size)
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            info = _main_entry(archive)
+            if info.compress_type == zipfile.ZIP_STORED:
+                with open(path, "rb") as f:
+                    f.seek(info.header_offset)
+                    header = f.read(_LOCAL_HEADER_SIZE)
+                    name_length = int.from_bytes(header[26:28], "little")
+                    extra_length = int.from_bytes(header[28:30], "little")
+                    mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                base = info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length
+                return mapping, base, info.file_size
+
+            cache = _cache_path(path)
+            fresh = (os.path.exists(cache) and os.path.getsize(cache) == info.file_size
+                     and os.path.getmtime(cache) >= os.path.getmtime(path))
+            if not fresh:
+                with archive.open(info) as src, open(cache + ".tmp", "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(cache + ".tmp", cache)
+            path = cache
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Bugreport text is empty")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapping, 0, len(mapping)
+
+
+def _find_all(buf: mmap.mmap, marker: bytes, start: int, end: int) -> List[int]:
+    positions = []
+    pos = buf.find(marker, start, end)
+    while pos >= 0:
+        positions.append(pos + 1)
+        pos = buf.find(marker, pos + len(marker), end)
+    return positions
+
+
+def scan_sections(buf: mmap.mmap, base: int, size: int) -> List[Dict]:
+    """
+    Build the section index in one pass over the marker lines.
+
+    Top level `------ NAME (command) ------` sections end at the next
+    section or their duration line; `DUMP OF SERVICE name:` blocks are
+    nested in the enclosing section.
+
+    Args:
+        buf: Mapped text (or bytes)
+        base: Offset of the text in buf
+        size: Text size
+
+    Returns:
+        List[Dict]: Sections with id, name, kind, command, start, end, parent
+    """
+    limit = base + size
+    markers = [(pos, "section") for pos in _find_all(buf, SECTION_MARKER, base, limit)]
+    markers += [(pos, "service") for pos in _find_all(buf, SERVICE_MARKER, base, limit)]
+    markers.sort()
+
+    sections: List[Dict] = []
+    open_section: Optional[Dict] = None
+    open_service: Optional[Dict] = None
+
+    def close(entry: Optional[Dict], at: int):
+        if entry is not None and entry["end"] is None:
+            entry["end"] = at
+
+    for pos, kind in markers:
+        line_end = buf.find(b"\n", pos, limit)
+        line = buf[pos:line_end if line_end >= 0 else limit].decode("utf-8", "replace").rstrip("\r")
+        start = pos - base
+        if kind == "section":
+            title = _SECTION_TITLE.match(line)
+            if not title:
+                continue
+            close(open_service, start)
+            open_service = None
+            close(open_section, start)
+            open_section = None
+            if _DURATION.match(title.group(1)):
+                continue
+            entry = {"name": title.group(1), "kind": "section", "command": title.group(2) or "", "parent": None}
+            open_section = entry
+        else:
+            name = line[len(SERVICE_MARKER) - 1:].rstrip(":").strip()
+            for priority in _SERVICE_PRIORITY:
+                if name.startswith(priority):
+                    name = name[len(priority):]
+            close(open_service, start)
+            parent = open_section["id"] if open_section else None
+            entry = {"name": name, "kind": "service", "command": "", "parent": parent}
+            open_service = entry
+        entry.update(id=len(sections), start=start, end=None)
+        sections.append(entry)
+
+    close(open_service, size)
+    close(open_section, size)
+    return sections
+
+
+def build_index(path: str) -> List[Dict]:
+    """
+    Index a bugreport and save the index next to it.
+
+    Runs in a worker process (see index_async).
+
+    Args:
+        path: Bugreport .zip or .txt path
+
+    Returns:
+        List[Dict]: Section index (see scan_sections)
+    """
+    mapping, base, size = _map_text(path)
+    try:
+        sections = scan_sections(mapping, base, size)
+    finally:
+        mapping.close()
+    with open(_index_path(path) + ".tmp", "w") as f:
+        json.dump({"version": INDEX_VERSION, "source": _source_key(path), "sections": sections}, f)
+    os.replace(_index_path(path) + ".tmp", _index_path(path))
+    return sections
+
+
+def load_index(path: str) -> Optional[List[Dict]]:
+    """Return saved index if it matches the current bugreport file."""
+    try:
+        with open(_index_path(path)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("source") != _source_key(path):
+        return None
+    return data["sections"]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, Tuple[List[int], Future]] = {}
+_reports: Dict[str, "BugReport"] = {}
+_lock = threading.Lock()
+
+
+def index_async(path: str) -> Future:
+    """
+    Start indexing a bugreport in the background.
+
+    Args:
+        path: Bugreport .zip or .txt path
+
+    Returns:
+        Future: Resolves to the section index
+    """
+    global _pool
+    path = os.path.abspath(path)
+    source = _source_key(path)
+    with _lock:
+        pending = _pending.get(path)
+        if pending is not None and pending[0] == source:
+            future = pending[1]
+            if not (future.done() and future.exception()):
+                return future
+        sections = load_index(path)
+        if sections is not None:
+            future = Future()
+            future.set_result(sections)
+        else:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=2)
+            future = _pool.submit(build_index, path)
+        _pending[path] = (source, future)
+        return future
+
+
+class BugReport:
+    """Indexed, memory-mapped bugreport text."""
+
+    def __init__(self, path: str, sections: List[Dict]):
+        """
+        Map bugreport text for an existing index.
+
+        Args:
+            path: Bugreport .zip or .txt path
+            sections: Section index from build_index/load_index
+        """
+        self.path = path
+        self.sections = sections
+        self.source = _source_key(path)
+        self._map, self._base, self.size = _map_text(path)
+        self._starts = [section["start"] for section in sections]
+
+    def find(self, name: str) -> List[Dict]:
+        """
+        Look up sections by name.
+
+        Args:
+            name: "#<id>", exact name, or case-insensitive substring
+
+        Returns:
+            List[Dict]: Matching sections (exact matches only, if any)
+        """
+        if name.startswith("#") and name[1:].isdigit():
+            index = int(name[1:])
+            return [self.sections[index]] if index < len(self.sections) else []
+        exact = [s for s in self.sections if s["name"] == name]
+        if exact:
+            return exact
+        lowered = name.lower()
+        return [s for s in self.sections if lowered in s["name"].lower()]
+
+    def read(self, section: Dict, offset: int = 0, limit: int = 20000) -> str:
+        """Read up to limit bytes of a section starting at offset into it."""
+        start = self._base + section["start"] + max(offset, 0)
+        end = min(self._base + section["end"], start + limit)
+        return self._map[start:end].decode("utf-8", "replace") if end > start else ""
+
+    def section_at(self, offset: int) -> Optional[Dict]:
+        """Innermost section containing a text offset."""
+        i = bisect.bisect_right(self._starts, offset) - 1
+        while i >= 0:
+            section = self.sections[i]
+            if section["start"] <= offset < section["end"]:
+                return section
+            i = section["parent"] if section["parent"] is not None else -1
+        return None
+
+    def grep(self, pattern: str, section: Optional[Dict] = None, max_matches: int = 100,
+             ignore_case: bool = False) -> List[Tuple[int, str]]:
+        """
+        Search lines matching a regular expression without copying the text.
+
+        Args:
+            pattern: Python regular expression (^ and $ match at line boundaries)
+            section: Restrict search to this section (whole report if None)
+            max_matches: Stop after this many matching lines
+            ignore_case: Case-insensitive match
+
+        Returns:
+            List[Tuple[int, str]]: (text offset of line, line)
+        """
+        # Multiline so ^ and $ anchor at each line, not only the searched range
+        regex = re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        lo = self._base + (section["start"] if section else 0)
+        hi = self._base + (section["end"] if section else self.size)
+        matches = []
+        pos = lo
+        while len(matches) < max_matches:
+            match = regex.search(self._map, pos, hi)
+            if not match:
+                break
+            line_start = max(self._map.rfind(b"\n", lo, match.start()) + 1, lo)
+            line_end = self._map.find(b"\n", match.end(), hi)
+            line_end = hi if line_end < 0 else line_end
+            matches.append((line_start - self._base,
+                            self._map[line_start:line_end].decode("utf-8", "replace").rstrip("\r")))
+            pos = line_end + 1
+        return matches
+
+    def close(self):
+        """Release the mapping."""
+        self._map.close()
+
+
+def open_bugreport(path: str, timeout: float = 0) -> Optional[BugReport]:
+    """
+    Return indexed bugreport, waiting up to timeout for background indexing.
+
+    Args:
+        path: Bugreport .zip or .txt path
+        timeout: Seconds to wait for an index still being built
+
+    Returns:
+        Optional[BugReport]: None while indexing is still running
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        report = _reports.get(path)
+    if report is not None and report.source == _source_key(path):
+        return report
+
+    future = index_async(path)
+    try:
+        sections = future.result(timeout=timeout)
+    except futures.TimeoutError:
+        return None
+
+    with _lock:
+        report = _reports.get(path)
+        if report is None or report.sections is not sections:
+            if report is not None:
+                report.close()
+            report = BugReport(path, sections)
+            _reports[path] = report
+        return report
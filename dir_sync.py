@@ -0,0 +1,330 @@
+"""Hash-based delta sync of directory trees between host and device."""
+
+import hashlib
+import os
+import shlex
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from .adb_client import ADBClient
+
+# Host digests kept across syncs, keyed by (path, size, mtime)
+HASH_CACHE_SIZE = 100000
+HASH_CHUNK = 1024 * 1024
+# Files per adb push/pull invocation
+TRANSFER_BATCH = 64
+# Minimum assumed transfer rate for timeouts (bytes/s)
+MIN_RATE = 2 * 1024 * 1024
+
+# relative path -> (size, mtime)
+Tree = Dict[str, Tuple[int, float]]
+
+_hash_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def list_local_tree(root: str) -> Optional[Tree]:
+    """
+    List regular files under a host directory.
+
+    Args:
+        root: Host directory
+
+    Returns:
+        Tree or None: relative path -> (size, mtime), None if root is not a directory
+    """
+    if not os.path.isdir(root):
+        return None
+    tree: Tree = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            tree[rel] = (st.st_size, st.st_mtime)
+    return tree
+
+
+def parse_stat_listing(output: str) -> Tree:
+    """Parse `stat -c '%s %Y %n'` lines of "./"-relative paths."""
+    tree: Tree = {}
+    for line in output.splitlines():
+        parts = line.split(" ", 2)
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            continue
+        tree[parts[2][2:] if parts[2].startswith("./") else parts[2]] = (int(parts[0]), float(parts[1]))
+    return tree
+
+
+def list_device_tree(client: ADBClient, root: str) -> Optional[Tree]:
+    """
+    List regular files under a device directory in one shell call.
+
+    Args:
+        client: ADB client of the device
+        root: Device directory
+
+    Returns:
+        Tree or None: relative path -> (size, mtime), None if root is not a directory
+
+    Raises:
+        RuntimeError: If the listing fails
+    """
+    quoted = shlex.quote(root)
+    script = f"[ -d {quoted} ] || {{ echo missing; exit 0; }}; cd {quoted} && find . -type f -exec stat -c '%s %Y %n' {{}} +"
+    success, output = client.shell(shlex.quote(script), timeout=120)
+    if not success:
+        raise RuntimeError(f"Cannot list {root}: {output.strip()[:200]}")
+    if output.strip() == "missing":
+        return None
+    return parse_stat_listing(output)
+
+
+def local_md5(path: str) -> str:
+    """MD5 of a host file, cached by size and mtime."""
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        if key in _hash_cache:
+            _hash_cache.move_to_end(key)
+            return _hash_cache[key]
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_cache[key] = value
+        if len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return value
+
+
+def local_md5s(root: str, paths: Sequence[str], workers: int = 8) -> Dict[str, str]:
+    """Hash host files (relative to root) in a thread pool."""
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        digests = pool.map(lambda rel: local_md5(os.path.join(root, rel)), paths)
+        return dict(zip(paths, digests))
+
+
+def device_md5s(client: ADBClient, root: str, paths: Sequence[str]) -> Dict[str, str]:
+    """
+    Hash device files in one shell call, feeding the path list over stdin.
+
+    Args:
+        client: ADB client of the device
+        root: Device directory the paths are relative to
+        paths: Relative file paths
+
+    Returns:
+        Dict[str, str]: relative path -> md5 (unreadable files are missing)
+    """
+    if not paths:
+        return {}
+    script = f"cd {shlex.quote(root)} && tr '\\n' '\\0' | xargs -0 md5sum"
+    listing = "".join(f"./{rel}\n" for rel in paths).encode()
+    success, output = client.execute_bytes(f"shell {shlex.quote(script)}", timeout=60 + len(paths) // 100,
+                                           input=listing)
+    digests: Dict[str, str] = {}
+    for line in output.decode("utf-8", errors="replace").splitlines():
+        digest, _, name = line.partition("  ")
+        if len(digest) == 32 and name:
+            digests[name[2:] if name.startswith("./") else name] = digest
+    return digests
+
+
+def plan_sync(source: Tree, dest: Tree, source_hashes: Dict[str, str], dest_hashes: Dict[str, str],
+              delete: bool = False) -> Dict[str, List[str]]:
+    """
+    Minimal set of changes that makes dest equal to source.
+
+    Files present on both sides with equal size are compared by hash;
+    a missing hash on either side counts as changed.
+
+    Returns:
+        Dict[str, List[str]]: "added", "changed", "deleted" and "unchanged" relative paths
+    """
+    plan: Dict[str, List[str]] = {"added": [], "changed": [], "deleted": [], "unchanged": []}
+    for rel in sorted(source):
+        if rel not in dest:
+            plan["added"].append(rel)
+        elif source[rel][0] != dest[rel][0]:
+            plan["changed"].append(rel)
+        elif source_hashes.get(rel) and source_hashes.get(rel) == dest_hashes.get(rel):
+            plan["unchanged"].append(rel)
+        else:
+            plan["changed"].append(rel)
+    if delete:
+        plan["deleted"] = sorted(set(dest) - set(source))
+    return plan
+
+
+def _batches(paths: Sequence[str]) -> List[Tuple[str, List[str]]]:
+    """Group relative paths by directory into transfer batches."""
+    by_dir: Dict[str, List[str]] = {}
+    for rel in paths:
+        by_dir.setdefault(os.path.dirname(rel), []).append(rel)
+    return [(directory, files[i:i + TRANSFER_BATCH])
+            for directory, files in sorted(by_dir.items()) for i in range(0, len(files), TRANSFER_BATCH)]
+
+
+def _join(root: str, rel: str) -> str:
+    """Device path of a relative path (root itself for "")."""
+    return f"{root.rstrip('/')}/{rel}" if rel else root
+
+
+def transfer(client: ADBClient, local_root: str, device_root: str, paths: Sequence[str], sizes: Dict[str, int],
+             direction: str, max_parallel: int = 4) -> Tuple[int, List[str]]:
+    """
+    Copy files with one multi-source adb push/pull per directory batch.
+
+    Args:
+        client: ADB client of the device
+        local_root: Host directory
+        device_root: Device directory
+        paths: Relative paths to copy
+        sizes: Relative path -> size (for timeouts)
+        direction: "push" (host to device) or "pull" (device to host)
+        max_parallel: Concurrent adb transfers
+
+    Returns:
+        Tuple[int, List[str]]: (files copied, errors)
+    """
+    batches = _batches(paths)
+    directories = sorted({directory for directory, _ in batches})
+    if direction == "push":
+        dirs = " ".join(shlex.quote(_join(device_root, d)) for d in directories)
+        if dirs:
+            success, output = client.shell(shlex.quote(f"mkdir -p {dirs}"), timeout=60)
+            if not success:
+                return 0, [f"mkdir failed: {output.strip()[:200]}"]
+    else:
+        for directory in directories:
+            os.makedirs(os.path.join(local_root, directory), exist_ok=True)
+
+    def copy(batch: Tuple[str, List[str]]) -> Tuple[int, Optional[str]]:
+        directory, files = batch
+        if direction == "push":
+            sources = [os.path.join(local_root, rel) for rel in files]
+            target = _join(device_root, directory)
+        else:
+            sources = [_join(device_root, rel) for rel in files]
+            target = os.path.join(local_root, directory)
+        timeout = 60 + sum(sizes.get(rel, 0) for rel in files) // MIN_RATE
+        args = " ".join(shlex.quote(path) for path in sources + [target.rstrip("/") + "/"])
+        success, output = client.execute(f"{direction} {args}", timeout=timeout)
+        return (len(files), None) if success else (0, f"{directory or '.'}: {output.strip()[:200]}")
+
+    copied, errors = 0, []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(batches) or 1))) as pool:
+        for count, error in pool.map(copy, batches):
+            copied += count
+            if error:
+                errors.append(error)
+    return copied, errors
+
+
+def _delete(client: ADBClient, local_root: str, device_root: str, paths: Sequence[str], direction: str) -> List[str]:
+    """Remove destination files that no longer exist at the source."""
+    errors = []
+    if direction == "push":
+        for i in range(0, len(paths), 500):
+            chunk = " ".join(shlex.quote(_join(device_root, rel)) for rel in paths[i:i + 500])
+            success, output = client.shell(shlex.quote(f"rm -f {chunk}"), timeout=60)
+            if not success:
+                errors.append(f"rm failed: {output.strip()[:200]}")
+    else:
+        for rel in paths:
+            try:
+                os.remove(os.path.join(local_root, rel))
+            except OSError as e:
+                errors.append(f"{rel}: {e}")
+    return errors
+
+
+def sync_tree(client: ADBClient, local_root: str, device_root: str, direction: str = "push",
+              delete: bool = False, dry_run: bool = False, max_parallel: int = 4) -> Dict:
+    """
+    Make the destination tree match the source, transferring only changed files.
+
+    Args:
+        client: ADB client of the device
+        local_root: Host directory
+        device_root: Device directory
+        direction: "push" (host to device) or "pull" (device to host)
+        delete: Remove destination files missing at the source
+        dry_run: Only compute the plan
+        max_parallel: Concurrent adb transfers
+
+    Returns:
+        Dict: plan, bytes to copy, copied count, errors and phase timings
+
+    Raises:
+        ValueError: If direction is invalid
+        RuntimeError: If the source tree is missing or cannot be listed
+    """
+    if direction not in ("push", "pull"):
+        raise ValueError(f"direction must be 'push' or 'pull', not {direction!r}")
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        device_listing = pool.submit(list_device_tree, client, device_root)
+        local = list_local_tree(local_root)
+        device = device_listing.result()
+    source, dest = (local, device) if direction == "push" else (device, local)
+    if source is None:
+        raise RuntimeError(f"Source directory not found: {local_root if direction == 'push' else device_root}")
+    dest = dest or {}
+    listed = time.monotonic()
+
+    # Only same-size files need content comparison
+    candidates = [rel for rel in source if rel in dest and source[rel][0] == dest[rel][0]]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        device_hashes = pool.submit(device_md5s, client, device_root, candidates)
+        local_hashes = local_md5s(local_root, candidates)
+        device_hashes = device_hashes.result()
+    source_hashes, dest_hashes = ((local_hashes, device_hashes) if direction == "push"
+                                  else (device_hashes, local_hashes))
+    plan = plan_sync(source, dest, source_hashes, dest_hashes, delete)
+    hashed = time.monotonic()
+
+    to_copy = plan["added"] + plan["changed"]
+    sizes = {rel: source[rel][0] for rel in to_copy}
+    result = {"plan": plan, "bytes": sum(sizes.values()), "copied": 0, "errors": [],
+              "hashed": len(candidates), "timings": {"list": listed - start, "hash": hashed - listed}}
+    if dry_run:
+        return result
+    if to_copy:
+        result["copied"], result["errors"] = transfer(client, local_root, device_root, to_copy, sizes,
+                                                      direction, max_parallel)
+    if plan["deleted"]:
+        result["errors"] += _delete(client, local_root, device_root, plan["deleted"], direction)
+    result["timings"]["transfer"] = time.monotonic() - hashed
+    return result
+
+
+def format_sync_result(result: Dict, direction: str, dry_run: bool, max_list: int = 20) -> str:
+    """Render a sync plan and outcome."""
+    plan = result["plan"]
+    counts = ", ".join(f"{len(plan[key])} {key}" for key in ("added", "changed", "deleted", "unchanged"))
+    timings = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in result["timings"].items())
+    verb = "Would copy" if dry_run else "Copied"
+    copied = len(plan["added"]) + len(plan["changed"]) if dry_run else result["copied"]
+    lines = [
+        f"{direction.capitalize()} sync: {counts} ({result['hashed']} compared by hash)",
+        f"{verb} {copied} files, {result['bytes'] / 1024 / 1024:.1f} MB ({timings})",
+    ]
+    for key, mark in (("added", "+"), ("changed", "~"), ("deleted", "-")):
+        for rel in plan[key][:max_list]:
+            lines.append(f"  {mark} {rel}")
+        if len(plan[key]) > max_list:
+            lines.append(f"  ... {len(plan[key]) - max_list} more {key}")
+    for error in result["errors"][:10]:
+        lines.append(f"Error: {error}")
+    return "\n".join(lines)
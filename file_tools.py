@@ -1,8 +1,17 @@
 """File system tools for Android."""
 
+import base64
+import gzip
+import hashlib
+import shlex
+import stat
+import time
 from langchain.tools import tool
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from ..device_manager import DeviceManager
+from ..dir_sync import format_sync_result, sync_tree
+from ..fs_index import FsNode, format_matches, format_size, get_fs_index, index_tree, parse_stat_lines
+from ..security import RiskLevel, SecurityValidator
 
 _device_manager = DeviceManager()
 
@@ -26,14 +35,55 @@ def list_directory(path: str, device_id: Optional[str] = None) -> str:
     return output if success else f"Failed to list directory: {output}"
 
 
+# Block size for dd range reads
+READ_BLOCK = 4096
+HEXDUMP_WIDTH = 16
+
+
+def _hexdump(data: bytes, offset: int = 0) -> str:
+    """Render bytes as offset / hex / ASCII rows."""
+    rows = []
+    for i in range(0, len(data), HEXDUMP_WIDTH):
+        chunk = data[i:i + HEXDUMP_WIDTH]
+        text = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+        rows.append(f"{offset + i:08x}  {chunk.hex(' '):<{HEXDUMP_WIDTH * 3 - 1}}  |{text}|")
+    return "\n".join(rows)
+
+
+def _read_command(path: str, offset: int, length: int, start_line: Optional[int], end_line: Optional[int]) -> Tuple[str, int]:
+    """Device pipeline for a byte or line range; returns (command, bytes to drop from its output)."""
+    quoted = shlex.quote(path)
+    if start_line or end_line:
+        first = max(1, start_line or 1)
+        if end_line:
+            return f"sed -n '{first},{end_line}p;{end_line}q' {quoted} | head -c {length}", 0
+        return f"tail -n +{first} {quoted} | head -c {length}", 0
+    if offset < 0:
+        return f"tail -c {-offset} {quoted} | head -c {length}", 0
+    # Block-aligned dd seeks instead of reading through the skipped part
+    skip = offset // READ_BLOCK
+    count = (offset + length + READ_BLOCK - 1) // READ_BLOCK - skip
+    return f"dd if={quoted} bs={READ_BLOCK} skip={skip} count={count} 2>/dev/null", offset - skip * READ_BLOCK
+
+
 @tool
-def read_file(path: str, device_id: Optional[str] = None, max_size: int = 102400) -> str:
-    """Read text file contents from device.
+def read_file(path: str, device_id: Optional[str] = None, max_size: int = 102400, offset: int = 0, length: Optional[int] = None, start_line: Optional[int] = None, end_line: Optional[int] = None, encoding: str = "text", compress: bool = False) -> str:
+    """Read file contents from device, whole or as a byte or line range.
+
+    Files larger than max_size are returned in pages; the header shows the
+    offset to pass for the next page. Binary content is shown as a hex dump
+    unless encoding is "base64".
 
     Args:
         path: File path to read
         device_id: Device serial number (uses default if None)
-        max_size: Maximum file size in bytes (default: 100KB)
+        max_size: Maximum bytes returned per call (default: 100KB)
+        offset: First byte to read; negative reads from the end, e.g. -4096 for the last 4KB (default: 0)
+        length: Bytes to read (default and upper bound: max_size)
+        start_line: First line to read (1-based, overrides offset)
+        end_line: Last line to read (inclusive)
+        encoding: "text", "hex" (hex dump) or "base64" (default: text)
+        compress: Gzip on device before transfer, for large text ranges (default: False)
 
     Returns:
         str: File contents or error message
@@ -41,25 +91,66 @@ def read_file(path: str, device_id: Optional[str] = None, max_size: int = 102400
     client = _device_manager.get_device(device_id)
     if not client:
         return f"Device not found: {device_id or 'default'}"
-
-    # Check file size first
-    success, size_output = client.shell(f"stat -c%s {path}")
-    if success and size_output.isdigit():
-        if int(size_output) > max_size:
-            return f"File too large ({size_output} bytes). Use pull_file for large files."
-
-    success, output = client.shell(f"cat {path}")
-    return output if success else f"Failed to read file: {output}"
+    if encoding not in ("text", "hex", "base64"):
+        return f"Unknown encoding: {encoding} (use text, hex or base64)"
+
+    length = min(length or max_size, max_size)
+    command, drop = _read_command(path, offset, length, start_line, end_line)
+    if compress:
+        command = f"if command -v gzip >/dev/null; then printf z; {command} | gzip -1 -c; else printf r; {command}; fi"
+    quoted = shlex.quote(path)
+    # Size line first so one round-trip answers both
+    script = f"[ -r {quoted} ] || {{ echo missing; exit 0; }}; stat -c %s {quoted}; {command}"
+    success, output = client.execute_bytes(f"exec-out {shlex.quote(script)}", timeout=60 + length // (1024 * 1024))
+    if not success:
+        return f"Failed to read file: {output.decode('utf-8', 'replace')}"
+    header, _, data = output.partition(b"\n")
+    if header == b"missing":
+        return f"Failed to read file: {path} not found or not readable"
+    size = int(header) if header.isdigit() else 0
+    if compress:
+        data = gzip.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    data = data[drop:drop + length]
+
+    if start_line or end_line:
+        first = max(1, start_line or 1)
+        last = first + data.count(b"\n") - (1 if data.endswith(b"\n") else 0)
+        note = f"[lines {first}-{last} of {path}" + (", truncated at max_size]" if len(data) >= length else "]")
+        start = None
+    else:
+        start = offset if offset >= 0 else max(0, size + offset)
+        end = start + len(data)
+        note = ""
+        # /proc and other pseudo files report size 0
+        if start > 0 or end < size or len(data) >= length:
+            note = f"[bytes {start}-{max(start, end - 1)} of {size or 'unknown size'}"
+            note += f"; next offset {end}]" if end < size else "]"
+
+    if encoding == "base64":
+        body = base64.b64encode(data).decode()
+    elif encoding == "hex" or b"\0" in data[:8192]:
+        body = _hexdump(data, start or 0)
+        if encoding == "text":
+            note = (note + "\n" if note else "") + "[binary content shown as hex dump; use encoding=\"base64\" for raw bytes]"
+    else:
+        body = data.decode("utf-8", errors="replace")
+    return f"{note}\n{body}" if note else body
 
 
 @tool
-def write_file(path: str, content: str, device_id: Optional[str] = None) -> str:
+def write_file(path: str, content: str, device_id: Optional[str] = None, append: bool = False, encoding: str = "text", verify: bool = True) -> str:
     """Write content to a file on device.
 
+    Content is streamed over stdin into a temporary file next to the target,
+    checked and then renamed over it, so readers never see a partial file.
+
     Args:
         path: File path to write
         content: Content to write
         device_id: Device serial number (uses default if None)
+        append: Append to the file instead of replacing it (default: False)
+        encoding: "text" or "base64" (content is base64 of binary data) (default: text)
+        verify: Check the MD5 of the written bytes before replacing the file (default: True)
 
     Returns:
         str: Write status
@@ -68,11 +159,35 @@ def write_file(path: str, content: str, device_id: Optional[str] = None) -> str:
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    # Escape content for shell
-    escaped_content = content.replace("'", "'\\''")
-
-    success, output = client.shell(f"echo '{escaped_content}' > {path}")
-    return "File written successfully" if success else f"Failed to write file: {output}"
+    if encoding == "base64":
+        try:
+            data = base64.b64decode(content, validate=True)
+        except ValueError as e:
+            return f"Invalid base64 content: {e}"
+    elif encoding == "text":
+        data = content.encode("utf-8")
+    else:
+        return f"Unknown encoding: {encoding} (use text or base64)"
+
+    target = shlex.quote(path)
+    tmp = shlex.quote(f"{path}.atlas-tmp") + ".$$"
+    # Start from the old file (append) and keep its mode
+    seed = f"cp {target} {tmp}" if append else f": > {tmp}"
+    lines = [f"if [ -e {target} ]; then {seed} && chmod $(stat -c %a {target}) {tmp}; fi"]
+    lines.append(f"cat >> {tmp} || {{ rm -f {tmp}; exit 1; }}")
+    if verify:
+        expected = hashlib.md5(data).hexdigest()
+        lines.append(f"sum=$(tail -c {len(data)} {tmp} | md5sum | cut -d' ' -f1)")
+        lines.append(f"[ \"$sum\" = {expected} ] || {{ rm -f {tmp}; echo \"checksum mismatch: $sum\" >&2; exit 1; }}")
+    lines.append(f"mv -f {tmp} {target} || {{ rm -f {tmp}; exit 1; }}")
+    script = "\n".join(lines)
+
+    success, output = client.execute_bytes(f"shell {shlex.quote(script)}", timeout=60 + len(data) // (1024 * 1024),
+                                           input=data)
+    if not success:
+        return f"Failed to write file: {output.decode('utf-8', 'replace').strip()}"
+    action = "Appended" if append else "Wrote"
+    return f"{action} {len(data)} bytes to {path}" + (" (MD5 verified)" if verify else "")
 
 
 @tool
@@ -195,3 +310,188 @@ def file_stats(path: str, device_id: Optional[str] = None) -> str:
 
     success, output = client.shell(f"stat {path}")
     return output if success else f"Failed to get file stats: {output}"
+
+
+def _split_paths(paths: str) -> List[str]:
+    """Split a newline or comma separated path list, dropping duplicates."""
+    parts = paths.splitlines() if "\n" in paths else paths.split(",")
+    return list(dict.fromkeys(part.strip() for part in parts if part.strip()))
+
+
+def _stat_paths(client, paths: List[str]) -> Tuple[bool, Dict[str, FsNode], str]:
+    """stat all paths in one shell call; returns (success, path -> node for existing paths, error)."""
+    quoted = " ".join(shlex.quote(path) for path in paths)
+    success, output = client.shell(shlex.quote(f"stat -c '%f %s %Y %n' {quoted} 2>/dev/null; true"))
+    if not success:
+        return False, {}, output
+    return True, {path: FsNode(mode, size, mtime) for path, mode, size, mtime in parse_stat_lines(output)}, ""
+
+
+def _risk_notes(paths: List[str]) -> Dict[str, str]:
+    """Risk reason per flagged path."""
+    checks = SecurityValidator.validate_paths(paths)
+    return {path: f"[{risk.value}] {reason}" for path, (_, risk, reason) in zip(paths, checks) if risk != RiskLevel.SAFE}
+
+
+@tool
+def file_exists_batch(paths: str, device_id: Optional[str] = None) -> str:
+    """Check whether many files or directories exist, in one device call.
+
+    Args:
+        paths: Paths to check, one per line or comma separated
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: One "exists"/"missing" line per path
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    wanted = _split_paths(paths)
+    if not wanted:
+        return "No paths given"
+    success, found, error = _stat_paths(client, wanted)
+    if not success:
+        return f"Failed to check paths: {error}"
+
+    notes = _risk_notes(wanted)
+    lines = [f"{len(found)} of {len(wanted)} exist"]
+    for path in wanted:
+        state = f"exists ({found[path].kind})" if path in found else "missing"
+        lines.append(f"{state:<12} {path}" + (f"  {notes[path]}" if path in notes else ""))
+    return "\n".join(lines)
+
+
+@tool
+def file_stats_batch(paths: str, device_id: Optional[str] = None) -> str:
+    """Get type, size, mtime and permissions of many paths in one device call.
+
+    Args:
+        paths: Paths to check, one per line or comma separated
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Table with one row per path (missing paths marked "-")
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    wanted = _split_paths(paths)
+    if not wanted:
+        return "No paths given"
+    success, found, error = _stat_paths(client, wanted)
+    if not success:
+        return f"Failed to get file stats: {error}"
+
+    notes = _risk_notes(wanted)
+    lines = [f"{'type':<4} {'mode':<4} {'size':>10} {'modified':<19} path"]
+    for path in wanted:
+        node = found.get(path)
+        if node is None:
+            row = f"{'-':<4} {'-':<4} {'-':>10} {'-':<19} {path}"
+        else:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(node.mtime))
+            row = f"{node.kind:<4} {stat.S_IMODE(node.mode):04o} {node.size:>10} {when} {path}"
+        lines.append(row + (f"  {notes[path]}" if path in notes else ""))
+    return "\n".join(lines)
+
+
+@tool
+def sync_directory(local_path: str, device_path: str, direction: str = "push", device_id: Optional[str] = None, delete: bool = False, dry_run: bool = False, max_parallel: int = 4) -> str:
+    """Sync a directory between host and device, copying only files that differ.
+
+    Both trees are listed in one pass each; files of equal size are compared
+    by MD5, so repeat syncs of an unchanged tree transfer nothing.
+
+    Args:
+        local_path: Directory on host
+        device_path: Directory on device
+        direction: "push" (host to device) or "pull" (device to host)
+        device_id: Device serial number (uses default if None)
+        delete: Remove destination files that do not exist at the source (default: False)
+        dry_run: Only show what would be copied or deleted (default: False)
+        max_parallel: Concurrent adb transfers (default: 4)
+
+    Returns:
+        str: Added/changed/deleted files and transfer summary
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    try:
+        result = sync_tree(client, local_path, device_path, direction, delete, dry_run, max_parallel)
+    except (ValueError, RuntimeError) as e:
+        return f"Failed to sync directory: {e}"
+    return format_sync_result(result, direction, dry_run)
+
+
+@tool
+def index_directory(path: str, device_id: Optional[str] = None, rebuild: bool = False) -> str:
+    """Crawl a device directory tree into a local index for find_files queries.
+
+    The first call lists the whole subtree in one pass. Later calls only
+    re-list directories that changed since the previous crawl.
+
+    Args:
+        path: Directory to index (e.g. /sdcard or /data/data/<package>)
+        device_id: Device serial number (uses default if None)
+        rebuild: Crawl from scratch instead of refreshing (default: False)
+
+    Returns:
+        str: Indexed file, directory and byte counts
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    try:
+        index, action = index_tree(client, path, rebuild)
+    except RuntimeError as e:
+        return f"Failed to index directory: {e}"
+    files, dirs, size = index.totals()
+    return f"Indexed {index.root}: {files} files, {dirs} directories, {format_size(size)} ({action})"
+
+
+@tool
+def find_files(path: str, pattern: str = "*", device_id: Optional[str] = None, kind: Optional[str] = None, min_size: Optional[int] = None, max_size: Optional[int] = None, modified_within_minutes: Optional[int] = None, sort: str = "path", limit: int = 50, refresh: bool = False) -> str:
+    """Find files under a device directory by glob, type, size or age, answered from the local index.
+
+    The directory is indexed on first use (see index_directory).
+
+    Args:
+        path: Directory to search
+        pattern: Glob; without "/" it matches names anywhere (e.g. "*.db"), with "/" the relative path (e.g. "databases/*.db")
+        device_id: Device serial number (uses default if None)
+        kind: "f" (files), "d" (directories) or "l" (symlinks)
+        min_size: Minimum size in bytes
+        max_size: Maximum size in bytes
+        modified_within_minutes: Only entries modified in the last N minutes
+        sort: "path", "size" (largest first) or "newest" (default: path)
+        limit: Maximum entries listed (default: 50)
+        refresh: Re-check the device for changes first (default: False)
+
+    Returns:
+        str: Matching entries with type, mode, size and mtime
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    index = get_fs_index(client, path)
+    try:
+        if index is None or refresh:
+            index, _ = index_tree(client, index.root if index else path)
+    except RuntimeError as e:
+        return f"Failed to index directory: {e}"
+
+    newer_than = None
+    if modified_within_minutes is not None:
+        # Device clock now, estimated from the last crawl
+        device_now = (index.device_time or index.crawled_at) + (time.time() - index.crawled_at)
+        newer_than = device_now - modified_within_minutes * 60
+    matches, total = index.query(pattern, index.relative(path.rstrip("/") or "/") or "", kind, min_size, max_size,
+                                 newer_than, sort, limit)
+    return format_matches(matches, total)
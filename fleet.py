@@ -0,0 +1,70 @@
+"""Fan-out of device operations across several devices."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+from .adb_client import ADBClient
+from .device_manager import DeviceManager
+
+# Upper bound on concurrent adb sessions per fan-out
+MAX_WORKERS = 16
+
+
+def resolve_devices(manager: DeviceManager, device_ids: Optional[str]) -> Tuple[List[ADBClient], List[str]]:
+    """
+    Resolve a device selector to clients.
+
+    Args:
+        manager: Device manager of the calling tool module
+        device_ids: None (default device), "all" (every connected device)
+                    or comma-separated serial numbers
+
+    Returns:
+        Tuple[List[ADBClient], List[str]]: (clients, selectors not found)
+    """
+    if device_ids and device_ids.strip().lower() == "all":
+        return [manager.get_device(d) for d in manager.scan_devices()], []
+
+    wanted = [d.strip() for d in device_ids.split(",") if d.strip()] if device_ids else [None]
+    clients, missing = [], []
+    for device_id in wanted:
+        client = manager.get_device(device_id)
+        if client is None and device_id:
+            # Devices connected after the last scan
+            manager.scan_devices()
+            client = manager.get_device(device_id)
+        if client is None:
+            missing.append(device_id or "default")
+        else:
+            clients.append(client)
+    return clients, missing
+
+
+def run_on_devices(clients: List[ADBClient], func: Callable[[ADBClient], Any],
+                   max_workers: int = MAX_WORKERS) -> List[Tuple[str, bool, Any]]:
+    """
+    Run func for each client concurrently.
+
+    Args:
+        clients: Target devices
+        func: Operation taking an ADB client
+        max_workers: Maximum concurrent devices
+
+    Returns:
+        List[Tuple[str, bool, Any]]: (device id, success, result or error message) in client order
+    """
+    if len(clients) == 1:
+        # No thread hop for the common single device case
+        futures = None
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(clients))))
+        futures = [pool.submit(func, client) for client in clients]
+        pool.shutdown(wait=True)
+
+    results = []
+    for i, client in enumerate(clients):
+        device_id = client.device_id or "default"
+        try:
+            results.append((device_id, True, futures[i].result() if futures else func(client)))
+        except Exception as e:
+            results.append((device_id, False, f"{type(e).__name__}: {e}"))
+    return results
@@ -0,0 +1,179 @@
+"""Frame timing analysis of `dumpsys gfxinfo <pkg> framestats` output."""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+PROFILE_MARKER = "---PROFILEDATA---"
+
+# Per-phase durations as (name, start column, end column)
+PHASES = [
+    ("delay", "IntendedVsync", "HandleInputStart"),
+    ("input", "HandleInputStart", "AnimationStart"),
+    ("animation", "AnimationStart", "PerformTraversalsStart"),
+    ("layout", "PerformTraversalsStart", "DrawStart"),
+    ("draw", "DrawStart", "SyncQueued"),
+    ("sync", "SyncStart", "IssueDrawCommandsStart"),
+    ("issue", "IssueDrawCommandsStart", "SwapBuffers"),
+    ("gpu", "SwapBuffers", "GpuCompleted"),
+]
+
+# Frames slower than this are reported as frozen
+FROZEN_MS = 700.0
+DEFAULT_BUDGET_MS = 1000.0 / 60
+
+
+class FrameStats:
+    """Per-frame timings in milliseconds, one array element per frame."""
+
+    def __init__(self, intended: np.ndarray, total: np.ndarray, budget: np.ndarray, phases: Dict[str, np.ndarray]):
+        """
+        Initialize frame stats.
+
+        Args:
+            intended: IntendedVsync per frame (ns), identifies a frame
+            total: Frame time IntendedVsync -> completion (ms)
+            budget: Deadline per frame (ms)
+            phases: Phase name -> duration (ms)
+        """
+        self.intended = intended
+        self.total = total
+        self.budget = budget
+        self.phases = phases
+
+    def __len__(self) -> int:
+        return int(self.total.size)
+
+    def summary(self) -> Dict:
+        """Percentiles, jank ratios and per-phase medians/p90s."""
+        count = len(self)
+        if count == 0:
+            return {"frames": 0}
+        p50, p90, p95, p99 = np.percentile(self.total, [50, 90, 95, 99])
+        span = (self.intended[-1] - self.intended[0]) / 1e9 if count > 1 else 0.0
+        return {
+            "frames": count,
+            "fps": (count - 1) / span if span > 0 else 0.0,
+            "budget": float(np.median(self.budget)),
+            "p50": float(p50), "p90": float(p90), "p95": float(p95), "p99": float(p99),
+            "max": float(self.total.max()),
+            "janky": float(np.mean(self.total > self.budget)),
+            "frozen": int(np.sum(self.total > FROZEN_MS)),
+            "phases": {name: (float(np.median(values)), float(np.percentile(values, 90)))
+                       for name, values in self.phases.items()},
+        }
+
+
+def _blocks(text: str) -> List[Tuple[List[str], List[List[str]]]]:
+    """Split output into (header, rows) per PROFILEDATA block."""
+    blocks = []
+    inside = False
+    header: Optional[List[str]] = None
+    rows: List[List[str]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line == PROFILE_MARKER:
+            if inside and header:
+                blocks.append((header, rows))
+            inside, header, rows = not inside, None, []
+        elif inside and line:
+            fields = line.rstrip(",").split(",")
+            if header is None:
+                header = fields
+            elif len(fields) == len(header):
+                rows.append(fields)
+    return blocks
+
+
+def parse_framestats(text: str) -> FrameStats:
+    """
+    Parse all PROFILEDATA blocks of gfxinfo output into one FrameStats.
+
+    Frames with non-zero Flags (first draw, layout changes) are skipped
+    as recommended; repeated frames across dumps are merged by IntendedVsync.
+
+    Args:
+        text: Output of one or more `dumpsys gfxinfo <pkg> framestats` calls
+
+    Returns:
+        FrameStats: Frames ordered by IntendedVsync
+    """
+    tables = []
+    for header, rows in _blocks(text):
+        if rows:
+            data = np.array(rows, dtype=np.int64)
+            if "Flags" in header:
+                data = data[data[:, header.index("Flags")] == 0]
+            tables.append({name: data[:, i] for i, name in enumerate(header)})
+
+    # Windows of one app share a header; keep columns present in every block
+    common = set.intersection(*(set(table) for table in tables)) if tables else set()
+    merged = {name: np.concatenate([table[name] for table in tables]) for name in common}
+
+    if "IntendedVsync" not in merged or "FrameCompleted" not in merged:
+        empty = np.zeros(0)
+        return FrameStats(np.zeros(0, dtype=np.int64), empty, empty, {})
+
+    intended, first = np.unique(merged["IntendedVsync"], return_index=True)
+    merged = {name: values[first] for name, values in merged.items()}
+
+    end = merged["FrameCompleted"]
+    if "GpuCompleted" in merged:
+        end = np.maximum(end, merged["GpuCompleted"])
+    total = (end - intended) / 1e6
+
+    if "FrameDeadline" in merged and np.all(merged["FrameDeadline"] > 0):
+        budget = (merged["FrameDeadline"] - intended) / 1e6
+    elif "FrameInterval" in merged and np.all(merged["FrameInterval"] > 0):
+        budget = merged["FrameInterval"] / 1e6
+    else:
+        budget = np.full(intended.size, DEFAULT_BUDGET_MS)
+
+    phases = {}
+    for name, start, stop in PHASES:
+        if start in merged and stop in merged:
+            valid = (merged[start] > 0) & (merged[stop] > 0)
+            phases[name] = np.where(valid, np.maximum(merged[stop] - merged[start], 0), 0) / 1e6
+
+    valid = total > 0
+    return FrameStats(intended[valid], total[valid], budget[valid], {k: v[valid] for k, v in phases.items()})
+
+
+def format_frame_summary(label: str, summary: Dict) -> str:
+    """Render one run as a compact table."""
+    if not summary.get("frames"):
+        return f"{label}: no frames rendered (is the app in the foreground and animating?)"
+    lines = [
+        f"{label}: {summary['frames']} frames, {summary['fps']:.1f} fps, budget {summary['budget']:.1f} ms",
+        f"  frame ms  p50 {summary['p50']:.1f}  p90 {summary['p90']:.1f}  p95 {summary['p95']:.1f}  "
+        f"p99 {summary['p99']:.1f}  max {summary['max']:.1f}",
+        f"  janky {summary['janky'] * 100:.1f}%  frozen (>{FROZEN_MS:.0f} ms) {summary['frozen']}",
+        "  phase ms (p50/p90): " + "  ".join(f"{name} {p50:.1f}/{p90:.1f}"
+                                            for name, (p50, p90) in summary["phases"].items()),
+    ]
+    return "\n".join(lines)
+
+
+def format_comparison(summaries: Dict[str, Dict]) -> str:
+    """Render runs side by side with change relative to the first run."""
+    labels = [label for label, summary in summaries.items() if summary.get("frames")]
+    if not labels:
+        return "No runs with frames to compare"
+    base = summaries[labels[0]]
+    rows = [("frames", "frames", 1, "{:.0f}"), ("fps", "fps", 1, "{:.1f}"), ("p50 ms", "p50", 1, "{:.1f}"),
+            ("p90 ms", "p90", 1, "{:.1f}"), ("p99 ms", "p99", 1, "{:.1f}"), ("janky %", "janky", 100, "{:.1f}")]
+    width = max(16, *(len(label) + 2 for label in labels))
+    lines = [f"{'':<14}" + "".join(f"{label:>{width}}" for label in labels)]
+    for title, key, scale, fmt in rows:
+        cells = []
+        for label in labels:
+            value = summaries[label][key]
+            cell = fmt.format(value * scale)
+            if label != labels[0] and base[key]:
+                cell += f" ({(value - base[key]) / base[key]:+.0%})"
+            cells.append(f"{cell:>{width}}")
+        lines.append(f"{title:<14}" + "".join(cells))
+    phases = list(base["phases"])
+    for phase in phases:
+        cells = [f"{summaries[label]['phases'].get(phase, (0, 0))[0]:.1f}" for label in labels]
+        lines.append(f"{phase + ' p50':<14}" + "".join(f"{cell:>{width}}" for cell in cells))
+    return "\n".join(lines)
@@ -0,0 +1,399 @@
+"""In-memory index of a device directory tree for local find/glob queries."""
+
+import fnmatch
+import heapq
+import shlex
+import stat
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .adb_client import ADBClient
+
+STAT_FORMAT = "%f %s %Y %n"
+# Directories re-listed per shell call during a refresh
+REFRESH_BATCH = 200
+
+
+class FsNode:
+    """One file or directory in the index."""
+
+    __slots__ = ("mode", "size", "mtime", "children")
+
+    def __init__(self, mode: int, size: int, mtime: int):
+        """
+        Initialize node.
+
+        Args:
+            mode: st_mode (type and permission bits)
+            size: Size in bytes
+            mtime: Modification time (device epoch seconds)
+        """
+        self.mode = mode
+        self.size = size
+        self.mtime = mtime
+        self.children: Optional[Dict[str, "FsNode"]] = {} if stat.S_ISDIR(mode) else None
+
+    @property
+    def is_dir(self) -> bool:
+        return self.children is not None
+
+    @property
+    def kind(self) -> str:
+        """"d", "f", "l" or "o" (other)."""
+        if self.is_dir:
+            return "d"
+        if stat.S_ISREG(self.mode):
+            return "f"
+        return "l" if stat.S_ISLNK(self.mode) else "o"
+
+
+def parse_stat_lines(output: str) -> Iterator[Tuple[str, int, int, int]]:
+    """
+    Parse `stat -c '%f %s %Y %n'` output.
+
+    Yields:
+        Tuple[str, int, int, int]: (path, mode, size, mtime)
+    """
+    for line in output.splitlines():
+        parts = line.split(" ", 3)
+        if len(parts) != 4 or not parts[1].isdigit() or not parts[2].isdigit():
+            continue
+        try:
+            mode = int(parts[0], 16)
+        except ValueError:
+            continue
+        yield parts[3], mode, int(parts[1]), int(parts[2])
+
+
+class FsIndex:
+    """Path trie of a device subtree with size, mtime and mode per entry."""
+
+    def __init__(self, root: str):
+        """
+        Initialize empty index.
+
+        Args:
+            root: Absolute device path the index covers
+        """
+        self.root = root.rstrip("/") or "/"
+        self.node: Optional[FsNode] = None
+        self.crawled_at = 0.0
+        self.device_time = 0
+        self._lock = threading.Lock()
+
+    def relative(self, path: str) -> Optional[str]:
+        """Path relative to the root ("" for the root), None if outside it."""
+        if path == self.root:
+            return ""
+        prefix = self.root if self.root.endswith("/") else self.root + "/"
+        return path[len(prefix):] if path.startswith(prefix) else None
+
+    def _lookup(self, rel: str) -> Optional[FsNode]:
+        """Node at a relative path, None if not indexed."""
+        node = self.node
+        for name in rel.split("/") if rel else []:
+            if node is None or not node.is_dir:
+                return None
+            node = node.children.get(name)
+        return node
+
+    def _set(self, rel: str, mode: int, size: int, mtime: int):
+        """Insert or update an entry, keeping the subtree of a directory that stays one."""
+        if not rel:
+            children = self.node.children if self.node is not None and self.node.is_dir else None
+            self.node = FsNode(mode, size, mtime)
+            if children is not None and self.node.is_dir:
+                self.node.children = children
+            return
+        parent_rel, _, name = rel.rpartition("/")
+        parent = self._lookup(parent_rel)
+        if parent is None or not parent.is_dir:
+            return
+        existing = parent.children.get(name)
+        if existing is not None and existing.is_dir == stat.S_ISDIR(mode):
+            existing.mode, existing.size, existing.mtime = mode, size, mtime
+        else:
+            parent.children[name] = FsNode(mode, size, mtime)
+
+    def load(self, entries: Sequence[Tuple[str, int, int, int]], device_time: int = 0):
+        """
+        Replace the index with crawled entries (parents must precede children).
+
+        Args:
+            entries: (absolute path, mode, size, mtime) in find order
+            device_time: Device clock at the start of the crawl
+        """
+        with self._lock:
+            self.node = None
+            for path, mode, size, mtime in entries:
+                rel = self.relative(path)
+                if rel is not None:
+                    self._set(rel, mode, size, mtime)
+            self.crawled_at = time.time()
+            self.device_time = device_time
+
+    def walk(self, rel: str = "") -> Iterator[Tuple[str, FsNode]]:
+        """Yield (relative path, node) for a subtree, parents first."""
+        start = self._lookup(rel)
+        if start is None:
+            return
+        stack = [(rel, start)]
+        while stack:
+            path, node = stack.pop()
+            yield path, node
+            if node.is_dir:
+                stack.extend(((f"{path}/{name}" if path else name), child)
+                             for name, child in sorted(node.children.items(), reverse=True))
+
+    def directories(self) -> Dict[str, int]:
+        """Relative directory path -> mtime."""
+        with self._lock:
+            return {rel: node.mtime for rel, node in self.walk() if node.is_dir}
+
+    def apply_refresh(self, dirs: Sequence[Tuple[str, int, int, int]], listings: Sequence[Tuple[str, int, int, int]],
+                      changed: Sequence[str], modified: Sequence[Tuple[str, int, int, int]], device_time: int):
+        """
+        Merge a refresh into the index.
+
+        Args:
+            dirs: Current (path, mode, size, mtime) of every directory under the root
+            listings: Direct entries of the changed directories
+            changed: Absolute paths of directories whose entries were re-listed
+            modified: Files modified since the last crawl
+            device_time: Device clock at the start of the refresh
+        """
+        with self._lock:
+            present = {self.relative(path) for path, _, _, _ in dirs}
+            stale = [rel for rel, node in self.walk() if node.is_dir and rel not in present]
+            for rel in stale:
+                self._remove(rel)
+            listed: Dict[str, set] = {self.relative(path): set() for path in changed}
+            for path, mode, size, mtime in sorted(dirs, key=lambda entry: entry[0].count("/")):
+                rel = self.relative(path)
+                if rel is not None:
+                    self._set(rel, mode, size, mtime)
+            for path, mode, size, mtime in sorted(listings, key=lambda entry: entry[0].count("/")):
+                rel = self.relative(path)
+                if rel:
+                    self._set(rel, mode, size, mtime)
+                    listed.setdefault(rel.rpartition("/")[0], set()).add(rel.rpartition("/")[2])
+            # Entries of re-listed directories that are gone
+            for rel, names in listed.items():
+                node = self._lookup(rel)
+                if node is not None and node.is_dir:
+                    for name in [name for name in node.children if name not in names]:
+                        del node.children[name]
+            for path, mode, size, mtime in modified:
+                rel = self.relative(path)
+                if rel:
+                    self._set(rel, mode, size, mtime)
+            self.crawled_at = time.time()
+            self.device_time = device_time
+
+    def _remove(self, rel: str):
+        """Drop an entry and its subtree."""
+        parent_rel, _, name = rel.rpartition("/")
+        parent = self._lookup(parent_rel) if rel else None
+        if parent is not None and parent.is_dir:
+            parent.children.pop(name, None)
+
+    def query(self, pattern: str = "*", under: str = "", kind: Optional[str] = None, min_size: Optional[int] = None,
+              max_size: Optional[int] = None, newer_than: Optional[float] = None, sort: str = "path",
+              limit: int = 50) -> Tuple[List[Tuple[str, FsNode]], int]:
+        """
+        Find entries by glob, type, size and mtime.
+
+        Patterns without "/" match entry names anywhere in the tree (like
+        `find -name`); patterns with "/" match the path relative to the root.
+
+        Args:
+            pattern: Glob pattern
+            under: Relative directory to search in ("" for the whole tree)
+            kind: "f", "d" or "l" to restrict the entry type
+            min_size: Minimum size in bytes
+            max_size: Maximum size in bytes
+            newer_than: Only entries modified after this epoch time
+            sort: "path", "size" (largest first) or "newest"
+            limit: Maximum entries returned
+
+        Returns:
+            Tuple[List[Tuple[str, FsNode]], int]: (matches as (absolute path, node), total matches)
+        """
+        by_path = "/" in pattern
+        pattern = pattern.strip("/")
+        # Walk only below the literal leading components of a path pattern
+        start = [under] if under else []
+        if by_path:
+            for part in pattern.split("/")[:-1]:
+                if any(c in part for c in "*?["):
+                    break
+                start.append(part)
+        with self._lock:
+            matches = []
+            for rel, node in self.walk("/".join(start)):
+                if not rel or rel == under:
+                    continue
+                name = rel[len(under) + 1:] if under else rel
+                if not fnmatch.fnmatchcase(name if by_path else rel.rpartition("/")[2], pattern):
+                    continue
+                if kind and node.kind != kind:
+                    continue
+                if min_size is not None and node.size < min_size:
+                    continue
+                if max_size is not None and node.size > max_size:
+                    continue
+                if newer_than is not None and node.mtime <= newer_than:
+                    continue
+                matches.append((rel, node))
+        total = len(matches)
+        if sort == "size":
+            matches = heapq.nlargest(limit, matches, key=lambda match: match[1].size)
+        elif sort == "newest":
+            matches = heapq.nlargest(limit, matches, key=lambda match: match[1].mtime)
+        else:
+            matches = matches[:limit]
+        return [(self._absolute(rel), node) for rel, node in matches], total
+
+    def _absolute(self, rel: str) -> str:
+        """Device path of a relative path."""
+        return f"{self.root.rstrip('/')}/{rel}" if rel else self.root
+
+    def totals(self) -> Tuple[int, int, int]:
+        """(files, directories, bytes in files)."""
+        files = dirs = size = 0
+        with self._lock:
+            for _, node in self.walk():
+                if node.is_dir:
+                    dirs += 1
+                else:
+                    files += 1
+                    size += node.size
+        return files, dirs, size
+
+
+def _find_command(paths: Sequence[str], extra: str = "") -> str:
+    """find over paths (followed if they are symlinks) printing one stat line per entry."""
+    quoted = " ".join(shlex.quote(path) for path in paths)
+    return f"find -H {quoted} {extra} -exec stat -c '{STAT_FORMAT}' {{}} + 2>/dev/null"
+
+
+def _root_command(root: str, extra: str = "") -> str:
+    """Stat the root through a symlink (/sdcard is one), then find below it."""
+    return f"stat -L -c '{STAT_FORMAT}' {shlex.quote(root)} 2>/dev/null; " + \
+        _find_command([root], f"-mindepth 1 {extra}".rstrip())
+
+
+def crawl(client: ADBClient, index: FsIndex, timeout: int = 300):
+    """
+    Crawl the index root in one shell call.
+
+    Raises:
+        RuntimeError: If the root does not exist or cannot be listed
+    """
+    quoted = shlex.quote(index.root)
+    script = f"[ -e {quoted} ] || {{ echo missing; exit 0; }}; date +%s; {_root_command(index.root)}; true"
+    success, output = client.shell(shlex.quote(script), timeout=timeout)
+    if not success:
+        raise RuntimeError(f"Cannot crawl {index.root}: {output.strip()[:200]}")
+    head, _, body = output.partition("\n")
+    if head.strip() == "missing":
+        raise RuntimeError(f"Not found: {index.root}")
+    index.load(list(parse_stat_lines(body)), int(head) if head.strip().isdigit() else 0)
+
+
+def refresh(client: ADBClient, index: FsIndex, timeout: int = 300) -> Tuple[int, int]:
+    """
+    Re-list only directories whose mtime changed and files modified since the last crawl.
+
+    A directory's mtime changes when entries are added, removed or renamed
+    in it; files rewritten in place are found with `find -mmin`.
+
+    Returns:
+        Tuple[int, int]: (directories re-listed, modified files)
+
+    Raises:
+        RuntimeError: If the root cannot be listed
+    """
+    root = shlex.quote(index.root)
+    since = index.device_time or int(index.crawled_at)
+    script = (f"[ -e {root} ] || {{ echo missing; exit 0; }}; date +%s; "
+              f"{_root_command(index.root, '-type d')}; echo ---; "
+              f"m=$(( ($(date +%s) - {since}) / 60 + 1 )); "
+              f"{_find_command([index.root], '-type f -mmin -$m')}; true")
+    success, output = client.shell(shlex.quote(script), timeout=timeout)
+    if not success:
+        raise RuntimeError(f"Cannot refresh {index.root}: {output.strip()[:200]}")
+    head, _, body = output.partition("\n")
+    if head.strip() == "missing":
+        raise RuntimeError(f"Not found: {index.root}")
+    dir_part, _, file_part = body.partition("\n---\n")
+    dirs = list(parse_stat_lines(dir_part))
+    modified = list(parse_stat_lines(file_part))
+
+    known = index.directories()
+    changed = [path for path, _, _, mtime in dirs if known.get(index.relative(path)) != mtime]
+    listings: List[Tuple[str, int, int, int]] = []
+    for i in range(0, len(changed), REFRESH_BATCH):
+        command = _find_command(changed[i:i + REFRESH_BATCH], "-mindepth 1 -maxdepth 1")
+        ok, listed = client.shell(shlex.quote(f"{command}; true"), timeout=timeout)
+        if not ok:
+            raise RuntimeError(f"Cannot refresh {index.root}: {listed.strip()[:200]}")
+        listings.extend(parse_stat_lines(listed))
+    index.apply_refresh(dirs, listings, changed, modified, int(head) if head.strip().isdigit() else 0)
+    return len(changed), len(modified)
+
+
+_indexes: Dict[Tuple[str, str], FsIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_fs_index(client: ADBClient, path: str) -> Optional[FsIndex]:
+    """Existing index of the device covering path (the deepest one), if any."""
+    device = client.device_id or "default"
+    path = path.rstrip("/") or "/"
+    with _indexes_lock:
+        covering = [index for (owner, _), index in _indexes.items()
+                    if owner == device and index.relative(path) is not None and index.node is not None]
+    return max(covering, key=lambda index: len(index.root), default=None)
+
+
+def index_tree(client: ADBClient, path: str, rebuild: bool = False) -> Tuple[FsIndex, str]:
+    """
+    Crawl a subtree, or refresh it if it was crawled before.
+
+    Returns:
+        Tuple[FsIndex, str]: (index, what was done)
+    """
+    key = (client.device_id or "default", path.rstrip("/") or "/")
+    with _indexes_lock:
+        index = _indexes.setdefault(key, FsIndex(path))
+    started = time.monotonic()
+    if rebuild or index.node is None:
+        crawl(client, index)
+        action = "crawled"
+    else:
+        dirs, files = refresh(client, index)
+        action = f"refreshed ({dirs} directories re-listed, {files} modified files)"
+    return index, f"{action} in {time.monotonic() - started:.1f}s"
+
+
+def format_size(size: int) -> str:
+    """Human readable byte count."""
+    if size < 1024:
+        return f"{size}B"
+    value = float(size)
+    for unit in ("K", "M", "G"):
+        value /= 1024
+        if value < 1024 or unit == "G":
+            break
+    return f"{value:.1f}{unit}"
+
+
+def format_matches(matches: Sequence[Tuple[str, FsNode]], total: int) -> str:
+    """Render query results as "type mode size mtime path" rows."""
+    lines = [f"{total} matches" + (f", showing {len(matches)}" if total > len(matches) else "")]
+    for path, node in matches:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(node.mtime))
+        lines.append(f"{node.kind} {stat.S_IMODE(node.mode):04o} {format_size(node.size):>7} {when} "
+                     f"{path}{'/' if node.is_dir else ''}")
+    return "\n".join(lines)
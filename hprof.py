@@ -0,0 +1,470 @@
+"""Streaming HPROF heap dump analyzer.
+
+Parses Android (`am dumpheap`) and standard JVM HPROF files from a
+memory map in a single pass. Per-object state is limited to a few
+packed arrays (string/bitmap instance offsets, char/byte array index),
+so memory stays a small fraction of the dump size.
+"""
+
+import heapq
+import mmap
+import struct
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Top level record tags
+TAG_STRING = 0x01
+TAG_LOAD_CLASS = 0x02
+TAG_HEAP_DUMP = 0x0C
+TAG_HEAP_DUMP_SEGMENT = 0x1C
+
+# Heap dump sub-record tags
+SUB_CLASS_DUMP = 0x20
+SUB_INSTANCE_DUMP = 0x21
+SUB_OBJ_ARRAY_DUMP = 0x22
+SUB_PRIM_ARRAY_DUMP = 0x23
+SUB_PRIM_ARRAY_NODATA = 0xC3
+SUB_HEAP_DUMP_INFO = 0xFE
+
+# Basic types
+TYPE_OBJECT = 2
+TYPE_CHAR = 5
+TYPE_BYTE = 8
+_TYPE_SIZES = {4: 1, 5: 2, 6: 4, 7: 8, 8: 1, 9: 2, 10: 4, 11: 8}
+_PRIM_NAMES = {4: "boolean[]", 5: "char[]", 6: "float[]", 7: "double[]", 8: "byte[]",
+               9: "short[]", 10: "int[]", 11: "long[]"}
+_DESCRIPTORS = {"Z": "boolean", "C": "char", "F": "float", "D": "double", "B": "byte",
+                "S": "short", "I": "int", "J": "long"}
+
+# GC root sub-records: (id count, extra bytes)
+_ROOTS = {
+    0xFF: (1, 0), 0x01: (2, 0), 0x02: (1, 8), 0x03: (1, 8), 0x04: (1, 4), 0x05: (1, 0),
+    0x06: (1, 4), 0x07: (1, 0), 0x08: (1, 8), 0x89: (1, 0), 0x8A: (1, 0), 0x8B: (1, 0),
+    0x8C: (1, 0), 0x8D: (1, 0), 0x8E: (1, 8), 0x90: (1, 0),
+}
+
+STRING_CLASS = "java.lang.String"
+BITMAP_CLASS = "android.graphics.Bitmap"
+
+
+def class_name(raw: str) -> str:
+    """Normalize JVM descriptors ("[Ljava/lang/Object;") to "java.lang.Object[]"."""
+    name = raw.replace("/", ".")
+    dims = len(name) - len(name.lstrip("["))
+    if not dims:
+        return name
+    element = name[dims:]
+    if element.startswith("L") and element.endswith(";"):
+        element = element[1:-1]
+    else:
+        element = _DESCRIPTORS.get(element, element)
+    return element + "[]" * dims
+
+
+class _ClassInfo:
+    __slots__ = ("super_id", "fields")
+
+    def __init__(self, super_id: int, fields: List[Tuple[int, int]]):
+        self.super_id = super_id
+        self.fields = fields
+
+
+class HprofParser:
+    """Single pass HPROF reader producing histogram and lookup tables."""
+
+    def __init__(self, path: str, heap: Optional[str] = "app", top_n: int = 20):
+        """
+        Initialize parser.
+
+        Args:
+            path: HPROF file path
+            heap: Only count objects in this heap (app, image, zygote); None for all.
+                  Dumps without heap markers are counted entirely.
+            top_n: Number of largest instances to keep
+        """
+        self.path = path
+        self.heap = heap
+        self.top_n = top_n
+        self.strings: Dict[int, Tuple[int, int]] = {}
+        self.class_names: Dict[int, int] = {}
+        self.classes: Dict[int, _ClassInfo] = {}
+
+        # Histogram: key (class id, or -type for primitive arrays) -> slot
+        self.slots: Dict[int, int] = {}
+        self.counts = array("q")
+        self.sizes = array("q")
+        self.largest: List[Tuple[int, int, int]] = []
+        self.heaps: Dict[str, int] = {}
+        self._heap_name = "default"
+        self._counting = True
+
+        # Instance data offsets of classes resolved after the pass
+        self.tracked: Dict[int, array] = {}
+        # char[]/byte[] arrays: id, data offset, length, element type
+        self.array_ids = array("Q")
+        self.array_offsets = array("Q")
+        self.array_lengths = array("I")
+        self.array_types = array("B")
+
+    def string(self, string_id: int) -> str:
+        """Decode an entry of the HPROF string table."""
+        entry = self.strings.get(string_id)
+        if entry is None:
+            return f"<string@{string_id:#x}>"
+        offset, length = entry
+        return self.map[offset:offset + length].decode("utf-8", "replace")
+
+    def name(self, key: int) -> str:
+        """Class name for a histogram key."""
+        if key < 0:
+            return _PRIM_NAMES.get(-key, "unknown[]")
+        name_id = self.class_names.get(key)
+        return class_name(self.string(name_id)) if name_id is not None else f"class@{key:#x}"
+
+    def parse(self, mapping: mmap.mmap):
+        """Run the single pass over a mapped dump."""
+        self.map = mapping
+        header_end = mapping.find(b"\0", 0, 64)
+        if not mapping[:header_end].startswith(b"JAVA PROFILE"):
+            raise ValueError("Not an HPROF file")
+        self.id_size = struct.unpack_from(">I", mapping, header_end + 1)[0]
+        if self.id_size not in (4, 8):
+            raise ValueError(f"Unsupported identifier size {self.id_size}")
+        id_fmt = "I" if self.id_size == 4 else "Q"
+        self._id = struct.Struct(">" + id_fmt)
+        self._record = struct.Struct(">BII")
+        self._load_class = struct.Struct(f">I{id_fmt}I{id_fmt}")
+
+        # Class names are needed to pick tracked classes; LOAD CLASS precedes the heap dump
+        pos, size = header_end + 13, len(mapping)
+        while pos + 9 <= size:
+            tag, _, length = self._record.unpack_from(mapping, pos)
+            body = pos + 9
+            if tag == TAG_STRING:
+                self.strings[self._id.unpack_from(mapping, body)[0]] = (body + self.id_size, length - self.id_size)
+            elif tag == TAG_LOAD_CLASS:
+                _, class_id, _, name_id = self._load_class.unpack_from(mapping, body)
+                self.class_names[class_id] = name_id
+                if self.string(name_id) in (STRING_CLASS, BITMAP_CLASS):
+                    self.tracked[class_id] = array("Q")
+            elif tag in (TAG_HEAP_DUMP, TAG_HEAP_DUMP_SEGMENT):
+                self._heap_dump(body, body + length)
+            pos = body + length
+
+    def _slot(self, key: int) -> int:
+        slot = self.slots[key] = len(self.counts)
+        self.counts.append(0)
+        self.sizes.append(0)
+        return slot
+
+    def _heap_dump(self, pos: int, end: int):
+        mapping = self.map
+        id_size = self.id_size
+        id_fmt = "I" if id_size == 4 else "Q"
+        instance = struct.Struct(f">{id_fmt}I{id_fmt}I")
+        obj_array = struct.Struct(f">{id_fmt}II{id_fmt}")
+        prim_array = struct.Struct(f">{id_fmt}IIB")
+        heap_info = struct.Struct(f">I{id_fmt}")
+        roots = {tag: ids * id_size + extra for tag, (ids, extra) in _ROOTS.items()}
+        type_sizes = {**_TYPE_SIZES, TYPE_OBJECT: id_size}
+
+        slots, counts, sizes = self.slots, self.counts, self.sizes
+        largest, top_n = self.largest, self.top_n
+        tracked = self.tracked
+        array_ids, array_offsets = self.array_ids, self.array_offsets
+        array_lengths, array_types = self.array_lengths, self.array_types
+        counting, heap_name = self._counting, self._heap_name
+        heap_bytes = 0
+        threshold = largest[0][0] if len(largest) >= top_n else 0
+
+        while pos < end:
+            tag = mapping[pos]
+            pos += 1
+            if tag == SUB_INSTANCE_DUMP:
+                object_id, _, class_id, length = instance.unpack_from(mapping, pos)
+                pos += instance.size
+                heap_bytes += length
+                if counting:
+                    slot = slots.get(class_id)
+                    if slot is None:
+                        slot = self._slot(class_id)
+                    counts[slot] += 1
+                    sizes[slot] += length
+                    if length > threshold:
+                        heapq.heappush(largest, (length, object_id, class_id))
+                        if len(largest) > top_n:
+                            heapq.heappop(largest)
+                        threshold = largest[0][0] if len(largest) >= top_n else 0
+                    if class_id in tracked:
+                        tracked[class_id].append(pos)
+                pos += length
+            elif tag == SUB_PRIM_ARRAY_DUMP:
+                object_id, _, count, elem_type = prim_array.unpack_from(mapping, pos)
+                pos += prim_array.size
+                length = count * type_sizes[elem_type]
+                heap_bytes += length
+                if elem_type == TYPE_CHAR or elem_type == TYPE_BYTE:
+                    array_ids.append(object_id)
+                    array_offsets.append(pos)
+                    array_lengths.append(length)
+                    array_types.append(elem_type)
+                if counting:
+                    slot = slots.get(-elem_type)
+                    if slot is None:
+                        slot = self._slot(-elem_type)
+                    counts[slot] += 1
+                    sizes[slot] += length
+                    if length > threshold:
+                        heapq.heappush(largest, (length, object_id, -elem_type))
+                        if len(largest) > top_n:
+                            heapq.heappop(largest)
+                        threshold = largest[0][0] if len(largest) >= top_n else 0
+                pos += length
+            elif tag == SUB_OBJ_ARRAY_DUMP:
+                object_id, _, count, class_id = obj_array.unpack_from(mapping, pos)
+                pos += obj_array.size
+                length = count * id_size
+                heap_bytes += length
+                if counting:
+                    slot = slots.get(class_id)
+                    if slot is None:
+                        slot = self._slot(class_id)
+                    counts[slot] += 1
+                    sizes[slot] += length
+                    if length > threshold:
+                        heapq.heappush(largest, (length, object_id, class_id))
+                        if len(largest) > top_n:
+                            heapq.heappop(largest)
+                        threshold = largest[0][0] if len(largest) >= top_n else 0
+                pos += length
+            elif tag in roots:
+                pos += roots[tag]
+            elif tag == SUB_CLASS_DUMP:
+                pos = self._class_dump(pos, type_sizes)
+            elif tag == SUB_HEAP_DUMP_INFO:
+                self.heaps[heap_name] = self.heaps.get(heap_name, 0) + heap_bytes
+                heap_bytes = 0
+                _, name_id = heap_info.unpack_from(mapping, pos)
+                pos += heap_info.size
+                heap_name = self.string(name_id)
+                counting = self.heap is None or heap_name == self.heap
+            elif tag == SUB_PRIM_ARRAY_NODATA:
+                pos += prim_array.size
+            else:
+                raise ValueError(f"Unknown heap dump sub-record {tag:#x} at offset {pos - 1}")
+
+        self.heaps[heap_name] = self.heaps.get(heap_name, 0) + heap_bytes
+        self._counting, self._heap_name = counting, heap_name
+
+    def _class_dump(self, pos: int, type_sizes: Dict[int, int]) -> int:
+        mapping, id_size = self.map, self.id_size
+        unpack_id = self._id.unpack_from
+        class_id = unpack_id(mapping, pos)[0]
+        super_id = unpack_id(mapping, pos + id_size + 4)[0]
+        pos += 7 * id_size + 4 + 4
+
+        constants = struct.unpack_from(">H", mapping, pos)[0]
+        pos += 2
+        for _ in range(constants):
+            pos += 3 + type_sizes[mapping[pos + 2]]
+
+        statics = struct.unpack_from(">H", mapping, pos)[0]
+        pos += 2
+        for _ in range(statics):
+            pos += id_size + 1 + type_sizes[mapping[pos + id_size]]
+
+        count = struct.unpack_from(">H", mapping, pos)[0]
+        pos += 2
+        fields = []
+        for _ in range(count):
+            fields.append((unpack_id(mapping, pos)[0], mapping[pos + id_size]))
+            pos += id_size + 1
+        self.classes[class_id] = _ClassInfo(super_id, fields)
+        return pos
+
+    def field_offsets(self, class_id: int) -> Dict[str, Tuple[int, int]]:
+        """Map field name to (offset in instance data, type), subclass fields first."""
+        offsets: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        seen = set()
+        while class_id in self.classes and class_id not in seen:
+            seen.add(class_id)
+            info = self.classes[class_id]
+            for name_id, field_type in info.fields:
+                offsets.setdefault(self.string(name_id), (offset, field_type))
+                offset += self.id_size if field_type == TYPE_OBJECT else _TYPE_SIZES[field_type]
+            class_id = info.super_id
+        return offsets
+
+
+def _read_field(parser: HprofParser, data: int, field: Tuple[int, int]) -> int:
+    offset, field_type = field
+    if field_type == TYPE_OBJECT:
+        return parser._id.unpack_from(parser.map, data + offset)[0]
+    return struct.unpack_from(">i", parser.map, data + offset)[0]
+
+
+def _read_ids(parser: HprofParser, offsets: array, field_offset: int) -> np.ndarray:
+    """Gather an object id field from many instances at once."""
+    if not offsets:
+        return np.zeros(0, dtype=np.uint64)
+    buf = np.frombuffer(parser.map, dtype=np.uint8)
+    starts = np.frombuffer(offsets, dtype=np.uint64).astype(np.int64) + field_offset
+    raw = buf[starts[:, None] + np.arange(parser.id_size)]
+    dtype = ">u4" if parser.id_size == 4 else ">u8"
+    return raw.copy().view(dtype).ravel().astype(np.uint64)
+
+
+def _lookup_arrays(parser: HprofParser, ids: np.ndarray) -> np.ndarray:
+    """Index into the char/byte array table for each id (-1 if missing)."""
+    if not parser.array_ids or not ids.size:
+        return np.full(ids.size, -1, dtype=np.int64)
+    table = np.frombuffer(parser.array_ids, dtype=np.uint64)
+    order = np.argsort(table, kind="stable")
+    sorted_ids = table[order]
+    where = np.minimum(np.searchsorted(sorted_ids, ids), sorted_ids.size - 1)
+    return np.where(sorted_ids[where] == ids, order[where], -1)
+
+
+def _string_stats(parser: HprofParser, top_n: int) -> Dict:
+    instances, value_ids = 0, [np.zeros(0, dtype=np.uint64)]
+    for class_id, offsets in parser.tracked.items():
+        if parser.name(class_id) != STRING_CLASS:
+            continue
+        value = parser.field_offsets(class_id).get("value")
+        instances += len(offsets)
+        if value is not None and value[1] == TYPE_OBJECT:
+            value_ids.append(_read_ids(parser, offsets, value[0]))
+
+    # Strings sharing one value array are not duplicates
+    index = _lookup_arrays(parser, np.unique(np.concatenate(value_ids)))
+    index = index[index >= 0]
+    offsets = np.frombuffer(parser.array_offsets, dtype=np.uint64)[index].tolist()
+    lengths = np.frombuffer(parser.array_lengths, dtype=np.uint32)[index].tolist()
+    types = np.frombuffer(parser.array_types, dtype=np.uint8)[index].tolist()
+    mapping = parser.map
+    groups: Dict[bytes, List[int]] = {}
+    for offset, length, elem_type in zip(offsets, lengths, types):
+        content = mapping[offset:offset + length]
+        entry = groups.get(content)
+        if entry is None:
+            groups[content] = [1, length, elem_type]
+        else:
+            entry[0] += 1
+    total = sum(lengths)
+
+    duplicates = []
+    for content, (copies, length, elem_type) in groups.items():
+        if copies > 1:
+            text = content.decode("utf-16-be" if elem_type == TYPE_CHAR else "latin-1", "replace")
+            duplicates.append((text, copies, (copies - 1) * length))
+    duplicates.sort(key=lambda item: item[2], reverse=True)
+    return {
+        "count": instances,
+        "bytes": total,
+        "wasted": sum(item[2] for item in duplicates),
+        "duplicates": duplicates[:top_n],
+    }
+
+
+def _bitmap_stats(parser: HprofParser, top_n: int) -> Dict:
+    count, pixel_bytes, buffers = 0, 0, []
+    sizes: List[Tuple[int, int, int]] = []
+    for class_id, offsets in parser.tracked.items():
+        if parser.name(class_id) != BITMAP_CLASS:
+            continue
+        fields = parser.field_offsets(class_id)
+        width, height, buffer = fields.get("mWidth"), fields.get("mHeight"), fields.get("mBuffer")
+        for data in offsets:
+            count += 1
+            if width and height:
+                w, h = _read_field(parser, data, width), _read_field(parser, data, height)
+                pixel_bytes += w * h * 4
+                sizes.append((w * h, w, h))
+            if buffer and buffer[1] == TYPE_OBJECT:
+                buffers.append(_read_field(parser, data, buffer))
+
+    # Pre-O bitmaps keep pixels in a Java byte[]
+    index = _lookup_arrays(parser, np.array([b for b in buffers if b], dtype=np.uint64))
+    buffer_bytes = sum(parser.array_lengths[i] for i in index if i >= 0)
+    largest = [(w, h) for _, w, h in heapq.nlargest(top_n, sizes)]
+    return {"count": count, "pixel_bytes": pixel_bytes, "buffer_bytes": buffer_bytes, "largest": largest}
+
+
+def analyze_hprof(path: str, top_n: int = 20, heap: Optional[str] = "app") -> Dict:
+    """
+    Analyze a heap dump in one pass over a memory map.
+
+    Args:
+        path: HPROF file path
+        top_n: Rows in each table
+        heap: Only count objects in this heap (app, image, zygote); None for all
+
+    Returns:
+        Dict: Summary tables (see format_heap_analysis)
+    """
+    parser = HprofParser(path, heap=heap, top_n=top_n)
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        parser.parse(mapping)
+        counts = np.frombuffer(parser.counts, dtype=np.int64) if parser.counts else np.zeros(0, np.int64)
+        sizes = np.frombuffer(parser.sizes, dtype=np.int64) if parser.sizes else np.zeros(0, np.int64)
+        keys = np.array(list(parser.slots), dtype=np.int64)
+        top = np.argsort(sizes)[::-1][:top_n]
+        return {
+            "heap": heap or "all",
+            "heaps": {name: size for name, size in parser.heaps.items() if size},
+            "objects": int(counts.sum()),
+            "bytes": int(sizes.sum()),
+            "classes": [(parser.name(int(keys[i])), int(counts[i]), int(sizes[i])) for i in top],
+            "largest": [(object_id, parser.name(key), length)
+                        for length, object_id, key in sorted(parser.largest, reverse=True)],
+            "strings": _string_stats(parser, top_n),
+            "bitmaps": _bitmap_stats(parser, top_n),
+        }
+    finally:
+        parser.map = None
+        mapping.close()
+
+
+def _size(num: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if num < 1024:
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.2f} GB"
+
+
+def format_heap_analysis(analysis: Dict) -> str:
+    """Render heap analysis as compact text tables for the LLM."""
+    lines: List[str] = [
+        f"Heap '{analysis['heap']}': {analysis['objects']} objects, {_size(analysis['bytes'])} shallow",
+    ]
+    if len(analysis["heaps"]) > 1:
+        lines.append("Heaps: " + ", ".join(f"{name}={_size(size)}" for name, size in analysis["heaps"].items()))
+
+    lines += ["", "Classes by shallow size:  count  size"]
+    for name, count, size in analysis["classes"]:
+        lines.append(f"  {name[:48]:<48} {count:>9} {_size(size):>10}")
+
+    lines += ["", "Largest objects:"]
+    for object_id, name, size in analysis["largest"]:
+        lines.append(f"  {object_id:#x} {name} {_size(size)}")
+
+    strings = analysis["strings"]
+    lines += ["", f"Strings: {strings['count']} instances, {_size(strings['bytes'])} of character data, "
+                  f"{_size(strings['wasted'])} in duplicates"]
+    for text, copies, wasted in strings["duplicates"]:
+        shown = text[:60].replace("\n", "\\n")
+        lines.append(f"  {copies:>6}x {_size(wasted):>10} \"{shown}\"")
+
+    bitmaps = analysis["bitmaps"]
+    if bitmaps["count"]:
+        lines += ["", f"Bitmaps: {bitmaps['count']}, {_size(bitmaps['pixel_bytes'])} of pixels (ARGB_8888 estimate)"]
+        if bitmaps["buffer_bytes"]:
+            lines.append(f"  Java pixel buffers: {_size(bitmaps['buffer_bytes'])}")
+        if bitmaps["largest"]:
+            lines.append("  Largest: " + ", ".join(f"{w}x{h}" for w, h in bitmaps["largest"][:10]))
+    return "\n".join(lines)
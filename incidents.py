@@ -0,0 +1,410 @@
+"""Crash and ANR fingerprinting with a deduplicated incident store."""
+
+import calendar
+import hashlib
+import os
+import re
+import shlex
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from .adb_client import ADBClient
+from .logcat_store import Row, parse_logcat_line
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".atlas", "incidents.db")
+
+# Frames of the root cause that make up a fingerprint
+FINGERPRINT_FRAMES = 5
+
+_JAVA_FRAME = re.compile(r"^at ([\w$.<>]+)\(")
+_EXCEPTION = re.compile(r"^(?:Caused by: )?([A-Za-z_$][\w$]*(?:\.[\w$]+)+)(?::|$)")
+_NATIVE_FRAME = re.compile(r"#(\d+) pc [0-9a-f]+\s+(\S+)(?:\s+\(([^)]*)\))?")
+_SIGNAL = re.compile(r"signal \d+ \((\w+)\)")
+_NATIVE_PROCESS = re.compile(r">>> (\S+) <<<")
+_JAVA_PROCESS = re.compile(r"^Process: ([^,\s]+)")
+_ANR_HEADER = re.compile(r"^----- pid (\d+) at (\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(?:\.\d+)?([+-]\d{4})?")
+_UTC_OFFSET = re.compile(r"^([+-])(\d\d)(\d\d)$")
+_ANR_MAIN_THREAD = re.compile(r'^"main" .*tid=1 (\w+)')
+
+# Build-specific noise in frame names: lambda hashes, synthetic suffixes
+_LAMBDA_NOISE = re.compile(r"(\$\$(?:Lambda|ExternalSyntheticLambda))[\w$/]*")
+_HEX_NOISE = re.compile(r"0x[0-9a-f]+")
+
+
+class Incident:
+    """One parsed crash or ANR occurrence."""
+
+    def __init__(self, kind: str, package: str, timestamp: float, cause: str, frames: List[str], detail: str = ""):
+        """
+        Initialize incident.
+
+        Args:
+            kind: "java", "native" or "anr"
+            package: Crashing package or process name
+            timestamp: Occurrence time (epoch seconds)
+            cause: Exception class, signal or thread state
+            frames: Normalized frames, innermost first
+            detail: First raw line for display (message, abort reason)
+        """
+        self.kind = kind
+        self.package = package
+        self.timestamp = timestamp
+        self.cause = cause
+        self.frames = frames
+        self.detail = detail
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of kind, package, cause and top frames."""
+        key = "|".join([self.kind, self.package, self.cause] + self.frames[:FINGERPRINT_FRAMES])
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    @property
+    def title(self) -> str:
+        """Short human readable signature."""
+        where = self.frames[0] if self.frames else "unknown"
+        return f"{self.cause} at {where}"
+
+
+def normalize_java_frame(frame: str) -> str:
+    """Strip lambda hashes and addresses from a Java method name."""
+    return _HEX_NOISE.sub("", _LAMBDA_NOISE.sub(r"\1", frame))
+
+
+def normalize_native_frame(library: str, symbol: Optional[str]) -> str:
+    """Reduce native frame to library basename and symbol without offset."""
+    name = os.path.basename(library)
+    if symbol and not symbol.startswith(("BuildId", "offset")):
+        return f"{name}!{symbol.split('+')[0]}"
+    return name
+
+
+def _parse_java_block(rows: List[Row]) -> Incident:
+    package = ""
+    causes: List[Tuple[str, List[str]]] = []
+    detail = ""
+    for row in rows:
+        line = row[5].strip()
+        frame = _JAVA_FRAME.match(line)
+        if frame:
+            if causes:
+                causes[-1][1].append(normalize_java_frame(frame.group(1)))
+            continue
+        process = _JAVA_PROCESS.match(line)
+        if process:
+            package = process.group(1)
+            continue
+        exception = _EXCEPTION.match(line)
+        if exception and (line.startswith("Caused by: ") or not causes):
+            causes.append((exception.group(1), []))
+            detail = line
+    # Root cause is the innermost "Caused by" that still has frames
+    cause, frames = next(((c, f) for c, f in reversed(causes) if f), causes[-1] if causes else ("unknown", []))
+    return Incident("java", package or str(rows[0][1]), rows[0][0], cause, frames, detail)
+
+
+def _parse_native_block(rows: List[Row]) -> Incident:
+    package = ""
+    signal = "signal"
+    frames: List[str] = []
+    detail = ""
+    for row in rows:
+        line = row[5]
+        process = _NATIVE_PROCESS.search(line)
+        if process and not package:
+            package = process.group(1)
+        sig = _SIGNAL.search(line)
+        if sig and signal == "signal":
+            signal = sig.group(1)
+        if "Abort message:" in line and not detail:
+            detail = line.strip()
+        frame = _NATIVE_FRAME.search(line)
+        if frame:
+            if frame.group(1) == "00" and frames:
+                # Only the crashing thread's backtrace
+                break
+            frames.append(normalize_native_frame(frame.group(2), frame.group(3)))
+    return Incident("native", package or str(rows[0][1]), rows[0][0], signal, frames, detail)
+
+
+def parse_crash_buffer(rows: Sequence[Row]) -> List[Incident]:
+    """
+    Group crash buffer entries into Java and native crash incidents.
+
+    Args:
+        rows: Parsed `logcat -b crash -v threadtime -v epoch` entries
+
+    Returns:
+        List[Incident]: One incident per crash block
+    """
+    open_blocks: Dict[Tuple[str, int], Tuple[str, List[Row]]] = {}
+    finished: List[Tuple[str, List[Row]]] = []
+    for row in rows:
+        key = (row[4], row[1])
+        message = row[5]
+        if message.startswith("FATAL EXCEPTION"):
+            kind = "java"
+        elif "*** *** ***" in message:
+            kind = "native"
+        else:
+            if key in open_blocks:
+                open_blocks[key][1].append(row)
+            continue
+        if key in open_blocks:
+            finished.append(open_blocks.pop(key))
+        open_blocks[key] = (kind, [row])
+    finished.extend(open_blocks.values())
+
+    incidents = []
+    for kind, block in sorted(finished, key=lambda item: item[1][0][0]):
+        incidents.append(_parse_java_block(block) if kind == "java" else _parse_native_block(block))
+    return incidents
+
+
+def parse_utc_offset(text: str) -> Optional[int]:
+    """Seconds east of UTC from a `date +%z` style "+HHMM" offset, None if malformed."""
+    match = _UTC_OFFSET.match(text.strip())
+    if not match:
+        return None
+    seconds = int(match.group(2)) * 3600 + int(match.group(3)) * 60
+    return -seconds if match.group(1) == "-" else seconds
+
+
+def parse_anr_trace(text: str, utc_offset: Optional[int] = None) -> List[Incident]:
+    """
+    Parse ANR trace file into an incident for the process that stopped responding.
+
+    The ANRing process is dumped first; later blocks (system_server and
+    other bystanders dumped for context) are ignored. The header time is
+    device local; newer devices append its UTC offset.
+
+    Args:
+        text: Contents of a /data/anr trace file
+        utc_offset: Device UTC offset in seconds for headers without one
+                    (host local time if None)
+
+    Returns:
+        List[Incident]: At most one incident, fingerprinted on the main thread stack
+    """
+    incidents = []
+    package = ""
+    timestamp = 0.0
+    state: Optional[str] = None
+    frames: List[str] = []
+    for raw in text.splitlines() + [""]:
+        line = raw.strip()
+        header = _ANR_HEADER.match(line)
+        if header:
+            if package:
+                # Next process block: the ANRing process had no main thread dump
+                break
+            package = header.group(1)
+            local = time.strptime(header.group(2), "%Y-%m-%d %H:%M:%S")
+            offset = parse_utc_offset(header.group(3)) if header.group(3) else utc_offset
+            timestamp = calendar.timegm(local) - offset if offset is not None else time.mktime(local)
+            continue
+        if line.startswith("Cmd line:"):
+            package = line.split(":", 1)[1].strip()
+            continue
+        main = _ANR_MAIN_THREAD.match(line)
+        if main:
+            state, frames = main.group(1), []
+            continue
+        if state is None:
+            continue
+        if not line:
+            incidents.append(Incident("anr", package, timestamp, f"ANR {state}", frames))
+            break
+        frame = _JAVA_FRAME.match(line)
+        if frame:
+            frames.append(normalize_java_frame(frame.group(1)))
+            continue
+        native = _NATIVE_FRAME.search(line)
+        if native and line.startswith("native:"):
+            frames.append(normalize_native_frame(native.group(2), native.group(3)))
+    return incidents
+
+
+class IncidentStore:
+    """SQLite-backed incident index with per-device occurrences."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create) the incident database.
+
+        Args:
+            path: SQLite file path (":memory:" for a throwaway store)
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS incidents (
+                    fingerprint TEXT PRIMARY KEY, kind TEXT, package TEXT, title TEXT,
+                    detail TEXT, frames TEXT, first_seen REAL, last_seen REAL, count INTEGER);
+                CREATE TABLE IF NOT EXISTS occurrences (
+                    device_id TEXT, fingerprint TEXT, timestamp REAL,
+                    PRIMARY KEY (device_id, fingerprint, timestamp));
+                CREATE TABLE IF NOT EXISTS ingest_state (
+                    device_id TEXT, source TEXT, marker TEXT, PRIMARY KEY (device_id, source));
+                CREATE INDEX IF NOT EXISTS idx_incidents_package ON incidents(package);
+            """)
+
+    def add(self, device_id: str, incidents: Sequence[Incident]) -> Tuple[int, int]:
+        """
+        Record occurrences, ignoring ones already stored.
+
+        Args:
+            device_id: Device the incidents came from
+            incidents: Parsed incidents
+
+        Returns:
+            Tuple[int, int]: (new occurrences, new distinct incidents)
+        """
+        new_occurrences = new_incidents = 0
+        with self._lock, self._db:
+            for incident in incidents:
+                fp = incident.fingerprint
+                cursor = self._db.execute("INSERT OR IGNORE INTO occurrences VALUES (?, ?, ?)",
+                                          (device_id, fp, incident.timestamp))
+                if not cursor.rowcount:
+                    continue
+                new_occurrences += 1
+                cursor = self._db.execute(
+                    "UPDATE incidents SET count = count + 1, first_seen = MIN(first_seen, ?), "
+                    "last_seen = MAX(last_seen, ?) WHERE fingerprint = ?",
+                    (incident.timestamp, incident.timestamp, fp))
+                if not cursor.rowcount:
+                    new_incidents += 1
+                    self._db.execute("INSERT INTO incidents VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)", (
+                        fp, incident.kind, incident.package, incident.title, incident.detail,
+                        "\n".join(incident.frames), incident.timestamp, incident.timestamp))
+        return new_occurrences, new_incidents
+
+    def top(self, limit: int = 10, package: Optional[str] = None, kind: Optional[str] = None,
+            device_id: Optional[str] = None, since: Optional[float] = None) -> List[Tuple]:
+        """
+        Most frequent incidents.
+
+        Args:
+            limit: Maximum rows
+            package: Filter by package
+            kind: Filter by kind (java, native, anr)
+            device_id: Count only occurrences on this device
+            since: Count only occurrences after this time
+
+        Returns:
+            List of (fingerprint, kind, package, title, count, devices, first_seen, last_seen)
+        """
+        where, params = ["1 = 1"], []
+        if package:
+            where.append("i.package = ?")
+            params.append(package)
+        if kind:
+            where.append("i.kind = ?")
+            params.append(kind)
+        if device_id:
+            where.append("o.device_id = ?")
+            params.append(device_id)
+        if since:
+            where.append("o.timestamp >= ?")
+            params.append(since)
+        query = f"""
+            SELECT i.fingerprint, i.kind, i.package, i.title, COUNT(*), COUNT(DISTINCT o.device_id),
+                   MIN(o.timestamp), MAX(o.timestamp)
+            FROM occurrences o JOIN incidents i ON i.fingerprint = o.fingerprint
+            WHERE {' AND '.join(where)}
+            GROUP BY i.fingerprint ORDER BY COUNT(*) DESC LIMIT ?"""
+        with self._lock:
+            return self._db.execute(query, params + [limit]).fetchall()
+
+    def get(self, fingerprint: str) -> Optional[Tuple]:
+        """Return (kind, package, title, detail, frames, first_seen, last_seen, count) for fingerprint."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT kind, package, title, detail, frames, first_seen, last_seen, count "
+                "FROM incidents WHERE fingerprint = ?", (fingerprint,)).fetchone()
+
+    def marker(self, device_id: str, source: str) -> Optional[str]:
+        """Return ingestion marker (last timestamp, seen files) for a device source."""
+        with self._lock:
+            row = self._db.execute("SELECT marker FROM ingest_state WHERE device_id = ? AND source = ?",
+                                   (device_id, source)).fetchone()
+        return row[0] if row else None
+
+    def set_marker(self, device_id: str, source: str, marker: str):
+        """Store ingestion marker for a device source."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO ingest_state VALUES (?, ?, ?)", (device_id, source, marker))
+
+
+def collect_incidents(client: ADBClient, store: IncidentStore) -> Tuple[int, int, List[str]]:
+    """
+    Ingest new crash buffer entries and ANR trace files from a device.
+
+    Only entries after the stored crash-buffer timestamp and ANR files
+    not seen before (by name and mtime) are transferred.
+
+    Args:
+        client: ADB client for device
+        store: Incident store
+
+    Returns:
+        Tuple[int, int, List[str]]: (new occurrences, new incidents, warnings)
+    """
+    device_id = client.device_id or "default"
+    warnings = []
+    incidents: List[Incident] = []
+
+    cmd = "logcat -b crash -d -v threadtime -v epoch"
+    # Marker "<last timestamp>#<rows ingested at it>"; -T includes that timestamp
+    last_ts, _, seen_at = (store.marker(device_id, "crash") or "").partition("#")
+    if last_ts:
+        cmd += f" -T {last_ts}"
+    success, output = client.shell(cmd, timeout=60)
+    if success:
+        rows = [row for row in map(parse_logcat_line, output.splitlines()) if row]
+        new_rows = rows
+        if last_ts:
+            # Markers without a count covered every row at their timestamp
+            skip = int(seen_at) if seen_at.isdigit() else len(rows)
+            new_rows = []
+            for row in rows:
+                if f"{row[0]:.3f}" == last_ts and skip:
+                    skip -= 1
+                elif row[0] >= float(last_ts):
+                    new_rows.append(row)
+        incidents.extend(parse_crash_buffer(new_rows))
+        if new_rows:
+            stamp = f"{rows[-1][0]:.3f}"
+            at_stamp = sum(1 for row in rows if f"{row[0]:.3f}" == stamp)
+            store.set_marker(device_id, "crash", f"{stamp}#{at_stamp}")
+    else:
+        warnings.append(f"Crash buffer unavailable: {output}")
+
+    seen = set((store.marker(device_id, "anr") or "").split("\n"))
+    success, listing = client.shell(shlex.quote("date +%z; stat -c '%Y %n' /data/anr/* 2>/dev/null"))
+    if success and listing:
+        head, _, body = listing.partition("\n")
+        utc_offset = parse_utc_offset(head)
+        current = [line.strip() for line in body.splitlines() if line.strip()]
+        # Files that could not be read stay unrecorded and are retried next time
+        recorded = []
+        for entry in current:
+            if entry not in seen:
+                path = entry.split(" ", 1)[1]
+                ok, text = client.shell(f"cat {shlex.quote(path)}", timeout=60)
+                if not ok:
+                    warnings.append(f"Cannot read {path}")
+                    continue
+                incidents.extend(parse_anr_trace(text, utc_offset))
+            recorded.append(entry)
+        store.set_marker(device_id, "anr", "\n".join(recorded))
+    elif not success:
+        warnings.append("ANR directory not readable")
+
+    new_occurrences, new_incidents = store.add(device_id, incidents)
+    return new_occurrences, new_incidents, warnings
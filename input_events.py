@@ -0,0 +1,282 @@
+"""Recording and replay of raw input events via getevent/sendevent."""
+
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .adb_client import ADBClient, ADBStream
+
+# getevent -t line: "[   74613.372316] /dev/input/event1: 0003 0035 000001f4"
+_EVENT_LINE = re.compile(
+    r"^\[\s*(\d+\.\d+)\]\s+(/dev/input/\S+):\s+([0-9a-f]{4})\s+([0-9a-f]{4})\s+([0-9a-f]{8})\s*$"
+)
+
+EV_SYN = 0
+SYN_REPORT = 0
+
+SESSION_FORMAT_VERSION = 1
+
+
+class InputEvent:
+    """Single raw input event."""
+
+    __slots__ = ("t", "device", "type", "code", "value")
+
+    def __init__(self, t: float, device: str, type: int, code: int, value: int):
+        self.t = t
+        self.device = device
+        self.type = type
+        self.code = code
+        self.value = value
+
+    def is_frame_end(self) -> bool:
+        """Check if event closes an input frame (SYN_REPORT)."""
+        return self.type == EV_SYN and self.code == SYN_REPORT
+
+
+def parse_getevent_line(line: str) -> Optional[InputEvent]:
+    """
+    Parse one line of `getevent -t` output.
+
+    Args:
+        line: Raw output line
+
+    Returns:
+        InputEvent or None for device headers and other noise
+    """
+    match = _EVENT_LINE.match(line.strip())
+    if not match:
+        return None
+
+    t, device, ev_type, code, value = match.groups()
+    value = int(value, 16)
+    if value >= 0x80000000:
+        # sendevent expects signed values (e.g. tracking id -1)
+        value -= 0x100000000
+    return InputEvent(float(t), device, int(ev_type, 16), int(code, 16), value)
+
+
+class UISession:
+    """Compact timestamped event log with optional UI checkpoints."""
+
+    def __init__(self, events: Optional[List[InputEvent]] = None, checkpoints: Optional[List[Tuple[float, str]]] = None):
+        """
+        Initialize session.
+
+        Args:
+            events: Recorded events with absolute device timestamps
+            checkpoints: (seconds from session start, expected UI text) pairs
+        """
+        self.events = events or []
+        self.checkpoints = checkpoints or []
+
+    @property
+    def duration(self) -> float:
+        """Session length in seconds."""
+        if not self.events:
+            return 0.0
+        return self.events[-1].t - self.events[0].t
+
+    def to_dict(self) -> Dict:
+        """Serialize to compact dict (device table + event rows)."""
+        devices: List[str] = []
+        rows = []
+        start = self.events[0].t if self.events else 0.0
+        for event in self.events:
+            if event.device not in devices:
+                devices.append(event.device)
+            rows.append([round(event.t - start, 6), devices.index(event.device), event.type, event.code, event.value])
+
+        return {
+            "version": SESSION_FORMAT_VERSION,
+            "devices": devices,
+            "events": rows,
+            "checkpoints": [[round(t, 3), text] for t, text in self.checkpoints],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UISession":
+        """Load session from dict produced by to_dict."""
+        if data.get("version") != SESSION_FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format: {data.get('version')}")
+
+        devices = data["devices"]
+        events = [InputEvent(t, devices[dev], ev_type, code, value) for t, dev, ev_type, code, value in data["events"]]
+        checkpoints = [(t, text) for t, text in data.get("checkpoints", [])]
+        return cls(events, checkpoints)
+
+    def save(self, path: str):
+        """Write session to JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "UISession":
+        """Read session from JSON file."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def segments(self) -> List[Tuple[List[InputEvent], Optional[str]]]:
+        """
+        Split events at checkpoints.
+
+        Returns:
+            List of (events, expected text to verify after them or None)
+        """
+        if not self.events:
+            return []
+
+        start = self.events[0].t
+        result = []
+        index = 0
+        for cp_time, expect in sorted(self.checkpoints):
+            segment = []
+            while index < len(self.events) and self.events[index].t - start <= cp_time:
+                segment.append(self.events[index])
+                index += 1
+            # Never split an input frame across a checkpoint
+            while segment and not segment[-1].is_frame_end() and index < len(self.events):
+                segment.append(self.events[index])
+                index += 1
+            result.append((segment, expect))
+
+        if index < len(self.events):
+            result.append((self.events[index:], None))
+        return result
+
+
+def build_sendevent_script(events: List[InputEvent], speed: float = 1.0, min_sleep: float = 0.005) -> str:
+    """
+    Build a shell script injecting events with their original spacing.
+
+    Sleeps are only inserted between input frames so each frame is
+    delivered as a burst.
+
+    Args:
+        events: Events to inject
+        speed: Timing multiplier (2.0 = twice as fast, 0 = no delays)
+        min_sleep: Delays shorter than this are dropped (seconds)
+
+    Returns:
+        str: Script for `sh` on the device
+    """
+    lines = []
+    frame_start: Optional[float] = None
+    for event in events:
+        if speed > 0 and frame_start is not None:
+            delay = (event.t - frame_start) / speed
+            if delay >= min_sleep:
+                lines.append(f"sleep {delay:.3f}")
+            frame_start = None
+        lines.append(f"sendevent {event.device} {event.type} {event.code} {event.value}")
+        if event.is_frame_end():
+            frame_start = event.t
+    return "\n".join(lines) + "\n"
+
+
+class InputRecorder:
+    """Background `getevent` reader collecting events for one device."""
+
+    def __init__(self, client: ADBClient):
+        """
+        Initialize recorder.
+
+        Args:
+            client: ADB client for the device to record
+        """
+        self.client = client
+        self.events: List[InputEvent] = []
+        self.checkpoints: List[Tuple[float, str]] = []
+        self._stream: Optional[ADBStream] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_arrival = 0.0
+
+    def start(self):
+        """Start streaming events from the device."""
+        self._stream = self.client.stream("exec-out getevent -t")
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def _collect(self):
+        for line in self._stream.lines():
+            event = parse_getevent_line(line)
+            if event:
+                with self._lock:
+                    self.events.append(event)
+                    self._last_arrival = time.monotonic()
+
+    def add_checkpoint(self, expect: str) -> float:
+        """
+        Mark current moment with text expected in the UI tree.
+
+        Args:
+            expect: Text or resource id that must be on screen at this point
+
+        Returns:
+            float: Checkpoint offset in seconds
+        """
+        with self._lock:
+            if self.events:
+                # Anchor to the event clock so replay splits at the right event, plus
+                # the time the UI was left to settle since, which replay waits out
+                settle = time.monotonic() - self._last_arrival
+                offset = self.events[-1].t - self.events[0].t + settle
+            else:
+                offset = 0.0
+            self.checkpoints.append((offset, expect))
+        return offset
+
+    def stop(self) -> UISession:
+        """Stop streaming and return the recorded session."""
+        if self._stream:
+            self._stream.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            return UISession(list(self.events), list(self.checkpoints))
+
+
+def replay_session(client: ADBClient, session: UISession, speed: float = 1.0, verify: bool = True, timeout: int = 300) -> Tuple[bool, str]:
+    """
+    Replay session on device.
+
+    Each checkpoint segment is injected in one batched `sh` session fed
+    over stdin; the UI tree is checked between segments, after the
+    recorded time from the segment's last event to its checkpoint.
+
+    Args:
+        client: ADB client for target device
+        session: Recorded session
+        speed: Timing multiplier (0 = inject as fast as possible)
+        verify: Check UI-tree checkpoints
+        timeout: Timeout per segment in seconds
+
+    Returns:
+        Tuple[bool, str]: (success, report)
+    """
+    report = []
+    start = session.events[0].t if session.events else 0.0
+    checkpoint_times = [t for t, _ in sorted(session.checkpoints)]
+    injected = 0.0
+    for number, (events, expect) in enumerate(session.segments(), 1):
+        if events:
+            script = build_sendevent_script(events, speed)
+            success, output = client.execute_bytes("shell sh", timeout=timeout, input=script.encode())
+            if not success:
+                return False, f"Segment {number} failed: {output.decode(errors='replace')}"
+            report.append(f"Segment {number}: injected {len(events)} events")
+            injected = events[-1].t - start
+
+        if verify and expect:
+            wait = (checkpoint_times[number - 1] - injected) / speed if speed > 0 else 0
+            if wait > 0:
+                time.sleep(wait)
+            success, tree = client.shell("uiautomator dump /dev/tty", timeout=timeout)
+            if not success or expect not in tree:
+                report.append(f"Checkpoint {number} FAILED: '{expect}' not on screen")
+                return False, "\n".join(report)
+            report.append(f"Checkpoint {number} passed: '{expect}'")
+
+    return True, "\n".join(report)
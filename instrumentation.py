@@ -0,0 +1,398 @@
+"""Instrumentation test orchestration: `am instrument -r` parsing, sharding and reporting."""
+
+import heapq
+import os
+import queue
+import shlex
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+from .adb_client import ADBClient
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".atlas", "test_durations.db")
+DEVICE_SHARD_DIR = "/data/local/tmp"
+
+# Assumed duration of tests without history (seconds)
+DEFAULT_TEST_SECONDS = 2.0
+# Weight of the newest run in the duration average
+DURATION_SMOOTHING = 0.3
+
+# INSTRUMENTATION_STATUS_CODE values
+STATUS_START = 1
+STATUS_OK = 0
+STATUS_ERROR = -1
+STATUS_FAILURE = -2
+STATUS_IGNORED = -3
+STATUS_ASSUMPTION_FAILURE = -4
+
+OUTCOMES = {STATUS_OK: "passed", STATUS_ERROR: "failed", STATUS_FAILURE: "failed",
+            STATUS_IGNORED: "skipped", STATUS_ASSUMPTION_FAILURE: "skipped"}
+
+
+class TestResult:
+    """Outcome of one test method."""
+
+    def __init__(self, name: str, outcome: str, duration: float, message: str = "",
+                 device_id: str = "", attempt: int = 1):
+        """
+        Initialize result.
+
+        Args:
+            name: "package.Class#method"
+            outcome: passed, failed, skipped, crashed or timeout
+            duration: Seconds between start and end status
+            message: Stack trace or crash reason
+            device_id: Device the test ran on
+            attempt: 1 for the first run, higher for retries
+        """
+        self.name = name
+        self.outcome = outcome
+        self.duration = duration
+        self.message = message
+        self.device_id = device_id
+        self.attempt = attempt
+
+
+class InstrumentationParser:
+    """Incremental parser of `am instrument -r` output."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize parser.
+
+        Args:
+            clock: Time source used to measure test durations as lines arrive
+        """
+        self.clock = clock
+        self.current: Optional[Tuple[str, float]] = None
+        self.numtests: Optional[int] = None
+        self.result: Dict[str, str] = {}
+        self.code: Optional[int] = None
+        self._status: Dict[str, str] = {}
+        self._key: Optional[str] = None
+        self._target: Dict[str, str] = self._status
+
+    def feed(self, line: str) -> Optional[TestResult]:
+        """
+        Consume one output line.
+
+        Returns:
+            TestResult when the line completes a test, else None
+        """
+        if line.startswith("INSTRUMENTATION_STATUS: "):
+            self._pair(self._status, line[len("INSTRUMENTATION_STATUS: "):])
+        elif line.startswith("INSTRUMENTATION_STATUS_CODE: "):
+            return self._status_code(int(line.split(":", 1)[1].strip() or 0))
+        elif line.startswith("INSTRUMENTATION_RESULT: "):
+            self._pair(self.result, line[len("INSTRUMENTATION_RESULT: "):])
+        elif line.startswith("INSTRUMENTATION_CODE: "):
+            self.code = int(line.split(":", 1)[1].strip() or 0)
+            self._key = None
+        elif line.startswith("INSTRUMENTATION_FAILED: "):
+            self.result.setdefault("shortMsg", line.split(":", 1)[1].strip())
+        elif self._key:
+            # Continuation of a multi-line value (stack traces, stream)
+            self._target[self._key] += "\n" + line
+        return None
+
+    def _pair(self, target: Dict[str, str], text: str):
+        key, _, value = text.partition("=")
+        target[key] = value
+        self._key, self._target = key, target
+
+    def _status_code(self, code: int) -> Optional[TestResult]:
+        status, self._status, self._key = self._status, {}, None
+        if "numtests" in status and status["numtests"].isdigit():
+            self.numtests = int(status["numtests"])
+        name = f"{status.get('class', '')}#{status.get('test', '')}"
+        if code == STATUS_START:
+            self.current = (name, self.clock())
+            return None
+        started = self.current[1] if self.current and self.current[0] == name else self.clock()
+        self.current = None
+        return TestResult(name, OUTCOMES.get(code, "failed"), self.clock() - started, status.get("stack", "").strip())
+
+    def interrupted(self, reason: str) -> Optional[TestResult]:
+        """Result for the test running when output stopped (process crash or timeout)."""
+        if self.current is None:
+            return None
+        name, started = self.current
+        self.current = None
+        crash = self.result.get("shortMsg", "")
+        outcome = "timeout" if reason == "timeout" else "crashed"
+        return TestResult(name, outcome, self.clock() - started, crash or reason)
+
+
+class DurationHistory:
+    """SQLite store of smoothed test durations for shard balancing."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create) the duration database.
+
+        Args:
+            path: SQLite file path (":memory:" for a throwaway store)
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS durations ("
+                             "suite TEXT, test TEXT, seconds REAL, runs INTEGER, PRIMARY KEY (suite, test))")
+
+    def get(self, suite: str, tests: Sequence[str]) -> Dict[str, float]:
+        """Known durations of tests in a suite."""
+        with self._lock:
+            rows = self._db.execute("SELECT test, seconds FROM durations WHERE suite = ?", (suite,)).fetchall()
+        wanted = set(tests)
+        return {test: seconds for test, seconds in rows if test in wanted}
+
+    def record(self, suite: str, results: Sequence[TestResult]):
+        """Fold passed/failed test durations into the moving average."""
+        with self._lock, self._db:
+            for result in results:
+                if result.outcome not in ("passed", "failed"):
+                    continue
+                self._db.execute(
+                    "INSERT INTO durations VALUES (?, ?, ?, 1) ON CONFLICT(suite, test) DO UPDATE SET "
+                    "seconds = seconds * ? + excluded.seconds * ?, runs = runs + 1",
+                    (suite, result.name, result.duration, 1 - DURATION_SMOOTHING, DURATION_SMOOTHING))
+
+
+def make_shards(tests: Sequence[str], durations: Dict[str, float], count: int) -> List[List[str]]:
+    """
+    Split tests into shards with balanced expected duration (longest processing time first).
+
+    Args:
+        tests: Test names
+        durations: Known durations; unknown tests get the median of known ones
+        count: Number of shards
+
+    Returns:
+        List[List[str]]: Non-empty shards, longest expected first
+    """
+    known = sorted(durations.values())
+    default = known[len(known) // 2] if known else DEFAULT_TEST_SECONDS
+    expected = {test: durations.get(test, default) for test in tests}
+    heap = [(0.0, i, []) for i in range(max(1, min(count, len(tests))))]
+    for test in sorted(tests, key=lambda t: expected[t], reverse=True):
+        total, i, shard = heapq.heappop(heap)
+        shard.append(test)
+        heapq.heappush(heap, (total + expected[test], i, shard))
+    return [shard for _, _, shard in sorted(heap, reverse=True) if shard]
+
+
+def run_shard(client: ADBClient, runner: str, tests: Sequence[str], args: str = "",
+              test_timeout: float = 300.0, attempt: int = 1) -> Tuple[List[TestResult], Dict[str, str]]:
+    """
+    Run a list of tests with `am instrument -r`, parsing results as they stream.
+
+    Args:
+        client: ADB client of the device
+        runner: "test.package/runner.Class"
+        tests: "package.Class#method" names
+        args: Extra `-e key value` arguments
+        test_timeout: Seconds without output before the run is considered hung
+        attempt: Attempt number recorded in the results
+
+    Returns:
+        Tuple[List[TestResult], Dict[str, str]]: (results, INSTRUMENTATION_RESULT values)
+    """
+    device = client.device_id or "default"
+    shard_file = f"{DEVICE_SHARD_DIR}/atlas-tests-{os.getpid()}-{threading.get_ident()}.txt"
+    # The runner reads the file as the app uid
+    write = f"cat > {shard_file} && chmod 644 {shard_file}"
+    success, output = client.execute_bytes(f"shell {shlex.quote(write)}",
+                                           input="\n".join(tests).encode() + b"\n")
+    if not success:
+        raise RuntimeError(f"Failed to push test list: {output.decode('utf-8', 'replace')}")
+
+    command = f"am instrument -r -w -e testFile {shard_file} {args} {runner}"
+    parser = InstrumentationParser()
+    results: List[TestResult] = []
+    stream = client.stream(f"shell {shlex.quote(command)}")
+    reason = "instrumentation ended"
+    try:
+        while True:
+            try:
+                line = stream.readline(test_timeout)
+            except TimeoutError:
+                reason = "timeout"
+                break
+            if line is None:
+                break
+            result = parser.feed(line)
+            if result:
+                results.append(result)
+    finally:
+        stream.close()
+        client.shell(f"rm -f {shard_file}")
+
+    interrupted = parser.interrupted(reason)
+    if interrupted:
+        results.append(interrupted)
+    for result in results:
+        result.device_id, result.attempt = device, attempt
+    return results, parser.result
+
+
+def list_tests(client: ADBClient, runner: str, args: str = "", timeout: float = 300.0) -> List[str]:
+    """
+    List tests of an instrumentation without running them (AndroidJUnitRunner log-only mode).
+
+    Args:
+        client: ADB client of the device
+        runner: "test.package/runner.Class"
+        args: Filter arguments (e.g. "-e package com.example.tests")
+        timeout: Seconds without output before giving up
+
+    Returns:
+        List[str]: "package.Class#method" names in declaration order
+    """
+    command = f"am instrument -r -w -e log true {args} {runner}"
+    parser = InstrumentationParser()
+    tests = []
+    stream = client.stream(f"shell {shlex.quote(command)}")
+    try:
+        while True:
+            line = stream.readline(timeout)
+            if line is None:
+                break
+            result = parser.feed(line)
+            if result and result.name not in tests:
+                tests.append(result.name)
+    finally:
+        stream.close()
+    if not tests and parser.result.get("shortMsg"):
+        raise RuntimeError(parser.result["shortMsg"])
+    return tests
+
+
+def run_sharded(clients: Sequence[ADBClient], runner: str, shards: List[List[str]], args: str = "",
+                retries: int = 1, test_timeout: float = 300.0) -> Tuple[List[TestResult], Dict[str, float]]:
+    """
+    Run shards on devices from a shared queue; failed or unfinished tests are retried as new shards.
+
+    Args:
+        clients: Devices to run on (each runs one shard at a time)
+        runner: "test.package/runner.Class"
+        shards: Test shards, longest first
+        args: Extra `-e key value` arguments
+        retries: Extra attempts for tests that did not pass
+        test_timeout: Seconds without output before a shard is considered hung
+
+    Returns:
+        Tuple[List[TestResult], Dict[str, float]]: (all attempts' results, busy seconds per device)
+    """
+    work: "queue.Queue[Tuple[List[str], int]]" = queue.Queue()
+    for shard in shards:
+        work.put((shard, 1))
+    pending = [len(shards)]
+    lock = threading.Condition()
+    results: List[TestResult] = []
+    busy: Dict[str, float] = {}
+
+    def worker(client: ADBClient):
+        device = client.device_id or "default"
+        while True:
+            with lock:
+                while work.empty() and pending[0]:
+                    lock.wait(1.0)
+                if not pending[0]:
+                    return
+                tests, attempt = work.get()
+            started = time.monotonic()
+            try:
+                shard_results, _ = run_shard(client, runner, tests, args, test_timeout, attempt)
+            except Exception as e:
+                shard_results = [TestResult(test, "crashed", 0.0, f"{type(e).__name__}: {e}", device, attempt)
+                                 for test in tests]
+            busy[device] = busy.get(device, 0.0) + time.monotonic() - started
+
+            finished = {r.name for r in shard_results}
+            # Tests never started because the run crashed or hung
+            shard_results += [TestResult(test, "not run", 0.0, "instrumentation stopped early", device, attempt)
+                              for test in tests if test not in finished]
+            retry = [r.name for r in shard_results if r.outcome not in ("passed", "skipped")]
+            with lock:
+                results.extend(shard_results)
+                if retry and attempt <= retries:
+                    work.put((retry, attempt + 1))
+                    pending[0] += 1
+                pending[0] -= 1
+                lock.notify_all()
+
+    threads = [threading.Thread(target=worker, args=(client,), daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, busy
+
+
+def merge_results(results: Sequence[TestResult]) -> Dict[str, TestResult]:
+    """Final result per test; a pass after a failure marks the test flaky."""
+    final: Dict[str, TestResult] = {}
+    for result in sorted(results, key=lambda r: r.attempt):
+        previous = final.get(result.name)
+        if previous and previous.outcome not in ("passed", "skipped") and result.outcome == "passed":
+            result.outcome = "flaky"
+            result.message = previous.message
+        final[result.name] = result
+    return final
+
+
+def format_test_summary(final: Dict[str, TestResult], wall: float, busy: Dict[str, float],
+                        max_failures: int = 20) -> str:
+    """Render counts, device utilization and failures."""
+    counts: Dict[str, int] = {}
+    for result in final.values():
+        counts[result.outcome] = counts.get(result.outcome, 0) + 1
+    order = ("passed", "flaky", "failed", "crashed", "timeout", "not run", "skipped")
+    lines = [f"{len(final)} tests in {wall:.1f}s on {len(busy)} device(s): "
+             + ", ".join(f"{counts[o]} {o}" for o in order if counts.get(o))]
+    if busy:
+        lines.append("Device busy time: " + ", ".join(f"{d} {s:.0f}s" for d, s in sorted(busy.items())))
+    bad = [r for r in final.values() if r.outcome not in ("passed", "skipped", "flaky")]
+    if bad:
+        lines.append("Failures:")
+        for result in bad[:max_failures]:
+            first = result.message.splitlines()[0] if result.message else ""
+            lines.append(f"  [{result.outcome}] {result.name} ({result.device_id}): {first[:200]}")
+        if len(bad) > max_failures:
+            lines.append(f"  ... {len(bad) - max_failures} more")
+    flaky = [r.name for r in final.values() if r.outcome == "flaky"]
+    if flaky:
+        lines.append("Flaky (passed on retry): " + ", ".join(flaky[:max_failures]))
+    return "\n".join(lines)
+
+
+def junit_xml(final: Dict[str, TestResult], suite: str) -> bytes:
+    """Render final results as JUnit XML, one testsuite per class."""
+    root = ElementTree.Element("testsuites", name=suite)
+    by_class: Dict[str, List[TestResult]] = {}
+    for result in final.values():
+        by_class.setdefault(result.name.split("#")[0], []).append(result)
+    for class_name, results in sorted(by_class.items()):
+        failures = sum(1 for r in results if r.outcome in ("failed", "timeout", "not run"))
+        errors = sum(1 for r in results if r.outcome == "crashed")
+        suite_element = ElementTree.SubElement(
+            root, "testsuite", name=class_name, tests=str(len(results)), failures=str(failures), errors=str(errors),
+            skipped=str(sum(1 for r in results if r.outcome == "skipped")),
+            time=f"{sum(r.duration for r in results):.3f}")
+        for result in results:
+            case = ElementTree.SubElement(suite_element, "testcase", classname=class_name,
+                                          name=result.name.split("#", 1)[-1], time=f"{result.duration:.3f}")
+            if result.outcome in ("failed", "timeout", "not run"):
+                ElementTree.SubElement(case, "failure", message=result.outcome).text = result.message
+            elif result.outcome == "crashed":
+                ElementTree.SubElement(case, "error", message="crashed").text = result.message
+            elif result.outcome == "skipped":
+                ElementTree.SubElement(case, "skipped")
+            elif result.outcome == "flaky":
+                # Rerun-style annotation understood by common CI reporters
+                ElementTree.SubElement(case, "flakyFailure", message="failed before passing").text = result.message
+    return ElementTree.tostring(root, encoding="utf-8", xml_declaration=True)
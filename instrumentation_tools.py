@@ -0,0 +1,159 @@
+"""Instrumentation test tools for Android."""
+
+import threading
+import time
+from langchain.tools import tool
+from typing import List, Optional, Set
+from ..adb_client import ADBClient
+from ..device_manager import DeviceManager
+from ..fleet import resolve_devices
+from ..instrumentation import (
+    DurationHistory,
+    format_test_summary,
+    junit_xml,
+    list_tests,
+    make_shards,
+    merge_results,
+    run_sharded,
+)
+
+_device_manager = DeviceManager()
+_durations: Optional[DurationHistory] = None
+
+# Devices currently running a suite; a device runs one suite at a time
+_leased: Set[str] = set()
+_lease_lock = threading.Lock()
+
+
+def _duration_history() -> DurationHistory:
+    """Open the shared duration history on first use."""
+    global _durations
+    if _durations is None:
+        _durations = DurationHistory()
+    return _durations
+
+
+def _resolve_runner(client: ADBClient, runner: str) -> Optional[str]:
+    """Expand a test package name to "package/runner" using pm list instrumentation."""
+    if "/" in runner:
+        return runner
+    success, output = client.shell("pm list instrumentation")
+    for line in output.splitlines() if success else []:
+        # instrumentation:com.example.test/androidx.test.runner.AndroidJUnitRunner (target=com.example)
+        component = line.replace("instrumentation:", "").split(" ")[0]
+        if component.startswith(runner + "/"):
+            return component
+    return None
+
+
+def _filter_args(test_filter: Optional[str], test_package: Optional[str]) -> str:
+    args = ""
+    if test_filter:
+        args += f" -e class {test_filter.replace(' ', '')}"
+    if test_package:
+        args += f" -e package {test_package.strip()}"
+    return args
+
+
+@tool
+def list_instrumentation_tests(runner: str, device_id: Optional[str] = None, test_filter: Optional[str] = None,
+                               test_package: Optional[str] = None, max_results: int = 200) -> str:
+    """List tests of an instrumentation without running them.
+
+    Args:
+        runner: Test package or "test.package/runner.Class"
+        device_id: Device serial number (uses default if None)
+        test_filter: Comma-separated classes or Class#method names
+        test_package: Only tests in this Java package
+        max_results: Maximum names to list (default: 200)
+
+    Returns:
+        str: Test count and names
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    component = _resolve_runner(client, runner)
+    if not component:
+        return f"No instrumentation found for {runner} (see pm list instrumentation)"
+    try:
+        tests = list_tests(client, component, _filter_args(test_filter, test_package))
+    except (RuntimeError, TimeoutError) as e:
+        return f"Failed to list tests: {e}"
+
+    lines = [f"{len(tests)} test(s) in {component}:"] + tests[:max_results]
+    if len(tests) > max_results:
+        lines.append(f"... {len(tests) - max_results} more")
+    return "\n".join(lines)
+
+
+@tool
+def run_instrumentation_tests(runner: str, device_id: Optional[str] = "all", test_filter: Optional[str] = None,
+                              test_package: Optional[str] = None, retries: int = 1, test_timeout: int = 300,
+                              junit_path: Optional[str] = None, extra_args: str = "") -> str:
+    """Run an instrumentation suite sharded across devices, with retries of failed tests.
+
+    Tests are split into one shard per device, balanced by durations of
+    earlier runs, and results are parsed while `am instrument -r` streams.
+    Failed, crashed or unfinished tests are retried (on any free device);
+    a test passing on retry is reported as flaky.
+
+    Args:
+        runner: Test package or "test.package/runner.Class"
+        device_id: Comma-separated serials or "all" (default: all)
+        test_filter: Comma-separated classes or Class#method names
+        test_package: Only tests in this Java package
+        retries: Extra attempts for tests that did not pass (default: 1)
+        test_timeout: Seconds without output before a shard counts as hung (default: 300)
+        junit_path: Optional local path for a JUnit XML report
+        extra_args: Extra runner arguments, e.g. "-e clearPackageData true"
+
+    Returns:
+        str: Pass/fail counts, device utilization, failures and flaky tests
+    """
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    with _lease_lock:
+        leased = [c for c in clients if (c.device_id or "default") not in _leased]
+        _leased.update(c.device_id or "default" for c in leased)
+    busy_elsewhere = [c.device_id or "default" for c in clients if c not in leased]
+    if not leased:
+        return f"All selected devices are running other suites: {', '.join(busy_elsewhere)}"
+
+    try:
+        component = _resolve_runner(leased[0], runner)
+        if not component:
+            return f"No instrumentation found for {runner} (see pm list instrumentation)"
+        try:
+            tests = list_tests(leased[0], component, _filter_args(test_filter, test_package))
+        except (RuntimeError, TimeoutError) as e:
+            return f"Failed to list tests: {e}"
+        if not tests:
+            return f"No tests matched in {component}"
+
+        history = _duration_history()
+        shards = make_shards(tests, history.get(component, tests), len(leased))
+        started = time.monotonic()
+        results, busy = run_sharded(leased[:len(shards)], component, shards, extra_args, retries, test_timeout)
+        wall = time.monotonic() - started
+    finally:
+        with _lease_lock:
+            _leased.difference_update(c.device_id or "default" for c in leased)
+
+    history.record(component, [r for r in results if r.attempt == 1])
+    final = merge_results(results)
+    lines: List[str] = [f"Device not found: {d}" for d in missing]
+    if busy_elsewhere:
+        lines.append(f"Skipped devices running other suites: {', '.join(busy_elsewhere)}")
+    lines.append(format_test_summary(final, wall, busy))
+    if junit_path:
+        try:
+            with open(junit_path, "wb") as f:
+                f.write(junit_xml(final, component))
+            lines.append(f"JUnit report: {junit_path}")
+        except OSError as e:
+            lines.append(f"Failed to write JUnit report: {e}")
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+"""Vectorized log analytics: rates, top talkers and burst detection."""
+
+import time
+from typing import Dict, List, Sequence
+import numpy as np
+from .logcat_store import LEVELS, LEVEL_INDEX
+
+# Scale factor turning median absolute deviation into a stddev estimate
+MAD_SCALE = 1.4826
+
+
+def bursts(counts: np.ndarray, threshold: float = 4.0, min_count: int = 10) -> np.ndarray:
+    """
+    Find buckets whose count is far above the typical rate.
+
+    Uses median + threshold * MAD so the bursts themselves do not
+    inflate the baseline.
+
+    Args:
+        counts: Entries per time bucket
+        threshold: Robust standard deviations above the median
+        min_count: Ignore buckets with fewer entries
+
+    Returns:
+        np.ndarray: Indices of burst buckets
+    """
+    if counts.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    median = np.median(counts)
+    spread = max(np.median(np.abs(counts - median)) * MAD_SCALE, 1.0)
+    return np.flatnonzero((counts > median + threshold * spread) & (counts >= min_count))
+
+
+def summarize(ts: np.ndarray, pid: np.ndarray, level: np.ndarray, tag: np.ndarray, tag_names: Sequence[str],
+              bucket_seconds: float = 10.0, top_n: int = 10, threshold: float = 4.0) -> Dict:
+    """
+    Aggregate parsed log columns into a compact summary.
+
+    Args:
+        ts: Timestamps (epoch seconds)
+        pid: Process ids
+        level: Level indices (see LEVELS)
+        tag: Tag ids
+        tag_names: Tag id to name table
+        bucket_seconds: Width of rate buckets
+        top_n: Rows in top tag/pid tables
+        threshold: Burst threshold in robust standard deviations
+
+    Returns:
+        Dict: Summary tables (see format_summary)
+
+    Raises:
+        ValueError: If bucket_seconds is not positive
+    """
+    if bucket_seconds <= 0:
+        raise ValueError(f"bucket_seconds must be positive, got {bucket_seconds}")
+    total = int(ts.size)
+    if total == 0:
+        return {"total": 0}
+
+    start, end = float(ts.min()), float(ts.max())
+    span = max(end - start, 1e-3)
+    bucket = ((ts - start) // bucket_seconds).astype(np.int64)
+    n_buckets = int(bucket.max()) + 1
+    is_error = level >= LEVEL_INDEX["E"]
+
+    # Per-tag counts, error counts and bucketed timelines in single passes
+    tag_counts = np.bincount(tag, minlength=len(tag_names))
+    tag_errors = np.bincount(tag, weights=is_error, minlength=len(tag_names))
+    top_tags = np.argsort(tag_counts)[::-1][:top_n]
+    top_tags = top_tags[tag_counts[top_tags] > 0]
+
+    rank = np.full(len(tag_names), -1, dtype=np.int64)
+    rank[top_tags] = np.arange(top_tags.size)
+    in_top = rank[tag] >= 0
+    timeline = np.bincount(rank[tag[in_top]] * n_buckets + bucket[in_top],
+                           minlength=top_tags.size * n_buckets).reshape(top_tags.size, n_buckets)
+    peak = timeline.max(axis=1)
+    typical = np.maximum(np.median(timeline, axis=1), 1.0)
+
+    pids, pid_inverse, pid_counts = np.unique(pid, return_inverse=True, return_counts=True)
+    pid_errors = np.bincount(pid_inverse, weights=is_error, minlength=pids.size)
+    top_pids = np.argsort(pid_counts)[::-1][:top_n]
+
+    counts = np.bincount(bucket, minlength=n_buckets)
+    error_counts = np.bincount(bucket, weights=is_error, minlength=n_buckets)
+    burst_buckets = bursts(counts, threshold)
+    error_bursts = bursts(error_counts, threshold, min_count=3)
+
+    # Dominant tag per burst bucket
+    burst_rows = []
+    for b in burst_buckets[:top_n]:
+        members = tag[bucket == b]
+        dominant = int(np.bincount(members).argmax())
+        burst_rows.append((start + b * bucket_seconds, int(counts[b]), tag_names[dominant]))
+
+    errors_at = ts[is_error]
+    return {
+        "total": total,
+        "start": start,
+        "end": end,
+        "rate": total / span,
+        "bucket_seconds": bucket_seconds,
+        "levels": {LEVELS[i]: int(n) for i, n in enumerate(np.bincount(level, minlength=len(LEVELS))) if n},
+        "tags": [(tag_names[t], int(tag_counts[t]), tag_counts[t] / span, int(tag_errors[t]),
+                  float(peak[i] / typical[i])) for i, t in enumerate(top_tags)],
+        "pids": [(int(pids[p]), int(pid_counts[p]), pid_counts[p] / span, int(pid_errors[p])) for p in top_pids],
+        "bursts": burst_rows,
+        "first_error": float(errors_at.min()) if errors_at.size else None,
+        "error_bursts": [(start + b * bucket_seconds, int(error_counts[b])) for b in error_bursts[:top_n]],
+    }
+
+
+def _clock(ts: float) -> str:
+    return time.strftime("%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def format_summary(summary: Dict) -> str:
+    """Render summary as compact text tables for the LLM."""
+    if not summary.get("total"):
+        return "No log entries in window"
+
+    lines: List[str] = [
+        f"{summary['total']} entries {_clock(summary['start'])} - {_clock(summary['end'])} "
+        f"({summary['rate']:.1f}/s)",
+        "Levels: " + " ".join(f"{name}={count}" for name, count in summary["levels"].items()),
+        "",
+        "Top tags:  count  rate/s  errors  peak/typical",
+    ]
+    for name, count, rate, errors, spike in summary["tags"]:
+        lines.append(f"  {name[:28]:<28} {count:>8} {rate:>7.1f} {errors:>7} {spike:>6.1f}x")
+
+    lines += ["", "Top pids:  count  rate/s  errors"]
+    for pid, count, rate, errors in summary["pids"]:
+        lines.append(f"  {pid:<8} {count:>8} {rate:>7.1f} {errors:>7}")
+
+    bucket = summary["bucket_seconds"]
+    if summary["bursts"]:
+        lines += ["", f"Bursts ({bucket:g}s buckets):"]
+        for start, count, name in summary["bursts"]:
+            lines.append(f"  {_clock(start)} {count} entries, mostly {name}")
+
+    if summary["first_error"] is not None:
+        lines += ["", f"First error: {_clock(summary['first_error'])}"]
+        for start, count in summary["error_bursts"]:
+            lines.append(f"  Error burst {_clock(start)}: {count} errors")
+    return "\n".join(lines)
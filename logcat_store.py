@@ -0,0 +1,515 @@
+"""Continuous logcat ingestion into an indexed in-memory ring buffer."""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .adb_client import ADBClient, ADBStream
+
+# Log priorities in ascending order; index is the stored level value
+LEVELS = "VDIWEFS"
+LEVEL_INDEX = {name: i for i, name in enumerate(LEVELS)}
+LEVEL_INDEX["A"] = LEVEL_INDEX["F"]
+
+BUFFERS = ["main", "system", "crash", "radio", "events", "kernel"]
+BUFFER_INDEX = {name: i for i, name in enumerate(BUFFERS)}
+
+# Bytes per entry across all metadata columns (see LogStore.__init__)
+ENTRY_BYTES = 42
+
+# Distinct tags kept in the tag table; further tags share OVERFLOW_TAG
+MAX_TAGS = 8192
+OVERFLOW_TAG = "(other)"
+
+# "  1700000000.123  1234  1234 I Tag     : message" (-v threadtime -v epoch)
+_EPOCH_LINE = re.compile(r"^\s*(\d+\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEFSA])\s+(.*?)\s*: (.*)$")
+# Buffer dividers: "--------- beginning of main" / "--------- switch to system" (-D)
+_BUFFER_MARKER = re.compile(r"^-+ (?:beginning of|switch to) (\w+)")
+# Leading "MM-DD HH:MM:SS.mmm" of default threadtime lines
+_THREADTIME_STAMP = re.compile(r"^(\d\d-\d\d \d\d:\d\d:\d\d\.\d{3})")
+
+# Opaque cursor prefixes: store sequence number or device log timestamp
+STORE_CURSOR = "s:"
+TIME_CURSOR = "t:"
+
+Row = Tuple[float, int, int, int, str, str]
+
+
+def parse_logcat_line(line: str) -> Optional[Row]:
+    """
+    Parse one `logcat -v threadtime -v epoch` line.
+
+    Args:
+        line: Raw output line
+
+    Returns:
+        (timestamp, pid, tid, level, tag, message) or None
+    """
+    match = _EPOCH_LINE.match(line)
+    if not match:
+        return None
+    ts, pid, tid, level, tag, message = match.groups()
+    return float(ts), int(pid), int(tid), LEVEL_INDEX[level], tag, message
+
+
+def parse_filter_expr(filter_expr: str) -> Tuple[Dict[str, int], int]:
+    """
+    Parse logcat filterspecs like "ActivityManager:I MyApp:D *:S".
+
+    Args:
+        filter_expr: Space separated TAG[:LEVEL] specs
+
+    Returns:
+        Tuple[Dict[str, int], int]: (minimum level per tag, default minimum level)
+    """
+    per_tag: Dict[str, int] = {}
+    default = LEVEL_INDEX["V"]
+    for spec in filter_expr.split():
+        tag, _, level = spec.partition(":")
+        value = LEVEL_INDEX.get(level.upper(), LEVEL_INDEX["V"]) if level else LEVEL_INDEX["V"]
+        if tag == "*":
+            default = value
+        else:
+            per_tag[tag] = value
+    return per_tag, default
+
+
+class LogStore:
+    """Columnar ring buffer of log entries with a bounded memory budget.
+
+    Entry metadata lives in fixed-size NumPy columns indexed by
+    sequence number modulo capacity; message bytes live in a circular
+    arena. The oldest entries are evicted when either is full. The
+    columns double as the index: tag, pid, level, buffer and time
+    filters are vectorized masks over them.
+    """
+
+    def __init__(self, memory_bytes: int = 64 * 1024 * 1024, max_tags: int = MAX_TAGS):
+        """
+        Initialize store.
+
+        Args:
+            memory_bytes: Total budget, split 1:3 between entry columns and message arena
+            max_tags: Distinct tags kept before evicted tags are dropped or new ones overflow
+        """
+        self.capacity = max(memory_bytes // 4 // ENTRY_BYTES, 1024)
+        self.arena_size = max(memory_bytes - self.capacity * ENTRY_BYTES, 64 * 1024)
+
+        self.seq = np.full(self.capacity, -1, dtype=np.int64)
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.pid = np.zeros(self.capacity, dtype=np.int32)
+        self.tid = np.zeros(self.capacity, dtype=np.int32)
+        self.level = np.zeros(self.capacity, dtype=np.uint8)
+        self.tag = np.zeros(self.capacity, dtype=np.int32)
+        self.buffer = np.zeros(self.capacity, dtype=np.uint8)
+        self.msg_offset = np.zeros(self.capacity, dtype=np.int64)
+        self.msg_length = np.zeros(self.capacity, dtype=np.int32)
+
+        self._arena = bytearray(self.arena_size)
+        self._arena_pos = 0
+        self.max_tags = max_tags
+        self.tags: List[str] = []
+        self._tag_ids: Dict[str, int] = {}
+        self._tags_compacted_at = 0
+        self.first_seq = 0
+        self.next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def tag_id(self, tag: str) -> int:
+        """Return id for tag, registering it if new (OVERFLOW_TAG once the table is full)."""
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            if len(self.tags) >= self.max_tags:
+                tag = OVERFLOW_TAG
+                tag_id = self._tag_ids.get(tag)
+                if tag_id is not None:
+                    return tag_id
+            tag_id = len(self.tags)
+            self._tag_ids[tag] = tag_id
+            self.tags.append(tag)
+        return tag_id
+
+    def _compact_tags(self):
+        """Drop tags no live entry refers to and renumber the rest (caller holds the lock)."""
+        live = self.seq >= self.first_seq
+        used = np.unique(self.tag[live])
+        remap = np.zeros(len(self.tags), dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        self.tag = np.where(live, remap[self.tag], 0).astype(np.int32)
+        self.tags = [self.tags[i] for i in used]
+        self._tag_ids = {tag: i for i, tag in enumerate(self.tags)}
+        self._tags_compacted_at = self.next_seq
+
+    def append(self, rows: Sequence[Row], buffer: int = 0):
+        """
+        Append parsed rows from one log buffer.
+
+        Args:
+            rows: Parsed entries in arrival order
+            buffer: Buffer index (see BUFFERS)
+        """
+        if not rows:
+            return
+        rows = rows[-self.capacity:]
+        with self._lock:
+            # Reclaim tags of evicted entries at most once per ring turnover
+            if (len(self.tags) + len({row[4] for row in rows} - self._tag_ids.keys()) > self.max_tags
+                    and self.next_seq - self._tags_compacted_at >= self.capacity):
+                self._compact_tags()
+            count = len(rows)
+            seqs = np.arange(self.next_seq, self.next_seq + count, dtype=np.int64)
+            slots = seqs % self.capacity
+            self.seq[slots] = seqs
+            self.ts[slots] = [row[0] for row in rows]
+            self.pid[slots] = [row[1] for row in rows]
+            self.tid[slots] = [row[2] for row in rows]
+            self.level[slots] = [row[3] for row in rows]
+            self.tag[slots] = [self.tag_id(row[4]) for row in rows]
+            self.buffer[slots] = buffer
+
+            offsets, lengths = [], []
+            for row in rows:
+                data = row[5].encode("utf-8", errors="replace")[:self.arena_size // 4]
+                offsets.append(self._arena_pos)
+                lengths.append(len(data))
+                self._write_arena(data)
+            self.msg_offset[slots] = offsets
+            self.msg_length[slots] = lengths
+
+            self.next_seq += count
+            self.first_seq = max(self.first_seq, self.next_seq - self.capacity)
+            # Evict entries whose message bytes were overwritten
+            oldest_valid = self._arena_pos - self.arena_size
+            while self.first_seq < self.next_seq and self.msg_offset[self.first_seq % self.capacity] < oldest_valid:
+                self.first_seq += 1
+
+    def _write_arena(self, data: bytes):
+        start = self._arena_pos % self.arena_size
+        end = start + len(data)
+        if end <= self.arena_size:
+            self._arena[start:end] = data
+        else:
+            split = self.arena_size - start
+            self._arena[start:] = data[:split]
+            self._arena[:end - self.arena_size] = data[split:]
+        self._arena_pos += len(data)
+
+    def message(self, slot: int) -> str:
+        """Decode message stored for ring slot."""
+        start = int(self.msg_offset[slot]) % self.arena_size
+        end = start + int(self.msg_length[slot])
+        if end <= self.arena_size:
+            data = self._arena[start:end]
+        else:
+            data = self._arena[start:] + self._arena[:end - self.arena_size]
+        return data.decode("utf-8", errors="replace")
+
+    def query(self, tags: Optional[Sequence[str]] = None, pids: Optional[Sequence[int]] = None,
+              min_level: int = 0, buffers: Optional[Sequence[str]] = None, since: Optional[float] = None,
+              until: Optional[float] = None, after_seq: Optional[int] = None, filter_expr: Optional[str] = None,
+              limit: Optional[int] = None, oldest: bool = False) -> np.ndarray:
+        """
+        Select entries matching all given filters.
+
+        Args:
+            tags: Keep only these tags
+            pids: Keep only these process ids
+            min_level: Minimum level index (see LEVELS)
+            buffers: Keep only these buffers
+            since: Minimum timestamp (epoch seconds)
+            until: Maximum timestamp (epoch seconds)
+            after_seq: Keep entries with sequence number above this
+            filter_expr: logcat filterspec ("Tag:I *:S")
+            limit: Keep only N matches (most recent unless oldest)
+            oldest: Keep the oldest N matches instead, for paging forward
+
+        Returns:
+            np.ndarray: Ring slots of matches in sequence order
+        """
+        with self._lock:
+            lower = self.first_seq if after_seq is None else max(self.first_seq, after_seq + 1)
+            mask = (self.seq >= lower) & (self.seq < self.next_seq)
+            if min_level:
+                mask &= self.level >= min_level
+            if tags is not None:
+                ids = [self._tag_ids[t] for t in tags if t in self._tag_ids]
+                mask &= np.isin(self.tag, ids)
+            if pids is not None:
+                mask &= np.isin(self.pid, list(pids))
+            if buffers is not None:
+                mask &= np.isin(self.buffer, [BUFFER_INDEX[b] for b in buffers if b in BUFFER_INDEX])
+            if since is not None:
+                mask &= self.ts >= since
+            if until is not None:
+                mask &= self.ts <= until
+            if filter_expr:
+                per_tag, default = parse_filter_expr(filter_expr)
+                thresholds = np.full(max(len(self.tags), 1), default, dtype=np.uint8)
+                for tag, value in per_tag.items():
+                    if tag in self._tag_ids:
+                        thresholds[self._tag_ids[tag]] = value
+                mask &= self.level >= thresholds[self.tag]
+
+            slots = np.flatnonzero(mask)
+            slots = slots[np.argsort(self.seq[slots], kind="stable")]
+            if limit is not None:
+                if limit <= 0:
+                    slots = slots[:0]
+                else:
+                    slots = slots[:limit] if oldest else slots[-limit:]
+            return slots
+
+    def columns(self, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        """Copy metadata columns for slots (for vectorized analytics)."""
+        with self._lock:
+            return {
+                "ts": self.ts[slots],
+                "pid": self.pid[slots],
+                "tid": self.tid[slots],
+                "level": self.level[slots],
+                "tag": self.tag[slots],
+                "buffer": self.buffer[slots],
+            }
+
+    def format(self, slots: np.ndarray) -> List[str]:
+        """Render slots as threadtime-style lines."""
+        with self._lock:
+            lines = []
+            for slot in slots:
+                ts = float(self.ts[slot])
+                stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(ts)) + f".{int(ts * 1000) % 1000:03d}"
+                lines.append(f"{stamp} {self.pid[slot]:5d} {self.tid[slot]:5d} {LEVELS[self.level[slot]]} "
+                             f"{self.tags[self.tag[slot]]}: {self.message(slot)}")
+            return lines
+
+
+def _fit_lines(lines: List[str], max_size: Optional[int]) -> int:
+    """Return how many leading lines fit in max_size characters (at least one)."""
+    if max_size is None:
+        return len(lines)
+    total = 0
+    for count, line in enumerate(lines):
+        total += len(line) + 1
+        if total > max_size:
+            return max(count, 1)
+    return len(lines)
+
+
+def page_store(store: LogStore, cursor: Optional[str], limit: int, max_size: Optional[int] = None,
+               **filters) -> Tuple[List[str], str]:
+    """
+    Read one page of store entries after a cursor.
+
+    Without a cursor the newest `limit` entries are returned; with one,
+    the oldest entries after it, so repeated calls page forward without
+    gaps or repeats.
+
+    Args:
+        store: Log store
+        cursor: Cursor from a previous page (STORE_CURSOR prefix) or None
+        limit: Maximum entries
+        max_size: Maximum characters of rendered lines
+        **filters: Extra LogStore.query filters
+
+    Returns:
+        Tuple[List[str], str]: (rendered lines, cursor for the next page)
+    """
+    after = int(cursor[len(STORE_CURSOR):]) if cursor else None
+    # Snapshot head first: everything up to it is covered by this query
+    head = store.next_seq - 1
+    slots = store.query(after_seq=after, limit=limit, oldest=after is not None, **filters)
+    lines = store.format(slots)
+    count = _fit_lines(lines, max_size)
+    if count < len(slots) or (after is not None and len(slots) == limit):
+        # More matches remain; resume right after the last one returned
+        next_seq = int(store.seq[slots[count - 1]])
+    else:
+        next_seq = max([head] + [int(store.seq[slot]) for slot in slots[-1:]])
+    return lines[:count], f"{STORE_CURSOR}{next_seq}"
+
+
+def parse_time_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Split a time cursor into its logcat timestamp and lines already returned at it.
+
+    Args:
+        cursor: Cursor with TIME_CURSOR prefix ("t:MM-DD HH:MM:SS.mmm#N")
+
+    Returns:
+        Tuple[str, int]: (timestamp for `logcat -T`, lines at that timestamp to skip)
+    """
+    stamp, _, seen = cursor[len(TIME_CURSOR):].partition("#")
+    # Cursors without a count covered every line at their timestamp
+    return stamp, int(seen) if seen.isdigit() else sys.maxsize
+
+
+def page_device_output(output: str, cursor: Optional[str], limit: int,
+                       max_size: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+    """
+    Trim a `logcat -d` dump to one page after a time cursor.
+
+    The cursor records the last timestamp returned and how many lines at
+    it were returned, so a page cut inside one millisecond resumes at the
+    next line of that millisecond. Timestamps are only compared for
+    equality: the device already filtered by time, and MM-DD stamps do
+    not order across a year boundary.
+
+    Args:
+        output: threadtime logcat output (from -t N or -T <cursor time>)
+        cursor: Cursor from a previous page (TIME_CURSOR prefix) or None
+        limit: Maximum lines
+        max_size: Maximum characters
+
+    Returns:
+        Tuple[List[str], Optional[str]]: (lines, cursor for the next page or None)
+    """
+    since, seen = parse_time_cursor(cursor) if cursor else (None, 0)
+    skip = seen
+    lines = []
+    for line in output.splitlines():
+        match = _THREADTIME_STAMP.match(line)
+        if not match:
+            continue
+        # -T is inclusive; skip the lines at the cursor time already returned
+        if skip and match.group(1) == since:
+            skip -= 1
+            continue
+        lines.append(line)
+
+    lines = lines[:limit] if since is not None else lines[-limit:]
+    lines = lines[:_fit_lines(lines, max_size)]
+    if not lines:
+        return lines, cursor
+    stamps = [_THREADTIME_STAMP.match(line).group(1) for line in lines]
+    last = stamps[-1]
+    count = stamps.count(last) + (seen if last == since else 0)
+    return lines, f"{TIME_CURSOR}{last}#{count}"
+
+
+class LogcatCollector:
+    """Background `logcat` stream feeding a LogStore."""
+
+    def __init__(self, client: ADBClient, buffers: Sequence[str] = ("main", "system", "crash"),
+                 memory_bytes: int = 64 * 1024 * 1024, batch_size: int = 512):
+        """
+        Initialize collector.
+
+        Args:
+            client: ADB client for device
+            buffers: Log buffers to collect
+            memory_bytes: Memory budget for the store
+            batch_size: Lines parsed before a vectorized append
+        """
+        self.client = client
+        self.buffers = list(buffers)
+        self.store = LogStore(memory_bytes)
+        self.batch_size = batch_size
+        self.last_ts = 0.0
+        # Rows stored at last_ts, which `-T last_ts` replays on resume
+        self._last_rows: Counter = Counter()
+        self._stream: Optional[ADBStream] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start collecting in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _command(self) -> str:
+        cmd = f"logcat -b {','.join(self.buffers)} -D -v threadtime -v epoch"
+        if self.last_ts:
+            # Resume after reconnect without re-reading the whole buffer
+            cmd += f" -T {self.last_ts:.3f}"
+        return cmd
+
+    def _flush(self, rows: List[Row], buffer: int):
+        """Append rows and remember the ones at the newest timestamp."""
+        self.store.append(rows, buffer)
+        for row in rows:
+            if row[0] > self.last_ts:
+                self.last_ts = row[0]
+                self._last_rows = Counter()
+            if row[0] == self.last_ts:
+                self._last_rows[row] += 1
+
+    def _run(self):
+        while self._running:
+            self._stream = self.client.stream(f"exec-out {self._command()}")
+            buffer = BUFFER_INDEX.get(self.buffers[0], 0)
+            resume_ts = self.last_ts
+            # -T is inclusive: drop only the resume-millisecond rows already stored
+            replayed = Counter(self._last_rows)
+            rows: List[Row] = []
+            while self._running:
+                try:
+                    line = self._stream.readline(timeout=0.1 if rows else None)
+                except TimeoutError:
+                    line = ""
+                if line is None:
+                    break
+                marker = _BUFFER_MARKER.match(line)
+                row = parse_logcat_line(line) if not marker else None
+                if row and row[0] <= resume_ts and replayed[row] > 0:
+                    replayed[row] -= 1
+                elif row and row[0] >= resume_ts:
+                    rows.append(row)
+                # Flush on buffer switch, full batch or idle stream
+                if rows and (marker or not line or len(rows) >= self.batch_size):
+                    self._flush(rows, buffer)
+                    rows = []
+                if marker:
+                    buffer = BUFFER_INDEX.get(marker.group(1), buffer)
+            self._flush(rows, buffer)
+            self._stream.close()
+            if self._running:
+                time.sleep(1)
+
+    @property
+    def alive(self) -> bool:
+        """Check if the logcat stream is running."""
+        return bool(self._running and self._stream and self._stream.alive)
+
+    def stop(self):
+        """Stop collecting."""
+        self._running = False
+        if self._stream:
+            self._stream.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# Running collectors keyed by device serial
+_collectors: Dict[str, LogcatCollector] = {}
+
+
+def get_collector(device_id: str) -> Optional[LogcatCollector]:
+    """Return running collector for device, if any."""
+    return _collectors.get(device_id)
+
+
+def start_collector(client: ADBClient, buffers: Sequence[str] = ("main", "system", "crash"),
+                    memory_bytes: int = 64 * 1024 * 1024) -> LogcatCollector:
+    """Start (or return existing) collector for device."""
+    collector = _collectors.get(client.device_id)
+    if collector is None:
+        collector = LogcatCollector(client, buffers, memory_bytes)
+        collector.start()
+        _collectors[client.device_id] = collector
+    return collector
+
+
+def stop_collector(device_id: str) -> bool:
+    """Stop collector for device. Returns False if none was running."""
+    collector = _collectors.pop(device_id, None)
+    if collector is None:
+        return False
+    collector.stop()
+    return True
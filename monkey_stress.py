@@ -0,0 +1,335 @@
+"""Streaming `monkey` output parsing with logcat crash correlation."""
+
+import re
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from .incidents import Incident, parse_anr_trace, parse_crash_buffer
+from .logcat_store import Row
+
+# Printed by the launch script before it execs monkey in the same process
+PID_PREFIX = ":Atlas: monkey pid="
+
+# Injected events kept for the lead-up to each crash
+RECENT_EVENTS = 10
+# Monkey output lines kept for error reporting
+RECENT_LINES = 50
+# Stack lines kept per crash report
+MAX_STACK_LINES = 64
+
+_EVENT_MARKER = re.compile(r"^// Sending event #(\d+)")
+_REPORT = re.compile(r"^// (CRASH|NOT RESPONDING): (\S+) \(pid (\d+)\)")
+_SEED = re.compile(r"^:Monkey: seed=(-?\d+) count=(\d+)")
+_PID = re.compile(r"^" + re.escape(PID_PREFIX) + r"(\d+)")
+_INJECTED = re.compile(r"^Events injected: (\d+)")
+_SYSTEM_CRASH = re.compile(r"System appears to have crashed at event (\d+)")
+_ANR_IN = re.compile(r"^ANR in (\S+)")
+_REPORT_HEADERS = ("Short Msg:", "Long Msg:", "Build Label:", "Build Changelist:", "Build Time:")
+
+
+class MonkeyReport:
+    """Crash or ANR reported by monkey or seen in logcat during a run."""
+
+    def __init__(self, kind: str, package: str, pid: int, event_index: int, detail: str = "",
+                 recent: Sequence[Tuple[int, str]] = ()):
+        """
+        Initialize report.
+
+        Args:
+            kind: "crash" or "anr"
+            package: Process that crashed or stopped responding
+            pid: Process id (0 if unknown)
+            event_index: Injected event count when the report arrived
+            detail: Short message or ANR reason
+            recent: (event index, line) of the events leading up to it
+        """
+        self.kind = kind
+        self.package = package
+        self.pid = pid
+        self.event_index = event_index
+        self.detail = detail
+        self.recent = list(recent)
+        self.stack: List[str] = []
+        self.incident: Optional[Incident] = None
+        self.source = "monkey"
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Incident fingerprint, if a stack was available."""
+        return self.incident.fingerprint if self.incident else None
+
+    def stack_incident(self) -> Optional[Incident]:
+        """Fingerprint monkey's own Java stack the same way the crash buffer is."""
+        if self.kind != "crash" or not any(line.startswith("at ") for line in self.stack):
+            return None
+        messages = ["FATAL EXCEPTION: main", f"Process: {self.package}, PID: {self.pid}"] + self.stack
+        rows = [(0.0, self.pid, self.pid, 0, "AndroidRuntime", message) for message in messages]
+        incidents = parse_crash_buffer(rows)
+        return incidents[0] if incidents else None
+
+
+def monkey_script(command: str) -> str:
+    """Device script printing its PID, then replacing itself with the monkey command."""
+    return f"echo {PID_PREFIX}$$; exec {command}"
+
+
+class MonkeyParser:
+    """Incremental parser for `monkey -v -v` output."""
+
+    def __init__(self, recent_events: int = RECENT_EVENTS):
+        """
+        Initialize parser.
+
+        Args:
+            recent_events: Injected events remembered before each report
+        """
+        self.pid: Optional[int] = None
+        self.seed: Optional[int] = None
+        self.count: Optional[int] = None
+        self.events = 0
+        self.injected: Optional[int] = None
+        self.finished = False
+        self.aborted = False
+        self.system_crash: Optional[int] = None
+        self.dropped = ""
+        self.errors: List[str] = []
+        self.recent: Deque[Tuple[int, str]] = deque(maxlen=recent_events)
+        self.tail: Deque[str] = deque(maxlen=RECENT_LINES)
+        self._open: Optional[MonkeyReport] = None
+
+    def feed(self, line: str) -> Optional[MonkeyReport]:
+        """
+        Consume one output line.
+
+        Args:
+            line: Raw monkey output line
+
+        Returns:
+            MonkeyReport or None: A report once its block is complete
+        """
+        text = line.strip()
+        if not text:
+            return None
+        self.tail.append(text)
+        done = None
+        if self._open is not None:
+            done = self._continue(text)
+            if self._open is not None:
+                return done
+
+        if text.startswith((":Sending ", ":Switch:")) and self.injected is None:
+            self.events += 1
+            self.recent.append((self.events, text))
+            return done
+        marker = _EVENT_MARKER.match(text)
+        if marker:
+            self.events = max(self.events, int(marker.group(1)))
+            return done
+        report = _REPORT.match(text)
+        if report:
+            kind = "crash" if report.group(1) == "CRASH" else "anr"
+            self._open = MonkeyReport(kind, report.group(2), int(report.group(3)), self.events, recent=self.recent)
+            return done
+        seed = _SEED.match(text)
+        if seed:
+            self.seed, self.count = int(seed.group(1)), int(seed.group(2))
+        elif _PID.match(text):
+            self.pid = int(_PID.match(text).group(1))
+        elif _INJECTED.match(text):
+            self.injected = int(_INJECTED.match(text).group(1))
+            self.events = max(self.events, self.injected)
+        elif text.startswith(":Dropped:"):
+            self.dropped = text[len(":Dropped:"):].strip()
+        elif text.startswith("// Monkey finished"):
+            self.finished = True
+        elif text.startswith("** Monkey aborted"):
+            self.aborted = True
+        elif _SYSTEM_CRASH.search(text):
+            self.system_crash = int(_SYSTEM_CRASH.search(text).group(1))
+        elif text.startswith(("** Error", "** No activities", "Error:")):
+            self.errors.append(text)
+        return done
+
+    def _continue(self, text: str) -> Optional[MonkeyReport]:
+        """Extend the open report; returns it when its block ended."""
+        report = self._open
+        if report.kind == "crash":
+            if not text.startswith("//"):
+                return self.close()
+            body = text[2:].strip()
+            if not body:
+                return self.close()
+            if body.startswith("Long Msg:") or (body.startswith("Short Msg:") and not report.detail):
+                report.detail = body.split(":", 1)[1].strip()
+            elif not body.startswith(_REPORT_HEADERS) and len(report.stack) < MAX_STACK_LINES:
+                report.stack.append(body)
+            return None
+        # ANR details are printed without the comment prefix
+        if text.startswith((":", "//", "**")):
+            return self.close()
+        if text.startswith("Reason:"):
+            report.detail = text.split(":", 1)[1].strip()
+        return None
+
+    def close(self) -> Optional[MonkeyReport]:
+        """Finish the open report (end of output or next block)."""
+        report, self._open = self._open, None
+        if report is not None and report.kind == "crash":
+            report.incident = report.stack_incident()
+        return report
+
+
+class LogcatCrashes:
+    """Bounded crash-buffer rows and ANR notices with the event count at arrival."""
+
+    def __init__(self, max_rows: int = 5000):
+        """
+        Initialize collector.
+
+        Args:
+            max_rows: Crash buffer rows kept (oldest dropped)
+        """
+        self.rows: Deque[Row] = deque(maxlen=max_rows)
+        self.arrival: Dict[float, int] = {}
+        self.anrs: List[Tuple[str, int, str]] = []
+
+    def add(self, row: Row, event_index: int) -> Optional[str]:
+        """
+        Record one logcat entry.
+
+        Args:
+            row: Parsed `logcat -v threadtime -v epoch` entry
+            event_index: Injected event count when it arrived
+
+        Returns:
+            str or None: "crash" or "anr" if the entry starts a new one
+        """
+        message = row[5]
+        if row[4] == "ActivityManager":
+            anr = _ANR_IN.match(message)
+            if anr:
+                self.anrs.append((anr.group(1), event_index, message))
+                return "anr"
+            return None
+        self.rows.append(row)
+        self.arrival.setdefault(row[0], event_index)
+        if message.startswith("FATAL EXCEPTION") or "*** *** ***" in message:
+            return "crash"
+        return None
+
+    def incidents(self) -> List[Tuple[Incident, int]]:
+        """Crash incidents parsed so far with the event count when each started."""
+        return [(incident, self.arrival.get(incident.timestamp, 0)) for incident in parse_crash_buffer(list(self.rows))]
+
+
+def _same_process(a: str, b: str) -> bool:
+    """Compare package names ignoring ":process" suffixes."""
+    return a.split(":")[0] == b.split(":")[0]
+
+
+def correlate(reports: List[MonkeyReport], logcat: LogcatCrashes, anr_traces: Sequence[str] = ()
+              ) -> List[MonkeyReport]:
+    """
+    Attach logcat crash fingerprints to monkey reports and add what monkey missed.
+
+    Crash-buffer incidents replace fingerprints taken from monkey's own stack
+    (native crashes only have frames there). ANR reports are fingerprinted
+    from trace files when given.
+
+    Args:
+        reports: Reports parsed from monkey output, in order
+        logcat: Crash entries seen during the run
+        anr_traces: Contents of ANR trace files written during the run
+
+    Returns:
+        List[MonkeyReport]: All reports ordered by event index
+    """
+    unmatched = logcat.incidents()
+    for report in reports:
+        if report.kind != "crash":
+            continue
+        for i, (incident, _) in enumerate(unmatched):
+            if _same_process(incident.package, report.package):
+                report.incident, report.source = incident, "logcat"
+                del unmatched[i]
+                break
+
+    anr_incidents = [incident for text in anr_traces for incident in parse_anr_trace(text)]
+    reported = [report for report in reports if report.kind == "anr"]
+    for package, event_index, message in logcat.anrs:
+        if not any(_same_process(report.package, package) for report in reported):
+            report = MonkeyReport("anr", package, 0, event_index, message)
+            report.source = "logcat"
+            reports.append(report)
+            reported.append(report)
+    for report in reported:
+        match = next((incident for incident in anr_incidents if _same_process(incident.package, report.package)), None)
+        if match:
+            report.incident = match
+            anr_incidents.remove(match)
+
+    for incident, event_index in unmatched:
+        report = MonkeyReport("crash", incident.package, 0, event_index, incident.detail or incident.cause)
+        report.incident, report.source = incident, "logcat"
+        reports.append(report)
+    return sorted(reports, key=lambda report: report.event_index)
+
+
+def format_stress_summary(parser: MonkeyParser, reports: Sequence[MonkeyReport], command: str, elapsed: float,
+                          stopped: str = "", known: Optional[Dict[str, int]] = None) -> str:
+    """
+    Render a reproducible stress run summary.
+
+    Args:
+        parser: Parser that consumed the run's output
+        reports: Correlated crash and ANR reports
+        command: Monkey command line (to reproduce the run)
+        elapsed: Run time in seconds
+        stopped: Why the run was stopped early, if it was
+        known: Previous occurrence count per fingerprint from the incident store
+
+    Returns:
+        str: Summary text
+    """
+    known = known or {}
+    target = f"/{parser.count}" if parser.count is not None else ""
+    if stopped:
+        outcome = f"stopped ({stopped})"
+    elif parser.finished:
+        outcome = "finished"
+    elif parser.aborted:
+        outcome = "aborted"
+    else:
+        outcome = "ended without completion"
+    lines = [
+        f"Monkey {outcome} after {parser.events}{target} events in {elapsed:.1f}s (seed {parser.seed})",
+        f"Reproduce: {command}",
+    ]
+    if parser.dropped:
+        lines.append(f"Dropped: {parser.dropped}")
+    if parser.system_crash is not None:
+        lines.append(f"System crashed at event {parser.system_crash}")
+    for error in parser.errors[:5]:
+        lines.append(f"Error: {error}")
+
+    crashes = sum(1 for report in reports if report.kind == "crash")
+    lines.append(f"{crashes} crashes, {len(reports) - crashes} ANRs")
+    for report in reports:
+        # Reports only seen in logcat are placed by arrival time
+        approx = "~" if report.pid == 0 else ""
+        head = f"\n[{report.kind}] {report.package} at event {approx}#{report.event_index}"
+        if report.incident:
+            head += f" fingerprint {report.fingerprint}"
+            count = known.get(report.fingerprint)
+            head += f" (seen {count}x before)" if count else " (new)"
+        lines.append(head)
+        if report.incident:
+            lines.append(f"  {report.incident.title}")
+        if report.detail and not (report.incident and report.detail == report.incident.cause):
+            lines.append(f"  {report.detail[:200]}")
+        if report.recent:
+            lines.append("  Last events:")
+            lines += [f"    #{index} {event}" for index, event in report.recent[-5:]]
+    if not reports and not parser.finished and not stopped:
+        lines.append("\nLast output:")
+        lines += [f"  {line}" for line in list(parser.tail)[-10:]]
+    return "\n".join(lines)
@@ -0,0 +1,429 @@
+"""Structured package index built from one `dumpsys package` pass per device."""
+
+import re
+import shlex
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .adb_client import ADBClient
+
+# Full rebuild after this many seconds even without install/uninstall
+INDEX_MAX_AGE = 1800.0
+# Seconds without output before a dump is considered stuck
+DUMP_IDLE_TIMEOUT = 60.0
+
+COMPONENT_TYPES = ("activities", "receivers", "services", "providers")
+
+_RESOLVER_TABLES = {
+    "Activity Resolver Table:": "activities",
+    "Receiver Resolver Table:": "receivers",
+    "Service Resolver Table:": "services",
+    "Provider Resolver Table:": "providers",
+}
+_COMPONENT = re.compile(r"^\s+[0-9a-f]+ ([\w.$]+)/([\w.$]+)(?: filter [0-9a-f]+)?$")
+_FILTER_ENTRY = re.compile(r'^\s+(Action|Category|Scheme|Type): "(.*)"')
+_PROVIDER = re.compile(r"Provider\{[0-9a-f]+ ([\w.$]+)/([\w.$]+)\}")
+_PACKAGE = re.compile(r"^  Package \[([\w.]+)\] \(")
+_KEY_VALUE = re.compile(r"(\w+)=(\[[^\]]*\]|\S+)")
+_USER = re.compile(r"^    User (\d+): (.*)")
+_PERMISSION = re.compile(r"^\s+([\w.]+): granted=(true|false)")
+# Values containing spaces ("2024-01-31 10:00:00")
+_TIME_KEYS = ("timeStamp", "firstInstallTime", "lastUpdateTime")
+
+
+class PackageRecord:
+    """Parsed state of one installed package."""
+
+    def __init__(self, name: str):
+        """
+        Initialize record.
+
+        Args:
+            name: Package name
+        """
+        self.name = name
+        self.fields: Dict[str, str] = {}
+        self.flags: List[str] = []
+        self.requested: List[str] = []
+        # permission -> (granted, "install" or "runtime")
+        self.permissions: Dict[str, Tuple[bool, str]] = {}
+        self.users: Dict[int, Dict[str, str]] = {}
+        # type -> component -> {"actions", "categories", "schemes", "types", "authorities"}
+        self.components: Dict[str, Dict[str, Dict[str, Set[str]]]] = {kind: {} for kind in COMPONENT_TYPES}
+
+    def _int(self, key: str) -> Optional[int]:
+        value = self.fields.get(key, "")
+        return int(value) if value.lstrip("-").isdigit() else None
+
+    @property
+    def uid(self) -> Optional[int]:
+        return self._int("userId") if "userId" in self.fields else self._int("appId")
+
+    @property
+    def version_code(self) -> Optional[int]:
+        return self._int("versionCode")
+
+    @property
+    def version_name(self) -> str:
+        return self.fields.get("versionName", "")
+
+    @property
+    def code_path(self) -> str:
+        return self.fields.get("codePath", "")
+
+    @property
+    def system(self) -> bool:
+        return "SYSTEM" in self.flags
+
+    def component(self, kind: str, name: str) -> Dict[str, Set[str]]:
+        """Get or create a component entry."""
+        return self.components[kind].setdefault(
+            name, {"actions": set(), "categories": set(), "schemes": set(), "types": set(), "authorities": set()})
+
+    def launcher_activities(self) -> List[str]:
+        """Activities with MAIN/LAUNCHER intent filters."""
+        return [name for name, info in self.components["activities"].items()
+                if "android.intent.category.LAUNCHER" in info["categories"]
+                and "android.intent.action.MAIN" in info["actions"]]
+
+
+class _DumpParser:
+    """Line-by-line parser of `dumpsys package` output (full or per package)."""
+
+    def __init__(self):
+        self.records: Dict[str, PackageRecord] = {}
+        self._section = ""
+        self._kind: Optional[str] = None
+        self._current: Optional[Dict[str, Set[str]]] = None
+        self._package: Optional[PackageRecord] = None
+        self._list: Optional[str] = None
+        self._list_indent = 0
+        self._authority: Optional[str] = None
+
+    def _record(self, name: str) -> PackageRecord:
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = PackageRecord(name)
+        return record
+
+    def feed(self, line: str):
+        """Consume one output line."""
+        if not line.strip():
+            return
+        if not line.startswith(" "):
+            # Top-level section header
+            self._section = line.strip()
+            self._kind = _RESOLVER_TABLES.get(self._section)
+            self._current = self._package = None
+            self._list = None
+            return
+        if self._kind:
+            self._resolver_line(line)
+        elif self._section == "Packages:":
+            self._package_line(line)
+        elif self._section == "ContentProvider Authorities:":
+            self._authority_line(line)
+        elif self._section == "Registered ContentProviders:":
+            match = _PROVIDER.search(line)
+            if match:
+                package, cls = match.groups()
+                self._record(package).component("providers", _full_class(package, cls))
+
+    def _resolver_line(self, line: str):
+        match = _COMPONENT.match(line)
+        if match:
+            package, cls = match.groups()
+            self._current = self._record(package).component(self._kind, _full_class(package, cls))
+            return
+        entry = _FILTER_ENTRY.match(line)
+        if entry and self._current is not None:
+            key = {"Action": "actions", "Category": "categories", "Scheme": "schemes", "Type": "types"}[entry.group(1)]
+            self._current[key].add(entry.group(2))
+
+    def _authority_line(self, line: str):
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]:"):
+            self._authority = stripped[1:-2]
+            return
+        match = _PROVIDER.search(stripped)
+        if match and self._authority:
+            package, cls = match.groups()
+            self._record(package).component("providers", _full_class(package, cls))["authorities"].add(self._authority)
+            self._authority = None
+
+    def _package_line(self, line: str):
+        match = _PACKAGE.match(line)
+        if match:
+            self._package = self._record(match.group(1))
+            self._list = None
+            return
+        record = self._package
+        if record is None:
+            return
+        indent = len(line) - len(line.lstrip())
+        stripped = line.strip()
+
+        if self._list and indent > self._list_indent:
+            self._list_item(record, stripped)
+            return
+        self._list = None
+
+        user = _USER.match(line)
+        if user:
+            record.users[int(user.group(1))] = dict(_KEY_VALUE.findall(user.group(2)))
+            return
+        if stripped.endswith("permissions:"):
+            self._list = stripped[:-1]
+            self._list_indent = indent
+            return
+        if indent != 4:
+            return
+        key = stripped.split("=", 1)[0]
+        if key in _TIME_KEYS:
+            record.fields[key] = stripped.split("=", 1)[1]
+        elif key in ("flags", "pkgFlags"):
+            record.flags = sorted(set(record.flags) | set(stripped.split("=", 1)[1].strip("[] ").split()))
+        else:
+            for name, value in _KEY_VALUE.findall(stripped):
+                record.fields.setdefault(name, value)
+
+    def _list_item(self, record: PackageRecord, item: str):
+        if self._list == "requested permissions":
+            record.requested.append(item.split(":", 1)[0].split(",", 1)[0])
+            return
+        match = _PERMISSION.match(" " + item)
+        if match:
+            kind = "runtime" if self._list == "runtime permissions" else "install"
+            # Runtime grants are per user; keep the first user's state
+            record.permissions.setdefault(match.group(1), (match.group(2) == "true", kind))
+
+
+def _full_class(package: str, cls: str) -> str:
+    return package + cls if cls.startswith(".") else cls
+
+
+def parse_dumpsys_package(lines: Iterable[str]) -> Dict[str, PackageRecord]:
+    """
+    Parse `dumpsys package` output into records.
+
+    Args:
+        lines: Output lines of a full or per-package dump (may be concatenated)
+
+    Returns:
+        Dict[str, PackageRecord]: Packages found in the Packages section
+    """
+    parser = _DumpParser()
+    for line in lines:
+        parser.feed(line)
+    # Resolver tables also name packages that are not installed for this user
+    return {name: record for name, record in parser.records.items() if record.fields}
+
+
+def parse_package_list(output: str) -> Dict[str, Tuple[str, Optional[int]]]:
+    """Parse `pm list packages -f --show-versioncode` into name -> (apk path, version code)."""
+    packages = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith("package:"):
+            continue
+        entry, _, version = line[len("package:"):].partition(" versionCode:")
+        path, _, name = entry.rpartition("=")
+        packages[name] = (path, int(version) if version.strip().isdigit() else None)
+    return packages
+
+
+class PackageIndex:
+    """Package records of one device with lookups by uid, permission and component."""
+
+    def __init__(self):
+        self.records: Dict[str, PackageRecord] = {}
+        self.built_at = 0.0
+        self._by_uid: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _stream_dump(self, client: ADBClient, command: str) -> Dict[str, PackageRecord]:
+        stream = client.stream(f"shell {shlex.quote(command)}")
+        parser = _DumpParser()
+        try:
+            while True:
+                line = stream.readline(DUMP_IDLE_TIMEOUT)
+                if line is None:
+                    break
+                parser.feed(line)
+        finally:
+            stream.close()
+        return {name: record for name, record in parser.records.items() if record.fields}
+
+    def build(self, client: ADBClient):
+        """Rebuild from one full `dumpsys package`."""
+        records = self._stream_dump(client, "dumpsys package")
+        if not records:
+            raise RuntimeError("dumpsys package returned no packages")
+        with self._lock:
+            self.records = records
+            self.built_at = time.time()
+            self._reindex()
+
+    def refresh(self, client: ADBClient, packages: Optional[Iterable[str]] = None) -> Tuple[List[str], List[str]]:
+        """
+        Re-dump only changed packages.
+
+        Args:
+            client: ADB client of the device
+            packages: Packages known to have changed; if None, changes are
+                      detected from `pm list packages -f --show-versioncode`
+
+        Returns:
+            Tuple[List[str], List[str]]: (updated or added, removed)
+        """
+        if packages is None:
+            success, output = client.shell("pm list packages -f --show-versioncode", timeout=60)
+            if not success:
+                raise RuntimeError(f"pm list packages failed: {output}")
+            installed = parse_package_list(output)
+            removed = [name for name in self.records if name not in installed]
+            changed = [name for name, (path, version) in installed.items()
+                       if name not in self.records
+                       or (version is not None and self.records[name].version_code != version)
+                       or not path.startswith(self.records[name].code_path or path)]
+        else:
+            changed, removed = list(packages), []
+
+        if changed:
+            script = "; ".join(f"dumpsys package {shlex.quote(name)}" for name in changed)
+            records = self._stream_dump(client, script)
+        else:
+            records = {}
+        removed += [name for name in changed if name not in records and name in self.records]
+        with self._lock:
+            for name in removed:
+                self.records.pop(name, None)
+            self.records.update(records)
+            self._reindex()
+        return sorted(records), sorted(set(removed))
+
+    def remove(self, package_name: str):
+        """Drop a package after it was uninstalled."""
+        with self._lock:
+            if self.records.pop(package_name, None):
+                self._reindex()
+
+    def _reindex(self):
+        by_uid: Dict[int, List[str]] = {}
+        for name, record in self.records.items():
+            if record.uid is not None:
+                by_uid.setdefault(record.uid, []).append(name)
+        self._by_uid = by_uid
+
+    def get(self, package_name: str) -> Optional[PackageRecord]:
+        return self.records.get(package_name)
+
+    def by_uid(self, uid: int) -> List[str]:
+        """Packages sharing an app uid."""
+        return self._by_uid.get(uid % 100000, []) or self._by_uid.get(uid, [])
+
+    def with_permission(self, permission: str, granted_only: bool = True) -> List[str]:
+        """Packages requesting (or holding) a permission."""
+        return sorted(name for name, record in self.records.items()
+                      if (record.permissions.get(permission, (False, ""))[0] if granted_only
+                          else permission in record.requested or permission in record.permissions))
+
+    def find_component(self, name: str) -> List[Tuple[str, str, str]]:
+        """Components whose class name contains name as (package, type, component)."""
+        matches = []
+        for package, record in self.records.items():
+            for kind, components in record.components.items():
+                matches += [(package, kind, component) for component in components if name in component]
+        return matches
+
+
+# Per device indexes
+_indexes: Dict[str, PackageIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_package_index(client: ADBClient, max_age: float = INDEX_MAX_AGE) -> PackageIndex:
+    """
+    Get the device's package index, building it on first use or when too old.
+
+    Args:
+        client: ADB client of the device
+        max_age: Rebuild when the index is older than this (seconds)
+
+    Returns:
+        PackageIndex: Current index
+    """
+    key = client.device_id or "default"
+    with _indexes_lock:
+        index = _indexes.setdefault(key, PackageIndex())
+    if time.time() - index.built_at > max_age:
+        index.build(client)
+    return index
+
+
+def lookup_package(client: ADBClient, package_name: str) -> Optional[PackageRecord]:
+    """Look up a package, re-dumping just that package on a cache miss."""
+    index = get_package_index(client)
+    record = index.get(package_name)
+    if record is None:
+        # Installed outside this tool since the last refresh
+        index.refresh(client, [package_name])
+        record = index.get(package_name)
+    return record
+
+
+def notify_package_changed(device_id: Optional[str], package_name: Optional[str] = None,
+                           removed: bool = False, client: Optional[ADBClient] = None):
+    """
+    Keep an existing index current after install/uninstall.
+
+    Args:
+        device_id: Device the change happened on
+        package_name: Changed package (None if unknown, e.g. after installing an APK file)
+        removed: Package was uninstalled
+        client: Client used to re-dump changed packages
+    """
+    index = _indexes.get(device_id or "default")
+    if index is None or not index.built_at:
+        return
+    if removed and package_name:
+        index.remove(package_name)
+    elif client is not None:
+        try:
+            index.refresh(client, [package_name] if package_name else None)
+        except (RuntimeError, TimeoutError):
+            # Fall back to a full rebuild on next use
+            index.built_at = 0.0
+
+
+def format_package_info(record: PackageRecord) -> str:
+    """Render the key facts of a package."""
+    fields = record.fields
+    user = record.users.get(0) or next(iter(record.users.values()), {})
+    lines = [
+        f"Package: {record.name}",
+        f"Version: {record.version_name} ({record.version_code})",
+        f"SDK: min {fields.get('minSdk', '?')}, target {fields.get('targetSdk', '?')}",
+        f"UID: {record.uid}",
+        f"Type: {'system' if record.system else 'third-party'}",
+        f"Code path: {record.code_path}",
+    ]
+    if fields.get("primaryCpuAbi") not in (None, "null"):
+        lines.append(f"ABI: {fields['primaryCpuAbi']}")
+    for key, title in (("firstInstallTime", "First installed"), ("lastUpdateTime", "Last updated"),
+                       ("installerPackageName", "Installer")):
+        if key in fields:
+            lines.append(f"{title}: {fields[key]}")
+    if user:
+        state = [f"{key}={user[key]}" for key in ("installed", "enabled", "stopped", "suspended") if key in user]
+        lines.append("User 0: " + " ".join(state))
+    if record.flags:
+        lines.append(f"Flags: {' '.join(record.flags)}")
+    granted = sum(1 for ok, _ in record.permissions.values() if ok)
+    lines.append(f"Permissions: {len(record.requested)} requested, {granted} granted")
+    counts = ", ".join(f"{len(record.components[kind])} {kind}" for kind in COMPONENT_TYPES)
+    lines.append(f"Components (with intent filters or authorities): {counts}")
+    launchers = record.launcher_activities()
+    if launchers:
+        lines.append(f"Launcher: {', '.join(launchers)}")
+    return "\n".join(lines)
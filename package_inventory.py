@@ -0,0 +1,182 @@
+"""Per-device package inventory with change history."""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .adb_client import ADBClient
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".atlas", "packages.db")
+
+# (package, change, old version, new version)
+Change = Tuple[str, str, Optional[int], Optional[int]]
+
+
+def parse_pm_list(output: str) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """
+    Parse `pm list packages -U --show-versioncode`.
+
+    Args:
+        output: Command output ("package:<name> versionCode:<n> uid:<n>")
+
+    Returns:
+        Dict[str, Tuple]: package -> (version code, uid)
+    """
+    packages = {}
+    for line in output.splitlines():
+        fields = line.strip().split()
+        if not fields or not fields[0].startswith("package:"):
+            continue
+        values = dict(field.split(":", 1) for field in fields[1:] if ":" in field)
+        version, uid = values.get("versionCode", ""), values.get("uid", "").split(",")[0]
+        packages[fields[0][len("package:"):]] = (int(version) if version.isdigit() else None,
+                                                 int(uid) if uid.isdigit() else None)
+    return packages
+
+
+def diff_packages(old: Dict[str, Tuple], new: Dict[str, Tuple]) -> List[Change]:
+    """Adds, removals and version changes between two snapshots."""
+    changes: List[Change] = []
+    for name in sorted(new.keys() - old.keys()):
+        changes.append((name, "added", None, new[name][0]))
+    for name in sorted(old.keys() - new.keys()):
+        changes.append((name, "removed", old[name][0], None))
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name][0], new[name][0]
+        if before != after:
+            kind = "downgraded" if before is not None and after is not None and after < before else "updated"
+            changes.append((name, kind, before, after))
+    return changes
+
+
+class PackageInventory:
+    """SQLite-backed last known package state per device plus change history."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create) the inventory database.
+
+        Args:
+            path: SQLite file path (":memory:" for a throwaway store)
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS packages (
+                    device_id TEXT, package TEXT, version_code INTEGER, uid INTEGER, since REAL,
+                    PRIMARY KEY (device_id, package));
+                CREATE TABLE IF NOT EXISTS changes (
+                    device_id TEXT, package TEXT, timestamp REAL, change TEXT,
+                    old_version INTEGER, new_version INTEGER);
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    device_id TEXT PRIMARY KEY, first_seen REAL, last_refresh REAL, count INTEGER);
+                CREATE INDEX IF NOT EXISTS idx_packages_package ON packages(package, version_code);
+                CREATE INDEX IF NOT EXISTS idx_changes_time ON changes(timestamp);
+            """)
+
+    def current(self, device_id: str) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        """Last known packages of a device as package -> (version code, uid)."""
+        with self._lock:
+            rows = self._db.execute("SELECT package, version_code, uid FROM packages WHERE device_id = ?",
+                                    (device_id,)).fetchall()
+        return {package: (version, uid) for package, version, uid in rows}
+
+    def update(self, device_id: str, packages: Dict[str, Tuple], timestamp: Optional[float] = None
+               ) -> Tuple[List[Change], bool]:
+        """
+        Store a new snapshot and record what changed.
+
+        Args:
+            device_id: Device the snapshot came from
+            packages: package -> (version code, uid)
+            timestamp: Snapshot time (default: now)
+
+        Returns:
+            Tuple[List[Change], bool]: (changes, True if this was the device's first snapshot)
+        """
+        timestamp = timestamp or time.time()
+        old = self.current(device_id)
+        with self._lock:
+            first = self._db.execute("SELECT 1 FROM snapshots WHERE device_id = ?", (device_id,)).fetchone() is None
+        # The first snapshot is a baseline, not a list of installs
+        changes = [] if first else diff_packages(old, packages)
+
+        with self._lock, self._db:
+            for package, change, before, after in changes:
+                self._db.execute("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?)",
+                                 (device_id, package, timestamp, change, before, after))
+                if change == "removed":
+                    self._db.execute("DELETE FROM packages WHERE device_id = ? AND package = ?", (device_id, package))
+                else:
+                    self._db.execute("INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?)",
+                                     (device_id, package, after, packages[package][1], timestamp))
+            if first:
+                self._db.executemany("INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, NULL)",
+                                     [(device_id, name, version, uid) for name, (version, uid) in packages.items()])
+            self._db.execute(
+                "INSERT INTO snapshots VALUES (?, ?, ?, ?) ON CONFLICT(device_id) DO UPDATE SET "
+                "last_refresh = excluded.last_refresh, count = excluded.count",
+                (device_id, timestamp, timestamp, len(packages)))
+        return changes, first
+
+    def history(self, device_id: Optional[str] = None, package: Optional[str] = None,
+                since: Optional[float] = None, limit: int = 100) -> List[Tuple]:
+        """
+        Recorded changes, newest first.
+
+        Returns:
+            List of (timestamp, device_id, package, change, old version, new version)
+        """
+        where, params = ["1 = 1"], []
+        if device_id:
+            where.append("device_id = ?")
+            params.append(device_id)
+        if package:
+            where.append("package = ?")
+            params.append(package)
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        query = (f"SELECT timestamp, device_id, package, change, old_version, new_version FROM changes "
+                 f"WHERE {' AND '.join(where)} ORDER BY timestamp DESC LIMIT ?")
+        with self._lock:
+            return self._db.execute(query, params + [limit]).fetchall()
+
+    def versions(self, package: str) -> List[Tuple]:
+        """
+        Last known version of a package on every tracked device.
+
+        Returns:
+            List of (device_id, version code or None if not installed, since, last refresh)
+        """
+        with self._lock:
+            return self._db.execute("""
+                SELECT s.device_id, p.version_code, p.since, s.last_refresh
+                FROM snapshots s LEFT JOIN packages p ON p.device_id = s.device_id AND p.package = ?
+                ORDER BY p.version_code, s.device_id""", (package,)).fetchall()
+
+
+def refresh_inventory(client: ADBClient, inventory: PackageInventory) -> Tuple[List[Change], bool, int]:
+    """
+    Snapshot a device's packages and store the delta.
+
+    Args:
+        client: ADB client of the device
+        inventory: Inventory store
+
+    Returns:
+        Tuple[List[Change], bool, int]: (changes, first snapshot, package count)
+
+    Raises:
+        RuntimeError: If the package list cannot be read
+    """
+    success, output = client.shell("pm list packages -U --show-versioncode", timeout=60)
+    packages = parse_pm_list(output) if success else {}
+    if not packages:
+        raise RuntimeError(f"pm list packages failed: {output.strip()[:200]}")
+    changes, first = inventory.update(client.device_id or "default", packages)
+    return changes, first, len(packages)
@@ -0,0 +1,274 @@
+"""Performance measurement tools for Android."""
+
+import shlex
+import time
+from langchain.tools import tool
+from typing import Dict, List, Optional, Tuple
+from ..adb_client import ADBClient
+from ..device_manager import DeviceManager
+from ..fleet import resolve_devices, run_on_devices
+from ..frame_stats import FrameStats, format_comparison, format_frame_summary, parse_framestats
+from ..perfetto_trace import DEFAULT_CATEGORIES, format_trace_summary, record_trace, summarize_trace
+from ..startup_bench import format_launch_summary, parse_am_start, summarize_launches
+
+_device_manager = DeviceManager()
+
+# Frame timing runs keyed by (label, device id)
+_frame_runs: Dict[tuple, Dict] = {}
+
+# framestats keeps only the last 120 frames; poll faster than that fills at 120 Hz
+FRAMESTATS_POLL_INTERVAL = 0.5
+
+DROP_CACHES = "sync && echo 3 > /proc/sys/vm/drop_caches && echo dropped"
+
+
+def _collect_frames(client: ADBClient, package_name: str, duration: float) -> FrameStats:
+    """Reset gfxinfo, then poll framestats for duration seconds over one shell session."""
+    package = shlex.quote(package_name)
+    client.shell(f"dumpsys gfxinfo {package} reset")
+
+    script = f"while true; do dumpsys gfxinfo {package} framestats; sleep {FRAMESTATS_POLL_INTERVAL}; done"
+    stream = client.stream(f"exec-out {shlex.quote(script)}")
+    try:
+        output = list(stream.lines(duration))
+    finally:
+        stream.close()
+
+    # Frames rendered during the last poll interval
+    success, tail = client.shell(f"dumpsys gfxinfo {package} framestats")
+    if success:
+        output.append(tail)
+    return parse_framestats("\n".join(output))
+
+
+@tool
+def measure_frames(package_name: str, device_id: Optional[str] = None, duration_seconds: int = 10, label: str = "run") -> str:
+    """Measure UI rendering performance (frame times, jank, per-phase breakdown) while the app runs.
+
+    Resets frame statistics, then collects every frame rendered during the
+    window. Drive the UI (scroll, animate) during or right before the call.
+    Runs are stored by label for compare_frame_runs.
+
+    Args:
+        package_name: Package to measure
+        device_id: Device serial, comma-separated serials, or "all" (uses default if None)
+        duration_seconds: Collection window in seconds (default: 10)
+        label: Name of this run for later comparison (default: run)
+
+    Returns:
+        str: Frame time percentiles, janky/frozen frames and phase times per device
+    """
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    results = run_on_devices(clients, lambda client: _collect_frames(client, package_name, duration_seconds))
+    lines = [f"Device not found: {d}" for d in missing]
+    for device, success, result in results:
+        if not success:
+            lines.append(f"{device}: failed: {result}")
+            continue
+        summary = result.summary()
+        _frame_runs[(label, device)] = summary
+        lines.append(format_frame_summary(f"{device} [{label}]", summary))
+    return "\n".join(lines)
+
+
+@tool
+def compare_frame_runs(labels: str, device_id: Optional[str] = None) -> str:
+    """Compare stored measure_frames runs side by side (change relative to the first label).
+
+    Args:
+        labels: Comma-separated run labels, e.g. "baseline,candidate"
+        device_id: Device serial, comma-separated serials, or "all" (uses default if None)
+
+    Returns:
+        str: Comparison table per device
+    """
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    wanted = [label.strip() for label in labels.split(",") if label.strip()]
+    sections = []
+    for client in clients:
+        device = client.device_id or "default"
+        runs = {label: _frame_runs[(label, device)] for label in wanted if (label, device) in _frame_runs}
+        absent = [label for label in wanted if label not in runs]
+        section = f"{device}:\n" + format_comparison(runs)
+        if absent:
+            section += f"\nNo runs recorded for: {', '.join(absent)}"
+        sections.append(section)
+    return "\n\n".join(sections)
+
+
+@tool
+def capture_trace(device_id: Optional[str] = None, duration_seconds: int = 10, categories: Optional[str] = None,
+                  apps: str = "*", output_path: Optional[str] = None, top_n: int = 15) -> str:
+    """Record a system trace (Perfetto) and summarize scheduling and atrace slices.
+
+    Captures sched switch/wakeup, CPU frequency and atrace events, streams
+    the trace back and reports CPU time per process/thread, runnable
+    (scheduling) latency per process, top atrace slices and average CPU
+    frequency. Reproduce the slow scenario during the capture window.
+
+    Args:
+        device_id: Device serial (uses default if None)
+        duration_seconds: Trace duration in seconds (default: 10)
+        categories: Comma-separated atrace categories (default: gfx,view,input,am,wm,sched,dalvik,binder_driver)
+        apps: Comma-separated packages with app tracing enabled, "*" for all (default: *)
+        output_path: Optional local path to also save the raw trace (open in ui.perfetto.dev)
+        top_n: Rows per table (default: 15)
+
+    Returns:
+        str: Trace summary tables or error message
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    wanted = [c.strip() for c in categories.split(",") if c.strip()] if categories else list(DEFAULT_CATEGORIES)
+    packages = [a.strip() for a in apps.split(",") if a.strip()]
+    success, path = record_trace(client, duration_seconds, wanted, packages)
+    if not success:
+        return f"Trace capture failed: {path}"
+
+    process = client.popen(f"exec-out cat {shlex.quote(path)}")
+    try:
+        if output_path:
+            with open(output_path, "wb") as copy:
+                summary = summarize_trace(process.stdout, top_n, copy_to=copy)
+        else:
+            summary = summarize_trace(process.stdout, top_n)
+    except ValueError as e:
+        return f"Failed to parse trace: {e}"
+    finally:
+        process.kill()
+        process.wait()
+        client.shell(f"rm -f {shlex.quote(path)}")
+
+    result = format_trace_summary(summary)
+    if output_path:
+        result += f"\n\nRaw trace saved to: {output_path}"
+    return result
+
+
+@tool
+def summarize_trace_file(path: str, top_n: int = 15) -> str:
+    """Summarize a Perfetto trace file on the host (CPU time, runnable latency, atrace slices).
+
+    Args:
+        path: Local path of a .perfetto-trace / .pftrace file
+        top_n: Rows per table (default: 15)
+
+    Returns:
+        str: Trace summary tables or error message
+    """
+    try:
+        with open(path, "rb") as trace:
+            summary = summarize_trace(trace, top_n)
+    except OSError as e:
+        return f"Cannot read trace: {e}"
+    except ValueError as e:
+        return f"Failed to parse trace: {e}"
+    return format_trace_summary(summary)
+
+
+def _launch_component(client: ADBClient, package_name: str, activity: Optional[str]) -> Optional[str]:
+    """Component to start: given activity or the package's launcher activity."""
+    if activity:
+        return activity if "/" in activity else f"{package_name}/{activity}"
+    success, output = client.shell(
+        f"cmd package resolve-activity --brief -c android.intent.category.LAUNCHER {shlex.quote(package_name)}")
+    lines = output.strip().splitlines() if success else []
+    return lines[-1].strip() if lines and "/" in lines[-1] else None
+
+
+def _drop_caches(client: ADBClient) -> bool:
+    """Drop the device page cache; needs adb root or su."""
+    for command in (DROP_CACHES, f"su 0 sh -c {shlex.quote(DROP_CACHES)}"):
+        # Quoted as one argument so the redirect runs on the device, not the host
+        success, output = client.shell(shlex.quote(command))
+        if success and output.strip().endswith("dropped"):
+            return True
+    return False
+
+
+def _benchmark_start(client: ADBClient, package_name: str, activity: Optional[str], iterations: int,
+                     warmup: int, mode: str, drop_caches: bool, settle: float) -> Tuple[Dict, str, List[str]]:
+    """Launch the app warmup + iterations times with am start -W and summarize."""
+    component = _launch_component(client, package_name, activity)
+    if not component:
+        raise RuntimeError(f"No launcher activity found for {package_name}")
+    package = shlex.quote(package_name)
+    notes = []
+    launches = []
+    if mode == "warm":
+        client.shell(f"am force-stop {package}")
+    for _ in range(warmup + iterations):
+        if mode == "cold":
+            client.shell(f"am force-stop {package}")
+            if drop_caches and not _drop_caches(client):
+                notes.append("cache drop unavailable (needs root), continuing without it")
+                drop_caches = False
+        else:
+            # BACK finishes the activity but keeps the process; HOME would leave it
+            # resumable and measure hot starts
+            client.shell("input keyevent KEYCODE_BACK")
+        time.sleep(settle)
+        success, output = client.shell(f"am start -W -n {shlex.quote(component)}", timeout=60)
+        launch = parse_am_start(output) if success else {"error": output.strip()}
+        if mode == "warm" and "error" not in launch and launch.get("LaunchState", "WARM") != "WARM":
+            launch["error"] = f"launch state {launch['LaunchState']}, expected WARM"
+        launches.append(launch)
+    if mode == "cold":
+        client.shell(f"am force-stop {package}")
+    return summarize_launches(launches, warmup), component, notes
+
+
+@tool
+def benchmark_app_start(package_name: str, device_id: Optional[str] = None, activity: Optional[str] = None,
+                        iterations: int = 10, warmup: int = 1, mode: str = "cold",
+                        drop_caches: bool = False, settle_seconds: float = 1.0) -> str:
+    """Benchmark app startup time with repeated `am start -W` launches.
+
+    Cold mode force-stops the app before every launch (optionally dropping
+    the page cache, which needs root); warm mode sends BACK between launches
+    so the activity is recreated in a live process, and counts launches the
+    device does not report as WARM as failed. Leading warmup runs are
+    discarded. Reports TotalTime/WaitTime mean with 95% confidence
+    interval, median and p90.
+
+    Args:
+        package_name: Package to launch
+        device_id: Device serial, comma-separated serials, or "all" (uses default if None)
+        activity: Activity to start, e.g. ".MainActivity" (default: launcher activity)
+        iterations: Measured launches per device (default: 10)
+        warmup: Launches discarded before measuring (default: 1)
+        mode: "cold" or "warm" (default: cold)
+        drop_caches: Drop page cache before cold launches (default: False)
+        settle_seconds: Pause before each launch in seconds (default: 1.0)
+
+    Returns:
+        str: Launch time statistics per device
+    """
+    if mode not in ("cold", "warm"):
+        return f"Unknown mode: {mode} (use cold or warm)"
+    if iterations < 1:
+        return "iterations must be at least 1"
+
+    clients, missing = resolve_devices(_device_manager, device_id)
+    if not clients:
+        return f"Device not found: {', '.join(missing) or 'no devices connected'}"
+
+    results = run_on_devices(clients, lambda client: _benchmark_start(
+        client, package_name, activity, iterations, max(warmup, 0), mode, drop_caches, settle_seconds))
+    lines = [f"Device not found: {d}" for d in missing]
+    for device, success, result in results:
+        if not success:
+            lines.append(f"{device}: failed: {result}")
+            continue
+        summary, component, notes = result
+        lines.append(format_launch_summary(f"{device} [{mode}]", summary, component))
+        lines.extend(f"  note: {note}" for note in notes)
+    return "\n".join(lines)
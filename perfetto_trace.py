@@ -0,0 +1,605 @@
+"""Perfetto trace capture and a streaming protobuf summarizer.
+
+The trace is read packet by packet from any binary stream (e.g. `adb
+exec-out cat`), so memory is bounded by one packet plus a short reorder
+window, never by the trace size. Only the fields needed for the
+summaries are decoded: ftrace sched_switch/sched_waking (full or
+compact_sched encoding), cpu_frequency, atrace print events and the
+process tree.
+"""
+
+import heapq
+import shlex
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import numpy as np
+from .adb_client import ADBClient
+
+DEVICE_TRACE_DIR = "/data/misc/perfetto-traces"
+DEFAULT_CATEGORIES = ("gfx", "view", "input", "am", "wm", "sched", "dalvik", "binder_driver")
+
+# Field numbers (perfetto/trace protos)
+TRACE_PACKET = 1
+PACKET_FTRACE_EVENTS = 1
+PACKET_PROCESS_TREE = 2
+BUNDLE_CPU = 1
+BUNDLE_EVENT = 2
+BUNDLE_COMPACT_SCHED = 4
+EVENT_TIMESTAMP = 1
+EVENT_PID = 2
+EVENT_PRINT = 3
+EVENT_SCHED_SWITCH = 4
+EVENT_CPU_FREQUENCY = 11
+EVENT_SCHED_WAKEUP = 17
+EVENT_SCHED_WAKING = 20
+
+# ftrace buffers of different CPUs are drained independently; events
+# are only matched across CPUs once they are this much older than the
+# newest timestamp seen
+REORDER_WINDOW_NS = 1_000_000_000
+FLUSH_EVENTS = 1_000_000
+
+# Runnable latency histogram: log2 buckets of microseconds
+LATENCY_BUCKETS = 32
+
+_WIRE_VARINT, _WIRE_64BIT, _WIRE_LEN, _WIRE_32BIT = 0, 1, 2, 5
+
+
+def build_config(duration_ms: int, categories: List[str], apps: List[str], buffer_mb: int = 64) -> str:
+    """
+    Text format trace config for sched, CPU frequency and atrace.
+
+    Args:
+        duration_ms: Trace duration
+        categories: atrace categories (see `atrace --list_categories`)
+        apps: Packages with app-level atrace enabled ("*" for all)
+        buffer_mb: In-memory trace buffer before it is written to the file
+
+    Returns:
+        str: Config for `perfetto --txt -c -`
+    """
+    ftrace = [
+        'ftrace_events: "sched/sched_switch"',
+        'ftrace_events: "sched/sched_waking"',
+        'ftrace_events: "power/cpu_frequency"',
+        'ftrace_events: "ftrace/print"',
+    ]
+    ftrace += [f'atrace_categories: "{category}"' for category in categories]
+    ftrace += [f'atrace_apps: "{app}"' for app in apps]
+    ftrace += ["compact_sched { enabled: true }", "drain_period_ms: 250"]
+    return "\n".join([
+        f"buffers {{ size_kb: {buffer_mb * 1024} fill_policy: DISCARD }}",
+        "buffers { size_kb: 2048 fill_policy: DISCARD }",
+        "data_sources { config { name: \"linux.ftrace\" target_buffer: 0 ftrace_config { "
+        + " ".join(ftrace) + " } } }",
+        "data_sources { config { name: \"linux.process_stats\" target_buffer: 1 "
+        "process_stats_config { scan_all_processes_on_start: true } } }",
+        f"duration_ms: {duration_ms}",
+        "write_into_file: true",
+        "file_write_period_ms: 2500",
+        "flush_period_ms: 5000",
+    ])
+
+
+def record_trace(client: ADBClient, duration_seconds: int, categories: List[str],
+                 apps: List[str], name: str = "atlas") -> Tuple[bool, str]:
+    """
+    Record a trace into a file on the device.
+
+    Args:
+        client: ADB client of the target device
+        duration_seconds: Trace duration
+        categories: atrace categories
+        apps: Packages with app-level atrace enabled
+        name: Trace file name (without extension)
+
+    Returns:
+        Tuple[bool, str]: (success, device path or error message)
+    """
+    path = f"{DEVICE_TRACE_DIR}/{name}.perfetto-trace"
+    config = build_config(duration_seconds * 1000, categories, apps)
+    command = f"perfetto --txt -c - -o {shlex.quote(path)}"
+    success, output = client.execute_bytes(f"shell {shlex.quote(command)}",
+                                           timeout=duration_seconds + 60, input=config.encode())
+    if not success:
+        return False, output.decode("utf-8", "replace").strip() or "perfetto failed"
+    return True, path
+
+
+def _varint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(buf, pos: int, end: int):
+    """Iterate (field, wire type, value) of a message; LEN values are (start, end)."""
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        wire = key & 7
+        if wire == _WIRE_VARINT:
+            value, pos = _varint(buf, pos)
+        elif wire == _WIRE_LEN:
+            length, pos = _varint(buf, pos)
+            value = (pos, pos + length)
+            pos += length
+        elif wire == _WIRE_64BIT:
+            value = int.from_bytes(buf[pos:pos + 8], "little")
+            pos += 8
+        elif wire == _WIRE_32BIT:
+            value = int.from_bytes(buf[pos:pos + 4], "little")
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire}")
+        yield key >> 3, wire, value
+
+
+def packed_varints(data: bytes) -> np.ndarray:
+    """Decode a packed repeated varint field in one vectorized pass."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(raw.size) - np.repeat(starts, ends - starts + 1)
+    parts = (raw & 0x7F).astype(np.uint64) << (position * 7).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+def iter_packets(stream: BinaryIO, max_packet: int = 256 * 1024 * 1024):
+    """
+    Read TracePacket payloads one at a time from a trace stream.
+
+    Args:
+        stream: Binary file-like object positioned at trace start
+        max_packet: Sanity limit for a single packet
+
+    Yields:
+        bytes: Serialized TracePacket
+    """
+    while True:
+        key = _read_varint(stream)
+        if key is None:
+            return
+        if key & 7 != _WIRE_LEN:
+            raise ValueError("Not a Perfetto trace (unexpected wire type)")
+        length = _read_varint(stream)
+        if length is None or length > max_packet:
+            raise ValueError("Truncated or corrupt trace packet")
+        data = stream.read(length)
+        if len(data) < length:
+            return
+        if key >> 3 == TRACE_PACKET:
+            yield data
+
+
+def _read_varint(stream: BinaryIO) -> Optional[int]:
+    result = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+class TraceSummarizer:
+    """Incremental aggregation of thread CPU time, runnable latency and atrace slices."""
+
+    def __init__(self, top_n: int = 15):
+        """
+        Initialize summarizer.
+
+        Args:
+            top_n: Rows per summary table
+        """
+        self.top_n = top_n
+        self.packets = 0
+        self.sched_events = 0
+        self.first_ts: Optional[int] = None
+        self.last_ts = 0
+
+        self.comm: Dict[int, str] = {}
+        self.tgid: Dict[int, int] = {}
+        self.process_names: Dict[int, str] = {}
+
+        # Per CPU (timestamp, tid) of the last switch
+        self._cpu_state: Dict[int, Tuple[int, int]] = {}
+        self.cpu_time: Dict[int, int] = {}
+
+        # (tid, ns) running intervals, reduced into cpu_time on flush
+        self._runs: List[np.ndarray] = []
+
+        # Reorder buffers: runnable starts and switch-ins as (ts, tid) arrays
+        self._starts: List[np.ndarray] = []
+        self._ins: List[np.ndarray] = []
+        self._buffered = 0
+        self._flush_at = FLUSH_EVENTS
+        # tid -> [waits, total ns, max ns, log2 us histogram]
+        self.latency: Dict[int, List] = {}
+
+        self._prints: List[Tuple[int, int, str]] = []
+        self._stacks: Dict[int, List[Tuple[int, str]]] = {}
+        self.slices: Dict[str, List[int]] = {}
+        self.longest: List[Tuple[int, str, int]] = []
+
+        self._freq: List[Tuple[int, int, int]] = []
+
+    # -- decoding ---------------------------------------------------------
+
+    def add_packet(self, data: bytes):
+        """Decode one TracePacket."""
+        self.packets += 1
+        for field, wire, value in _fields(data, 0, len(data)):
+            if wire != _WIRE_LEN:
+                continue
+            if field == PACKET_FTRACE_EVENTS:
+                self._bundle(data, *value)
+            elif field == PACKET_PROCESS_TREE:
+                self._process_tree(data, *value)
+        if self._buffered >= self._flush_at:
+            self._flush(self.last_ts - REORDER_WINDOW_NS)
+            # Avoid re-sorting on every packet when the window itself is large
+            self._flush_at = max(FLUSH_EVENTS, 2 * self._buffered)
+
+    def _process_tree(self, buf: bytes, pos: int, end: int):
+        for field, wire, value in _fields(buf, pos, end):
+            if wire != _WIRE_LEN:
+                continue
+            info = {f: v for f, w, v in _fields(buf, *value) if f != 3}
+            if field == 1:
+                # Process: pid = 1, cmdline = 3 (first entry)
+                pid = info.get(1, 0)
+                cmdline = next((v for f, w, v in _fields(buf, *value) if f == 3), None)
+                if cmdline:
+                    self.process_names[pid] = buf[cmdline[0]:cmdline[1]].decode("utf-8", "replace")
+                self.tgid.setdefault(pid, pid)
+            elif field == 2:
+                # Thread: tid = 1, name = 2, tgid = 5
+                tid = info.get(1, 0)
+                self.tgid[tid] = info.get(5, tid)
+                if 2 in info:
+                    self.comm[tid] = buf[info[2][0]:info[2][1]].decode("utf-8", "replace")
+
+    def _bundle(self, buf: bytes, pos: int, end: int):
+        cpu = 0
+        events = []
+        compact = None
+        for field, wire, value in _fields(buf, pos, end):
+            if field == BUNDLE_CPU:
+                cpu = value
+            elif field == BUNDLE_EVENT:
+                events.append(value)
+            elif field == BUNDLE_COMPACT_SCHED:
+                compact = value
+
+        switches: List[Tuple[int, int, int]] = []
+        wakings: List[Tuple[int, int]] = []
+        for start, stop in events:
+            self._event(buf, start, stop, cpu, switches, wakings)
+        if switches:
+            data = np.array(switches, dtype=np.int64)
+            self._switches(cpu, data[:, 0], data[:, 1], data[:, 2])
+        if wakings:
+            data = np.array(wakings, dtype=np.int64)
+            self._starts.append(data)
+            self._buffered += len(data)
+        if compact:
+            self._compact_sched(buf, *compact, cpu)
+
+    def _event(self, buf: bytes, pos: int, end: int, cpu: int, switches: List, wakings: List):
+        ts = pid = 0
+        for field, wire, value in _fields(buf, pos, end):
+            if field == EVENT_TIMESTAMP:
+                ts = value
+            elif field == EVENT_PID:
+                pid = value
+            elif wire != _WIRE_LEN:
+                continue
+            elif field == EVENT_SCHED_SWITCH:
+                # prev_pid = 2, prev_state = 4, next_comm = 5, next_pid = 6
+                info = {f: v for f, w, v in _fields(buf, *value)}
+                next_pid = info.get(6, 0)
+                if 5 in info:
+                    self.comm[next_pid] = buf[info[5][0]:info[5][1]].decode("utf-8", "replace")
+                switches.append((ts, next_pid, info.get(4, 0)))
+            elif field in (EVENT_SCHED_WAKING, EVENT_SCHED_WAKEUP):
+                info = {f: v for f, w, v in _fields(buf, *value)}
+                wakings.append((ts, info.get(2, 0)))
+            elif field == EVENT_CPU_FREQUENCY:
+                # state (kHz) = 1, cpu_id = 2
+                info = {f: v for f, w, v in _fields(buf, *value)}
+                self._freq.append((ts, info.get(2, 0), info.get(1, 0)))
+            elif field == EVENT_PRINT:
+                # buf = 2
+                text = next((v for f, w, v in _fields(buf, *value) if f == 2), None)
+                if text:
+                    self._prints.append((ts, pid, buf[text[0]:text[1]].decode("utf-8", "replace")))
+        self._seen(ts)
+
+    def _compact_sched(self, buf: bytes, pos: int, end: int, cpu: int):
+        packed: Dict[int, bytes] = {}
+        interned: List[str] = []
+        for field, wire, value in _fields(buf, pos, end):
+            if wire != _WIRE_LEN:
+                continue
+            if field == 5:
+                interned.append(buf[value[0]:value[1]].decode("utf-8", "replace"))
+            else:
+                packed[field] = packed.get(field, b"") + buf[value[0]:value[1]]
+
+        # switch_timestamp = 1 (delta), switch_prev_state = 2, switch_next_pid = 3, switch_next_comm_index = 6
+        ts = np.cumsum(packed_varints(packed.get(1, b""))).astype(np.int64)
+        if ts.size:
+            next_pid = packed_varints(packed.get(3, b"")).astype(np.int64)
+            prev_state = packed_varints(packed.get(2, b"")).astype(np.int64)
+            comm_index = packed_varints(packed.get(6, b""))
+            if interned and comm_index.size == ts.size:
+                tids, first = np.unique(next_pid, return_index=True)
+                names = [interned[i] if i < len(interned) else "?" for i in comm_index[first].tolist()]
+                self.comm.update(zip(tids.tolist(), names))
+            if next_pid.size == ts.size and prev_state.size == ts.size:
+                self._switches(cpu, ts, next_pid, prev_state)
+
+        # waking_timestamp = 7 (delta), waking_pid = 8
+        waking_ts = np.cumsum(packed_varints(packed.get(7, b""))).astype(np.int64)
+        waking_pid = packed_varints(packed.get(8, b"")).astype(np.int64)
+        if waking_ts.size and waking_ts.size == waking_pid.size:
+            self._starts.append(np.stack([waking_ts, waking_pid], axis=1))
+            self._buffered += waking_ts.size
+            self._seen(int(waking_ts[-1]))
+
+    # -- aggregation ------------------------------------------------------
+
+    def _seen(self, ts: int):
+        if ts:
+            if self.first_ts is None or ts < self.first_ts:
+                self.first_ts = ts
+            self.last_ts = max(self.last_ts, ts)
+
+    def _switches(self, cpu: int, ts: np.ndarray, next_pid: np.ndarray, prev_state: np.ndarray):
+        """Account CPU time per thread; queue switch-ins and preemptions for latency."""
+        self.sched_events += ts.size
+        self._seen(int(ts[0]))
+        self._seen(int(ts[-1]))
+        last = self._cpu_state.get(cpu)
+        prev_pid = np.concatenate(([last[1] if last else -1], next_pid[:-1]))
+        if last:
+            durations = np.diff(np.concatenate(([last[0]], ts)))
+        else:
+            durations = np.concatenate(([0], np.diff(ts)))
+        self._cpu_state[cpu] = (int(ts[-1]), int(next_pid[-1]))
+
+        running = (prev_pid > 0) & (durations > 0)
+        self._runs.append(np.stack([prev_pid[running], durations[running]], axis=1))
+
+        # A thread switched out while still runnable (state 0) waits from here
+        preempted = (prev_state == 0) & (prev_pid > 0)
+        self._starts.append(np.stack([ts[preempted], prev_pid[preempted]], axis=1))
+        self._ins.append(np.stack([ts, next_pid], axis=1)[next_pid > 0])
+        self._buffered += ts.size
+
+    def _flush(self, cutoff: int):
+        """Match runnable starts to switch-ins and close atrace slices older than cutoff."""
+        if self._runs:
+            runs = np.concatenate(self._runs)
+            tids, inverse = np.unique(runs[:, 0], return_inverse=True)
+            totals = np.bincount(inverse, weights=runs[:, 1])
+            for tid, total in zip(tids.tolist(), totals.tolist()):
+                self.cpu_time[tid] = self.cpu_time.get(tid, 0) + int(total)
+            self._runs = []
+
+        starts = np.concatenate(self._starts) if self._starts else np.zeros((0, 2), dtype=np.int64)
+        ins = np.concatenate(self._ins) if self._ins else np.zeros((0, 2), dtype=np.int64)
+        kind = np.concatenate([np.zeros(len(starts), dtype=np.int8), np.ones(len(ins), dtype=np.int8)])
+        events = np.concatenate([starts, ins])
+        ready = events[:, 0] < cutoff
+        later_events, later_kind = events[~ready], kind[~ready]
+        events, kind = events[ready], kind[ready]
+
+        pending = np.zeros((0, 2), dtype=np.int64)
+        if len(events):
+            order = np.lexsort((kind, events[:, 0], events[:, 1]))
+            ts, tid, kind = events[order, 0], events[order, 1], kind[order]
+            # A segment runs from the first event after a switch-in to the next switch-in
+            boundary = np.ones(ts.size, dtype=bool)
+            boundary[1:] = (tid[1:] != tid[:-1]) | (kind[:-1] == 1)
+            first = np.flatnonzero(boundary)
+            last = np.concatenate((first[1:] - 1, [ts.size - 1]))
+            waited = (kind[first] == 0) & (kind[last] == 1)
+            self._add_latency(tid[last[waited]], ts[last[waited]] - ts[first[waited]])
+            open_segments = kind[last] == 0
+            pending = np.stack([ts[first[open_segments]], tid[first[open_segments]]], axis=1)
+
+        later_starts = later_events[later_kind == 0]
+        self._starts = [pending, later_starts]
+        self._ins = [later_events[later_kind == 1]]
+        self._buffered = len(later_events)
+
+        self._prints.sort()
+        split = next((i for i, item in enumerate(self._prints) if item[0] >= cutoff), len(self._prints))
+        for ts, tid, text in self._prints[:split]:
+            self._print(ts, tid, text)
+        del self._prints[:split]
+
+    def _add_latency(self, tids: np.ndarray, latency: np.ndarray):
+        """Accumulate count, total, max and log2 histogram of waits per thread."""
+        if not tids.size:
+            return
+        unique, inverse = np.unique(tids, return_inverse=True)
+        counts = np.bincount(inverse)
+        totals = np.bincount(inverse, weights=latency)
+        worst = np.zeros(unique.size, dtype=np.int64)
+        np.maximum.at(worst, inverse, latency)
+        buckets = np.clip(np.log2(latency / 1000 + 1).astype(np.int64), 0, LATENCY_BUCKETS - 1)
+        histograms = np.bincount(inverse * LATENCY_BUCKETS + buckets,
+                                 minlength=unique.size * LATENCY_BUCKETS).reshape(unique.size, LATENCY_BUCKETS)
+        for i, tid in enumerate(unique.tolist()):
+            entry = self.latency.get(tid)
+            if entry is None:
+                self.latency[tid] = [int(counts[i]), int(totals[i]), int(worst[i]), histograms[i].copy()]
+            else:
+                entry[0] += int(counts[i])
+                entry[1] += int(totals[i])
+                entry[2] = max(entry[2], int(worst[i]))
+                entry[3] += histograms[i]
+
+    def _print(self, ts: int, tid: int, text: str):
+        """Pair atrace begin/end markers ("B|pid|name", "E|pid") per thread."""
+        text = text.rstrip("\n")
+        if text.startswith("B|"):
+            parts = text.split("|", 2)
+            if len(parts) == 3:
+                self._stacks.setdefault(tid, []).append((ts, parts[2]))
+        elif text.startswith("E") and self._stacks.get(tid):
+            start, name = self._stacks[tid].pop()
+            duration = ts - start
+            entry = self.slices.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+            if len(self.longest) < self.top_n:
+                heapq.heappush(self.longest, (duration, name, tid))
+            elif duration > self.longest[0][0]:
+                heapq.heapreplace(self.longest, (duration, name, tid))
+
+    # -- results ----------------------------------------------------------
+
+    def _process(self, tid: int) -> str:
+        tgid = self.tgid.get(tid, tid)
+        return self.process_names.get(tgid) or self.comm.get(tgid) or str(tgid)
+
+    def summary(self) -> Dict:
+        """Finish pending work and return summary tables."""
+        self._flush(np.iinfo(np.int64).max)
+        span = max(self.last_ts - (self.first_ts or self.last_ts), 1)
+
+        # Running threads at trace end
+        for ts, tid in self._cpu_state.values():
+            if tid > 0 and self.last_ts > ts:
+                self.cpu_time[tid] = self.cpu_time.get(tid, 0) + self.last_ts - ts
+
+        threads = sorted(self.cpu_time.items(), key=lambda item: item[1], reverse=True)
+        processes: Dict[str, int] = {}
+        for tid, total in self.cpu_time.items():
+            name = self._process(tid)
+            processes[name] = processes.get(name, 0) + total
+
+        by_process: Dict[str, List] = {}
+        for tid, (count, total, worst, histogram) in self.latency.items():
+            entry = by_process.setdefault(self._process(tid), [0, 0, 0, np.zeros(LATENCY_BUCKETS, dtype=np.int64)])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], worst)
+            entry[3] += histogram
+        latency = []
+        for name, (count, total, worst, histogram) in by_process.items():
+            # Upper edge of the bucket holding the 95th percentile
+            p95_bucket = int(np.searchsorted(np.cumsum(histogram) / count, 0.95))
+            latency.append((name, count, total / count, min(2 ** (p95_bucket + 1) * 1000, worst), worst, total))
+        latency.sort(key=lambda row: row[5], reverse=True)
+
+        freq = self._frequency(span)
+        return {
+            "span_ns": span,
+            "packets": self.packets,
+            "sched_events": self.sched_events,
+            "threads": [(tid, self.comm.get(tid, "?"), self._process(tid), total)
+                        for tid, total in threads[:self.top_n]],
+            "processes": sorted(processes.items(), key=lambda item: item[1], reverse=True)[:self.top_n],
+            "latency": latency[:self.top_n],
+            "slices": sorted(((name, *stats) for name, stats in self.slices.items()),
+                             key=lambda row: row[2], reverse=True)[:self.top_n],
+            "longest": sorted(self.longest, reverse=True),
+            "frequency": freq,
+        }
+
+    def _frequency(self, span: int) -> Dict[int, Tuple[float, int]]:
+        """Time weighted average and max frequency (kHz) per CPU."""
+        result: Dict[int, Tuple[float, int]] = {}
+        if not self._freq:
+            return result
+        data = np.array(sorted(self._freq), dtype=np.int64)
+        for cpu in np.unique(data[:, 1]).tolist():
+            rows = data[data[:, 1] == cpu]
+            durations = np.diff(np.concatenate((rows[:, 0], [self.last_ts])))
+            weight = durations.sum()
+            average = float((rows[:, 2] * durations).sum() / weight) if weight > 0 else float(rows[-1, 2])
+            result[cpu] = (average, int(rows[:, 2].max()))
+        return result
+
+
+def summarize_trace(stream: BinaryIO, top_n: int = 15, copy_to: Optional[BinaryIO] = None) -> Dict:
+    """
+    Summarize a Perfetto trace read incrementally from a stream.
+
+    Args:
+        stream: Binary stream of the serialized trace
+        top_n: Rows per summary table
+        copy_to: Optional file receiving the raw trace while it is parsed
+
+    Returns:
+        Dict: Summary tables (see format_trace_summary)
+    """
+    if copy_to is not None:
+        stream = _Tee(stream, copy_to)
+    summarizer = TraceSummarizer(top_n)
+    for packet in iter_packets(stream):
+        summarizer.add_packet(packet)
+    return summarizer.summary()
+
+
+class _Tee:
+    """Binary reader that copies everything read to a second file."""
+
+    def __init__(self, source: BinaryIO, sink: BinaryIO):
+        self.source = source
+        self.sink = sink
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.sink.write(data)
+        return data
+
+
+def format_trace_summary(summary: Dict) -> str:
+    """Render trace summary as compact text tables for the LLM."""
+    span_ms = summary["span_ns"] / 1e6
+    lines = [f"Trace: {span_ms / 1000:.1f}s, {summary['packets']} packets, {summary['sched_events']} sched switches"]
+    if not summary["sched_events"]:
+        lines.append("No scheduling events (ftrace may be unavailable on this build)")
+
+    if summary["processes"]:
+        lines += ["", "CPU time by process:  ms  %trace"]
+        for name, total in summary["processes"]:
+            lines.append(f"  {name[:40]:<40} {total / 1e6:>9.1f} {100 * total / summary['span_ns']:>6.1f}")
+
+    if summary["threads"]:
+        lines += ["", "CPU time by thread:  tid  ms"]
+        for tid, comm, process, total in summary["threads"]:
+            lines.append(f"  {comm[:20]:<20} {tid:>7} {total / 1e6:>9.1f}  ({process[:30]})")
+
+    if summary["latency"]:
+        lines += ["", "Runnable latency by process:  waits  mean ms  p95 ms  max ms  total ms"]
+        for name, count, mean, p95, worst, total in summary["latency"]:
+            lines.append(f"  {name[:32]:<32} {count:>7} {mean / 1e6:>8.2f} {p95 / 1e6:>7.2f} "
+                         f"{worst / 1e6:>7.2f} {total / 1e6:>9.1f}")
+
+    if summary["slices"]:
+        lines += ["", "Top atrace slices:  count  total ms  max ms"]
+        for name, count, total, worst in summary["slices"]:
+            lines.append(f"  {name[:44]:<44} {count:>6} {total / 1e6:>9.1f} {worst / 1e6:>8.1f}")
+        lines += ["", "Longest slices:"]
+        for duration, name, tid in summary["longest"]:
+            lines.append(f"  {duration / 1e6:>8.1f} ms  {name[:50]} (tid {tid})")
+
+    if summary["frequency"]:
+        lines += ["", "CPU frequency (avg/max MHz): " + "  ".join(
+            f"cpu{cpu} {avg / 1000:.0f}/{peak / 1000:.0f}" for cpu, (avg, peak) in sorted(summary["frequency"].items()))]
+    return "\n".join(lines)
@@ -0,0 +1,228 @@
+"""Streaming screen recording with a bounded in-memory H.264 ring buffer."""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from .adb_client import ADBClient
+
+START_CODE = b"\x00\x00\x00\x01"
+
+# H.264 NAL unit types
+NAL_IDR = 5
+NAL_SPS = 7
+NAL_PPS = 8
+
+# screenrecord refuses time limits above 3 minutes; segments are chained
+SEGMENT_SECONDS = 180
+
+READ_CHUNK = 64 * 1024
+
+
+def nal_type(nal: bytes) -> int:
+    """Return NAL unit type from its header byte."""
+    return nal[0] & 0x1F if nal else 0
+
+
+class NALSplitter:
+    """Incremental Annex-B byte stream to NAL unit splitter."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add stream bytes and return NAL units completed by them.
+
+        Args:
+            data: Next chunk of the H.264 elementary stream
+
+        Returns:
+            List[bytes]: NAL units without start codes
+        """
+        self._buffer.extend(data)
+        units = []
+        start = self._buffer.find(b"\x00\x00\x01")
+        while start != -1:
+            end = self._buffer.find(b"\x00\x00\x01", start + 3)
+            if end == -1:
+                break
+            # A 4-byte start code leaves a trailing zero on the previous unit
+            unit_end = end - 1 if self._buffer[end - 1] == 0 else end
+            units.append(bytes(self._buffer[start + 3:unit_end]))
+            start = end
+        if start > 0:
+            del self._buffer[:start]
+        return units
+
+    def flush(self) -> List[bytes]:
+        """Return the trailing NAL unit at end of stream."""
+        start = self._buffer.find(b"\x00\x00\x01")
+        tail = bytes(self._buffer[start + 3:]) if start != -1 else b""
+        self._buffer.clear()
+        return [tail] if tail else []
+
+
+class GOP:
+    """Group of pictures starting at an IDR frame."""
+
+    __slots__ = ("timestamp", "units", "size")
+
+    def __init__(self, timestamp: float):
+        self.timestamp = timestamp
+        self.units: List[bytes] = []
+        self.size = 0
+
+    def add(self, unit: bytes):
+        self.units.append(unit)
+        self.size += len(unit) + len(START_CODE)
+
+    def to_bytes(self) -> bytes:
+        return b"".join(START_CODE + unit for unit in self.units)
+
+
+class ScreenRecorder:
+    """Background `screenrecord` stream sampled into bounded ring buffers.
+
+    Complete GOPs are kept for clip dumps within a byte budget, and one
+    keyframe per sample interval is kept for frame dumps. Memory stays
+    bounded however long the recording runs.
+    """
+
+    def __init__(self, client: ADBClient, sample_interval: float = 1.0, buffer_bytes: int = 32 * 1024 * 1024,
+                 max_frames: int = 60, bit_rate: int = 4000000, size: Optional[str] = None):
+        """
+        Initialize recorder.
+
+        Args:
+            client: ADB client for device
+            sample_interval: Minimum seconds between sampled keyframes
+            buffer_bytes: Byte budget for the clip ring buffer
+            max_frames: Number of sampled keyframes kept
+            bit_rate: Encoder bit rate in bits per second
+            size: Optional video size "WIDTHxHEIGHT"
+        """
+        self.client = client
+        self.sample_interval = sample_interval
+        self.buffer_bytes = buffer_bytes
+        self.bit_rate = bit_rate
+        self.size = size
+        self.frames: Deque[Tuple[float, bytes]] = deque(maxlen=max_frames)
+        self.total_bytes = 0
+        self._gops: Deque[GOP] = deque()
+        self._gop_bytes = 0
+        self._current: Optional[GOP] = None
+        self._config: List[bytes] = []
+        self._last_sample = 0.0
+        self._process = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start streaming in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _command(self) -> str:
+        cmd = f"exec-out screenrecord --output-format=h264 --bit-rate {self.bit_rate} --time-limit {SEGMENT_SECONDS}"
+        if self.size:
+            cmd += f" --size {self.size}"
+        return cmd + " -"
+
+    def _run(self):
+        # Chain screenrecord segments until stopped
+        while self._running:
+            self._process = self.client.popen(self._command())
+            splitter = NALSplitter()
+            while self._running:
+                chunk = self._process.stdout.read1(READ_CHUNK)
+                if not chunk:
+                    break
+                self.total_bytes += len(chunk)
+                for unit in splitter.feed(chunk):
+                    self._add_unit(unit)
+            for unit in splitter.flush():
+                self._add_unit(unit)
+            if self._process.poll() is None:
+                self._process.terminate()
+            self._process.wait()
+            if self._running and self._process.returncode not in (0, None, -15):
+                # Device gone or screenrecord unsupported; do not spin
+                time.sleep(1)
+
+    def _add_unit(self, unit: bytes):
+        kind = nal_type(unit)
+        with self._lock:
+            if kind in (NAL_SPS, NAL_PPS):
+                if kind == NAL_SPS:
+                    self._config = []
+                self._config.append(unit)
+                return
+
+            if kind == NAL_IDR and (self._current is None or nal_type(self._current.units[-1]) != NAL_IDR):
+                self._close_gop()
+                self._current = GOP(time.time())
+                for config in self._config:
+                    self._current.add(config)
+                self._sample_keyframe(unit)
+
+            if self._current is None:
+                # Stream must start at a keyframe
+                return
+            self._current.add(unit)
+            self._trim()
+
+    def _sample_keyframe(self, idr: bytes):
+        now = time.time()
+        if now - self._last_sample >= self.sample_interval:
+            self._last_sample = now
+            frame = b"".join(START_CODE + unit for unit in self._config + [idr])
+            self.frames.append((now, frame))
+
+    def _close_gop(self):
+        if self._current is None:
+            return
+        self._gops.append(self._current)
+        self._gop_bytes += self._current.size
+        self._current = None
+
+    def _trim(self):
+        # Evict oldest GOPs so closed + open GOPs fit the byte budget
+        while self._gops and self._gop_bytes + self._current.size > self.buffer_bytes:
+            self._gop_bytes -= self._gops.popleft().size
+        if self._current.size > self.buffer_bytes:
+            # A single GOP above budget cannot be kept; wait for next IDR
+            self._current = None
+
+    def clip(self, last_seconds: Optional[float] = None) -> bytes:
+        """
+        Return buffered video as a playable H.264 elementary stream.
+
+        Args:
+            last_seconds: Only GOPs started within this many seconds
+
+        Returns:
+            bytes: Annex-B stream starting at a keyframe
+        """
+        with self._lock:
+            gops = list(self._gops) + ([self._current] if self._current else [])
+            cutoff = time.time() - last_seconds if last_seconds else 0.0
+            return b"".join(gop.to_bytes() for gop in gops if gop.timestamp >= cutoff)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes currently held in the clip buffer."""
+        with self._lock:
+            return self._gop_bytes + (self._current.size if self._current else 0)
+
+    def stop(self):
+        """Stop streaming and the device-side screenrecord."""
+        self._running = False
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._close_gop()
@@ -1,6 +1,6 @@
 """Security validation for ADB commands."""
 
-from typing import Tuple
+from typing import List, Sequence, Tuple
 from enum import Enum
 
 
@@ -42,6 +42,9 @@ class SecurityValidator:
         "settings put",
     ]
 
+    # System paths (allowed but flagged)
+    DANGEROUS_PATHS = ["/system", "/boot", "/recovery", "/dev"]
+
     @staticmethod
     def validate_command(command: str) -> Tuple[bool, RiskLevel, str]:
         """
@@ -89,10 +92,24 @@ class SecurityValidator:
             Tuple[bool, RiskLevel, str]: (allowed, risk_level, reason)
         """
         # Flag system paths as high risk (but allow)
-        dangerous_paths = ["/system", "/boot", "/recovery", "/dev"]
-
-        for dangerous in dangerous_paths:
+        for dangerous in SecurityValidator.DANGEROUS_PATHS:
             if path.startswith(dangerous):
                 return True, RiskLevel.HIGH, f"System path: {dangerous}"
 
         return True, RiskLevel.SAFE, "Safe path"
+
+    @staticmethod
+    def validate_paths(paths: Sequence[str]) -> List[Tuple[bool, RiskLevel, str]]:
+        """
+        Validate many file paths at once.
+
+        Args:
+            paths: File paths to validate
+
+        Returns:
+            List[Tuple[bool, RiskLevel, str]]: (allowed, risk_level, reason) per path, in order
+        """
+        prefixes = tuple(SecurityValidator.DANGEROUS_PATHS)
+        safe = (True, RiskLevel.SAFE, "Safe path")
+        # One prefix test per path; only flagged paths need the per-prefix reason
+        return [SecurityValidator.validate_path(path) if path.startswith(prefixes) else safe for path in paths]
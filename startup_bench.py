@@ -0,0 +1,127 @@
+"""Parsing and statistics for `am start -W` launch benchmarks."""
+
+from typing import Dict, List, Optional
+import numpy as np
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+_T95_LARGE = [(40, 2.021), (60, 2.000), (120, 1.980)]
+
+METRICS = ("TotalTime", "WaitTime")
+
+
+def t_critical(df: int) -> float:
+    """Two-sided 95% t value for df degrees of freedom."""
+    if df < 1:
+        return float("nan")
+    if df <= len(_T95):
+        return _T95[df - 1]
+    for limit, value in _T95_LARGE:
+        if df <= limit:
+            return value
+    return 1.960
+
+
+def parse_am_start(output: str) -> Dict:
+    """
+    Parse `am start -W` output.
+
+    Args:
+        output: Command output
+
+    Returns:
+        Dict: TotalTime/WaitTime (ms), LaunchState, Status and error text if
+              the activity was not (re)launched
+    """
+    result: Dict = {}
+    for line in output.splitlines():
+        key, sep, value = line.strip().partition(":")
+        if not sep:
+            continue
+        value = value.strip()
+        if key in METRICS or key == "ThisTime":
+            try:
+                result[key] = int(value)
+            except ValueError:
+                pass
+        elif key in ("Status", "LaunchState", "Activity"):
+            result[key] = value
+        elif key == "Error":
+            result.setdefault("error", value)
+        elif key == "Warning":
+            # e.g. "Activity not started, its current task has been brought to the front"
+            result.setdefault("warning", value)
+    # Pre-Q devices report ThisTime/TotalTime only
+    if "TotalTime" not in result and "ThisTime" in result:
+        result["TotalTime"] = result["ThisTime"]
+    if "TotalTime" not in result and "error" not in result:
+        result["error"] = result.get("warning") or f"no launch time reported (status {result.get('Status', '?')})"
+    elif result.get("Status", "ok") != "ok" and "error" not in result:
+        result["error"] = f"status {result['Status']}"
+    return result
+
+
+def summarize_values(values: List[float]) -> Dict:
+    """Mean with 95% confidence interval, median, p90 and spread."""
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return {"n": 0}
+    sd = float(data.std(ddof=1)) if data.size > 1 else 0.0
+    return {
+        "n": int(data.size),
+        "mean": float(data.mean()),
+        "ci95": float(t_critical(data.size - 1) * sd / np.sqrt(data.size)) if data.size > 1 else float("nan"),
+        "median": float(np.median(data)),
+        "p90": float(np.percentile(data, 90)),
+        "min": float(data.min()),
+        "max": float(data.max()),
+        "sd": sd,
+    }
+
+
+def summarize_launches(launches: List[Dict], warmup: int) -> Dict:
+    """
+    Summarize launches after discarding warmup runs.
+
+    Args:
+        launches: Parsed `am start -W` results in run order
+        warmup: Number of leading runs to discard
+
+    Returns:
+        Dict: Per-metric statistics, launch states and failures
+    """
+    measured = launches[warmup:]
+    valid = [launch for launch in measured if "error" not in launch and "TotalTime" in launch]
+    states: Dict[str, int] = {}
+    for launch in valid:
+        state = launch.get("LaunchState", "?")
+        states[state] = states.get(state, 0) + 1
+    return {
+        "runs": len(measured),
+        "warmup": min(warmup, len(launches)),
+        "metrics": {metric: summarize_values([launch[metric] for launch in valid if metric in launch])
+                    for metric in METRICS},
+        "states": states,
+        "errors": [launch["error"] for launch in measured if "error" in launch],
+    }
+
+
+def format_launch_summary(label: str, summary: Dict, component: Optional[str] = None) -> str:
+    """Render one device's launch benchmark."""
+    head = f"{label}: {component + ', ' if component else ''}{summary['runs']} runs ({summary['warmup']} warmup discarded)"
+    lines = [head]
+    for metric, stats in summary["metrics"].items():
+        if not stats.get("n"):
+            continue
+        ci = f" ±{stats['ci95']:.1f}" if stats["n"] > 1 else ""
+        lines.append(f"  {metric + ' ms':<13} mean {stats['mean']:.1f}{ci} (95% CI)  median {stats['median']:.0f}  "
+                     f"p90 {stats['p90']:.0f}  min {stats['min']:.0f}  max {stats['max']:.0f}  sd {stats['sd']:.1f}  n={stats['n']}")
+    if summary["states"]:
+        lines.append("  launch state: " + ", ".join(f"{state} x{count}" for state, count in summary["states"].items()))
+    if summary["errors"]:
+        lines.append(f"  {len(summary['errors'])} failed runs, first: {summary['errors'][0]}")
+    if len(lines) == 1:
+        lines.append("  no successful launches")
+    return "\n".join(lines)
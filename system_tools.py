@@ -1,22 +1,50 @@
 """System diagnostics and logging tools for Android."""
 
+import random
+import re
+import shlex
+import struct
+import time
 from langchain.tools import tool
-from typing import Optional
+from typing import List, Optional
+from ..bugreport_index import index_async, open_bugreport
 from ..device_manager import DeviceManager
+from ..hprof import analyze_hprof, format_heap_analysis
+from ..incidents import IncidentStore, collect_incidents
+from ..log_analytics import format_summary, summarize
+from ..monkey_stress import LogcatCrashes, MonkeyParser, correlate, format_stress_summary, monkey_script
+from ..logcat_store import (
+    LEVEL_INDEX, STORE_CURSOR, LogStore, get_collector, page_device_output, page_store, parse_time_cursor,
+    parse_logcat_line, start_collector, stop_collector
+)
+from ..telemetry import DEFAULT_SOURCES, get_sampler, start_sampler, stop_sampler
 
 _device_manager = DeviceManager()
+_incident_store: Optional[IncidentStore] = None
+
+
+def _incidents() -> IncidentStore:
+    """Open the shared incident store on first use."""
+    global _incident_store
+    if _incident_store is None:
+        _incident_store = IncidentStore()
+    return _incident_store
 
 
 @tool
-def device_logcat(device_id: Optional[str] = None, lines: int = 100, filter_expr: Optional[str] = None, buffer: str = "main", max_size: int = 10000) -> str:
+def device_logcat(device_id: Optional[str] = None, lines: int = 100, filter_expr: Optional[str] = None, buffer: str = "main", max_size: int = 10000, cursor: Optional[str] = None) -> str:
     """Fetch system and application logs.
 
+    Output ends with a [cursor: ...] line. Pass it back as cursor to get
+    only entries logged after this response.
+
     Args:
         device_id: Device serial number (uses default if None)
         lines: Number of log lines to retrieve (default: 100)
         filter_expr: Log filter expression (e.g., "ActivityManager:I *:S")
         buffer: Log buffer (main, system, crash, events, radio, all)
         max_size: Maximum output size in characters (default: 10000)
+        cursor: Cursor from a previous call to fetch only newer lines (optional)
 
     Returns:
         str: Log output
@@ -25,25 +53,44 @@ def device_logcat(device_id: Optional[str] = None, lines: int = 100, filter_expr
     if not client:
         return f"Device not found: {device_id or 'default'}"
 
-    cmd = f"logcat -b {buffer} -t {lines}"
+    collector = get_collector(client.device_id)
+    if cursor is None or cursor.startswith(STORE_CURSOR):
+        if collector and (buffer == "all" or buffer in collector.buffers):
+            buffers = None if buffer == "all" else [buffer]
+            entries, next_cursor = page_store(collector.store, cursor, lines, max_size,
+                                              buffers=buffers, filter_expr=filter_expr)
+            return _log_page(entries, next_cursor)
+        if cursor:
+            return "Cursor expired (log collector not running); call again without cursor"
+
+    cmd = f"logcat -b {buffer}"
+    if cursor:
+        cmd += f" -d -T \"'{parse_time_cursor(cursor)[0]}'\""
+    else:
+        cmd += f" -t {lines}"
     if filter_expr:
         cmd += f" {filter_expr}"
 
     success, output = client.shell(cmd, timeout=60)
     if success:
-        return output[:max_size] if len(output) > max_size else output
+        entries, next_cursor = page_device_output(output, cursor, lines, max_size)
+        return _log_page(entries, next_cursor)
     else:
         return f"Failed to get logs: {output}"
 
 
 @tool
-def app_logs(package_name: str, device_id: Optional[str] = None, lines: int = 100) -> str:
+def app_logs(package_name: str, device_id: Optional[str] = None, lines: int = 100, cursor: Optional[str] = None) -> str:
     """Retrieve logs for specific application.
 
+    Output ends with a [cursor: ...] line. Pass it back as cursor to get
+    only entries logged after this response.
+
     Args:
         package_name: Package name to get logs for
         device_id: Device serial number (uses default if None)
         lines: Number of log lines (default: 100)
+        cursor: Cursor from a previous call to fetch only newer lines (optional)
 
     Returns:
         str: Application logs
@@ -59,9 +106,129 @@ def app_logs(package_name: str, device_id: Optional[str] = None, lines: int = 10
 
     pid = pid_output.strip()
 
+    collector = get_collector(client.device_id)
+    if cursor is None or cursor.startswith(STORE_CURSOR):
+        if collector:
+            pids = [int(p) for p in pid.split() if p.isdigit()]
+            entries, next_cursor = page_store(collector.store, cursor, lines, pids=pids)
+            return _log_page(entries, next_cursor)
+        if cursor:
+            return "Cursor expired (log collector not running); call again without cursor"
+
     # Get logs for that PID
-    success, output = client.shell(f"logcat -t {lines} --pid={pid}")
-    return output if success else f"Failed to get app logs: {output}"
+    if cursor:
+        success, output = client.shell(f"logcat -d -T \"'{parse_time_cursor(cursor)[0]}'\" --pid={pid}")
+    else:
+        success, output = client.shell(f"logcat -t {lines} --pid={pid}")
+    if not success:
+        return f"Failed to get app logs: {output}"
+
+    entries, next_cursor = page_device_output(output, cursor, lines)
+    return _log_page(entries, next_cursor)
+
+
+def _log_page(entries: List[str], cursor: Optional[str]) -> str:
+    """Join log lines and append the continuation cursor."""
+    output = "\n".join(entries) if entries else "No new log entries"
+    return f"{output}\n[cursor: {cursor}]" if cursor else output
+
+
+@tool
+def start_log_collector(device_id: Optional[str] = None, buffers: str = "main,system,crash", memory_mb: int = 64) -> str:
+    """Start continuous background log collection for fast local log queries.
+
+    While running, device_logcat and app_logs answer from the in-memory
+    store instead of re-reading the device log.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        buffers: Comma-separated log buffers to collect (default: main,system,crash)
+        memory_mb: Memory budget in MB; oldest entries are evicted (default: 64)
+
+    Returns:
+        str: Collector status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if get_collector(client.device_id):
+        return f"Log collector already running on {client.device_id}"
+
+    collector = start_collector(client, buffers.split(","), memory_mb * 1024 * 1024)
+    return f"Log collector started on {client.device_id} (capacity {collector.store.capacity} entries)"
+
+
+@tool
+def stop_log_collector(device_id: Optional[str] = None) -> str:
+    """Stop background log collection and free its memory.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Collector status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if not stop_collector(client.device_id):
+        return f"No log collector running on {client.device_id}"
+    return f"Log collector stopped on {client.device_id}"
+
+
+@tool
+def log_stats(device_id: Optional[str] = None, window_seconds: Optional[int] = None, bucket_seconds: int = 10, top_n: int = 10, min_level: str = "V", buffer: str = "main") -> str:
+    """Summarize logs instead of returning raw lines: what is spamming, when errors started.
+
+    Reports per-tag and per-pid message rates, level histogram, rate
+    bursts and error bursts. Uses the background log collector when
+    running, otherwise parses one device log dump.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        window_seconds: Only analyze the last N seconds (optional, all if None)
+        bucket_seconds: Time bucket width for rates and bursts (default: 10)
+        top_n: Rows in top tag/pid tables (default: 10)
+        min_level: Minimum log level V/D/I/W/E/F (default: V)
+        buffer: Log buffer (main, system, crash, events, radio, all; default: main)
+
+    Returns:
+        str: Compact summary tables
+    """
+    if bucket_seconds < 1:
+        return "bucket_seconds must be at least 1"
+
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    collector = get_collector(client.device_id)
+    buffers = None
+    if collector and (buffer == "all" or buffer in collector.buffers):
+        store = collector.store
+        buffers = None if buffer == "all" else [buffer]
+    else:
+        success, output = client.shell(f"logcat -b {buffer} -d -v threadtime -v epoch", timeout=120)
+        if not success:
+            return f"Failed to get logs: {output}"
+        rows = [row for row in map(parse_logcat_line, output.splitlines()) if row]
+        store = LogStore(max(len(output) * 2, 1024 * 1024))
+        store.append(rows)
+
+    since = None
+    if window_seconds:
+        # Window relative to newest entry so device clock skew does not matter
+        newest = store.query(buffers=buffers, limit=1)
+        if newest.size:
+            since = float(store.ts[newest[0]]) - window_seconds
+
+    slots = store.query(since=since, min_level=LEVEL_INDEX.get(min_level.upper(), 0), buffers=buffers)
+    columns = store.columns(slots)
+    summary = summarize(columns["ts"], columns["pid"], columns["level"], columns["tag"], list(store.tags),
+                        bucket_seconds=bucket_seconds, top_n=top_n)
+    return format_summary(summary)
 
 
 @tool
@@ -108,6 +275,211 @@ def device_crash_logs(device_id: Optional[str] = None) -> str:
     return output if success else f"Failed to get crash logs: {output}"
 
 
+@tool
+def collect_device_incidents(device_id: Optional[str] = None) -> str:
+    """Parse new crashes and ANRs from a device into the deduplicated incident store.
+
+    Reads only crash buffer entries and ANR trace files not ingested before.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: New occurrence and incident counts
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    new_occurrences, new_incidents, warnings = collect_incidents(client, _incidents())
+    result = f"Collected {new_occurrences} new occurrences ({new_incidents} new distinct incidents)"
+    if warnings:
+        result += "\n" + "\n".join(f"Warning: {w}" for w in warnings)
+    return result
+
+
+@tool
+def top_incidents(limit: int = 10, package: Optional[str] = None, kind: Optional[str] = None, device_id: Optional[str] = None, hours: Optional[int] = None) -> str:
+    """List most frequent crashes and ANRs across all collected devices.
+
+    Run collect_device_incidents first to ingest new data.
+
+    Args:
+        limit: Maximum incidents to list (default: 10)
+        package: Only incidents of this package
+        kind: Only this kind: java, native or anr
+        device_id: Only count occurrences on this device
+        hours: Only count occurrences in the last N hours
+
+    Returns:
+        str: Incidents with fingerprint, counts and first/last seen
+    """
+    since = time.time() - hours * 3600 if hours else None
+    rows = _incidents().top(limit, package=package, kind=kind, device_id=device_id, since=since)
+    if not rows:
+        return "No incidents recorded"
+
+    lines = ["fingerprint       kind    count  devices  last seen       package / signature"]
+    for fingerprint, kind_, pkg, title, count, devices, _, last_seen in rows:
+        seen = time.strftime("%m-%d %H:%M:%S", time.localtime(last_seen))
+        lines.append(f"{fingerprint}  {kind_:<6} {count:>6} {devices:>8}  {seen}  {pkg}: {title}")
+    return "\n".join(lines)
+
+
+@tool
+def incident_details(fingerprint: str) -> str:
+    """Show normalized stack and first/last seen for an incident.
+
+    Args:
+        fingerprint: Fingerprint from top_incidents
+
+    Returns:
+        str: Incident details
+    """
+    row = _incidents().get(fingerprint)
+    if not row:
+        return f"Incident not found: {fingerprint}"
+
+    kind, package, title, detail, frames, first_seen, last_seen, count = row
+    clock = lambda ts: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+    lines = [
+        f"{kind} incident in {package}: {title}",
+        f"Occurrences: {count}, first seen {clock(first_seen)}, last seen {clock(last_seen)}",
+    ]
+    if detail:
+        lines.append(detail)
+    lines.append("Frames:")
+    lines += [f"  {frame}" for frame in frames.splitlines()]
+    return "\n".join(lines)
+
+
+# Seconds to keep reading logcat after a crash or the end of the run
+CRASH_GRACE_SECONDS = 2.0
+
+
+def _new_anr_traces(client, since: int, limit: int = 3) -> List[str]:
+    """Read ANR trace files modified at or after a device timestamp."""
+    success, listing = client.shell(shlex.quote("stat -c '%Y %n' /data/anr/* 2>/dev/null"))
+    if not success:
+        return []
+    entries = [line.split(" ", 1) for line in listing.splitlines() if " " in line.strip()]
+    recent = sorted((entry for entry in entries if entry[0].isdigit() and int(entry[0]) >= since), reverse=True)
+    traces = []
+    for _, path in recent[:limit]:
+        ok, text = client.shell(f"cat {shlex.quote(path.strip())}", timeout=60)
+        if ok:
+            traces.append(text)
+    return traces
+
+
+@tool
+def monkey_stress(package_name: str, device_id: Optional[str] = None, events: int = 1000, seed: Optional[int] = None, throttle_ms: int = 100, stop_on_crash: bool = True, max_seconds: int = 600, extra_args: str = "") -> str:
+    """Run a seeded monkey stress test and report crashes and ANRs with their event index.
+
+    Monkey output is streamed and the crash buffer is watched at the same
+    time; each crash is reported with the event it happened at and its
+    incident fingerprint instead of returning the raw monkey log. Run
+    again with the printed command to reproduce.
+
+    Args:
+        package_name: Package to exercise (comma separated for several)
+        device_id: Device serial number (uses default if None)
+        events: Number of events to inject (default: 1000)
+        seed: Random seed (random if None, printed in the summary)
+        throttle_ms: Delay between events in milliseconds (default: 100)
+        stop_on_crash: Stop at the first crash or ANR (default: True)
+        max_seconds: Maximum run time in seconds (default: 600)
+        extra_args: Additional monkey options, e.g. "--pct-touch 50 --pct-syskeys 0"
+
+    Returns:
+        str: Run summary with seed, crash event indexes and fingerprints
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    packages = [name.strip() for name in package_name.split(",") if name.strip()]
+    if not packages:
+        return "No package given"
+    seed = seed if seed is not None else random.randint(1, 2**31 - 1)
+    args = [arg for name in packages for arg in ("-p", name)]
+    args += ["-s", str(seed), "--throttle", str(throttle_ms), "--monitor-native-crashes"]
+    if not stop_on_crash:
+        args += ["--ignore-crashes", "--ignore-timeouts", "--ignore-native-crashes"]
+    args += shlex.split(extra_args) + ["-v", "-v", str(events)]
+    command = "monkey " + " ".join(shlex.quote(arg) for arg in args)
+
+    success, now = client.shell("date +%s")
+    since = int(now.strip()) if success and now.strip().isdigit() else int(time.time())
+    logcat = client.stream(
+        f"exec-out {shlex.quote(f'logcat -b crash,system -v threadtime -v epoch -T {since}.000 ActivityManager:E AndroidRuntime:E *:F')}")
+    monkey = client.stream(f"shell {shlex.quote(monkey_script(command))}")
+
+    parser, crashes = MonkeyParser(), LogcatCrashes()
+    reports = []
+    stopped = ""
+    monkey_done = False
+    start = time.monotonic()
+    end_at: Optional[float] = None
+    try:
+        while end_at is None or time.monotonic() < end_at:
+            triggered = False
+            if monkey_done:
+                time.sleep(0.1)
+            else:
+                try:
+                    line = monkey.readline(0.1)
+                except TimeoutError:
+                    line = ""
+                monkey_done = line is None
+                report = parser.close() if monkey_done else parser.feed(line)
+                if report:
+                    reports.append(report)
+                    triggered = True
+            while True:
+                try:
+                    entry = logcat.readline(0)
+                except TimeoutError:
+                    break
+                if entry is None:
+                    break
+                row = parse_logcat_line(entry)
+                if row and crashes.add(row, parser.events):
+                    triggered = True
+
+            if end_at is not None:
+                continue
+            if triggered and stop_on_crash:
+                stopped = "first crash"
+            elif time.monotonic() - start > max_seconds:
+                stopped = f"time limit {max_seconds}s"
+            if stopped or monkey_done:
+                end_at = time.monotonic() + CRASH_GRACE_SECONDS
+    finally:
+        if not monkey_done and parser.pid:
+            # Only this run's monkey; other monkeys on the device keep running
+            client.shell(f"kill {parser.pid}")
+        monkey.close()
+        logcat.close()
+    report = parser.close()
+    if report:
+        reports.append(report)
+    elapsed = time.monotonic() - start
+
+    anr_traces = _new_anr_traces(client, since) if crashes.anrs or any(r.kind == "anr" for r in reports) else []
+    reports = correlate(reports, crashes, anr_traces)
+    if parser.seed is None:
+        parser.seed = seed
+
+    known = {}
+    for report in reports:
+        row = _incidents().get(report.fingerprint) if report.fingerprint else None
+        if row:
+            known[report.fingerprint] = row[7]
+    target = f"-s {client.device_id} " if client.device_id else ""
+    return format_stress_summary(parser, reports, f"adb {target}shell {command}", elapsed, stopped, known)
+
+
 @tool
 def device_battery_stats(device_id: Optional[str] = None) -> str:
     """Analyze device battery usage and status.
@@ -136,6 +508,92 @@ def device_battery_stats(device_id: Optional[str] = None) -> str:
     return "\n".join(result) if result else output
 
 
+@tool
+def start_telemetry(device_id: Optional[str] = None, interval: float = 1.0, sources: str = ",".join(DEFAULT_SOURCES), packages: Optional[str] = None) -> str:
+    """Start background sampling of battery, CPU, memory, thermal and app PSS trends.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        interval: Seconds between samples (default: 1.0)
+        sources: Comma-separated sources: battery, cpu, memory, thermal
+        packages: Comma-separated packages to sample PSS for (slower, uses dumpsys meminfo)
+
+    Returns:
+        str: Sampler status with metric names
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if get_sampler(client.device_id):
+        return f"Telemetry already running on {client.device_id}"
+
+    try:
+        sampler = start_sampler(client, [s for s in sources.split(",") if s],
+                                [p for p in (packages or "").split(",") if p], interval)
+    except ValueError as e:
+        return str(e)
+    return f"Telemetry started on {client.device_id} every {interval}s: {', '.join(sampler.store.metrics)}"
+
+
+@tool
+def telemetry_stats(device_id: Optional[str] = None, window_seconds: int = 300, metrics: Optional[str] = None) -> str:
+    """Summarize sampled telemetry over a time window (min/max/mean/p95/slope).
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        window_seconds: Window ending now in seconds (default: 300)
+        metrics: Comma-separated metric names (default: all)
+
+    Returns:
+        str: Per-metric statistics
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    sampler = get_sampler(client.device_id)
+    if not sampler:
+        return f"No telemetry running on {client.device_id}. Use start_telemetry first."
+
+    names = [m for m in metrics.split(",") if m] if metrics else sampler.store.metrics
+    unknown = [m for m in names if m not in sampler.store.index]
+    if unknown:
+        return f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(sampler.store.metrics)}"
+
+    lines = [f"Telemetry {client.device_id}, last {window_seconds}s ({sampler.ticks} ticks total"
+             f"{'' if sampler.alive else ', sampler not running'})",
+             "metric                     last      min      max     mean      p95  slope/min  samples"]
+    for name in names:
+        stats = sampler.store.stats(name, window_seconds)
+        if stats is None:
+            lines.append(f"{name[:24]:<24}  no data")
+            continue
+        resolution = f"@{stats['resolution']}s" if stats["resolution"] else ""
+        lines.append(f"{name[:24]:<24} {stats['last']:>7.1f} {stats['min']:>8.1f} {stats['max']:>8.1f} "
+                     f"{stats['mean']:>8.1f} {stats['p95']:>8.1f} {stats['slope']:>+10.2f} {stats['samples']:>7}{resolution}")
+    return "\n".join(lines)
+
+
+@tool
+def stop_telemetry(device_id: Optional[str] = None) -> str:
+    """Stop background telemetry sampling and free its memory.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Sampler status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if not stop_sampler(client.device_id):
+        return f"No telemetry running on {client.device_id}"
+    return f"Telemetry stopped on {client.device_id}"
+
+
 @tool
 def capture_bugreport(device_id: Optional[str] = None, output_path: str = "bugreport.zip", timeout: int = 300) -> str:
     """Generate comprehensive diagnostic bugreport.
@@ -153,17 +611,133 @@ def capture_bugreport(device_id: Optional[str] = None, output_path: str = "bugre
         return f"Device not found: {device_id or 'default'}"
 
     success, output = client.execute(f"bugreport {output_path}", timeout=timeout)
-    return f"Bugreport saved to {output_path}" if success else f"Failed to generate bugreport: {output}"
+    if not success:
+        return f"Failed to generate bugreport: {output}"
+
+    # Index in the background so bugreport_sections is ready when needed
+    index_async(output_path)
+    return f"Bugreport saved to {output_path} (section index building in background)"
+
+
+def _bugreport(path: str, wait: int):
+    """Open indexed bugreport or return an error message."""
+    try:
+        report = open_bugreport(path, timeout=wait)
+    except (OSError, ValueError) as e:
+        return None, f"Cannot read bugreport {path}: {e}"
+    if report is None:
+        return None, f"Bugreport {path} is still being indexed, try again shortly"
+    return report, ""
 
 
 @tool
-def dump_heap(package_name: str, device_id: Optional[str] = None, output_path: str = "heap.hprof") -> str:
+def bugreport_sections(path: str = "bugreport.zip", name_filter: Optional[str] = None, wait: int = 30) -> str:
+    """List sections and per-service dumps of a bugreport with their sizes.
+
+    Args:
+        path: Bugreport .zip or .txt on the host (default: bugreport.zip)
+        name_filter: Only sections whose name contains this text
+        wait: Seconds to wait for a background index (default: 30)
+
+    Returns:
+        str: Section ids, names and sizes
+    """
+    report, error = _bugreport(path, wait)
+    if not report:
+        return error
+
+    sections = report.find(name_filter) if name_filter else report.sections
+    if not sections:
+        return f"No sections matching '{name_filter}'"
+    lines = [f"{len(sections)} sections in {path} ({report.size / 1024 / 1024:.1f} MB)"]
+    for section in sections:
+        indent = "    " if section["kind"] == "service" else ""
+        lines.append(f"#{section['id']:<5} {indent}{section['name']} ({(section['end'] - section['start']) / 1024:.1f} KB)")
+    return "\n".join(lines)
+
+
+@tool
+def read_bugreport_section(section: str, path: str = "bugreport.zip", offset: int = 0, max_bytes: int = 20000) -> str:
+    """Read one bugreport section (e.g. "SYSTEM LOG", "meminfo", "#12") without loading the whole report.
+
+    Args:
+        section: Section id ("#12"), exact name, or name substring
+        path: Bugreport .zip or .txt on the host (default: bugreport.zip)
+        offset: Byte offset into the section for paging (default: 0)
+        max_bytes: Maximum bytes to return (default: 20000)
+
+    Returns:
+        str: Section text
+    """
+    report, error = _bugreport(path, 30)
+    if not report:
+        return error
+
+    matches = report.find(section)
+    if not matches:
+        return f"Section not found: {section}. Use bugreport_sections to list sections."
+    target = matches[0]
+    size = target["end"] - target["start"]
+    text = report.read(target, offset, max_bytes)
+    end = min(offset + max_bytes, size)
+    header = f"#{target['id']} {target['name']}: bytes {offset}-{end} of {size}"
+    if end < size:
+        header += f" (use offset={end} for more)"
+    if len(matches) > 1:
+        header += "\nAlso matching: " + ", ".join(f"#{m['id']} {m['name']}" for m in matches[1:6])
+    return f"{header}\n{text}"
+
+
+@tool
+def grep_bugreport(pattern: str, path: str = "bugreport.zip", section: Optional[str] = None, max_matches: int = 100, ignore_case: bool = False) -> str:
+    """Search bugreport lines matching a regular expression, optionally within one section.
+
+    Args:
+        pattern: Python regular expression
+        path: Bugreport .zip or .txt on the host (default: bugreport.zip)
+        section: Section id, name or name substring to search in (whole report if None)
+        max_matches: Maximum matching lines (default: 100)
+        ignore_case: Case-insensitive search (default: False)
+
+    Returns:
+        str: Matching lines labelled with their section
+    """
+    report, error = _bugreport(path, 30)
+    if not report:
+        return error
+
+    target = None
+    if section:
+        matches = report.find(section)
+        if not matches:
+            return f"Section not found: {section}. Use bugreport_sections to list sections."
+        target = matches[0]
+
+    try:
+        found = report.grep(pattern, target, max_matches, ignore_case)
+    except re.error as e:
+        return f"Invalid pattern: {e}"
+    if not found:
+        return f"No lines matching '{pattern}'"
+
+    lines = []
+    for offset, line in found:
+        where = report.section_at(offset)
+        lines.append(f"[{where['name'] if where else 'header'}] {line}")
+    if len(found) == max_matches:
+        lines.append(f"... stopped at {max_matches} matches")
+    return "\n".join(lines)
+
+
+@tool
+def dump_heap(package_name: str, device_id: Optional[str] = None, output_path: str = "heap.hprof", analyze: bool = False) -> str:
     """Capture Java or native heap dump for memory analysis.
 
     Args:
         package_name: Package name or process ID
         device_id: Device serial number (uses default if None)
         output_path: Output file path (default: heap.hprof)
+        analyze: Append heap analysis (see analyze_heap) after download
 
     Returns:
         str: Heap dump status
@@ -183,6 +757,32 @@ def dump_heap(package_name: str, device_id: Optional[str] = None, output_path: s
     if success:
         # Cleanup device heap dump
         client.shell(f"rm {device_path}")
+        if analyze:
+            return f"Heap dump saved to {output_path}\n\n" + _heap_report(output_path)
         return f"Heap dump saved to {output_path}"
     else:
         return f"Failed to download heap dump: {output}"
+
+
+def _heap_report(path: str, top_n: int = 20, heap: str = "app") -> str:
+    """Analyze HPROF file or return an error message."""
+    try:
+        analysis = analyze_hprof(path, top_n=top_n, heap=None if heap == "all" else heap)
+    except (OSError, ValueError, struct.error) as e:
+        return f"Failed to analyze heap dump {path}: {e}"
+    return format_heap_analysis(analysis)
+
+
+@tool
+def analyze_heap(path: str = "heap.hprof", top_n: int = 20, heap: str = "app") -> str:
+    """Analyze a host HPROF heap dump: class histogram, largest objects, duplicate strings and bitmaps.
+
+    Args:
+        path: HPROF file on the host (default: heap.hprof, as written by dump_heap)
+        top_n: Rows per table (default: 20)
+        heap: Heap to count: app, zygote, image or all (default: app)
+
+    Returns:
+        str: Heap analysis tables
+    """
+    return _heap_report(path, top_n, heap)
@@ -0,0 +1,392 @@
+"""Periodic device telemetry sampling into downsampled ring buffers.
+
+One long-lived device shell loop prints every configured source per tick
+between section markers, so sampling costs no adb round trips. Samples
+go into a raw NumPy ring plus coarser tiers (mean/min/max per bucket)
+that keep hours of history in fixed memory.
+"""
+
+import math
+import re
+import shlex
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .adb_client import ADBClient, ADBStream
+
+# Device commands per source
+SOURCES = {
+    "battery": "dumpsys battery",
+    "cpu": "head -1 /proc/stat",
+    "memory": "grep -E '^(MemTotal|MemAvailable):' /proc/meminfo",
+    "thermal": "cat /sys/class/thermal/thermal_zone*/temp 2>/dev/null",
+}
+SOURCE_METRICS = {
+    "battery": ["battery_level", "battery_temp_c", "battery_voltage_mv"],
+    "cpu": ["cpu_usage_pct"],
+    "memory": ["mem_available_mb", "mem_used_pct"],
+    "thermal": ["thermal_max_c"],
+}
+DEFAULT_SOURCES = ("battery", "cpu", "memory", "thermal")
+
+# (bucket seconds, buckets) of downsampled tiers: 10s for 6h, 1min for 24h
+DEFAULT_TIERS = ((10, 2160), (60, 1440))
+
+_MARKER = "@@"
+_BATTERY_FIELD = re.compile(r"^\s*(level|temperature|voltage): (-?\d+)")
+_MEMINFO_FIELD = re.compile(r"^(\w+):\s+(\d+)")
+_PSS_TOTAL = re.compile(r"TOTAL(?: PSS)?:?\s+(\d+)")
+
+
+class _Ring:
+    """Fixed capacity ring of timestamped metric rows."""
+
+    def __init__(self, capacity: int, width: int, extremes: bool):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.mean = np.full((capacity, width), np.nan, dtype=np.float32)
+        self.lo = np.full((capacity, width), np.nan, dtype=np.float32) if extremes else None
+        self.hi = np.full((capacity, width), np.nan, dtype=np.float32) if extremes else None
+        self.count = 0
+
+    def write(self, ts: float, mean: np.ndarray, lo: Optional[np.ndarray] = None, hi: Optional[np.ndarray] = None):
+        i = self.count % self.capacity
+        self.ts[i] = ts
+        self.mean[i] = mean
+        if self.lo is not None:
+            self.lo[i] = lo
+            self.hi[i] = hi
+        self.count += 1
+
+    def order(self) -> np.ndarray:
+        """Slot indices oldest to newest."""
+        n = min(self.count, self.capacity)
+        return np.arange(self.count - n, self.count) % self.capacity
+
+    @property
+    def oldest(self) -> float:
+        return float(self.ts[self.count % self.capacity if self.count > self.capacity else 0]) if self.count else math.inf
+
+
+class _Bucket:
+    """Running mean/min/max of the current tier bucket."""
+
+    def __init__(self, seconds: int, width: int):
+        self.seconds = seconds
+        self.key: Optional[int] = None
+        self.sum = np.zeros(width)
+        self.n = np.zeros(width)
+        self.lo = np.full(width, np.nan)
+        self.hi = np.full(width, np.nan)
+
+    def reset(self, key: int):
+        self.key = key
+        self.sum[:] = 0
+        self.n[:] = 0
+        self.lo[:] = np.nan
+        self.hi[:] = np.nan
+
+
+class TimeSeriesStore:
+    """Raw ring plus downsampled tiers for a fixed set of metrics."""
+
+    def __init__(self, metrics: Sequence[str], raw_capacity: int = 3600,
+                 tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS):
+        """
+        Initialize store.
+
+        Args:
+            metrics: Metric names (columns)
+            raw_capacity: Raw samples kept
+            tiers: (bucket seconds, bucket count) per downsampled tier
+        """
+        self.metrics = list(metrics)
+        self.index = {name: i for i, name in enumerate(self.metrics)}
+        width = len(self.metrics)
+        self.raw = _Ring(raw_capacity, width, extremes=False)
+        self.tiers = [(_Ring(count, width, extremes=True), _Bucket(seconds, width)) for seconds, count in tiers]
+        self._lock = threading.Lock()
+
+    def append(self, ts: float, values: np.ndarray):
+        """Add one sample row (NaN for missing metrics)."""
+        valid = ~np.isnan(values)
+        with self._lock:
+            self.raw.write(ts, values)
+            for ring, bucket in self.tiers:
+                key = int(ts // bucket.seconds)
+                if key != bucket.key:
+                    if bucket.key is not None:
+                        self._flush(ring, bucket)
+                    bucket.reset(key)
+                bucket.sum[valid] += values[valid]
+                bucket.n[valid] += 1
+                np.fmin(bucket.lo, values, out=bucket.lo)
+                np.fmax(bucket.hi, values, out=bucket.hi)
+
+    @staticmethod
+    def _flush(ring: _Ring, bucket: _Bucket):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = bucket.sum / bucket.n
+        ring.write(bucket.key * bucket.seconds, mean, bucket.lo, bucket.hi)
+
+    def window(self, metric: str, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Samples of one metric over the last seconds from the finest tier covering it.
+
+        Args:
+            metric: Metric name
+            seconds: Window length
+            now: Window end (default: current time)
+
+        Returns:
+            Tuple: (ts, mean, min, max, resolution seconds; 0 for raw samples)
+        """
+        start = (now or time.time()) - seconds
+        column = self.index[metric]
+        with self._lock:
+            candidates = [(self.raw, None)] + list(self.tiers)
+            filled = [(ring, bucket) for ring, bucket in candidates if ring.count]
+            if not filled:
+                empty = np.zeros(0)
+                return empty, empty, empty, empty, 0
+            # Finest ring covering the window; else the finest one still holding all history
+            ring, bucket = next(((r, b) for r, b in filled if r.oldest <= start),
+                                next(((r, b) for r, b in filled if r.count <= r.capacity),
+                                     min(filled, key=lambda item: item[0].oldest)))
+            order = ring.order()
+            keep = order[ring.ts[order] >= start]
+            ts = ring.ts[keep]
+            mean = ring.mean[keep, column].astype(np.float64)
+            if bucket is None:
+                return ts, mean, mean, mean, 0
+            lo = ring.lo[keep, column].astype(np.float64)
+            hi = ring.hi[keep, column].astype(np.float64)
+            # The bucket still being filled holds the newest samples
+            if bucket.key is not None and bucket.key * bucket.seconds >= start:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    current = bucket.sum[column] / bucket.n[column]
+                ts = np.append(ts, bucket.key * bucket.seconds)
+                mean = np.append(mean, current)
+                lo = np.append(lo, bucket.lo[column])
+                hi = np.append(hi, bucket.hi[column])
+            return ts, mean, lo, hi, bucket.seconds
+
+    def stats(self, metric: str, seconds: float, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Summary statistics of a metric over a window.
+
+        Args:
+            metric: Metric name
+            seconds: Window length
+            now: Window end (default: current time)
+
+        Returns:
+            Optional[Dict]: last, min, max, mean, p95, slope per minute, samples, resolution
+        """
+        ts, mean, lo, hi, resolution = self.window(metric, seconds, now)
+        valid = ~np.isnan(mean)
+        if not valid.any():
+            return None
+        ts, mean, lo, hi = ts[valid], mean[valid], lo[valid], hi[valid]
+        slope = np.polyfit(ts - ts[0], mean, 1)[0] * 60 if ts.size > 1 and ts[-1] > ts[0] else 0.0
+        return {
+            "last": float(mean[-1]),
+            "min": float(np.nanmin(lo)),
+            "max": float(np.nanmax(hi)),
+            "mean": float(mean.mean()),
+            "p95": float(np.percentile(mean, 95)),
+            "slope": float(slope),
+            "samples": int(mean.size),
+            "resolution": resolution,
+        }
+
+
+def _parse_battery(lines: List[str]) -> List[float]:
+    fields = {}
+    for line in lines:
+        match = _BATTERY_FIELD.match(line)
+        if match:
+            fields.setdefault(match.group(1), int(match.group(2)))
+    temperature = fields.get("temperature")
+    return [fields.get("level", math.nan), temperature / 10 if temperature is not None else math.nan,
+            fields.get("voltage", math.nan)]
+
+
+def _parse_meminfo(lines: List[str]) -> List[float]:
+    fields = {}
+    for line in lines:
+        match = _MEMINFO_FIELD.match(line)
+        if match:
+            fields[match.group(1)] = int(match.group(2))
+    total, available = fields.get("MemTotal"), fields.get("MemAvailable")
+    if not total or available is None:
+        return [math.nan, math.nan]
+    return [available / 1024, 100 * (1 - available / total)]
+
+
+def _parse_thermal(lines: List[str]) -> List[float]:
+    temps = []
+    for line in lines:
+        try:
+            value = int(line.strip())
+        except ValueError:
+            continue
+        # Zones report millidegrees (most) or degrees
+        celsius = value / 1000 if abs(value) >= 1000 else value
+        if -40 < celsius < 150:
+            temps.append(celsius)
+    return [max(temps) if temps else math.nan]
+
+
+def _parse_pss(lines: List[str]) -> float:
+    for line in lines:
+        match = _PSS_TOTAL.search(line)
+        if match:
+            return int(match.group(1)) / 1024
+    return math.nan
+
+
+class TelemetrySampler:
+    """Background device loop sampling telemetry sources into a TimeSeriesStore."""
+
+    def __init__(self, client: ADBClient, sources: Sequence[str] = DEFAULT_SOURCES,
+                 packages: Sequence[str] = (), interval: float = 1.0, raw_capacity: int = 3600):
+        """
+        Initialize sampler.
+
+        Args:
+            client: ADB client for device
+            sources: Source names (see SOURCES)
+            packages: Packages whose PSS is sampled via `dumpsys meminfo`
+            interval: Seconds between ticks
+            raw_capacity: Raw samples kept per metric
+        """
+        unknown = set(sources) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown telemetry sources: {', '.join(sorted(unknown))}")
+        self.client = client
+        self.sources = list(sources)
+        self.packages = list(packages)
+        self.interval = interval
+        metrics = [name for source in self.sources for name in SOURCE_METRICS[source]]
+        metrics += [f"pss_mb:{package}" for package in self.packages]
+        self.store = TimeSeriesStore(metrics, raw_capacity)
+        self.ticks = 0
+        self._cpu: Optional[Tuple[int, int]] = None
+        self._stream: Optional[ADBStream] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def script(self) -> str:
+        """Device loop printing each source between markers once per interval."""
+        parts = [f"echo {_MARKER}tick"]
+        for source in self.sources:
+            parts.append(f"echo {_MARKER}{source}; {SOURCES[source]}")
+        for package in self.packages:
+            parts.append(f"echo {_MARKER}pss:{package}; dumpsys meminfo {shlex.quote(package)} | grep -m 1 TOTAL")
+        parts.append(f"echo {_MARKER}end")
+        return f"while true; do {'; '.join(parts)}; sleep {self.interval}; done"
+
+    def start(self):
+        """Start sampling in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            self._stream = self.client.stream(f"exec-out {shlex.quote(self.script())}")
+            sections: Dict[str, List[str]] = {}
+            current: Optional[List[str]] = None
+            tick_ts = time.time()
+            while self._running:
+                line = self._stream.readline()
+                if line is None:
+                    break
+                if not line.startswith(_MARKER):
+                    if current is not None:
+                        current.append(line)
+                    continue
+                name = line[len(_MARKER):].strip()
+                if name == "tick":
+                    tick_ts, sections, current = time.time(), {}, None
+                elif name == "end":
+                    self.store.append(tick_ts, self._values(sections))
+                    self.ticks += 1
+                    current = None
+                else:
+                    current = sections.setdefault(name, [])
+            self._stream.close()
+            if self._running:
+                time.sleep(1)
+
+    def _values(self, sections: Dict[str, List[str]]) -> np.ndarray:
+        """Turn one tick's raw sections into a metric row."""
+        row: List[float] = []
+        for source in self.sources:
+            lines = sections.get(source, [])
+            if source == "battery":
+                row += _parse_battery(lines)
+            elif source == "cpu":
+                row.append(self._cpu_usage(lines))
+            elif source == "memory":
+                row += _parse_meminfo(lines)
+            elif source == "thermal":
+                row += _parse_thermal(lines)
+        row += [_parse_pss(sections.get(f"pss:{package}", [])) for package in self.packages]
+        return np.array(row, dtype=np.float64)
+
+    def _cpu_usage(self, lines: List[str]) -> float:
+        """CPU busy percentage since the previous tick from /proc/stat."""
+        fields = lines[0].split() if lines else []
+        if len(fields) < 5 or fields[0] != "cpu":
+            return math.nan
+        counters = [int(value) for value in fields[1:9]]
+        total, idle = sum(counters), counters[3] + (counters[4] if len(counters) > 4 else 0)
+        previous, self._cpu = self._cpu, (total, idle)
+        if previous is None or total <= previous[0]:
+            return math.nan
+        return 100 * (1 - (idle - previous[1]) / (total - previous[0]))
+
+    @property
+    def alive(self) -> bool:
+        """Check if the sampling loop is running."""
+        return bool(self._running and self._stream and self._stream.alive)
+
+    def stop(self):
+        """Stop sampling."""
+        self._running = False
+        if self._stream:
+            self._stream.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# Running samplers keyed by device serial
+_samplers: Dict[str, TelemetrySampler] = {}
+
+
+def get_sampler(device_id: str) -> Optional[TelemetrySampler]:
+    """Return running sampler for device, if any."""
+    return _samplers.get(device_id)
+
+
+def start_sampler(client: ADBClient, sources: Sequence[str] = DEFAULT_SOURCES, packages: Sequence[str] = (),
+                  interval: float = 1.0) -> TelemetrySampler:
+    """Start (or return existing) sampler for device."""
+    sampler = _samplers.get(client.device_id)
+    if sampler is None:
+        sampler = TelemetrySampler(client, sources, packages, interval)
+        sampler.start()
+        _samplers[client.device_id] = sampler
+    return sampler
+
+
+def stop_sampler(device_id: str) -> bool:
+    """Stop sampler for device. Returns False if none was running."""
+    sampler = _samplers.pop(device_id, None)
+    if sampler is None:
+        return False
+    sampler.stop()
+    return True
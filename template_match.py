@@ -0,0 +1,287 @@
+"""Template matching on device frames with normalized cross-correlation."""
+
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+from .adb_client import ADBClient
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Channels per PNG color type (gray, rgb, palette, gray+alpha, rgba)
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# Smallest template side kept at the coarse search level
+MIN_TEMPLATE_SIDE = 12
+
+# Preprocessed templates kept in memory
+TEMPLATE_CACHE_SIZE = 64
+
+
+class Match:
+    """Template match result in full-resolution screen coordinates."""
+
+    def __init__(self, x: int, y: int, width: int, height: int, confidence: float):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Center point of the matched box."""
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode 8-bit non-interlaced PNG into an array.
+
+    Args:
+        data: PNG file contents
+
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, channels)
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+
+    pos = len(PNG_SIGNATURE)
+    idat = []
+    palette = None
+    width = height = color_type = 0
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if chunk_type == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if depth != 8 or interlace or color_type not in _PNG_CHANNELS:
+                raise ValueError("Only 8-bit non-interlaced PNGs are supported")
+        elif chunk_type == b"PLTE":
+            palette = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+        elif chunk_type == b"IDAT":
+            idat.append(body)
+        elif chunk_type == b"IEND":
+            break
+
+    bpp = _PNG_CHANNELS[color_type]
+    stride = width * bpp
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, stride + 1)
+    pixels = np.zeros((height, stride), dtype=np.uint8)
+    prev = np.zeros(stride, dtype=np.uint8)
+    for y in range(height):
+        filter_type, line = raw[y, 0], raw[y, 1:]
+        if filter_type == 0:
+            row = line.copy()
+        elif filter_type == 1:
+            row = np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+        elif filter_type == 2:
+            row = line + prev
+        else:
+            row = _unfilter_sequential(filter_type, line, prev, bpp)
+        pixels[y] = row
+        prev = row
+
+    image = pixels.reshape(height, width, bpp)
+    if palette is not None and color_type == 3:
+        image = palette[image[:, :, 0]]
+    return image
+
+
+def _unfilter_sequential(filter_type: int, line: np.ndarray, prev: np.ndarray, bpp: int) -> np.ndarray:
+    """Undo Average/Paeth filters, which depend on the previous pixel."""
+    row = line.astype(np.int16)
+    up = prev.astype(np.int16)
+    for i in range(0, len(row), bpp):
+        left = row[i - bpp:i] if i else np.zeros(bpp, dtype=np.int16)
+        above = up[i:i + bpp]
+        if filter_type == 3:
+            predictor = (left + above) // 2
+        else:
+            upper_left = up[i - bpp:i] if i else np.zeros(bpp, dtype=np.int16)
+            p = left + above - upper_left
+            pa, pb, pc = np.abs(p - left), np.abs(p - above), np.abs(p - upper_left)
+            predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, above, upper_left))
+        row[i:i + bpp] = (row[i:i + bpp] + predictor) & 0xFF
+    return row.astype(np.uint8)
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """Convert (H, W, C) uint8 image to float32 luminance."""
+    if image.ndim == 2:
+        return image.astype(np.float32)
+    channels = image.shape[2]
+    if channels < 3:
+        return image[:, :, 0].astype(np.float32)
+    # Zero weight for alpha keeps the product on the contiguous pixel layout
+    weights = np.array([0.299, 0.587, 0.114, 0.0][:channels], dtype=np.float32)
+    flat = image.reshape(-1, channels).astype(np.float32) @ weights
+    return flat.reshape(image.shape[:2])
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """Reduce resolution by factor x factor box averaging in one pass."""
+    if factor == 1:
+        return image
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    cropped = image[:height * factor, :width * factor]
+    blocks = cropped.reshape(height, factor, width, factor)
+    # Reduce the contiguous axis first; much faster than mean(axis=(1, 3))
+    return blocks.sum(axis=3).sum(axis=1) / (factor * factor)
+
+
+def _window_sums(image: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Sum of every height x width window using an integral image."""
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = image.cumsum(axis=0).cumsum(axis=1)
+    return (integral[height:, width:] - integral[:-height, width:]
+            - integral[height:, :-width] + integral[:-height, :-width])
+
+
+def ncc_map(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """
+    Normalized cross-correlation of template at every valid position.
+
+    Args:
+        image: Grayscale search image
+        template: Grayscale template (not larger than image)
+
+    Returns:
+        np.ndarray: Scores in [-1, 1], shape (H - h + 1, W - w + 1)
+    """
+    height, width = template.shape
+    out_h, out_w = image.shape[0] - height + 1, image.shape[1] - width + 1
+    if out_h <= 0 or out_w <= 0:
+        return np.full((0, 0), -1.0)
+
+    centered = template - template.mean()
+    template_norm = np.sqrt((centered ** 2).sum())
+    if template_norm == 0:
+        return np.zeros((out_h, out_w))
+
+    # Correlation via FFT: convolve with the flipped template
+    shape = (image.shape[0] + height - 1, image.shape[1] + width - 1)
+    spectrum = np.fft.rfft2(image, shape) * np.fft.rfft2(centered[::-1, ::-1], shape)
+    numerator = np.fft.irfft2(spectrum, shape)[height - 1:height - 1 + out_h, width - 1:width - 1 + out_w]
+
+    area = height * width
+    sums = _window_sums(image, height, width)
+    sums_sq = _window_sums(image.astype(np.float64) ** 2, height, width)
+    variance = np.maximum(sums_sq - sums ** 2 / area, 0)
+    denominator = np.sqrt(variance) * template_norm
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(denominator > 1e-6, numerator / denominator, 0.0)
+    return np.clip(scores, -1.0, 1.0)
+
+
+class PreparedTemplate:
+    """Template converted to grayscale full and coarse levels once and reused."""
+
+    def __init__(self, image: np.ndarray):
+        self.full = to_gray(image)
+        self.height, self.width = self.full.shape
+        # Largest power-of-two reduction keeping the template recognizable
+        self.factor = 1
+        while min(self.height, self.width) // (self.factor * 2) >= MIN_TEMPLATE_SIDE:
+            self.factor *= 2
+        self.coarse = downsample(self.full, self.factor)
+
+
+_template_cache: "OrderedDict[Tuple[str, int, int], PreparedTemplate]" = OrderedDict()
+
+
+def load_template(path: str) -> PreparedTemplate:
+    """
+    Load template PNG, reusing cached preprocessing while the file is unchanged.
+
+    Args:
+        path: Path to template PNG on host
+
+    Returns:
+        PreparedTemplate
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in _template_cache:
+        _template_cache.move_to_end(key)
+        return _template_cache[key]
+
+    with open(path, "rb") as f:
+        prepared = PreparedTemplate(decode_png(f.read()))
+
+    _template_cache[key] = prepared
+    if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+        _template_cache.popitem(last=False)
+    return prepared
+
+
+def find_template(frame: np.ndarray, template: PreparedTemplate, candidates: int = 3) -> Optional[Match]:
+    """
+    Locate template in frame with a coarse-to-fine search.
+
+    The full NCC map is only computed on the downscaled frame; the best
+    coarse peaks are then refined in small windows at full resolution.
+
+    Args:
+        frame: Grayscale full-resolution frame
+        template: Prepared template
+        candidates: Coarse peaks refined at full resolution
+
+    Returns:
+        Match or None if template does not fit in frame
+    """
+    scale = template.factor
+    coarse = ncc_map(downsample(frame, scale), template.coarse)
+    if coarse.size == 0:
+        return None
+
+    best: Optional[Match] = None
+    count = min(candidates, coarse.size)
+    for index in np.argpartition(coarse.ravel(), -count)[-count:]:
+        cy, cx = np.unravel_index(index, coarse.shape)
+        # Coarse peak is accurate to about one coarse pixel
+        y0 = max(int(cy) * scale - scale, 0)
+        x0 = max(int(cx) * scale - scale, 0)
+        y1 = min(int(cy) * scale + scale + template.height, frame.shape[0])
+        x1 = min(int(cx) * scale + scale + template.width, frame.shape[1])
+        fine = ncc_map(frame[y0:y1, x0:x1], template.full)
+        if fine.size == 0:
+            continue
+        fy, fx = np.unravel_index(np.argmax(fine), fine.shape)
+        score = float(fine[fy, fx])
+        if best is None or score > best.confidence:
+            best = Match(x0 + int(fx), y0 + int(fy), template.width, template.height, score)
+    return best
+
+
+def capture_frame(client: ADBClient, timeout: int = 30) -> Tuple[bool, object]:
+    """
+    Capture raw framebuffer over exec-out (no PNG encode/decode).
+
+    Args:
+        client: ADB client for device
+        timeout: Command timeout in seconds
+
+    Returns:
+        Tuple[bool, object]: (success, grayscale frame or error message)
+    """
+    success, data = client.execute_bytes("exec-out screencap", timeout=timeout)
+    if not success:
+        return False, data.decode(errors="replace")
+    if len(data) < 12:
+        return False, "Empty screencap output"
+
+    width, height, _ = struct.unpack("<III", data[:12])
+    pixels = width * height * 4
+    # Header is 12 bytes, or 16 bytes with colorspace on Android 9+
+    header = len(data) - pixels
+    if header not in (12, 16):
+        return False, f"Unexpected screencap size {len(data)} for {width}x{height}"
+
+    rgba = np.frombuffer(data, dtype=np.uint8, offset=header).reshape(height, width, 4)
+    return True, to_gray(rgba)
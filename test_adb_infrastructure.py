@@ -90,6 +90,11 @@ def test_adb_infrastructure():
     assert allowed, "System path should be allowed (with warning)"
     assert risk == RiskLevel.HIGH, "Should be high risk"
 
+    batch = SecurityValidator.validate_paths(["/sdcard/a.txt", "/system/bin/su", "/dev/null"])
+    print(f"   Batch risks: {[r.value for _, r, _ in batch]}")
+    assert batch == [SecurityValidator.validate_path(p) for p in ["/sdcard/a.txt", "/system/bin/su", "/dev/null"]], \
+        "Batch validation should match per-path validation"
+
     # Test 9: Device Manager
     print("\n9. Testing device manager...")
     manager = DeviceManager()
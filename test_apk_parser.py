@@ -0,0 +1,210 @@
+"""Test APK manifest parser - Checkpoint 3.10"""
+
+import hashlib
+import io
+import re
+import shlex
+import struct
+import sys
+import zipfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android import apk_parser
+from domains.android.apk_parser import ResourceTable, device_apk_manifest, format_manifest, parse_apk, parse_axml
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+LABEL_ID = 0x7F0A0001
+
+
+def _chunk(chunk_type, header, body):
+    return struct.pack("<HHI", chunk_type, 8 + len(header), 8 + len(header) + len(body)) + header + body
+
+
+def _string_pool(strings, utf8=False):
+    data, offsets = b"", []
+    for s in strings:
+        offsets.append(len(data))
+        if utf8:
+            raw = s.encode()
+            data += bytes([len(s), len(raw)]) + raw + b"\0"
+        else:
+            data += struct.pack("<H", len(s)) + s.encode("utf-16-le") + b"\0\0"
+    data += b"\0" * (-len(data) % 4)
+    header = struct.pack("<IIIII", len(strings), 0, 0x100 if utf8 else 0, 28 + 4 * len(strings), 0)
+    return _chunk(0x0001, header, struct.pack(f"<{len(offsets)}I", *offsets) + data)
+
+
+class _Xml:
+    """Minimal binary XML writer; attribute names come first in the pool to match the resource map."""
+
+    ATTRS = [("name", 0x01010003), ("label", 0x01010001), ("exported", 0x01010010),
+             ("versionCode", 0x0101021B), ("minSdkVersion", 0x0101020C), ("targetSdkVersion", 0x01010270)]
+
+    def __init__(self):
+        self.strings = [name for name, _ in self.ATTRS]
+        self.body = b""
+
+    def s(self, value):
+        if value not in self.strings:
+            self.strings.append(value)
+        return self.strings.index(value)
+
+    def start(self, tag, **attrs):
+        encoded = b""
+        for key, value in attrs.items():
+            name = self.s(key) if key not in dict(self.ATTRS) else [n for n, _ in self.ATTRS].index(key)
+            ns = self.s(ANDROID_NS) if key != "package" else 0xFFFFFFFF
+            if isinstance(value, bool):
+                raw, typed = 0xFFFFFFFF, (0x12, 0xFFFFFFFF if value else 0)
+            elif isinstance(value, int) and value >= 0x7F000000:
+                raw, typed = 0xFFFFFFFF, (0x01, value)
+            elif isinstance(value, int):
+                raw, typed = 0xFFFFFFFF, (0x10, value)
+            else:
+                raw, typed = self.s(value), (0x03, self.s(value))
+            encoded += struct.pack("<IIIHBBI", ns, name, raw, 8, 0, typed[0], typed[1])
+        ext = struct.pack("<IIHHHHHH", 0xFFFFFFFF, self.s(tag), 20, 20, len(attrs), 0, 0, 0)
+        self.body += _chunk(0x0102, struct.pack("<II", 1, 0xFFFFFFFF), ext + encoded)
+        return self
+
+    def end(self, tag):
+        self.body += _chunk(0x0103, struct.pack("<II", 1, 0xFFFFFFFF), struct.pack("<II", 0xFFFFFFFF, self.s(tag)))
+        return self
+
+    def build(self):
+        resource_map = _chunk(0x0180, b"", struct.pack(f"<{len(self.ATTRS)}I", *(i for _, i in self.ATTRS)))
+        content = _string_pool(self.strings) + resource_map + self.body
+        return _chunk(0x0003, b"", content)
+
+
+def _manifest():
+    xml = _Xml()
+    xml.start("manifest", package="com.example.app", versionCode=42, versionName="1.4.2")
+    xml.start("uses-sdk", minSdkVersion=24, targetSdkVersion=34).end("uses-sdk")
+    xml.start("uses-permission", name="android.permission.CAMERA").end("uses-permission")
+    xml.start("application", label=LABEL_ID)
+    xml.start("activity", name=".MainActivity", exported=True)
+    xml.start("intent-filter")
+    xml.start("action", name="android.intent.action.MAIN").end("action")
+    xml.start("category", name="android.intent.category.LAUNCHER").end("category")
+    xml.end("intent-filter").end("activity")
+    xml.start("service", name="com.example.sync.SyncService", exported=False).end("service")
+    xml.end("application").end("manifest")
+    return xml.build()
+
+
+def _type_chunk(locale, value_index):
+    config = struct.pack("<I", 64) + (locale.ljust(4, b"\0") if locale else b"\0" * 4) + b"\0" * 56
+    # Entries 0 (absent) and 1 (string)
+    offsets = struct.pack("<II", 0xFFFFFFFF, 0)
+    entry = struct.pack("<HHI", 8, 0, 0) + struct.pack("<HBBI", 8, 0, 0x03, value_index)
+    header = struct.pack("<BBHII", 0x0A, 0, 0, 2, 20 + len(config) + len(offsets)) + config
+    return _chunk(0x0201, header, offsets + entry)
+
+
+def _resources():
+    # Localized value first, so the default configuration has to win over it
+    package_body = _type_chunk(b"fr", 1) + _type_chunk(None, 0)
+    name = "com.example.app".encode("utf-16-le").ljust(256, b"\0")
+    header = struct.pack("<I", 0x7F) + name + struct.pack("<IIIII", 0, 0, 0, 0, 0)
+    package = _chunk(0x0200, header, package_body)
+    return _chunk(0x0002, struct.pack("<I", 1), _string_pool(["Example", "Exemple"], utf8=True) + package)
+
+
+def _apk():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("AndroidManifest.xml", _manifest())
+        archive.writestr("resources.arsc", _resources(), compress_type=zipfile.ZIP_STORED)
+        archive.writestr("classes.dex", b"dex\n035\0" + b"\0" * 4096)
+    buffer.seek(0)
+    return buffer
+
+
+class _DeviceStub:
+    """Serves one APK through stat/sha256sum and dd range reads."""
+
+    device_id = "stub"
+
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    def shell(self, command, timeout=30):
+        self.commands.append(command)
+        return True, f"{len(self.data)}\n{hashlib.sha256(self.data).hexdigest()}  /data/app/base.apk\n"
+
+    def execute_bytes(self, command, timeout=30, input=None):
+        self.commands.append(command)
+        bs, skip, count = map(int, re.search(r"bs=(\d+) skip=(\d+) count=(\d+)", command).groups())
+        return True, self.data[bs * skip:bs * (skip + count)]
+
+
+def test_apk_parser():
+    """Test binary XML, resource resolution and manifest summary."""
+    print("Testing APK Parser...")
+    print("=" * 60)
+
+    # Test 1: Binary XML tree
+    print("\n1. Testing binary XML parsing...")
+    root = parse_axml(_manifest())
+    print(f"   Root: {root['tag']} {root['attrs']}")
+    assert root["tag"] == "manifest" and root["attrs"]["versionCode"] == 42
+    assert [c["tag"] for c in root["children"]] == ["uses-sdk", "uses-permission", "application"]
+
+    # Test 2: resources.arsc prefers the default configuration
+    print("\n2. Testing resource resolution...")
+    assert ResourceTable(_resources()).resolve([LABEL_ID, LABEL_ID + 1]) == {LABEL_ID: "Example"}
+
+    # Test 3: Manifest summary from an APK
+    print("\n3. Testing APK manifest summary...")
+    info = parse_apk(_apk())
+    assert info["package"] == "com.example.app" and info["version_name"] == "1.4.2"
+    assert info["min_sdk"] == 24 and info["target_sdk"] == 34
+    assert info["permissions"] == ["android.permission.CAMERA"]
+    assert info["application"]["label"] == "Example", "Label reference should resolve"
+    main, service = info["components"]
+    assert main["name"] == "com.example.app.MainActivity" and main["exported"]
+    assert service["name"] == "com.example.sync.SyncService" and not service["exported"]
+
+    report = format_manifest(info)
+    print(report)
+    assert "launcher" in report and "Label: Example" in report
+
+    # Test 4: Not an APK
+    print("\n4. Testing invalid input...")
+    try:
+        parse_apk(io.BytesIO(b"not a zip"))
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+    # Test 5: Device APK commands reach the device shell intact
+    print("\n5. Testing device APK manifest commands...")
+    apk_parser._manifest_cache.clear()
+    client = _DeviceStub(_apk().getvalue())
+    info = device_apk_manifest(client, "/data/app/base.apk")
+    print(f"   Commands: {client.commands}")
+    assert info["package"] == "com.example.app"
+    expected = "'stat -c %s /data/app/base.apk && sha256sum /data/app/base.apk'"
+    assert client.commands[0] == expected, "Whole script must be one quoted argument"
+    # The host shell must pass the script to adb as a single word
+    assert shlex.split(client.commands[0]) == ["stat -c %s /data/app/base.apk && sha256sum /data/app/base.apk"]
+    assert all(cmd.startswith("exec-out 'dd if=/data/app/base.apk ") for cmd in client.commands[1:])
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.10 PASSED - APK parser working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_apk_parser()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.10 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
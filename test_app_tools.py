@@ -0,0 +1,221 @@
+"""Test fleet APK install - Checkpoint 3.22"""
+
+import hashlib
+import io
+import os
+import shlex
+import sys
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.tools import app_tools
+from domains.android.tools.app_tools import _stream_install
+from test_apk_parser import _Xml, _apk
+
+PACKAGE = "com.example.app"
+
+
+def _split_apk() -> bytes:
+    xml = _Xml()
+    xml.start("manifest", package=PACKAGE, split="config.arm64_v8a").end("manifest")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("AndroidManifest.xml", xml.build())
+        archive.writestr("lib/arm64-v8a/libapp.so", os.urandom(2048))
+    return buffer.getvalue()
+
+
+class _Session:
+    """`pm install -S` session: reads exactly the announced size from stdin, or stalls until killed."""
+
+    def __init__(self, size, reject=None, stall=False):
+        self.size = size
+        self.reject = reject
+        self.stall = stall
+        self.killed = threading.Event()
+        self.received = bytearray()
+        self.writes = 0
+        self.closed = False
+        self.stdin = self
+        self.stdout = self
+
+    def write(self, block):
+        if self.stall:
+            self.killed.wait()
+        if self.reject or self.killed.is_set():
+            raise BrokenPipeError
+        self.writes += 1
+        self.received += block
+
+    def close(self):
+        self.closed = True
+
+    def read(self):
+        if self.killed.is_set():
+            return b""
+        if self.reject:
+            return f"Failure [{self.reject}]\n".encode()
+        ok = self.closed and len(self.received) == self.size
+        return b"Success\n" if ok else b"Failure [INSTALL_FAILED_INVALID_APK: short read]\n"
+
+    def wait(self, timeout=None):
+        return 0
+
+    def poll(self):
+        return 0
+
+    def kill(self):
+        self.killed.set()
+
+
+class _InstallClient:
+    """Device with a set of installed APK files per package."""
+
+    def __init__(self, device_id, installed=(), reject=None, stall=False):
+        self.device_id = device_id
+        self.installed = list(installed)
+        self.reject = reject
+        self.stall = stall
+        self.commands = []
+        self.sessions = []
+
+    def shell(self, command, timeout=30):
+        self.commands.append(command)
+        (script,) = shlex.split(command)
+        assert f"pm path {PACKAGE}" in script, f"Unexpected shell command: {command}"
+        lines = [f"{hashlib.sha256(data).hexdigest()}  /data/app/{PACKAGE}/{i}.apk"
+                 for i, data in enumerate(self.installed)]
+        return True, "\n".join(lines)
+
+    def popen(self, command, stdin=False):
+        self.commands.append(command)
+        assert stdin, "APK must be streamed over stdin"
+        session = _Session(int(command.split("-S ")[1].split()[0]), self.reject, self.stall)
+        self.sessions.append(session)
+        return session
+
+    def execute(self, command, timeout=30):
+        self.commands.append(command)
+        return True, "Success"
+
+
+class _Manager:
+    def __init__(self, clients):
+        self.clients = {client.device_id: client for client in clients}
+
+    def get_device(self, device_id=None):
+        return self.clients.get(device_id)
+
+    def scan_devices(self):
+        return list(self.clients)
+
+
+def test_app_tools():
+    """Test streamed installs and the installed-hash skip logic."""
+    print("Testing Fleet Install...")
+    print("=" * 60)
+
+    base = _apk().getvalue()
+    split = _split_apk()
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, "app release.apk")
+        split_path = os.path.join(tmp, "split_config.arm64_v8a.apk")
+        with open(base_path, "wb") as f:
+            f.write(base)
+        with open(split_path, "wb") as f:
+            f.write(split)
+
+        # Test 1: Streamed `pm install -S` sends the whole file in chunks
+        print("\n1. Testing streamed install...")
+        chunk = app_tools.INSTALL_CHUNK
+        app_tools.INSTALL_CHUNK = 1000
+        try:
+            client = _InstallClient("dev1")
+            output = _stream_install(client, base_path, "-r -g")
+        finally:
+            app_tools.INSTALL_CHUNK = chunk
+        session = client.sessions[0]
+        print(f"   {client.commands[0]}: {output} ({session.writes} writes)")
+        assert client.commands == [f"shell pm install -S {len(base)} -r -g"]
+        assert output == "Success" and bytes(session.received) == base and session.closed
+        assert session.writes == -(-len(base) // 1000)
+
+        # pm closing the pipe early still reports its reason
+        rejected = _InstallClient("dev2", reject="INSTALL_FAILED_INSUFFICIENT_STORAGE")
+        assert _stream_install(rejected, base_path, "-r") == "Failure [INSTALL_FAILED_INSUFFICIENT_STORAGE]"
+        assert rejected.sessions[0].closed, "stdin is closed even after a broken pipe"
+
+        # A session that stops reading is killed at the deadline
+        timeout = app_tools.INSTALL_TIMEOUT
+        app_tools.INSTALL_TIMEOUT = 0.2
+        try:
+            stalled = _InstallClient("dev3", stall=True)
+            assert _stream_install(stalled, base_path, "-r") == "Failure [timed out after 0.2s]"
+        finally:
+            app_tools.INSTALL_TIMEOUT = timeout
+        assert stalled.sessions[0].killed.is_set() and stalled.sessions[0].closed
+        assert _stream_install(_InstallClient("dev4"), base_path, "-r") == "Success"
+
+        # Test 2: Identical installs are skipped, others streamed
+        print("\n2. Testing fleet install skip logic...")
+        clients = [_InstallClient("same", [base]), _InstallClient("older", [b"old apk"]), _InstallClient("fresh"),
+                   _InstallClient("full", reject="INSTALL_FAILED_INSUFFICIENT_STORAGE")]
+        manager = app_tools._device_manager
+        app_tools._device_manager = _Manager(clients)
+        try:
+            result = app_tools.install_app_fleet.invoke({"apk_paths": base_path,
+                                                         "device_id": "same,older,fresh,full,ghost"})
+            print(result)
+            same, older, fresh, full = clients
+            assert result.startswith(f"{PACKAGE} 1.4.2 (42) on 5 device(s)")
+            assert "1 skipped" in result and "2 installed" in result and "2 failed" in result
+            assert "same: skipped, identical APK installed" in result and not same.sessions
+            assert bytes(older.sessions[0].received) == base and bytes(fresh.sessions[0].received) == base
+            assert "full: FAILED after" in result and "INSTALL_FAILED_INSUFFICIENT_STORAGE" in result
+            assert "ghost: FAILED: device not found" in result
+            assert older.commands[-1] == f"shell pm install -S {len(base)} -r"
+
+            # force reinstalls identical APKs
+            forced = app_tools.install_app_fleet.invoke({"apk_paths": base_path, "device_id": "same", "force": True})
+            assert "1 installed, 0 skipped" in forced and len(same.sessions) == 1
+
+            # Test 3: Split sets compare every APK hash and use install-multiple
+            print("\n3. Testing split APK sets...")
+            same.installed = [split, base]
+            older.installed = [base]
+            result = app_tools.install_app_fleet.invoke({"apk_paths": f"{base_path}, {split_path}",
+                                                         "device_id": "same,older", "grant_permissions": True})
+            print(result)
+            assert "same: skipped" in result and "older: installed" in result
+            assert older.commands[-1] == (f"install-multiple -r -g {shlex.quote(base_path)} "
+                                          f"{shlex.quote(split_path)}")
+
+            # Test 4: Bad APK sets are rejected before touching devices
+            print("\n4. Testing APK validation...")
+            calls = sum(len(client.commands) for client in clients)
+            assert app_tools.install_app_fleet.invoke({"apk_paths": split_path}) == \
+                "Expected exactly one base APK, found 0"
+            assert app_tools.install_app_fleet.invoke({"apk_paths": os.path.join(tmp, "none.apk")}).startswith(
+                "Cannot read APK:")
+            assert sum(len(client.commands) for client in clients) == calls
+        finally:
+            app_tools._device_manager = manager
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.22 PASSED - Fleet install working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_app_tools()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.22 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
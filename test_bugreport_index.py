@@ -0,0 +1,108 @@
+"""Test bugreport section index - Checkpoint 3.16"""
+
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.bugreport_index import BugReport, build_index, load_index, scan_sections
+
+REPORT = """\
+== dumpstate: 2024-01-01 10:00:00
+------ MEMORY INFO (/proc/meminfo) ------
+MemTotal:        7823456 kB
+MemFree:          123456 kB
+------ 0.010s was the duration of 'MEMORY INFO' ------
+------ DUMPSYS (/system/bin/dumpsys) ------
+-------------------------------------------------------------------------------
+DUMP OF SERVICE CRITICAL activity:
+  mFocusedApp=com.example.app
+ANR in com.example.app
+-------------------------------------------------------------------------------
+DUMP OF SERVICE meminfo:
+Total RAM: 7,823,456K
+  anr count: 1
+------ SYSTEM LOG (logcat -v threadtime -d *:v) ------
+01-01 10:00:00.000  1000  1000 E ActivityManager: ANR in com.example.app
+"""
+
+
+def test_bugreport_index():
+    """Test section scanning, lookup, reads and line grep on a synthetic report."""
+    print("Testing Bugreport Index...")
+    print("=" * 60)
+
+    data = REPORT.encode()
+
+    # Test 1: Section scan with nested services and duration lines
+    print("\n1. Testing section scan...")
+    sections = scan_sections(data, 0, len(data))
+    for section in sections:
+        print(f"   #{section['id']} {section['kind']} {section['name']} parent={section['parent']}")
+    assert [s["name"] for s in sections] == ["MEMORY INFO", "DUMPSYS", "activity", "meminfo", "SYSTEM LOG"]
+    meminfo_section, dumpsys, activity, meminfo, system_log = sections
+    assert meminfo_section["command"] == "/proc/meminfo"
+    assert data[meminfo_section["end"]:].startswith(b"------ 0.010s"), "Duration line should close the section"
+    assert activity["kind"] == "service" and activity["parent"] == dumpsys["id"]
+    assert activity["end"] == meminfo["start"] and meminfo["end"] == system_log["start"]
+    assert system_log["end"] == len(data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Test 2: Deflated zip entry with a saved index
+        print("\n2. Testing zip indexing...")
+        path = str(Path(tmp) / "bugreport.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("main_entry.txt", "bugreport-device-2024.txt")
+            archive.writestr("bugreport-device-2024.txt", REPORT)
+            archive.writestr("version.txt", "2.0")
+        assert build_index(path) == sections
+        assert load_index(path) == sections, "Saved index should be reused"
+        report = BugReport(path, sections)
+
+        # Test 3: Section lookup
+        print("\n3. Testing find...")
+        assert report.find("#2") == [activity]
+        assert report.find("#99") == []
+        assert report.find("meminfo") == [meminfo], "Exact name should win over substrings"
+        assert report.find("mem") == [meminfo_section, meminfo]
+        assert report.find("system") == [system_log], "Substring match is case-insensitive"
+
+        # Test 4: Bounded reads stay inside the section
+        print("\n4. Testing read...")
+        text = report.read(meminfo_section)
+        assert text.startswith("------ MEMORY INFO") and text.endswith("123456 kB\n")
+        assert report.read(meminfo_section, offset=len("------ MEMORY INFO (/proc/meminfo) ------\n"),
+                           limit=8) == "MemTotal"
+        assert report.read(meminfo_section, offset=10 ** 6) == ""
+        assert report.section_at(meminfo["start"] + 40)["name"] == "meminfo"
+
+        # Test 5: Line grep with anchors, case folding and section scope
+        print("\n5. Testing grep...")
+        anchored = report.grep(r"^ANR in")
+        print(f"   ^ANR in: {anchored}")
+        assert [line for _, line in anchored] == ["ANR in com.example.app"], "^ should anchor at line starts"
+        assert [line for _, line in report.grep(r"kB$")] == ["MemTotal:        7823456 kB",
+                                                             "MemFree:          123456 kB"]
+        assert len(report.grep("anr")) == 1 and len(report.grep("anr", ignore_case=True)) == 3
+        scoped = report.grep(r"^\s+anr count", section=meminfo)
+        assert scoped == [(REPORT.index("  anr count"), "  anr count: 1")]
+        assert report.grep("ANR", section=system_log)[0][1].endswith("ANR in com.example.app")
+        assert len(report.grep("e", max_matches=2)) == 2
+        report.close()
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.16 PASSED - Bugreport index working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_bugreport_index()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.16 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
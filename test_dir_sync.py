@@ -0,0 +1,70 @@
+"""Test directory sync planning - Checkpoint 3.14"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android import dir_sync
+from domains.android.dir_sync import list_local_tree, local_md5s, parse_stat_listing, plan_sync
+
+
+def test_dir_sync():
+    """Test tree listing, hash comparison and change planning."""
+    print("Testing Directory Sync...")
+    print("=" * 60)
+
+    # Test 1: Device listing
+    print("\n1. Testing device stat listing...")
+    device = parse_stat_listing("12 1700000000 ./a.txt\n"
+                                "5 1700000001 ./dir/name with space.bin\n"
+                                "7 1700000002 ./old.txt\n"
+                                "stat: ./gone: No such file or directory\n")
+    print(f"   Device tree: {device}")
+    assert device == {"a.txt": (12, 1700000000.0), "dir/name with space.bin": (5, 1700000001.0),
+                      "old.txt": (7, 1700000002.0)}
+
+    # Test 2: Host listing and cached hashing
+    print("\n2. Testing host tree and hashes...")
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "dir"))
+        for rel, data in (("a.txt", b"hello world!"), ("dir/name with space.bin", b"12345"), ("new.txt", b"n")):
+            with open(os.path.join(root, rel), "wb") as f:
+                f.write(data)
+        local = list_local_tree(root)
+        assert sorted(local) == ["a.txt", "dir/name with space.bin", "new.txt"]
+        assert local["a.txt"][0] == 12
+        hashes = local_md5s(root, ["a.txt", "dir/name with space.bin"])
+        assert hashes["a.txt"] == "fc3ff98e8c6a0d3087d515c0473f8677"
+        cached = len(dir_sync._hash_cache)
+        local_md5s(root, ["a.txt"])
+        assert len(dir_sync._hash_cache) == cached, "Unchanged files are not rehashed"
+    assert list_local_tree("/nonexistent/dir") is None
+
+    # Test 3: Plan only touches differing files
+    print("\n3. Testing sync plan...")
+    device_hashes = {"a.txt": "fc3ff98e8c6a0d3087d515c0473f8677", "dir/name with space.bin": "0" * 32}
+    plan = plan_sync(local, device, hashes, device_hashes, delete=True)
+    print(f"   Plan: {plan}")
+    assert plan == {"added": ["new.txt"], "changed": ["dir/name with space.bin"],
+                    "deleted": ["old.txt"], "unchanged": ["a.txt"]}
+    assert plan_sync(local, device, hashes, {}, delete=False)["changed"] == ["a.txt", "dir/name with space.bin"], \
+        "Missing hash counts as changed"
+    assert plan_sync(local, device, hashes, device_hashes)["deleted"] == []
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.14 PASSED - Directory sync working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_dir_sync()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.14 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,273 @@
+"""Test file read/write tools - Checkpoint 3.21"""
+
+import base64
+import hashlib
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.tools import file_tools
+from domains.android.tools.file_tools import READ_BLOCK, _hexdump, _read_command, _stat_paths
+
+
+class _ShellClient:
+    """Runs device scripts with the local sh; coreutils stand in for toybox."""
+
+    device_id = "stub"
+
+    def __init__(self):
+        self.commands = []
+        self.inputs = []
+
+    def execute_bytes(self, command, timeout=30, input=None):
+        self.commands.append(command)
+        self.inputs.append(input)
+        kind, script = shlex.split(command)
+        assert kind in ("shell", "exec-out"), f"Unexpected adb command: {command}"
+        result = subprocess.run(["sh", "-c", script], input=input, capture_output=True)
+        return result.returncode == 0, result.stdout if result.returncode == 0 else result.stderr
+
+    def shell(self, command, timeout=30):
+        self.commands.append(command)
+        (script,) = shlex.split(command)
+        result = subprocess.run(["sh", "-c", script], capture_output=True, text=True)
+        return result.returncode == 0, (result.stdout if result.returncode == 0 else result.stderr).strip()
+
+
+class _LossyClient(_ShellClient):
+    """Loses the last byte on the way to the device."""
+
+    def execute_bytes(self, command, timeout=30, input=None):
+        return super().execute_bytes(command, timeout, input[:-1])
+
+
+class _NoGzipClient(_ShellClient):
+    """Device without gzip."""
+
+    def execute_bytes(self, command, timeout=30, input=None):
+        return super().execute_bytes(command.replace("command -v gzip", "false"), timeout, input)
+
+
+class _Manager:
+    def __init__(self, client):
+        self.client = client
+
+    def get_device(self, device_id=None):
+        return self.client
+
+
+def _script(client) -> str:
+    return shlex.split(client.commands[-1])[1]
+
+
+def test_file_tools():
+    """Test write_file scripts, read_file range commands, framing and paging notes, and batch stat."""
+    print("Testing File Tools...")
+    print("=" * 60)
+
+    client = _ShellClient()
+    manager = file_tools._device_manager
+    file_tools._device_manager = _Manager(client)
+    write = file_tools.write_file.invoke
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "it's here.txt")
+            target = shlex.quote(path)
+            staged = shlex.quote(f"{path}.atlas-tmp") + ".$$"
+
+            # Test 1: New file, verified, streamed over stdin
+            print("\n1. Testing new file write...")
+            content = "hello 'quoted' $HOME `x`\n"
+            result = write({"path": path, "content": content})
+            print(f"   {result}")
+            assert result == f"Wrote {len(content)} bytes to {path} (MD5 verified)"
+            assert client.commands[-1].startswith("shell '"), "Script must reach adb as one argument"
+            assert client.inputs[-1] == content.encode(), "Content goes over stdin, not the command line"
+            expected = hashlib.md5(content.encode()).hexdigest()
+            assert _script(client).split("\n") == [
+                f"if [ -e {target} ]; then : > {staged} && chmod $(stat -c %a {target}) {staged}; fi",
+                f"cat >> {staged} || {{ rm -f {staged}; exit 1; }}",
+                f"sum=$(tail -c {len(content)} {staged} | md5sum | cut -d' ' -f1)",
+                f"[ \"$sum\" = {expected} ] || {{ rm -f {staged}; echo \"checksum mismatch: $sum\" >&2; exit 1; }}",
+                f"mv -f {staged} {target} || {{ rm -f {staged}; exit 1; }}",
+            ]
+            assert open(path).read() == content and os.listdir(tmp) == ["it's here.txt"]
+
+            # Test 2: Replace keeps the mode of the existing file
+            print("\n2. Testing mode-preserving replace...")
+            os.chmod(path, 0o640)
+            assert write({"path": path, "content": "new\n", "verify": False}) == f"Wrote 4 bytes to {path}"
+            assert "md5sum" not in _script(client), "No checksum step without verify"
+            assert open(path).read() == "new\n" and os.stat(path).st_mode & 0o777 == 0o640
+
+            # Test 3: Append copies the old file and checks only the new tail
+            print("\n3. Testing append...")
+            result = write({"path": path, "content": "more\n", "append": True})
+            assert result == f"Appended 5 bytes to {path} (MD5 verified)"
+            assert _script(client).startswith(f"if [ -e {target} ]; then cp {target} {staged} && chmod ")
+            assert f"tail -c 5 {staged}" in _script(client)
+            assert open(path).read() == "new\nmore\n" and os.stat(path).st_mode & 0o777 == 0o640
+
+            # Test 4: Binary content as base64
+            print("\n4. Testing base64 content...")
+            data = bytes(range(256)) * 64
+            result = write({"path": path, "content": base64.b64encode(data).decode(), "encoding": "base64"})
+            assert result == f"Wrote {len(data)} bytes to {path} (MD5 verified)"
+            assert client.inputs[-1] == data and open(path, "rb").read() == data
+
+            # Test 5: Bad input never reaches the device; device errors are reported
+            print("\n5. Testing errors...")
+            calls = len(client.commands)
+            assert write({"path": path, "content": "!!not base64", "encoding": "base64"}).startswith(
+                "Invalid base64 content:")
+            assert write({"path": path, "content": "x", "encoding": "utf-16"}) == \
+                "Unknown encoding: utf-16 (use text or base64)"
+            assert len(client.commands) == calls
+            result = write({"path": os.path.join(tmp, "missing", "x"), "content": "x"})
+            print(f"   {result}")
+            assert result.startswith("Failed to write file:")
+            file_tools._device_manager = _Manager(_LossyClient())
+            result = write({"path": path, "content": "abc"})
+            print(f"   {result}")
+            assert result.startswith("Failed to write file: checksum mismatch")
+            assert open(path, "rb").read() == data and len(os.listdir(tmp)) == 1, "No temp files left behind"
+    finally:
+        file_tools._device_manager = manager
+
+    # Test 6: Range commands and dd block arithmetic
+    print("\n6. Testing read range commands...")
+    quoted = shlex.quote("/sdcard/my log.txt")
+    assert _read_command("/sdcard/my log.txt", 0, 100, 3, 5) == (f"sed -n '3,5p;5q' {quoted} | head -c 100", 0)
+    assert _read_command("/sdcard/my log.txt", 0, 100, 3, None) == (f"tail -n +3 {quoted} | head -c 100", 0)
+    assert _read_command("/sdcard/my log.txt", 0, 100, None, 5)[0].startswith("sed -n '1,5p;5q'")
+    assert _read_command("/sdcard/my log.txt", -4096, 100, None, None) == (f"tail -c 4096 {quoted} | head -c 100", 0)
+    cases = [
+        (0, 100, 0, 1, 0),
+        (READ_BLOCK, READ_BLOCK, 1, 1, 0),
+        (4000, 200, 0, 2, 4000),       # range straddles a block boundary
+        (5000, 1000, 1, 1, 904),
+        (10 ** 6, 3 * READ_BLOCK, 244, 4, 576),
+    ]
+    for offset, length, skip, count, drop in cases:
+        command, dropped = _read_command("/f", offset, length, None, None)
+        print(f"   offset {offset} length {length}: {command} (drop {dropped})")
+        assert command == f"dd if=/f bs={READ_BLOCK} skip={skip} count={count} 2>/dev/null" and dropped == drop
+        # The blocks read always cover the requested range
+        assert skip * READ_BLOCK + drop == offset and (skip + count) * READ_BLOCK >= offset + length
+    assert _hexdump(b"AB\0\xff" + bytes(range(0x41, 0x51)), 0x20).split("\n") == [
+        "00000020  41 42 00 ff 41 42 43 44 45 46 47 48 49 4a 4b 4c  |AB..ABCDEFGHIJKL|",
+        "00000030  4d 4e 4f 50                                      |MNOP|",
+    ]
+
+    # Test 7: Reads through the device script
+    print("\n7. Testing read_file pages and notes...")
+    client = _ShellClient()
+    file_tools._device_manager = _Manager(client)
+    read = file_tools.read_file.invoke
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big log.txt")
+            text = "".join(f"line {i:05d}\n" for i in range(1, 1001))
+            with open(path, "w") as f:
+                f.write(text)
+            size = len(text)
+
+            assert read({"path": path}) == text, "Whole small files have no note"
+            page = read({"path": path, "offset": 5000, "length": 1000})
+            print(f"   {page.splitlines()[0]}")
+            assert page == f"[bytes 5000-5999 of {size}; next offset 6000]\n" + text[5000:6000]
+            assert client.commands[-1].startswith("exec-out '"), "Script must reach adb as one argument"
+            assert read({"path": path, "max_size": 100}) == f"[bytes 0-99 of {size}; next offset 100]\n" + text[:100]
+            assert read({"path": path, "offset": -22}) == f"[bytes {size - 22}-{size - 1} of {size}]\n" + text[-22:]
+            lines = read({"path": path, "start_line": 2, "end_line": 3})
+            assert lines == f"[lines 2-3 of {path}]\nline 00002\nline 00003\n"
+            tail = read({"path": path, "start_line": 999})
+            assert tail == f"[lines 999-1000 of {path}]\nline 00999\nline 01000\n"
+            truncated = read({"path": path, "start_line": 1, "max_size": 25})
+            assert truncated.startswith("[lines 1-3 of") and "truncated at max_size" in truncated
+
+            # Gzip framing: "z" + gzip stream, or "r" + raw bytes without gzip on the device
+            compressed = read({"path": path, "offset": 100, "length": 5000, "compress": True})
+            assert "printf z" in _script(client) and "gzip -1 -c" in _script(client)
+            assert compressed.endswith(text[100:5100])
+            file_tools._device_manager = _Manager(_NoGzipClient())
+            assert read({"path": path, "offset": 100, "length": 5000, "compress": True}) == compressed
+            file_tools._device_manager = _Manager(client)
+
+            # Binary data as hex dump or base64
+            binary = os.path.join(tmp, "blob.bin")
+            with open(binary, "wb") as f:
+                f.write(b"\x7fELF\0\0" + bytes(range(250)))
+            dump = read({"path": binary, "length": 32})
+            assert "[binary content shown as hex dump" in dump and "00000000  7f 45 4c 46 00 00" in dump
+            assert read({"path": binary, "offset": 16, "length": 16, "encoding": "hex"}).split("\n")[1].startswith(
+                "00000010  0a 0b")
+            encoded = read({"path": binary, "offset": 6, "length": 250, "encoding": "base64"})
+            assert base64.b64decode(encoded.split("\n")[-1]) == bytes(range(250))
+
+            # Pseudo files report size 0
+            pseudo = read({"path": "/proc/self/status", "max_size": 10})
+            assert pseudo.startswith("[bytes 0-9 of unknown size]\nName:"), pseudo
+            assert read({"path": os.path.join(tmp, "nope")}) == \
+                f"Failed to read file: {os.path.join(tmp, 'nope')} not found or not readable"
+            assert read({"path": path, "encoding": "utf-16"}).startswith("Unknown encoding")
+    finally:
+        file_tools._device_manager = manager
+
+    # Test 8: Batch existence and stats in one quoted stat call
+    print("\n8. Testing batch stat...")
+    client = _ShellClient()
+    file_tools._device_manager = _Manager(client)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "my file.txt")
+            folder = os.path.join(tmp, "dir x")
+            missing = os.path.join(tmp, "it's gone")
+            with open(path, "w") as f:
+                f.write("hello")
+            os.chmod(path, 0o640)
+            os.mkdir(folder)
+
+            ok, found, _ = _stat_paths(client, [path, folder, missing])
+            assert ok and sorted(found) == sorted([path, folder])
+            assert (found[path].kind, found[path].size) == ("f", 5) and found[folder].kind == "d"
+            (script,) = shlex.split(client.commands[-1])
+            quoted = " ".join(shlex.quote(p) for p in (path, folder, missing))
+            assert script == f"stat -c '%f %s %Y %n' {quoted} 2>/dev/null; true", "One argument, each path quoted"
+
+            calls = len(client.commands)
+            result = file_tools.file_exists_batch.invoke({"paths": f"{path}\n{folder}\n{missing}\n{path}"})
+            print(f"   {result}")
+            assert len(client.commands) == calls + 1, "All paths in one device call"
+            assert result.split("\n") == ["2 of 3 exist", f"exists (f)   {path}", f"exists (d)   {folder}",
+                                          f"missing      {missing}"]
+
+            result = file_tools.file_stats_batch.invoke({"paths": f"{path}, {missing}"})
+            print(f"   {result}")
+            header, row, gone = result.split("\n")
+            assert header.split() == ["type", "mode", "size", "modified", "path"]
+            assert row.split()[:3] == ["f", "0640", "5"] and row.endswith(f" {path}")
+            assert gone.split()[:4] == ["-"] * 4 and gone.endswith(f" {missing}"), "Missing paths keep their row"
+            assert file_tools.file_stats_batch.invoke({"paths": " , "}) == "No paths given"
+    finally:
+        file_tools._device_manager = manager
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.21 PASSED - File tools working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_file_tools()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.21 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
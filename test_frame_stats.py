@@ -0,0 +1,73 @@
+"""Test gfxinfo framestats analysis - Checkpoint 3.6"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.frame_stats import format_comparison, parse_framestats
+
+HEADER = ("Flags,IntendedVsync,Vsync,HandleInputStart,AnimationStart,PerformTraversalsStart,DrawStart,"
+          "FrameDeadline,SyncQueued,SyncStart,IssueDrawCommandsStart,SwapBuffers,FrameCompleted,GpuCompleted,")
+
+MS = 1_000_000
+
+
+def _framestats(frame_ms, flags=None, start=0):
+    """Build one PROFILEDATA block with frames of given durations."""
+    rows = []
+    for i, duration in enumerate(frame_ms):
+        vsync = (start + i) * 16_666_666 + 10**9
+        phase = duration * MS // 8
+        times = [vsync + phase * k for k in range(1, 8)]
+        row = [flags[i] if flags else 0, vsync, vsync, times[0], times[1], times[2], times[3],
+               vsync + 16_666_666, times[4], times[4], times[5], times[6], vsync + duration * MS, times[6]]
+        rows.append(",".join(str(v) for v in row) + ",")
+    return "\n".join(["---PROFILEDATA---", HEADER] + rows + ["---PROFILEDATA---"])
+
+
+def test_frame_stats():
+    """Test parsing, deduplication, jank ratio and comparison."""
+    print("Testing Frame Stats...")
+    print("=" * 60)
+
+    # Test 1: Parsing and flag filtering
+    print("\n1. Testing framestats parsing...")
+    stats = parse_framestats("Window: main\n" + _framestats([8, 8, 40, 8], flags=[1, 0, 0, 0]))
+    print(f"   Frames: {len(stats)}, totals: {stats.total.tolist()}")
+    assert len(stats) == 3, "Frames with non-zero flags should be skipped"
+    assert stats.total.tolist() == [8.0, 40.0, 8.0]
+
+    # Test 2: Overlapping polls are merged
+    print("\n2. Testing deduplication across polls...")
+    polls = _framestats([8] * 10) + "\n" + _framestats([8] * 10, start=5)
+    assert len(parse_framestats(polls)) == 15, "Repeated frames should be merged by IntendedVsync"
+
+    # Test 3: Jank and phases
+    print("\n3. Testing summary...")
+    summary = parse_framestats(_framestats([8] * 9 + [100])).summary()
+    print(f"   p50 {summary['p50']:.1f} ms, janky {summary['janky']:.0%}, phases {list(summary['phases'])}")
+    assert summary["janky"] == 0.1, "One of ten frames exceeds its deadline"
+    assert abs(summary["budget"] - 16.67) < 0.01
+    assert {"input", "draw", "sync", "gpu"} <= set(summary["phases"])
+
+    # Test 4: Comparison
+    print("\n4. Testing run comparison...")
+    table = format_comparison({"base": summary, "slow": parse_framestats(_framestats([30] * 10)).summary()})
+    print(table)
+    assert "base" in table and "slow" in table and "janky %" in table
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.6 PASSED - Frame stats working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_frame_stats()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.6 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""Test device filesystem index - Checkpoint 3.15"""
+
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android import fs_index
+from domains.android.fs_index import FsIndex, format_matches, index_tree, parse_stat_lines
+
+CRAWL = """41ed 4096 1700000000 /data/data/com.example
+41ed 4096 1700000000 /data/data/com.example/databases
+81a4 20480 1700000100 /data/data/com.example/databases/app.db
+81a4 512 1700000200 /data/data/com.example/databases/app.db-journal
+41ed 4096 1700000000 /data/data/com.example/files
+81a4 1048576 1700000300 /data/data/com.example/files/cache.bin
+a1ff 12 1700000000 /data/data/com.example/lib
+stat: /data/data/com.example/secret: Permission denied"""
+
+
+class _ShellClient:
+    """Runs device scripts with the local sh; coreutils stand in for toybox."""
+
+    device_id = "stub"
+
+    def shell(self, command, timeout=30):
+        (script,) = shlex.split(command)
+        result = subprocess.run(["sh", "-c", script], capture_output=True, text=True)
+        return result.returncode == 0, result.stdout
+
+
+def test_fs_index():
+    """Test crawl parsing, glob/size/newest queries and incremental refresh."""
+    print("Testing Filesystem Index...")
+    print("=" * 60)
+
+    # Test 1: Load crawl
+    print("\n1. Testing crawl parsing...")
+    entries = list(parse_stat_lines(CRAWL))
+    assert len(entries) == 7
+    index = FsIndex("/data/data/com.example/")
+    index.load(entries, device_time=1700000400)
+    assert index.totals() == (4, 3, 20480 + 512 + 1048576 + 12)
+
+    # Test 2: Queries
+    print("\n2. Testing queries...")
+    names = lambda result: [path.rsplit("/", 1)[1] for path, _ in result[0]]
+    assert names(index.query("*.db")) == ["app.db"]
+    assert names(index.query("app.db*", sort="size")) == ["app.db", "app.db-journal"]
+    assert names(index.query("databases/*")) == ["app.db", "app.db-journal"]
+    assert names(index.query("*", kind="f", min_size=1000, sort="size")) == ["cache.bin", "app.db"]
+    assert names(index.query("*", kind="f", sort="newest", limit=1)) == ["cache.bin"]
+    assert index.query("*", kind="f", sort="newest", limit=1)[1] == 3, "Total counts all matches"
+    assert names(index.query("*", under="files")) == ["cache.bin"]
+    assert names(index.query("*", kind="l")) == ["lib"]
+    assert names(index.query("*", newer_than=1700000150)) == ["app.db-journal", "cache.bin"]
+    text = format_matches(*index.query("*.bin"))
+    print(f"   {text}")
+    assert "1.0M" in text and "/data/data/com.example/files/cache.bin" in text
+
+    # Test 3: Incremental refresh
+    print("\n3. Testing refresh...")
+    dirs = list(parse_stat_lines("41ed 4096 1700000000 /data/data/com.example\n"
+                                 "41ed 4096 1700000500 /data/data/com.example/databases\n"
+                                 "41ed 4096 1700000500 /data/data/com.example/shared_prefs"))
+    listings = list(parse_stat_lines("81a4 40960 1700000500 /data/data/com.example/databases/app.db\n"
+                                     "81a4 100 1700000500 /data/data/com.example/shared_prefs/prefs.xml"))
+    changed = ["/data/data/com.example/databases", "/data/data/com.example/shared_prefs"]
+    index.apply_refresh(dirs, listings, changed, [], 1700000600)
+    print(f"   Directories: {index.directories()}")
+    assert sorted(index.directories()) == ["", "databases", "shared_prefs"], "files/ was removed"
+    assert names(index.query("*", kind="f")) == ["app.db", "prefs.xml"], "Journal deleted, prefs added"
+    assert index.query("app.db")[0][0][1].size == 40960
+    assert index.device_time == 1700000600
+
+    # Test 4: A symlinked root (like /sdcard) is indexed as the directory it points to
+    print("\n4. Testing symlinked root...")
+    client = _ShellClient()
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = os.path.join(tmp, "storage")
+        os.makedirs(os.path.join(storage, "Download"))
+        with open(os.path.join(storage, "Download", "a.txt"), "w") as f:
+            f.write("hello")
+        os.symlink("storage", os.path.join(tmp, "sdcard"))
+        root = os.path.join(tmp, "sdcard")
+        try:
+            index, action = index_tree(client, root)
+            print(f"   {action}: {index.totals()}")
+            assert action.startswith("crawled") and index.totals() == (1, 2, 5)
+            assert index.node.kind == "d", "Root is followed, not indexed as a link"
+            assert index.query("a.txt")[0][0][0] == f"{root}/Download/a.txt"
+
+            os.makedirs(os.path.join(storage, "DCIM"))
+            with open(os.path.join(storage, "DCIM", "b.jpg"), "w") as f:
+                f.write("jpeg")
+            os.utime(storage, (1, 1))
+            index, action = index_tree(client, root)
+            print(f"   {action}: {index.totals()}")
+            assert action.startswith("refreshed (2 directories re-listed") and index.totals() == (2, 3, 9)
+        finally:
+            fs_index._indexes.pop(("stub", root), None)
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.15 PASSED - Filesystem index working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_fs_index()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.15 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,135 @@
+"""Test HPROF heap analyzer - Checkpoint 3.5"""
+
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.hprof import analyze_hprof, class_name, format_heap_analysis
+
+
+class _HprofWriter:
+    """Minimal Android-style HPROF writer (4 byte ids) for synthetic dumps."""
+
+    def __init__(self):
+        self.records = []
+        self.heap = []
+        self.next_id = 0x1000
+
+    def new_id(self) -> int:
+        self.next_id += 16
+        return self.next_id
+
+    def string(self, text: str) -> int:
+        string_id = self.new_id()
+        self.records.append((0x01, struct.pack(">I", string_id) + text.encode()))
+        return string_id
+
+    def load_class(self, name: str) -> int:
+        class_id = self.new_id()
+        self.records.append((0x02, struct.pack(">IIII", 1, class_id, 0, self.string(name))))
+        return class_id
+
+    def heap_info(self, name: str):
+        self.heap.append(struct.pack(">BII", 0xFE, 1, self.string(name)))
+
+    def class_dump(self, class_id: int, super_id: int, fields):
+        body = struct.pack(">IIIIIIIIIHH", class_id, 0, super_id, 0, 0, 0, 0, 0, 0, 0, 0)
+        body += struct.pack(">H", len(fields))
+        for name, field_type in fields:
+            body += struct.pack(">IB", self.string(name), field_type)
+        self.heap.append(b"\x20" + body)
+
+    def instance(self, class_id: int, data: bytes) -> int:
+        object_id = self.new_id()
+        self.heap.append(struct.pack(">BIIII", 0x21, object_id, 0, class_id, len(data)) + data)
+        return object_id
+
+    def prim_array(self, elem_type: int, data: bytes, elem_size: int) -> int:
+        object_id = self.new_id()
+        self.heap.append(struct.pack(">BIIIB", 0x23, object_id, 0, len(data) // elem_size, elem_type) + data)
+        return object_id
+
+    def write(self, path: str):
+        with open(path, "wb") as f:
+            f.write(b"JAVA PROFILE 1.0.3\0" + struct.pack(">IQ", 4, 0))
+            for tag, body in self.records:
+                f.write(struct.pack(">BII", tag, 0, len(body)) + body)
+            heap = b"".join(self.heap)
+            f.write(struct.pack(">BII", 0x1C, 0, len(heap)) + heap)
+
+
+def test_hprof():
+    """Test histogram, largest objects, string duplication and bitmaps."""
+    print("Testing HPROF Analyzer...")
+    print("=" * 60)
+
+    # Test 1: Class name normalization
+    print("\n1. Testing class name normalization...")
+    assert class_name("[Ljava/lang/Object;") == "java.lang.Object[]"
+    assert class_name("[[I") == "int[][]"
+    assert class_name("java.lang.String") == "java.lang.String"
+
+    # Build synthetic dump
+    w = _HprofWriter()
+    string_class = w.load_class("java.lang.String")
+    bitmap_class = w.load_class("android.graphics.Bitmap")
+    leak_class = w.load_class("com.example.LeakyCache")
+    w.heap_info("zygote")
+    w.instance(leak_class, b"\0" * 64)
+    w.heap_info("app")
+    w.class_dump(string_class, 0, [("count", 10), ("value", 2)])
+    w.class_dump(bitmap_class, 0, [("mWidth", 10), ("mHeight", 10)])
+    for i in range(100):
+        w.instance(leak_class, b"\0" * 32)
+    for i in range(30):
+        text = "duplicated" if i < 20 else f"unique{i}"
+        value = w.prim_array(8, text.encode(), 1)
+        w.instance(string_class, struct.pack(">iI", len(text), value))
+    w.instance(bitmap_class, struct.pack(">ii", 1080, 1920))
+    w.prim_array(8, b"\0" * 4096, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "heap.hprof")
+        w.write(path)
+        analysis = analyze_hprof(path, top_n=5)
+        everything = analyze_hprof(path, top_n=5, heap=None)
+
+    print(format_heap_analysis(analysis))
+
+    # Test 2: Histogram of the app heap only
+    print("\n2. Testing class histogram...")
+    classes = {name: (count, size) for name, count, size in analysis["classes"]}
+    assert classes["com.example.LeakyCache"] == (100, 3200), "Zygote heap instance should be excluded"
+    assert classes["java.lang.String"][0] == 30
+    assert everything["objects"] == analysis["objects"] + 1
+    assert analysis["heaps"]["zygote"] == 64
+
+    # Test 3: Largest objects
+    print("\n3. Testing largest objects...")
+    assert analysis["largest"][0][1:] == ("byte[]", 4096)
+
+    # Test 4: String duplication and bitmaps
+    print("\n4. Testing strings and bitmaps...")
+    strings = analysis["strings"]
+    assert strings["count"] == 30
+    assert strings["duplicates"][0] == ("duplicated", 20, 19 * 10)
+    assert analysis["bitmaps"]["count"] == 1
+    assert analysis["bitmaps"]["pixel_bytes"] == 1080 * 1920 * 4
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.5 PASSED - HPROF analyzer working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_hprof()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.5 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,193 @@
+"""Test crash and ANR fingerprinting - Checkpoint 3.4"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.incidents import (
+    IncidentStore, collect_incidents, parse_anr_trace, parse_crash_buffer, parse_utc_offset
+)
+from domains.android.logcat_store import parse_logcat_line
+
+JAVA_CRASH = """\
+  {ts}  {pid}  {pid} E AndroidRuntime: FATAL EXCEPTION: main
+  {ts}  {pid}  {pid} E AndroidRuntime: Process: com.example.app, PID: {pid}
+  {ts}  {pid}  {pid} E AndroidRuntime: java.lang.RuntimeException: Unable to start activity
+  {ts}  {pid}  {pid} E AndroidRuntime: \tat android.app.ActivityThread.performLaunchActivity(ActivityThread.java:3449)
+  {ts}  {pid}  {pid} E AndroidRuntime: Caused by: java.lang.NullPointerException: null object reference
+  {ts}  {pid}  {pid} E AndroidRuntime: \tat com.example.app.Main.lambda$onCreate$0(Main.java:{line})
+  {ts}  {pid}  {pid} E AndroidRuntime: \tat com.example.app.Main$$ExternalSyntheticLambda{n}.run(D8$$SyntheticClass:0)
+"""
+
+NATIVE_CRASH = """\
+  1700000050.000  5555  5555 F DEBUG   : *** *** *** *** *** *** *** *** *** *** *** *** *** *** *** ***
+  1700000050.000  5555  5555 F DEBUG   : pid: 4321, tid: 4330, name: Thread-2  >>> com.example.game <<<
+  1700000050.000  5555  5555 F DEBUG   : signal 11 (SIGSEGV), code 1 (SEGV_MAPERR), fault addr 0x0
+  1700000050.000  5555  5555 F DEBUG   :       #00 pc 000000000001e8f4  /apex/com.android.runtime/lib64/bionic/libc.so (strlen+16)
+  1700000050.000  5555  5555 F DEBUG   :       #01 pc 00000000000123ab  /data/app/~~x==/com.example.game-1/lib/arm64/libgame.so (render+44)
+"""
+
+ANR_TRACE = """\
+----- pid 1234 at 2024-01-01 10:00:00.123+0000 -----
+Cmd line: com.example.app
+
+"main" prio=5 tid=1 Blocked
+  at com.example.app.Db.query(Db.java:10)
+  - waiting to lock <0x0abc> held by thread 12
+  at com.example.app.Main.onClick(Main.java:20)
+
+"Thread-2" prio=5 tid=12 Runnable
+  at foo.Bar.run(Bar.java:1)
+"""
+
+# The ANRing process comes first; system_server and others follow for context
+MULTI_PROCESS_TRACE = ANR_TRACE + """
+----- end 1234 -----
+
+----- pid 1000 at 2024-01-01 10:00:00.456+0000 -----
+Cmd line: system_server
+
+"main" prio=5 tid=1 Native
+  at android.os.MessageQueue.nativePollOnce(Native method)
+  at android.os.Looper.loop(Looper.java:288)
+
+----- end 1000 -----
+
+----- pid 2222 at 2024-01-01 10:00:00.789+0000 -----
+Cmd line: com.android.phone
+
+"main" prio=5 tid=1 Native
+  at android.os.MessageQueue.nativePollOnce(Native method)
+
+----- end 2222 -----
+"""
+
+
+def _rows(text: str):
+    return [row for row in map(parse_logcat_line, text.splitlines()) if row]
+
+
+class _DeviceClient:
+    """Crash buffer honoring an inclusive `logcat -T`, and /data/anr files by path."""
+
+    device_id = "dev1"
+
+    def __init__(self):
+        self.crash = ""
+        self.anr = {}
+        self.unreadable = set()
+        self.commands = []
+
+    def shell(self, command, timeout=30):
+        self.commands.append(command)
+        if command.startswith("logcat"):
+            since = float(command.split(" -T ")[1]) if " -T " in command else 0
+            return True, "\n".join(line for line in self.crash.splitlines() if float(line.split()[0]) >= since)
+        if command.startswith("cat "):
+            path = command[4:]
+            return path not in self.unreadable, self.anr.get(path, "")
+        if "/data/anr/*" in command and self.anr:
+            return True, "\n".join(["+0530"] + [f"1700000000 {path}" for path in self.anr])
+        return False, ""
+
+
+def test_incidents():
+    """Test crash parsing, frame normalization and deduplicated storage."""
+    print("Testing Incident Fingerprinting...")
+    print("=" * 60)
+
+    # Test 1: Java and native crash blocks
+    print("\n1. Testing crash buffer parsing...")
+    first = JAVA_CRASH.format(ts="1700000000.100", pid=1234, line=42, n=0)
+    incidents = parse_crash_buffer(_rows(first + NATIVE_CRASH))
+    for incident in incidents:
+        print(f"   {incident.kind}: {incident.package} {incident.title} [{incident.fingerprint}]")
+    assert [i.kind for i in incidents] == ["java", "native"]
+    java, native = incidents
+    assert java.cause == "java.lang.NullPointerException", "Root cause should be the last Caused by"
+    assert java.frames[0] == "com.example.app.Main.lambda$onCreate$0"
+    assert native.package == "com.example.game" and native.cause == "SIGSEGV"
+    assert native.frames == ["libc.so!strlen", "libgame.so!render"]
+
+    # Test 2: Build noise does not change the fingerprint
+    print("\n2. Testing frame normalization...")
+    second = JAVA_CRASH.format(ts="1700000100.200", pid=2222, line=57, n=3)
+    again = parse_crash_buffer(_rows(second))[0]
+    assert again.fingerprint == java.fingerprint, "Line numbers and lambda ids should be ignored"
+
+    # Test 3: ANR traces
+    print("\n3. Testing ANR trace parsing...")
+    anrs = parse_anr_trace(ANR_TRACE)
+    print(f"   {anrs[0].package}: {anrs[0].title}")
+    assert len(anrs) == 1, "Only the main thread is fingerprinted"
+    assert anrs[0].frames == ["com.example.app.Db.query", "com.example.app.Main.onClick"]
+    multi = parse_anr_trace(MULTI_PROCESS_TRACE)
+    print(f"   Multi-process trace: {[a.package for a in multi]}")
+    assert [a.package for a in multi] == ["com.example.app"], "Bystander processes are not fingerprinted"
+    assert multi[0].fingerprint == anrs[0].fingerprint
+
+    # Header times are device local: their own offset wins, else the device's
+    assert anrs[0].timestamp == 1704103200, "10:00 UTC"
+    legacy = ANR_TRACE.replace(".123+0000", "")
+    assert parse_anr_trace(legacy, utc_offset=19800)[0].timestamp == 1704103200 - 19800
+    assert parse_anr_trace(ANR_TRACE, utc_offset=19800)[0].timestamp == 1704103200
+    assert parse_utc_offset("+0530") == 19800 and parse_utc_offset("-0800") == -28800
+    assert parse_utc_offset("%z") is None
+
+    # Test 4: Deduplicated store
+    print("\n4. Testing incident store...")
+    store = IncidentStore(":memory:")
+    assert store.add("dev1", incidents + anrs) == (3, 3)
+    assert store.add("dev1", incidents) == (0, 0), "Re-ingesting should be a no-op"
+    assert store.add("dev2", [again]) == (1, 0), "Same crash on another device is one incident"
+    top = store.top()
+    print(f"   Top: {top[0][3]} x{top[0][4]} on {top[0][5]} devices")
+    assert top[0][0] == java.fingerprint and top[0][4] == 2 and top[0][5] == 2
+    assert len(store.top(device_id="dev2")) == 1
+    assert store.get(java.fingerprint)[7] == 2
+
+    # Test 5: Collection resumes inside the marker millisecond
+    print("\n5. Testing incremental collection...")
+    client = _DeviceClient()
+    store = IncidentStore(":memory:")
+    client.crash = JAVA_CRASH.format(ts="1700000200.500", pid=1234, line=42, n=0)
+    assert collect_incidents(client, store)[:2] == (1, 1)
+    assert store.marker("dev1", "crash") == "1700000200.500#7"
+    client.crash += NATIVE_CRASH.replace("1700000050.000", "1700000200.500")
+    result = collect_incidents(client, store)
+    print(f"   Second pass: {result}, marker {store.marker('dev1', 'crash')}")
+    assert client.commands[-2].endswith(" -T 1700000200.500")
+    assert result[:2] == (1, 1), "A crash in the marker millisecond is not dropped"
+    assert store.marker("dev1", "crash") == "1700000200.500#12"
+    assert collect_incidents(client, store)[:2] == (0, 0)
+    store.set_marker("dev1", "crash", "1700000200.500")
+    client.crash += JAVA_CRASH.format(ts="1700000300.000", pid=2222, line=57, n=3)
+    assert collect_incidents(client, store)[:2] == (1, 0), "Markers without a count skip their whole millisecond"
+
+    # ANR files that could not be read are retried on the next pass
+    client.anr = {"/data/anr/anr_1": ANR_TRACE, "/data/anr/anr_2": legacy.replace("com.example.app", "com.other")}
+    client.unreadable = {"/data/anr/anr_2"}
+    result = collect_incidents(client, store)
+    print(f"   ANR pass: {result}")
+    assert result == (1, 1, ["Cannot read /data/anr/anr_2"])
+    assert store.marker("dev1", "anr") == "1700000000 /data/anr/anr_1"
+    client.unreadable = set()
+    assert collect_incidents(client, store) == (1, 1, [])
+    assert store.top(package="com.other")[0][6] == 1704103200 - 19800, "Device offset from `date +%z`"
+    assert client.commands.count("cat /data/anr/anr_1") == 1 and client.commands.count("cat /data/anr/anr_2") == 2
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.4 PASSED - Incident fingerprinting working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_incidents()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.4 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
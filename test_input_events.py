@@ -0,0 +1,105 @@
+"""Test UI record/replay event log - Checkpoint 3.23"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.input_events import (
+    InputRecorder, UISession, build_sendevent_script, parse_getevent_line, replay_session
+)
+
+
+class _ReplayClient:
+    """Records when events were injected and when the UI tree was dumped."""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_bytes(self, command, timeout=30, input=None):
+        self.calls.append(("inject", time.monotonic()))
+        return True, b""
+
+    def shell(self, command, timeout=30):
+        self.calls.append(("dump", time.monotonic()))
+        return True, '<node text="Settings" />'
+
+
+GETEVENT_OUTPUT = """add device 1: /dev/input/event2
+  name:     "touchscreen"
+[   100.000000] /dev/input/event2: 0003 0039 00000001
+[   100.000000] /dev/input/event2: 0003 0035 000001f4
+[   100.000000] /dev/input/event2: 0000 0000 00000000
+[   100.500000] /dev/input/event2: 0003 0039 ffffffff
+[   100.500000] /dev/input/event2: 0000 0000 00000000"""
+
+
+def test_input_events():
+    """Test getevent parsing, session round-trip, sendevent script and checkpoint timing."""
+    print("Testing UI Record/Replay...")
+    print("=" * 60)
+
+    # Test 1: Parse getevent output
+    print("\n1. Testing getevent parsing...")
+    events = [e for e in map(parse_getevent_line, GETEVENT_OUTPUT.splitlines()) if e]
+    print(f"   Parsed events: {len(events)}")
+    assert len(events) == 5, "Device headers should be skipped"
+    assert events[3].value == -1, "Tracking id release should be signed"
+    assert events[2].is_frame_end(), "SYN_REPORT should end a frame"
+
+    # Test 2: Session round-trip
+    print("\n2. Testing session serialization...")
+    session = UISession(events, [(0.2, "Settings")])
+    loaded = UISession.from_dict(session.to_dict())
+    print(f"   Duration: {loaded.duration:.2f}s")
+    assert len(loaded.events) == 5, "Events should survive round-trip"
+    assert abs(loaded.duration - 0.5) < 1e-6, "Duration should be preserved"
+
+    # Test 3: Checkpoint segments
+    print("\n3. Testing checkpoint segments...")
+    segments = loaded.segments()
+    print(f"   Segments: {[(len(evs), expect) for evs, expect in segments]}")
+    assert [len(evs) for evs, _ in segments] == [3, 2], "Split should follow frame boundaries"
+    assert segments[0][1] == "Settings", "First segment should carry checkpoint"
+
+    # Test 4: Sendevent script with accelerated timing
+    print("\n4. Testing sendevent script...")
+    script = build_sendevent_script(loaded.events, speed=2.0)
+    print(f"   Script lines: {len(script.splitlines())}")
+    assert "sleep 0.250" in script, "Delay should be scaled by speed"
+    assert "sendevent /dev/input/event2 3 57 -1" in script, "Signed value should be injected"
+    assert "sleep" not in build_sendevent_script(loaded.events, speed=0), "Speed 0 should drop delays"
+
+    # Test 5: Checkpoints are checked after the recorded settle time
+    print("\n5. Testing checkpoint timing...")
+    recorder = InputRecorder(None)
+    recorder.events = list(events)
+    recorder._last_arrival = time.monotonic() - 0.3
+    offset = recorder.add_checkpoint("Settings")
+    print(f"   Checkpoint offset: {offset:.2f}s")
+    assert 0.8 <= offset < 0.9, "Settle time after the last event is recorded"
+
+    client = _ReplayClient()
+    success, report = replay_session(client, UISession(events, [(0.2, "Settings")]), speed=2.0)
+    print(f"   {report.splitlines()[1]}")
+    assert success and [kind for kind, _ in client.calls] == ["inject", "dump", "inject"]
+    assert client.calls[1][1] - client.calls[0][1] >= 0.1, "Recorded 0.2s gap at double speed"
+    client = _ReplayClient()
+    assert replay_session(client, UISession(events, [(0.2, "Settings")]), speed=0)[0]
+    assert client.calls[1][1] - client.calls[0][1] < 0.1, "Speed 0 does not wait"
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.23 PASSED - UI record/replay working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_input_events()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.23 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,102 @@
+"""Test instrumentation runner parsing and sharding - Checkpoint 3.12"""
+
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android import instrumentation
+from domains.android.instrumentation import InstrumentationParser, junit_xml, make_shards, merge_results
+
+OUTPUT = """INSTRUMENTATION_STATUS: class=com.example.LoginTest
+INSTRUMENTATION_STATUS: current=1
+INSTRUMENTATION_STATUS: id=AndroidJUnitRunner
+INSTRUMENTATION_STATUS: numtests=3
+INSTRUMENTATION_STATUS: stream=
+com.example.LoginTest:
+INSTRUMENTATION_STATUS: test=validLogin
+INSTRUMENTATION_STATUS_CODE: 1
+INSTRUMENTATION_STATUS: class=com.example.LoginTest
+INSTRUMENTATION_STATUS: current=1
+INSTRUMENTATION_STATUS: test=validLogin
+INSTRUMENTATION_STATUS_CODE: 0
+INSTRUMENTATION_STATUS: class=com.example.LoginTest
+INSTRUMENTATION_STATUS: current=2
+INSTRUMENTATION_STATUS: test=badPassword
+INSTRUMENTATION_STATUS_CODE: 1
+INSTRUMENTATION_STATUS: class=com.example.LoginTest
+INSTRUMENTATION_STATUS: current=2
+INSTRUMENTATION_STATUS: stack=java.lang.AssertionError: expected error banner
+\tat com.example.LoginTest.badPassword(LoginTest.java:42)
+INSTRUMENTATION_STATUS: test=badPassword
+INSTRUMENTATION_STATUS_CODE: -2
+INSTRUMENTATION_STATUS: class=com.example.CartTest
+INSTRUMENTATION_STATUS: current=3
+INSTRUMENTATION_STATUS: test=checkout
+INSTRUMENTATION_STATUS_CODE: 1
+INSTRUMENTATION_RESULT: shortMsg=Process crashed.
+INSTRUMENTATION_CODE: 0"""
+
+
+def test_instrumentation():
+    """Test streaming parser, LPT sharding, flaky merging and JUnit output."""
+    print("Testing Instrumentation Runner...")
+    print("=" * 60)
+
+    # Test 1: Streaming parse with a crash mid-run
+    print("\n1. Testing am instrument -r parsing...")
+    ticks = iter(range(100))
+    parser = InstrumentationParser(clock=lambda: next(ticks))
+    results = [r for r in (parser.feed(line) for line in OUTPUT.splitlines()) if r]
+    crashed = parser.interrupted("instrumentation ended")
+    print(f"   Results: {[(r.name, r.outcome) for r in results + [crashed]]}")
+    assert [(r.name, r.outcome) for r in results] == [("com.example.LoginTest#validLogin", "passed"),
+                                                       ("com.example.LoginTest#badPassword", "failed")]
+    assert results[1].message.startswith("java.lang.AssertionError") and "LoginTest.java:42" in results[1].message
+    assert parser.numtests == 3
+    assert crashed.name == "com.example.CartTest#checkout" and crashed.outcome == "crashed"
+    assert crashed.message == "Process crashed."
+
+    # Test 2: Shards balanced by history
+    print("\n2. Testing duration-balanced sharding...")
+    durations = {"A#slow": 60.0, "A#mid": 30.0, "B#mid": 30.0}
+    tests = ["A#slow", "A#mid", "B#mid", "B#new1", "B#new2"]
+    shards = make_shards(tests, durations, 2)
+    totals = [sum(durations.get(t, 30.0) for t in shard) for shard in shards]
+    print(f"   Shards: {shards} expected {totals}")
+    assert sorted(t for shard in shards for t in shard) == sorted(tests)
+    assert max(totals) - min(totals) <= 30.0
+    assert len(make_shards(["A#one"], {}, 4)) == 1, "No empty shards"
+
+    # Test 3: Retry passing marks test flaky
+    print("\n3. Testing retry merging...")
+    Result = instrumentation.TestResult
+    final = merge_results([Result("A#x", "failed", 1.0, "boom", "dev-a", 1),
+                           Result("A#y", "passed", 2.0, "", "dev-a", 1),
+                           Result("A#z", "crashed", 1.0, "Process crashed.", "dev-b", 1),
+                           Result("A#x", "passed", 1.0, "", "dev-b", 2),
+                           Result("A#z", "crashed", 1.0, "Process crashed.", "dev-a", 2)])
+    assert {name: r.outcome for name, r in final.items()} == {"A#x": "flaky", "A#y": "passed", "A#z": "crashed"}
+
+    # Test 4: JUnit XML
+    print("\n4. Testing JUnit report...")
+    root = ElementTree.fromstring(junit_xml(final, "com.example.test/androidx.test.runner.AndroidJUnitRunner"))
+    suite = root.find("testsuite")
+    assert suite.get("name") == "A" and suite.get("tests") == "3" and suite.get("errors") == "1"
+    assert root.find(".//testcase[@name='z']/error") is not None
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.12 PASSED - Instrumentation runner working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_instrumentation()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.12 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,116 @@
+"""Test log analytics - Checkpoint 3.17"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android import logcat_store
+from domains.android.log_analytics import bursts, format_summary, summarize
+from domains.android.logcat_store import BUFFER_INDEX, LEVEL_INDEX, LogcatCollector
+from domains.android.tools import system_tools
+
+START = 1700000000.0
+
+
+def _columns(rows):
+    """Split (ts, pid, level, tag id) rows into summarize() columns."""
+    ts, pid, level, tag = (np.array(column) for column in zip(*rows))
+    return ts, pid.astype(np.int32), level.astype(np.uint8), tag.astype(np.int32)
+
+
+class _Manager:
+    """Device manager returning one fixed client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_device(self, device_id=None):
+        return self.client
+
+
+class _Client:
+    device_id = "stub"
+
+
+def test_log_analytics():
+    """Test burst detection, summary tables and per-buffer log stats."""
+    print("Testing Log Analytics...")
+    print("=" * 60)
+
+    # Test 1: Robust burst detection
+    print("\n1. Testing burst detection...")
+    counts = np.array([5, 6, 4, 5, 60, 5, 7, 5, 4, 6])
+    print(f"   Bursts in {counts.tolist()}: {bursts(counts).tolist()}")
+    assert bursts(counts).tolist() == [4]
+    assert bursts(counts, min_count=100).size == 0, "Small bursts are ignored"
+    assert bursts(np.array([8, 9, 8, 9])).size == 0, "Steady rate has no bursts"
+    assert bursts(np.zeros(0)).size == 0
+
+    # Test 2: Summary over synthetic columns
+    print("\n2. Testing summary...")
+    tag_names = ["Chatty", "Quiet", "Crashy"]
+    # Chatty logs 2/s for 100s, bursting 50 lines in bucket 5; Crashy errors from t=80
+    rows = [(START + i * 0.5, 100, LEVEL_INDEX["D"], 0) for i in range(200)]
+    rows += [(START + 55 + i * 0.1, 100, LEVEL_INDEX["D"], 0) for i in range(50)]
+    rows += [(START + i * 10.0, 200, LEVEL_INDEX["I"], 1) for i in range(10)]
+    rows += [(START + 80 + i * 0.5, 300, LEVEL_INDEX["E"], 2) for i in range(6)]
+    rows.sort()
+    summary = summarize(*_columns(rows), tag_names, bucket_seconds=10, top_n=2)
+    print(format_summary(summary))
+    assert summary["total"] == 266
+    assert summary["levels"] == {"D": 250, "I": 10, "E": 6}
+    assert [row[0] for row in summary["tags"]] == ["Chatty", "Quiet"], "Top tags by count"
+    assert summary["tags"][0][1] == 250 and summary["tags"][0][4] > 3, "Chatty should peak above its median"
+    assert [row[0] for row in summary["pids"]] == [100, 200]
+    # The error bucket also rises above the steady 21 lines per bucket
+    assert summary["bursts"] == [(START + 50, 71, "Chatty"), (START + 80, 27, "Chatty")]
+    assert summary["first_error"] == START + 80
+    assert summary["error_bursts"] == [(START + 80, 6)]
+    assert summarize(*(np.zeros(0) for _ in range(4)), tag_names) == {"total": 0}
+    assert format_summary({"total": 0}) == "No log entries in window"
+    try:
+        summarize(*_columns(rows), tag_names, bucket_seconds=0)
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    assert system_tools.log_stats.invoke({"bucket_seconds": 0}) == "bucket_seconds must be at least 1"
+
+    # Test 3: log_stats honours the buffer argument with a collector running
+    print("\n3. Testing log_stats buffer selection...")
+    collector = LogcatCollector(_Client(), buffers=("main", "crash"), memory_bytes=1024 * 1024)
+    collector.store.append([(START + i, 1, 1, LEVEL_INDEX["I"], "MainTag", "m") for i in range(20)],
+                           BUFFER_INDEX["main"])
+    collector.store.append([(START + 20 + i, 2, 2, LEVEL_INDEX["F"], "CrashTag", "c") for i in range(3)],
+                           BUFFER_INDEX["crash"])
+    manager = system_tools._device_manager
+    system_tools._device_manager = _Manager(_Client())
+    logcat_store._collectors["stub"] = collector
+    try:
+        crash = system_tools.log_stats.invoke({"buffer": "crash"})
+        everything = system_tools.log_stats.invoke({"buffer": "all"})
+        recent = system_tools.log_stats.invoke({"buffer": "main", "window_seconds": 4})
+    finally:
+        system_tools._device_manager = manager
+        logcat_store._collectors.pop("stub", None)
+    print(crash)
+    assert crash.startswith("3 entries") and "MainTag" not in crash
+    assert everything.startswith("23 entries")
+    assert recent.startswith("5 entries"), "Window should be relative to the newest entry of the buffer"
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.17 PASSED - Log analytics working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_log_analytics()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.17 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
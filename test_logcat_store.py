@@ -0,0 +1,198 @@
+"""Test logcat ring buffer store - Checkpoint 3.3"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.logcat_store import (
+    LogStore, LogcatCollector, BUFFER_INDEX, LEVEL_INDEX, OVERFLOW_TAG, parse_logcat_line, parse_filter_expr,
+    page_store, page_device_output
+)
+
+
+def _rows(count: int, start: float = 1700000000.0):
+    """Generate synthetic parsed log rows."""
+    return [(start + i * 0.01, 100 + i % 5, 200 + i % 3, i % 6, f"Tag{i % 10}", f"message {i}")
+            for i in range(count)]
+
+
+class _SessionStream:
+    """Replays one logcat session; stops the collector after the last one."""
+
+    def __init__(self, lines, on_end):
+        self._lines = list(lines)
+        self._on_end = on_end
+        self.alive = True
+
+    def readline(self, timeout=None):
+        if self._lines:
+            return self._lines.pop(0)
+        self._on_end()
+        return None
+
+    def close(self):
+        self.alive = False
+
+
+class _StreamClient:
+    """Serves a fixed list of logcat sessions to a collector."""
+
+    device_id = "stub"
+
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+        self.commands = []
+        self.collector = None
+
+    def stream(self, command):
+        self.commands.append(command)
+        lines = self.sessions.pop(0)
+
+        def on_end():
+            if not self.sessions:
+                self.collector._running = False
+        return _SessionStream(lines, on_end)
+
+
+def test_logcat_store():
+    """Test parsing, filtered queries and bounded eviction."""
+    print("Testing Logcat Store...")
+    print("=" * 60)
+
+    # Test 1: Line parsing
+    print("\n1. Testing threadtime/epoch line parsing...")
+    row = parse_logcat_line("  1700000000.123  1234  1235 W ActivityManager: Slow operation: 120ms")
+    print(f"   Parsed: {row}")
+    assert row == (1700000000.123, 1234, 1235, LEVEL_INDEX["W"], "ActivityManager", "Slow operation: 120ms")
+    assert parse_logcat_line("--------- beginning of main") is None, "Markers are not entries"
+
+    # Test 2: Filter spec parsing
+    print("\n2. Testing filter expression parsing...")
+    per_tag, default = parse_filter_expr("ActivityManager:I MyApp:D *:S")
+    print(f"   Per tag: {per_tag}, default: {default}")
+    assert per_tag == {"ActivityManager": LEVEL_INDEX["I"], "MyApp": LEVEL_INDEX["D"]}
+    assert default == LEVEL_INDEX["S"]
+
+    # Test 3: Filtered queries
+    print("\n3. Testing filtered queries...")
+    store = LogStore(memory_bytes=1024 * 1024)
+    store.append(_rows(1000), BUFFER_INDEX["main"])
+    store.append(_rows(10, start=1700000100.0), BUFFER_INDEX["crash"])
+    by_tag = store.query(tags=["Tag3"], buffers=["main"])
+    by_pid = store.query(pids=[101], min_level=LEVEL_INDEX["E"])
+    crash = store.query(buffers=["crash"])
+    last = store.format(store.query(limit=1))
+    print(f"   Tag3 (main): {len(by_tag)}, pid 101 >= E: {len(by_pid)}, crash: {len(crash)}")
+    assert len(by_tag) == 100, "Every tenth row has Tag3"
+    assert len(crash) == 10, "Crash buffer rows should be tagged"
+    assert all(store.level[s] >= LEVEL_INDEX["E"] and store.pid[s] == 101 for s in by_pid)
+    assert last[0].endswith("Tag9: message 9"), "Limit should keep the newest entry"
+    assert len(store.query(filter_expr="Tag1:I *:S")) == 66, "Filter spec should apply per tag"
+
+    # Test 4: Bounded memory eviction
+    print("\n4. Testing eviction...")
+    small = LogStore(memory_bytes=256 * 1024)
+    for i in range(20):
+        small.append(_rows(1000, start=1700000000.0 + i * 100))
+    print(f"   Capacity: {small.capacity}, kept: {len(small)}, next seq: {small.next_seq}")
+    assert len(small) <= small.capacity, "Store should never exceed capacity"
+    assert small.first_seq > 0, "Oldest entries should be evicted"
+    newest = small.format(small.query(limit=1))[0]
+    assert newest.endswith("message 999"), "Newest entry should survive eviction"
+
+    # Test 5: Incremental cursors
+    print("\n5. Testing log cursors...")
+    paged = LogStore(memory_bytes=1024 * 1024)
+    paged.append(_rows(10))
+    first, cursor = page_store(paged, None, 3)
+    paged.append(_rows(5, start=1700000100.0))
+    second, cursor = page_store(paged, cursor, 3)
+    third, cursor = page_store(paged, cursor, 3)
+    empty, _ = page_store(paged, cursor, 3)
+    print(f"   Pages: {len(first)}, {len(second)}, {len(third)}, {len(empty)} (cursor {cursor})")
+    assert first[-1].endswith("message 9"), "First page should end at newest entry"
+    assert [line[-1] for line in second + third] == list("01234"), "Pages should continue without gaps"
+    assert not empty, "Nothing new after last cursor"
+
+    dump = ("--------- beginning of main\n"
+            "11-19 10:00:00.100  1  1 I T: a\n"
+            "11-19 10:00:00.200  1  1 I T: b\n")
+    lines, time_cursor = page_device_output(dump, None, 10)
+    # -T output starts at the cursor time, inclusive
+    again, _ = page_device_output(dump.split("\n", 2)[2], time_cursor, 10)
+    assert time_cursor == "t:11-19 10:00:00.200#1", "Time cursor should use last timestamp"
+    assert len(lines) == 2 and not again, "Lines at cursor time should not repeat"
+
+    # A page cut inside one millisecond resumes at its next line (-T replays it)
+    burst = "".join(f"11-19 10:00:00.300  1  1 I T: m{i}\n" for i in range(5))
+    first_page, burst_cursor = page_device_output(burst, time_cursor, 2)
+    second_page, burst_cursor = page_device_output(burst, burst_cursor, 2)
+    third_page, burst_cursor = page_device_output(burst + "11-19 10:00:00.301  1  1 I T: n\n", burst_cursor, 2)
+    print(f"   Burst pages: {first_page + second_page + third_page} (cursor {burst_cursor})")
+    assert [line[-2:] for line in first_page + second_page + third_page] == ["m0", "m1", "m2", "m3", "m4", " n"]
+    assert burst_cursor == "t:11-19 10:00:00.301#1"
+
+    # Device output from -T crosses the new year; MM-DD order must not matter
+    new_year = ("12-31 23:59:59.999  1  1 I T: old\n"
+                "01-01 00:00:00.000  1  1 I T: new\n")
+    lines, year_cursor = page_device_output(new_year, "t:12-31 23:59:59.999#1", 10)
+    assert [line[-3:] for line in lines] == ["new"] and year_cursor == "t:01-01 00:00:00.000#1"
+
+    # Test 6: Collector resume keeps same-millisecond lines and follows dividers
+    print("\n6. Testing collector resume...")
+    first = ["--------- beginning of main",
+             "  1700000000.100     1     1 I T: a",
+             "  1700000000.200     1     1 I T: b",
+             "  1700000000.200     1     1 I T: c"]
+    # -T replays the resume millisecond; "d" arrived in it after the disconnect
+    second = ["  1700000000.200     1     1 I T: b",
+              "  1700000000.200     1     1 I T: c",
+              "  1700000000.200     1     1 I T: d",
+              "  1700000000.300     1     1 I T: e",
+              "--------- switch to crash",
+              "  1700000000.400     1     1 E T: f"]
+    client = _StreamClient([first, second])
+    collector = LogcatCollector(client, buffers=("main", "crash"), memory_bytes=1024 * 1024)
+    client.collector = collector
+    collector._running = True
+    collector._run()
+    messages = [line.rsplit(": ", 1)[1] for line in collector.store.format(collector.store.query())]
+    print(f"   Commands: {client.commands}")
+    print(f"   Stored: {messages}")
+    assert "-D " in client.commands[0] and "-T" not in client.commands[0]
+    assert client.commands[1].endswith("-T 1700000000.200"), "Should resume at the last stored timestamp"
+    assert messages == list("abcdef"), "Resume should drop replayed lines only"
+    crash = collector.store.format(collector.store.query(buffers=["crash"]))
+    assert len(crash) == 1 and crash[0].endswith("T: f"), "'switch to' divider should change buffer"
+
+    # Test 7: Tag table stays bounded
+    print("\n7. Testing tag table bound...")
+    tagged = LogStore(memory_bytes=256 * 1024, max_tags=64)
+    for i in range(30):
+        tagged.append([(1700000000.0 + i, 1, 1, 2, f"Tag{i}-{j % 10}", "x") for j in range(tagged.capacity // 2)])
+    newest = tagged.format(tagged.query(limit=1))[0]
+    print(f"   Tags: {len(tagged.tags)}, newest: {newest}")
+    assert len(tagged.tags) <= 64, "Tags of evicted entries should be reclaimed"
+    assert "Tag29-9: x" in newest and not tagged.query(tags=[OVERFLOW_TAG]).size
+    assert len(tagged.query(tags=["Tag29-3"])) == tagged.capacity // 20
+
+    flood = LogStore(memory_bytes=256 * 1024, max_tags=64)
+    flood.append([(1700000000.0, 1, 1, 2, f"Tag{j}", "x") for j in range(100)])
+    assert len(flood.tags) == 65, "Tags past the bound should share one overflow entry"
+    assert len(flood.query(tags=[OVERFLOW_TAG])) == 36
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.3 PASSED - Logcat store working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_logcat_store()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.3 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
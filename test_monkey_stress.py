@@ -0,0 +1,116 @@
+"""Test monkey stress output parsing and crash correlation - Checkpoint 3.13"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.incidents import parse_crash_buffer
+from domains.android.logcat_store import parse_logcat_line
+from domains.android.monkey_stress import LogcatCrashes, MonkeyParser, correlate, format_stress_summary, monkey_script
+
+MONKEY_OUTPUT = """:Monkey: seed=42 count=500
+:AllowPackage: com.example
+:Switch: #Intent;action=android.intent.action.MAIN;component=com.example/.Main;end
+:Sending Touch (ACTION_DOWN): 0:(100.0,200.0)
+:Sending Touch (ACTION_UP): 0:(101.0,201.0)
+    // Sending event #100
+:Sending Key (ACTION_DOWN): 4    // KEYCODE_BACK
+// NOT RESPONDING: com.example (pid 4242)
+ANR in com.example (com.example/.Main)
+PID: 4242
+Reason: Input dispatching timed out
+:Sending Key (ACTION_UP): 4    // KEYCODE_BACK
+// CRASH: com.example (pid 4242)
+// Short Msg: java.lang.IllegalStateException
+// Long Msg: java.lang.IllegalStateException: boom
+// Build Label: google/sdk
+// java.lang.IllegalStateException: boom
+// \tat com.example.Main.onClick(Main.java:10)
+// \tat android.view.View.performClick(View.java:7000)
+// 
+** Monkey aborted due to error.
+Events injected: 102
+:Sending rotation degree=0, persist=false
+:Dropped: keys=0 pointers=0 trackballs=0 flips=0 rotations=0"""
+
+CRASH_BUFFER = """1700000000.100  4242  4242 E AndroidRuntime: FATAL EXCEPTION: main
+1700000000.100  4242  4242 E AndroidRuntime: Process: com.example, PID: 4242
+1700000000.100  4242  4242 E AndroidRuntime: java.lang.IllegalStateException: boom
+1700000000.100  4242  4242 E AndroidRuntime: \tat com.example.Main.onClick(Main.java:10)
+1700000000.100  4242  4242 E AndroidRuntime: \tat android.view.View.performClick(View.java:7000)
+1700000000.500  5000  5000 F DEBUG   : *** *** *** *** *** *** *** *** *** *** *** *** *** *** *** ***
+1700000000.500  5000  5000 F DEBUG   : pid: 5000, tid: 5000, name: worker  >>> com.example:remote <<<
+1700000000.500  5000  5000 F DEBUG   : signal 11 (SIGSEGV), code 1 (SEGV_MAPERR), fault addr 0x0
+1700000000.500  5000  5000 F DEBUG   :       #00 pc 000123  /data/app/lib/libnative.so (crash_here+12)"""
+
+
+def test_monkey_stress():
+    """Test event counting, crash blocks and logcat correlation."""
+    print("Testing Monkey Stress Parsing...")
+    print("=" * 60)
+
+    # Test 1: Streaming parse
+    print("\n1. Testing monkey output parsing...")
+    parser = MonkeyParser(recent_events=3)
+    reports = [r for r in map(parser.feed, MONKEY_OUTPUT.splitlines()) if r]
+    assert parser.close() is None
+    print(f"   Reports: {[(r.kind, r.event_index, r.detail) for r in reports]}")
+    assert (parser.seed, parser.count, parser.events) == (42, 500, 102), "Events after the run are not counted"
+
+    # The launch script reports the PID monkey runs under, so only it is killed
+    pid, execed = subprocess.run(["sh", "-c", monkey_script("sh -c 'echo $$'")], capture_output=True,
+                                 text=True).stdout.splitlines()
+    assert pid.startswith(":Atlas: monkey pid=") and pid.endswith(f"={execed}"), "exec keeps the PID"
+    assert parser.pid is None
+    parser.feed(pid)
+    assert parser.pid == int(execed)
+    assert parser.aborted and not parser.finished and parser.dropped.startswith("keys=0")
+    anr, crash = reports
+    assert (anr.kind, anr.event_index, anr.detail) == ("anr", 101, "Input dispatching timed out")
+    assert (crash.kind, crash.pid, crash.event_index) == ("crash", 4242, 102)
+    assert crash.detail == "java.lang.IllegalStateException: boom"
+    assert [index for index, _ in crash.recent] == [3, 101, 102], "Bounded lead-up"
+
+    # Test 2: Monkey's stack fingerprints like the crash buffer
+    print("\n2. Testing fingerprint from monkey stack...")
+    rows = [parse_logcat_line(line) for line in CRASH_BUFFER.splitlines()]
+    java = parse_crash_buffer(rows[:5])[0]
+    assert crash.fingerprint == java.fingerprint, "Same incident as collect_device_incidents"
+
+    # Test 3: Correlation with logcat
+    print("\n3. Testing logcat correlation...")
+    logcat = LogcatCrashes(max_rows=100)
+    starts = [logcat.add(row, 102) for row in rows]
+    assert starts.count("crash") == 2
+    merged = correlate(reports, logcat)
+    print(f"   Merged: {[(r.kind, r.package, r.source) for r in merged]}")
+    assert [r.kind for r in merged] == ["anr", "crash", "crash"]
+    assert merged[1].source == "logcat" and merged[1].fingerprint == java.fingerprint
+    native = merged[2]
+    assert native.package == "com.example:remote" and native.pid == 0 and native.incident.cause == "SIGSEGV"
+
+    # Test 4: Summary
+    print("\n4. Testing summary...")
+    summary = format_stress_summary(parser, merged, "adb shell monkey -s 42 500", 12.5,
+                                    known={java.fingerprint: 3})
+    print(summary)
+    assert "seed 42" in summary and "aborted after 102/500 events" in summary
+    assert f"at event #102 fingerprint {java.fingerprint} (seen 3x before)" in summary
+    assert "at event ~#102" in summary, "Logcat-only crash is placed approximately"
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.13 PASSED - Monkey stress parsing working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_monkey_stress()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.13 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,126 @@
+"""Test dumpsys package index - Checkpoint 3.9"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.package_index import format_package_info, parse_dumpsys_package, parse_package_list
+
+DUMPSYS = """Activity Resolver Table:
+  Non-Data Actions:
+      android.intent.action.MAIN:
+        1d3c2bd com.example.app/.MainActivity filter 8b5e0a3
+          Action: "android.intent.action.MAIN"
+          Category: "android.intent.category.LAUNCHER"
+        2e4d3ce com.android.settings/.Settings filter 9c6f1b4
+          Action: "android.intent.action.MAIN"
+
+Service Resolver Table:
+  Non-Data Actions:
+      com.example.SYNC:
+        3f5e4df com.example.app/com.example.sync.SyncService filter 1a2b3c4
+          Action: "com.example.SYNC"
+
+ContentProvider Authorities:
+  [com.example.app.files]:
+    Provider{4a6f5e0 com.example.app/androidx.core.content.FileProvider}
+      applicationInfo=ApplicationInfo{5b7a6f1 com.example.app}
+
+Packages:
+  Package [com.example.app] (6c8b7a2):
+    userId=10123
+    pkg=Package{7d9c8b3 com.example.app}
+    codePath=/data/app/~~abc==/com.example.app-def==
+    primaryCpuAbi=arm64-v8a
+    versionCode=42 minSdk=24 targetSdk=34
+    versionName=1.4.2
+    flags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ALLOW_BACKUP ]
+    timeStamp=2024-01-31 10:00:00
+    firstInstallTime=2024-01-30 09:00:00
+    lastUpdateTime=2024-01-31 10:00:01
+    installerPackageName=com.android.vending
+    requested permissions:
+      android.permission.INTERNET
+      android.permission.CAMERA
+      android.permission.READ_EXTERNAL_STORAGE: restricted=true
+    install permissions:
+      android.permission.INTERNET: granted=true
+    User 0: ceDataInode=1234 installed=true hidden=false suspended=false stopped=false notLaunched=false enabled=0
+      gids=[3003]
+      runtime permissions:
+        android.permission.CAMERA: granted=false, flags=[ USER_SENSITIVE_WHEN_GRANTED ]
+        android.permission.READ_EXTERNAL_STORAGE: granted=true, flags=[ RESTRICTION_INSTALLER_EXEMPT ]
+  Package [com.android.settings] (8e0d9c4):
+    userId=1000
+    codePath=/system/priv-app/Settings
+    versionCode=34 minSdk=34 targetSdk=34
+    versionName=14
+    flags=[ SYSTEM HAS_CODE ]
+
+Hidden system packages:
+  Package [com.android.settings] (9f1e0d5):
+    userId=1000
+    versionCode=33 minSdk=33 targetSdk=33
+"""
+
+
+def test_package_index():
+    """Test package records, permissions, components and list parsing."""
+    print("Testing Package Index...")
+    print("=" * 60)
+
+    records = parse_dumpsys_package(DUMPSYS.splitlines())
+
+    # Test 1: Package fields
+    print("\n1. Testing package fields...")
+    app = records["com.example.app"]
+    print(f"   Packages: {sorted(records)}")
+    assert sorted(records) == ["com.android.settings", "com.example.app"]
+    assert app.version_code == 42 and app.version_name == "1.4.2" and app.uid == 10123
+    assert app.fields["targetSdk"] == "34" and app.fields["firstInstallTime"] == "2024-01-30 09:00:00"
+    assert not app.system and records["com.android.settings"].system
+    assert records["com.android.settings"].version_code == 34, "Hidden system package must not override"
+    assert app.users[0]["installed"] == "true"
+
+    # Test 2: Permissions with grant state
+    print("\n2. Testing permissions...")
+    print(f"   Permissions: {app.permissions}")
+    assert app.requested == ["android.permission.INTERNET", "android.permission.CAMERA",
+                             "android.permission.READ_EXTERNAL_STORAGE"]
+    assert app.permissions["android.permission.INTERNET"] == (True, "install")
+    assert app.permissions["android.permission.CAMERA"] == (False, "runtime")
+    assert app.permissions["android.permission.READ_EXTERNAL_STORAGE"] == (True, "runtime")
+
+    # Test 3: Components
+    print("\n3. Testing components...")
+    assert app.launcher_activities() == ["com.example.app.MainActivity"]
+    assert "com.example.sync.SyncService" in app.components["services"]
+    provider = app.components["providers"]["androidx.core.content.FileProvider"]
+    assert provider["authorities"] == {"com.example.app.files"}
+
+    # Test 4: pm list packages for incremental refresh
+    print("\n4. Testing package list parsing...")
+    listed = parse_package_list("package:/data/app/~~abc==/com.example.app-def==/base.apk=com.example.app versionCode:42\n"
+                                "package:/system/priv-app/Settings/Settings.apk=com.android.settings versionCode:34\n")
+    assert listed["com.example.app"] == ("/data/app/~~abc==/com.example.app-def==/base.apk", 42)
+    assert listed["com.example.app"][0].startswith(app.code_path)
+
+    info = format_package_info(app)
+    print(info)
+    assert "1.4.2 (42)" in info and "Launcher: com.example.app.MainActivity" in info
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.9 PASSED - Package index working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_package_index()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.9 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,70 @@
+"""Test package inventory tracking - Checkpoint 3.11"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.package_inventory import PackageInventory, parse_pm_list
+
+
+def _pm_list(packages):
+    return "\n".join(f"package:{name} versionCode:{version} uid:{uid}" for name, (version, uid) in packages.items())
+
+
+def test_package_inventory():
+    """Test pm list parsing, deltas, history and fleet version queries."""
+    print("Testing Package Inventory...")
+    print("=" * 60)
+
+    # Test 1: Parsing
+    print("\n1. Testing pm list parsing...")
+    parsed = parse_pm_list("package:com.example.app versionCode:42 uid:10123\n"
+                           "package:com.android.shell versionCode:34 uid:2000\n")
+    print(f"   Parsed: {parsed}")
+    assert parsed == {"com.example.app": (42, 10123), "com.android.shell": (34, 2000)}
+
+    inventory = PackageInventory(":memory:")
+    day0 = {"com.example.app": (42, 10123), "com.example.old": (1, 10124), "com.android.shell": (34, 2000)}
+
+    # Test 2: First snapshot is a baseline
+    print("\n2. Testing baseline...")
+    changes, first = inventory.update("dev-a", parse_pm_list(_pm_list(day0)), timestamp=1000)
+    assert first and changes == []
+    inventory.update("dev-b", day0, timestamp=1000)
+
+    # Test 3: Deltas
+    print("\n3. Testing deltas...")
+    day1 = {"com.example.app": (43, 10123), "com.example.new": (7, 10125), "com.android.shell": (34, 2000)}
+    changes, first = inventory.update("dev-a", day1, timestamp=2000)
+    print(f"   Changes: {changes}")
+    assert not first
+    assert changes == [("com.example.new", "added", None, 7), ("com.example.old", "removed", 1, None),
+                       ("com.example.app", "updated", 42, 43)]
+    assert inventory.update("dev-a", day1, timestamp=3000)[0] == [], "Unchanged snapshot should have no delta"
+    assert inventory.current("dev-a") == day1
+
+    # Test 4: History and fleet queries without devices
+    print("\n4. Testing history and version queries...")
+    history = inventory.history(package="com.example.app")
+    assert history == [(2000, "dev-a", "com.example.app", "updated", 42, 43)]
+    assert len(inventory.history(since=1500)) == 3
+    versions = {device: version for device, version, _, _ in inventory.versions("com.example.app")}
+    assert versions == {"dev-a": 43, "dev-b": 42}
+    new = {device: version for device, version, _, _ in inventory.versions("com.example.new")}
+    assert new == {"dev-a": 7, "dev-b": None}, "Devices without the package should be listed"
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.11 PASSED - Package inventory working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_package_inventory()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.11 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
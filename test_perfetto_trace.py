@@ -0,0 +1,131 @@
+"""Test Perfetto trace summarizer - Checkpoint 3.7"""
+
+import io
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.perfetto_trace import format_trace_summary, packed_varints, summarize_trace
+
+MS = 1_000_000
+SECOND = 1_000_000_000
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _int(field, value):
+    return _varint(field << 3) + _varint(value)
+
+
+def _msg(field, *parts):
+    payload = b"".join(p.encode() if isinstance(p, str) else p for p in parts)
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _packed(field, values, delta=False):
+    previous, encoded = 0, b""
+    for value in values:
+        encoded += _varint(value - previous if delta else value)
+        previous = value if delta else 0
+    return _msg(field, encoded)
+
+
+def _switch(ts, next_pid, next_comm, prev_state=0):
+    return _msg(2, _int(1, ts), _msg(4, _int(4, prev_state), _msg(5, next_comm), _int(6, next_pid)))
+
+
+def _build_trace():
+    """Trace with a process tree, full and compact sched events, atrace prints and frequency."""
+    tree = (_msg(1, _int(1, 100), _msg(3, "com.example.app"))
+            + _msg(2, _int(1, 100), _msg(2, "main"), _int(5, 100))
+            + _msg(2, _int(1, 101), _msg(2, "RenderThread"), _int(5, 100)))
+    cpu0 = _msg(1, _int(1, 0),
+                _switch(SECOND, 100, "main"),
+                _msg(2, _int(1, SECOND), _int(2, 100), _msg(3, _msg(2, "B|100|Choreographer#doFrame\n"))),
+                _msg(2, _int(1, SECOND + 8 * MS), _int(2, 100), _msg(3, _msg(2, "E|100\n"))),
+                _msg(2, _int(1, SECOND), _msg(11, _int(1, 1_000_000), _int(2, 0))),
+                _msg(2, _int(1, SECOND + 500 * MS), _msg(11, _int(1, 2_000_000), _int(2, 0))),
+                _switch(SECOND + 10 * MS, 0, "swapper/0", prev_state=1))
+    cpu1 = _msg(1, _int(1, 1),
+                _msg(2, _int(1, SECOND + 1 * MS), _msg(20, _msg(1, "RenderThread"), _int(2, 101))),
+                _switch(SECOND + 3 * MS, 101, "RenderThread"),
+                _switch(SECOND + 20 * MS, 0, "swapper/1", prev_state=1))
+    compact = _msg(4,
+                   _msg(5, "RenderThread"), _msg(5, "swapper/2"),
+                   _packed(1, [2 * SECOND, 2 * SECOND + 5 * MS], delta=True),
+                   _packed(2, [0, 1]),
+                   _packed(3, [101, 0]),
+                   _packed(6, [0, 1]),
+                   _packed(7, [2 * SECOND - 1 * MS], delta=True),
+                   _packed(8, [101]))
+    cpu2 = _msg(1, _int(1, 2), compact)
+    return b"".join(_msg(1, packet) for packet in (_msg(2, tree), cpu0, cpu1, cpu2))
+
+
+def test_perfetto_trace():
+    """Test packed varints, CPU time, runnable latency, slices and frequency."""
+    print("Testing Perfetto Trace Summarizer...")
+    print("=" * 60)
+
+    # Test 1: Vectorized packed varint decoding
+    print("\n1. Testing packed varint decoding...")
+    values = [0, 1, 127, 128, 300, 2**35 + 7, 2**62]
+    decoded = packed_varints(b"".join(_varint(v) for v in values)).tolist()
+    print(f"   Decoded: {decoded}")
+    assert decoded == values
+
+    trace = _build_trace()
+    copy = io.BytesIO()
+    summary = summarize_trace(io.BytesIO(trace), copy_to=copy)
+    assert copy.getvalue() == trace, "Raw trace should be copied while parsing"
+
+    # Test 2: CPU time per thread and process
+    print("\n2. Testing CPU time...")
+    threads = {tid: total for tid, comm, process, total in summary["threads"]}
+    print(f"   Threads: {summary['threads']}")
+    assert threads[100] == 10 * MS
+    assert threads[101] == 17 * MS + 5 * MS, "Full and compact sched events should both count"
+    assert summary["processes"][0] == ("com.example.app", 32 * MS)
+
+    # Test 3: Runnable latency matched across CPUs
+    print("\n3. Testing runnable latency...")
+    print(f"   Latency: {summary['latency']}")
+    name, count, mean, p95, worst, total = summary["latency"][0]
+    assert name == "com.example.app" and count == 2
+    assert worst == 2 * MS and total == 3 * MS
+
+    # Test 4: atrace slices and frequency
+    print("\n4. Testing slices and CPU frequency...")
+    assert summary["slices"][0] == ("Choreographer#doFrame", 1, 8 * MS, 8 * MS)
+    average, peak = summary["frequency"][0]
+    assert peak == 2_000_000 and 1_000_000 < average < 2_000_000
+
+    report = format_trace_summary(summary)
+    print(report)
+    assert "Runnable latency" in report and "Choreographer#doFrame" in report
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.7 PASSED - Perfetto trace summarizer working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_perfetto_trace()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.7 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
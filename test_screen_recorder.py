@@ -0,0 +1,129 @@
+"""Test screen recording ring buffer - Checkpoint 3.19"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.screen_recorder import GOP, NALSplitter, ScreenRecorder, START_CODE, nal_type
+from domains.android.tools import ui_tools
+
+SPS = bytes([0x67, 0x42, 0x00, 0x1F])
+PPS = bytes([0x68, 0xCE, 0x3C, 0x80])
+
+
+def _idr(n: int, size: int = 16) -> bytes:
+    return bytes([0x65, n]) + b"\xAA" * (size - 2)
+
+
+def _slice(n: int, size: int = 16) -> bytes:
+    return bytes([0x41, n]) + b"\xBB" * (size - 2)
+
+
+def _stream(units, short_codes=()) -> bytes:
+    """Annex-B stream; units at indices in short_codes use 3-byte start codes."""
+    return b"".join((b"\x00\x00\x01" if i in short_codes else START_CODE) + unit for i, unit in enumerate(units))
+
+
+class _Manager:
+    def __init__(self, client):
+        self.client = client
+
+    def get_device(self, device_id=None):
+        return self.client
+
+
+class _Client:
+    device_id = "stub"
+
+
+def test_screen_recorder():
+    """Test NAL splitting, GOP assembly, budget trimming and empty clip handling."""
+    print("Testing Screen Recorder...")
+    print("=" * 60)
+
+    # Test 1: Splitting with mixed start codes and arbitrary chunk boundaries
+    print("\n1. Testing NAL splitting...")
+    units = [SPS, PPS, _idr(0), _slice(1), _slice(2)]
+    data = _stream(units, short_codes={1, 3})
+    for chunk_size in (1, 3, 7, len(data)):
+        splitter = NALSplitter()
+        out = []
+        for i in range(0, len(data), chunk_size):
+            out += splitter.feed(data[i:i + chunk_size])
+        assert out == units[:-1], f"Last unit is open until flush (chunk {chunk_size})"
+        out += splitter.flush()
+        assert out == units, f"Units should survive {chunk_size}-byte chunks"
+    assert [nal_type(unit) for unit in units] == [7, 8, 5, 1, 1]
+    assert NALSplitter().flush() == [], "No stream, no units"
+
+    # Test 2: GOPs start at IDR frames with the current SPS/PPS
+    print("\n2. Testing GOP assembly...")
+    recorder = ScreenRecorder(None, buffer_bytes=10 ** 6)
+    for unit in [_slice(9), SPS, PPS, _idr(0), _idr(1), _slice(2), _idr(3), _slice(4)]:
+        recorder._add_unit(unit)
+    recorder._close_gop()
+    gops = list(recorder._gops)
+    print(f"   GOPs: {[len(gop.units) for gop in gops]}")
+    assert len(gops) == 2, "Consecutive IDR slices belong to one frame"
+    assert gops[0].units == [SPS, PPS, _idr(0), _idr(1), _slice(2)], "Leading P slices are dropped"
+    assert gops[1].units == [SPS, PPS, _idr(3), _slice(4)], "Every GOP carries the parameter sets"
+    assert recorder.clip() == gops[0].to_bytes() + gops[1].to_bytes()
+    assert recorder.clip().startswith(START_CODE + SPS), "Clip must start decodable"
+    assert len(recorder.frames) == 1, "Keyframes are sampled at most once per interval"
+
+    # Test 3: Oldest GOPs are evicted to fit the byte budget
+    print("\n3. Testing GOP trimming...")
+    probe = GOP(0)
+    for unit in (SPS, PPS, _idr(0), _slice(1), _slice(2)):
+        probe.add(unit)
+    gop_size = probe.size
+    trimmed = ScreenRecorder(None, buffer_bytes=gop_size * 2 + gop_size // 2)
+    trimmed._add_unit(SPS)
+    trimmed._add_unit(PPS)
+    for n in range(5):
+        for unit in (_idr(n), _slice(1), _slice(2)):
+            trimmed._add_unit(unit)
+        assert trimmed.buffered_bytes <= trimmed.buffer_bytes, "Closed + open GOPs stay within budget"
+    kept = [gop.units[2][1] for gop in trimmed._gops] + [trimmed._current.units[2][1]]
+    print(f"   Budget {trimmed.buffer_bytes}B, GOP {gop_size}B, kept GOPs {kept}")
+    assert kept == [3, 4], "Only the newest GOPs fit"
+
+    oversized = ScreenRecorder(None, buffer_bytes=gop_size)
+    for unit in (SPS, PPS, _idr(0), _slice(1), _slice(2), _slice(3)):
+        oversized._add_unit(unit)
+    assert oversized.buffered_bytes == 0 and oversized.clip() == b"", "A GOP above budget is dropped"
+    oversized._add_unit(_idr(4))
+    assert oversized.clip().startswith(START_CODE + SPS), "Buffering resumes at the next IDR"
+
+    # Test 4: Stopping with nothing buffered does not write an empty file
+    print("\n4. Testing stop without buffered video...")
+    manager = ui_tools._device_manager
+    ui_tools._device_manager = _Manager(_Client())
+    ui_tools._screen_recorders["stub"] = ScreenRecorder(None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.h264")
+            result = ui_tools.stop_screen_recording.invoke({"output_path": path})
+            print(f"   {result}")
+            assert result.startswith("Failed to save clip") and not os.path.exists(path)
+    finally:
+        ui_tools._device_manager = manager
+        ui_tools._screen_recorders.pop("stub", None)
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.19 PASSED - Screen recorder working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_screen_recorder()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.19 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,123 @@
+"""Test app start benchmark statistics - Checkpoint 3.8"""
+
+import shlex
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.tools import perf_tools
+from domains.android.startup_bench import format_launch_summary, parse_am_start, summarize_launches, t_critical
+
+AM_START = """Starting: Intent { act=android.intent.action.MAIN cmp=com.example.app/.MainActivity }
+Status: ok
+LaunchState: COLD
+Activity: com.example.app/.MainActivity
+TotalTime: TOTAL
+WaitTime: WAIT
+Complete"""
+
+
+def _am_start(total, wait):
+    return AM_START.replace("TOTAL", str(total)).replace("WAIT", str(wait))
+
+
+class _ShellStub:
+    """Records shell commands; succeeds only for the su variant."""
+
+    def __init__(self):
+        self.commands = []
+
+    def shell(self, command, timeout=30):
+        self.commands.append(command)
+        script = shlex.split(command)
+        assert len(script) == 1, "Device script must reach adb as one argument"
+        if script[0].startswith("su 0 sh -c"):
+            return True, "dropped\n"
+        return True, "/system/bin/sh: can't create /proc/sys/vm/drop_caches: Permission denied\n"
+
+
+def test_startup_bench():
+    """Test am start -W parsing, warmup discard and confidence intervals."""
+    print("Testing App Start Benchmark...")
+    print("=" * 60)
+
+    # Test 1: Parsing
+    print("\n1. Testing am start -W parsing...")
+    launch = parse_am_start(_am_start(512, 530))
+    print(f"   Parsed: {launch}")
+    assert launch["TotalTime"] == 512 and launch["WaitTime"] == 530
+    assert launch["LaunchState"] == "COLD" and "error" not in launch
+
+    legacy = parse_am_start("Status: ok\nActivity: com.example.app/.MainActivity\nThisTime: 300\nTotalTime: 310\nComplete")
+    assert legacy["TotalTime"] == 310
+
+    # Test 2: Launches that did not happen are failures
+    print("\n2. Testing failed launches...")
+    front = parse_am_start("Warning: Activity not started, its current task has been brought to the front\nStatus: ok")
+    missing = parse_am_start("Error: Activity class {com.example.app/.Nope} does not exist.")
+    assert "brought to the front" in front["error"]
+    assert "does not exist" in missing["error"]
+
+    # Test 3: Warmup discarded, statistics
+    print("\n3. Testing summary statistics...")
+    launches = [parse_am_start(_am_start(t, t + 20)) for t in (900, 500, 510, 520, 505, 515)]
+    summary = summarize_launches(launches + [front], warmup=1)
+    total = summary["metrics"]["TotalTime"]
+    print(f"   TotalTime: {total}")
+    assert summary["runs"] == 6 and total["n"] == 5, "Warmup run and failed launch should be excluded"
+    assert total["mean"] == 510.0 and total["median"] == 510.0
+    assert abs(total["ci95"] - 2.776 * total["sd"] / 5 ** 0.5) < 1e-9
+    assert summary["states"] == {"COLD": 5} and len(summary["errors"]) == 1
+    assert t_critical(1000) == 1.96
+
+    report = format_launch_summary("emulator-5554 [cold]", summary, "com.example.app/.MainActivity")
+    print(report)
+    assert "95% CI" in report and "1 failed runs" in report
+
+    # Test 4: Cache drop runs on the device and checks its result
+    print("\n4. Testing cache drop command...")
+    client = _ShellStub()
+    assert perf_tools._drop_caches(client), "su fallback reported success"
+    print(f"   Commands: {client.commands}")
+    assert client.commands == [
+        "'sync && echo 3 > /proc/sys/vm/drop_caches && echo dropped'",
+        shlex.quote("su 0 sh -c 'sync && echo 3 > /proc/sys/vm/drop_caches && echo dropped'"),
+    ]
+    client.shell = lambda command, timeout=30: (True, "su: not found")
+    assert not perf_tools._drop_caches(client), "Failure must not be reported as success"
+
+    # Test 5: Warm mode finishes the activity with BACK and only counts WARM launches
+    print("\n5. Testing warm mode...")
+    states = iter(["COLD", "WARM", "HOT", "WARM"])
+    commands = []
+
+    def shell(command, timeout=30):
+        commands.append(command)
+        if command.startswith("am start"):
+            return True, _am_start(300, 310).replace("COLD", next(states))
+        return True, ""
+
+    client = _ShellStub()
+    client.shell = shell
+    summary, component, _ = perf_tools._benchmark_start(client, "com.example.app", ".MainActivity", 3, 1,
+                                                        "warm", False, 0)
+    print(f"   States: {summary['states']}, errors: {summary['errors']}")
+    assert commands[0] == "am force-stop com.example.app"
+    assert commands.count("input keyevent KEYCODE_BACK") == 4 and "input keyevent KEYCODE_HOME" not in commands
+    assert summary["states"] == {"WARM": 2} and summary["errors"] == ["launch state HOT, expected WARM"]
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.8 PASSED - App start benchmark working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_startup_bench()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.8 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,133 @@
+"""Test telemetry sampling store - Checkpoint 3.18"""
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.telemetry import (
+    TelemetrySampler, TimeSeriesStore, _parse_battery, _parse_meminfo, _parse_pss, _parse_thermal
+)
+
+# Multiple of every tier bucket, so sample i lands in bucket i // seconds
+START = 1700000400.0
+
+BATTERY = """\
+Current Battery Service state:
+  AC powered: false
+  USB powered: true
+  status: 2
+  level: 87
+  scale: 100
+  voltage: 4123
+  temperature: 312
+  Battery Level: 55
+"""
+
+MEMINFO = """\
+MemTotal:        8000000 kB
+MemAvailable:    2048000 kB
+"""
+
+THERMAL = "41500\n-273000\n38\nerror\n47250\n"
+PSS = "                  TOTAL PSS:   153600            TOTAL RSS:   200000      TOTAL SWAP PSS:      12"
+
+
+def test_telemetry():
+    """Test /proc and dumpsys parsers, tier rollup, window selection and stats."""
+    print("Testing Telemetry...")
+    print("=" * 60)
+
+    # Test 1: Source parsers on fixed samples
+    print("\n1. Testing source parsers...")
+    assert _parse_battery(BATTERY.splitlines()) == [87, 31.2, 4123], "Temperature is reported in 0.1 C"
+    assert all(math.isnan(v) for v in _parse_battery([]))
+    available_mb, used_pct = _parse_meminfo(MEMINFO.splitlines())
+    print(f"   Memory: {available_mb} MB available, {used_pct:.1f}% used")
+    assert available_mb == 2000 and round(used_pct, 1) == 74.4
+    assert all(math.isnan(v) for v in _parse_meminfo(["MemAvailable: 1 kB"]))
+    assert _parse_thermal(THERMAL.splitlines()) == [47.25], "Millidegrees scaled, bogus zones dropped"
+    assert math.isnan(_parse_thermal(["-273000"])[0])
+    assert _parse_pss([PSS]) == 150.0 and math.isnan(_parse_pss(["no totals"]))
+
+    # Test 2: One tick of sections, CPU usage from /proc/stat deltas
+    print("\n2. Testing tick values...")
+    sampler = TelemetrySampler(None, packages=["com.example.app"])
+    sections = {"battery": BATTERY.splitlines(), "cpu": ["cpu  100 0 100 800 0 0 0 0 0 0"],
+                "memory": MEMINFO.splitlines(), "thermal": THERMAL.splitlines(), "pss:com.example.app": [PSS]}
+    first = sampler._values(sections)
+    sections["cpu"] = ["cpu  150 0 150 900 0 0 0 0 0 0"]
+    second = sampler._values(sections)
+    print(f"   Metrics: {dict(zip(sampler.store.metrics, second.tolist()))}")
+    assert sampler.store.metrics[-1] == "pss_mb:com.example.app"
+    assert math.isnan(first[sampler.store.index["cpu_usage_pct"]]), "First tick has no CPU delta"
+    assert second[sampler.store.index["cpu_usage_pct"]] == 50.0, "100 busy of 200 jiffies"
+    assert "dumpsys meminfo com.example.app" in sampler.script()
+    try:
+        TelemetrySampler(None, sources=["gpu"])
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+    # Test 3: Tier rollup of one sample per second for 10 minutes
+    print("\n3. Testing tier rollup...")
+    store = TimeSeriesStore(["ramp", "missing"], raw_capacity=60, tiers=((10, 100), (60, 100)))
+    assert store.window("ramp", 60, now=START)[4] == 0 and store.window("ramp", 60, now=START)[0].size == 0
+    for i in range(600):
+        store.append(START + i, np.array([float(i), math.nan]))
+    ten, minute = store.tiers[0][0], store.tiers[1][0]
+    print(f"   Raw: {store.raw.count}, 10s buckets: {ten.count}, 1min buckets: {minute.count}")
+    assert store.raw.count == 600 and ten.count == 59 and minute.count == 9, "Open buckets are not flushed"
+    assert ten.ts[0] == START and ten.mean[0, 0] == 4.5 and ten.lo[0, 0] == 0 and ten.hi[0, 0] == 9
+    assert minute.mean[8, 0] == 509.5 and minute.hi[8, 0] == 539
+    assert math.isnan(ten.mean[0, 1]) and math.isnan(ten.lo[0, 1]), "Missing metric stays NaN"
+
+    # Test 4: Window picks the finest tier covering it
+    print("\n4. Testing window queries...")
+    now = START + 599
+    ts, mean, lo, hi, resolution = store.window("ramp", 30, now=now)
+    assert resolution == 0 and ts.size == 31 and mean[0] == 569 and (lo == mean).all()
+    ts, mean, lo, hi, resolution = store.window("ramp", 300, now=now)
+    print(f"   300s window: {ts.size} samples at {resolution}s resolution")
+    assert resolution == 10 and ts.size == 30, "Raw ring only holds the last minute"
+    assert lo[0] == 300 and hi[-1] == 599 and mean[-1] == 594.5, "Open bucket carries the newest samples"
+    assert store.window("ramp", 10 ** 6, now=now)[4] == 10, "Longest history wins when nothing covers"
+
+    # Test 5: Window statistics
+    print("\n5. Testing stats...")
+    stats = store.stats("ramp", 30, now=now)
+    print(f"   30s: {stats}")
+    assert stats["last"] == 599 and stats["min"] == 569 and stats["max"] == 599
+    assert stats["samples"] == 31 and stats["resolution"] == 0
+    assert abs(stats["slope"] - 60) < 1e-6, "One unit per second is 60 per minute"
+    assert abs(stats["p95"] - np.percentile(np.arange(569, 600), 95)) < 1e-6
+    coarse = store.stats("ramp", 300, now=now)
+    assert coarse["min"] == 300 and coarse["max"] == 599 and coarse["last"] == 594.5
+    assert store.stats("missing", 300, now=now) is None
+
+    # A sampler younger than its window reads the raw samples it has
+    young = TimeSeriesStore(["ramp"])
+    for i in range(150):
+        young.append(START + i, np.array([float(i)]))
+    stats = young.stats("ramp", 300, now=START + 149)
+    print(f"   Young 300s: {stats}")
+    assert stats["last"] == 149 and stats["max"] == 149 and stats["min"] == 0
+    assert stats["samples"] == 150 and stats["resolution"] == 0
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.18 PASSED - Telemetry working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_telemetry()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.18 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,85 @@
+"""Test template matching - Checkpoint 3.2"""
+
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.template_match import PreparedTemplate, decode_png, find_template, to_gray
+
+
+def _encode_png(image: np.ndarray) -> bytes:
+    """Encode RGB image as PNG using Sub filter on odd rows."""
+    height, width, _ = image.shape
+    rows = []
+    for y in range(height):
+        row = image[y].reshape(-1)
+        if y % 2:
+            diff = row.astype(np.int16)
+            diff[3:] -= row[:-3].astype(np.int16)
+            rows.append(b"\x01" + (diff & 0xFF).astype(np.uint8).tobytes())
+        else:
+            rows.append(b"\x00" + row.tobytes())
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"".join(rows))) + chunk(b"IEND", b""))
+
+
+def test_template_match():
+    """Test PNG decoding and pyramid NCC search."""
+    print("Testing Template Matching...")
+    print("=" * 60)
+
+    rng = np.random.default_rng(7)
+    blocks = np.kron(rng.random((300, 135)) * 230, np.ones((8, 8)))
+    frame = np.clip(blocks + rng.random(blocks.shape) * 20, 0, 255).astype(np.uint8)
+    rgb = np.stack([frame] * 3, axis=2)
+    crop = rgb[1003:1099, 501:597].copy()
+
+    # Test 1: PNG decoding
+    print("\n1. Testing PNG decoding...")
+    decoded = decode_png(_encode_png(crop))
+    print(f"   Decoded shape: {decoded.shape}")
+    assert (decoded == crop).all(), "Decoded pixels should match"
+
+    # Test 2: Locate template
+    print("\n2. Testing template search...")
+    template = PreparedTemplate(decoded)
+    gray = to_gray(rgb)
+    start = time.time()
+    match = find_template(gray, template)
+    elapsed = (time.time() - start) * 1000
+    print(f"   Match: ({match.x}, {match.y}) confidence {match.confidence:.3f} in {elapsed:.1f}ms")
+    assert (match.x, match.y) == (501, 1003), "Should find exact crop position"
+    assert match.confidence > 0.99, "Exact crop should score ~1.0"
+    assert match.center == (549, 1051), "Center should be box midpoint"
+
+    # Test 3: Flat template has no signal
+    print("\n3. Testing featureless template...")
+    flat = find_template(gray, PreparedTemplate(np.full((40, 40, 3), 7, dtype=np.uint8)))
+    print(f"   Confidence: {flat.confidence:.3f}")
+    assert flat.confidence == 0.0, "Flat template should not match"
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.2 PASSED - Template matching working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_template_match()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.2 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
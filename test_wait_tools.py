@@ -0,0 +1,104 @@
+"""Test wait-for-log start filtering - Checkpoint 3.20"""
+
+import re
+import shlex
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domains.android.tools import wait_tools
+from domains.android.tools.wait_tools import _log_wait_script, _new_log_predicate
+
+
+class _Stream:
+    def __init__(self, lines):
+        self._lines = lines
+
+    def lines(self, timeout=None):
+        yield from self._lines
+
+    def close(self):
+        pass
+
+
+class _StreamClient:
+    """Replays fixed device output for any streamed command."""
+
+    device_id = "stub"
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.commands = []
+
+    def stream(self, command):
+        self.commands.append(command)
+        return _Stream(self.lines)
+
+
+class _Manager:
+    def __init__(self, client):
+        self.client = client
+
+    def get_device(self, device_id=None):
+        return self.client
+
+
+def test_wait_tools():
+    """Test wait_for_log device script and start time filtering."""
+    print("Testing Wait Tools...")
+    print("=" * 60)
+
+    # Test 1: Device script reports its start time and follows from that second
+    print("\n1. Testing wait_for_log script...")
+    script = _log_wait_script("crash", "AndroidRuntime:E *:S")
+    print(f"   Script: {script}")
+    assert script.startswith('start=$(date +%s.%N); echo "start $start"; ')
+    assert 'logcat -b crash -v threadtime -v epoch -T "${start%%.*}.000" AndroidRuntime:E *:S' in script
+
+    # Test 2: Lines before the start millisecond never match
+    print("\n2. Testing start time filtering...")
+    predicate = _new_log_predicate(re.compile("Displayed"))
+    assert not predicate("start 1700000000.123456789")
+    assert not predicate("--------- beginning of main")
+    assert not predicate("  1700000000.000  1000  1000 I ActivityTaskManager: Displayed old"), "Same second, earlier"
+    assert not predicate("  1700000000.122  1000  1000 I ActivityTaskManager: Displayed old")
+    assert not predicate("  1700000000.200  1000  1000 I ActivityTaskManager: Started new")
+    assert predicate("  1700000000.123  1000  1000 I ActivityTaskManager: Displayed new")
+
+    # Without %N support the start second is used as is
+    coarse = _new_log_predicate(re.compile("x"))
+    assert not coarse("start 1700000000.N")
+    assert coarse("  1700000000.000  1  1 I T: x") and not coarse("  1699999999.999  1  1 I T: x")
+
+    # Test 3: Tool streams the script as one shell argument and reports the match
+    print("\n3. Testing wait_for_log tool...")
+    client = _StreamClient(["start 1700000000.500000000",
+                            "  1700000000.400     1     1 I T: ready (stale)",
+                            "  1700000000.600     1     1 I T: ready"])
+    manager = wait_tools._device_manager
+    wait_tools._device_manager = _Manager(client)
+    try:
+        result = wait_tools.wait_for_log.invoke({"pattern": "ready", "timeout": 5})
+        invalid = wait_tools.wait_for_log.invoke({"pattern": "(", "timeout": 5})
+    finally:
+        wait_tools._device_manager = manager
+    print(f"   {result}")
+    assert result.startswith("Matched after") and result.endswith("T: ready")
+    assert shlex.split(client.commands[0]) == ["shell", _log_wait_script("main")]
+    assert invalid.startswith("Invalid pattern")
+
+    print("\n" + "=" * 60)
+    print("\n✅ Checkpoint 3.20 PASSED - Wait tools working!")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        test_wait_tools()
+    except Exception as e:
+        print(f"\n❌ Checkpoint 3.20 FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
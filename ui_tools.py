@@ -1,11 +1,22 @@
 """UI automation tools for Android."""
 
+import os
+import time
 from langchain.tools import tool
-from typing import Optional
+from typing import Dict, Optional
 from ..device_manager import DeviceManager
+from ..input_events import InputRecorder, UISession, replay_session
+from ..screen_recorder import ScreenRecorder
+from ..template_match import capture_frame, find_template, load_template
 
 _device_manager = DeviceManager()
 
+# Active getevent recorders keyed by device serial
+_recorders: Dict[str, InputRecorder] = {}
+
+# Active screen recorders keyed by device serial
+_screen_recorders: Dict[str, ScreenRecorder] = {}
+
 
 @tool
 def screenshot(device_id: Optional[str] = None, output_path: str = "screenshot.png", quality: int = 75) -> str:
@@ -39,6 +50,50 @@ def screenshot(device_id: Optional[str] = None, output_path: str = "screenshot.p
         return f"Failed to download screenshot: {output}"
 
 
+@tool
+def find_on_screen(template_path: str, device_id: Optional[str] = None, threshold: float = 0.8, tap_match: bool = False) -> str:
+    """Find a reference image (icon or button crop) on the current screen.
+
+    Works for apps without accessibility metadata (games, canvas UIs).
+    The template must be cropped at the device's screen resolution.
+
+    Args:
+        template_path: Local path to template PNG
+        device_id: Device serial number (uses default if None)
+        threshold: Minimum match confidence 0-1 (default: 0.8)
+        tap_match: Tap the center of the match if found (default: False)
+
+    Returns:
+        str: Match coordinates and confidence
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    try:
+        template = load_template(template_path)
+    except (OSError, ValueError) as e:
+        return f"Failed to load template: {e}"
+
+    success, frame = capture_frame(client)
+    if not success:
+        return f"Failed to capture screen: {frame}"
+
+    match = find_template(frame, template)
+    if not match:
+        return "Template larger than screen"
+    if match.confidence < threshold:
+        return f"Not found (best confidence {match.confidence:.2f} at {match.center})"
+
+    x, y = match.center
+    result = (f"Found at ({x}, {y}) confidence {match.confidence:.2f} "
+              f"[box {match.x},{match.y} {match.width}x{match.height}]")
+    if tap_match:
+        success, output = client.shell(f"input tap {x} {y}")
+        result += " - tapped" if success else f" - failed to tap: {output}"
+    return result
+
+
 @tool
 def tap(x: int, y: int, device_id: Optional[str] = None) -> str:
     """Simulate tap at screen coordinates.
@@ -164,3 +219,213 @@ def start_intent(package: str, activity: Optional[str] = None, extras: Optional[
 
     success, output = client.shell(cmd)
     return output if success else f"Failed to start intent: {output}"
+
+
+@tool
+def start_ui_recording(device_id: Optional[str] = None) -> str:
+    """Start recording raw touch and key input from the device.
+
+    Perform the flow (manually or with other UI tools) and then call
+    stop_ui_recording to save it for replay without LLM calls.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Recording status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if client.device_id in _recorders:
+        return f"Already recording on {client.device_id}"
+
+    recorder = InputRecorder(client)
+    recorder.start()
+    _recorders[client.device_id] = recorder
+    return f"Recording input on {client.device_id}"
+
+
+@tool
+def add_ui_checkpoint(expect_text: str, device_id: Optional[str] = None) -> str:
+    """Mark current point of a recording with text that must be on screen.
+
+    Args:
+        expect_text: Text or resource id checked in the UI tree during replay
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Checkpoint status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    recorder = _recorders.get(client.device_id)
+    if not recorder:
+        return f"Not recording on {client.device_id}"
+
+    offset = recorder.add_checkpoint(expect_text)
+    return f"Checkpoint at {offset:.2f}s: '{expect_text}'"
+
+
+@tool
+def stop_ui_recording(output_path: str = "ui_session.json", device_id: Optional[str] = None) -> str:
+    """Stop input recording and save the event log.
+
+    Args:
+        output_path: Output file path (default: ui_session.json)
+        device_id: Device serial number (uses default if None)
+
+    Returns:
+        str: Recording summary
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    recorder = _recorders.pop(client.device_id, None)
+    if not recorder:
+        return f"Not recording on {client.device_id}"
+
+    session = recorder.stop()
+    if not session.events:
+        return "No input events recorded"
+
+    session.save(output_path)
+    return (f"Saved {len(session.events)} events ({session.duration:.1f}s, "
+            f"{len(session.checkpoints)} checkpoint(s)) to {output_path}")
+
+
+@tool
+def replay_ui_session(session_path: str, device_id: Optional[str] = None, speed: float = 1.0, verify_checkpoints: bool = True) -> str:
+    """Replay a recorded UI session with sendevent.
+
+    Args:
+        session_path: Session file saved by stop_ui_recording
+        device_id: Device serial number (uses default if None)
+        speed: Timing multiplier, e.g. 2.0 = twice as fast, 0 = no delays (default: 1.0)
+        verify_checkpoints: Check recorded UI checkpoints (default: True)
+
+    Returns:
+        str: Replay report
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    try:
+        session = UISession.load(session_path)
+    except (OSError, ValueError, KeyError) as e:
+        return f"Failed to load session: {e}"
+
+    success, report = replay_session(client, session, speed=speed, verify=verify_checkpoints)
+    return f"Replay completed\n{report}" if success else f"Replay failed\n{report}"
+
+
+@tool
+def start_screen_recording(device_id: Optional[str] = None, sample_interval: float = 1.0, buffer_mb: int = 32, bit_rate_mbps: int = 4, size: Optional[str] = None) -> str:
+    """Start continuous screen recording into a bounded in-memory buffer.
+
+    Video streams to the host without an on-device file. Use
+    dump_screen_recording to save a clip or sampled keyframes, e.g. right
+    after a crash is detected.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        sample_interval: Minimum seconds between sampled keyframes (default: 1.0)
+        buffer_mb: Memory budget for the clip buffer in MB (default: 32)
+        bit_rate_mbps: Video bit rate in Mbps (default: 4)
+        size: Video size "WIDTHxHEIGHT" (optional, device resolution if None)
+
+    Returns:
+        str: Recording status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    if client.device_id in _screen_recorders:
+        return f"Already recording screen on {client.device_id}"
+
+    recorder = ScreenRecorder(client, sample_interval=sample_interval, buffer_bytes=buffer_mb * 1024 * 1024,
+                              bit_rate=bit_rate_mbps * 1000000, size=size)
+    recorder.start()
+    _screen_recorders[client.device_id] = recorder
+    return f"Screen recording started on {client.device_id} (buffer {buffer_mb}MB)"
+
+
+@tool
+def dump_screen_recording(output_path: str = "recording.h264", device_id: Optional[str] = None, frames: bool = False, last_seconds: Optional[float] = None) -> str:
+    """Save buffered screen recording while it keeps running.
+
+    Args:
+        output_path: Output file path; frames get _N suffixes (default: recording.h264)
+        device_id: Device serial number (uses default if None)
+        frames: Save sampled keyframes as separate files instead of a clip (default: False)
+        last_seconds: Only include the most recent seconds (optional)
+
+    Returns:
+        str: Dump status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    recorder = _screen_recorders.get(client.device_id)
+    if not recorder:
+        return f"Not recording screen on {client.device_id}"
+
+    if not frames:
+        data = recorder.clip(last_seconds)
+        if not data:
+            return "No complete keyframe buffered yet"
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return f"Clip saved to {output_path} ({len(data) // 1024}KB)"
+
+    cutoff = time.time() - last_seconds if last_seconds else 0.0
+    sampled = [(ts, frame) for ts, frame in list(recorder.frames) if ts >= cutoff]
+    if not sampled:
+        return "No keyframes sampled yet"
+
+    stem, ext = os.path.splitext(output_path)
+    paths = []
+    for index, (_, frame) in enumerate(sampled):
+        path = f"{stem}_{index}{ext or '.h264'}"
+        with open(path, "wb") as f:
+            f.write(frame)
+        paths.append(path)
+    return f"Saved {len(paths)} keyframe(s):\n" + "\n".join(paths)
+
+
+@tool
+def stop_screen_recording(device_id: Optional[str] = None, output_path: Optional[str] = None) -> str:
+    """Stop screen recording, optionally saving the buffered clip.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        output_path: Save buffered clip here before discarding (optional)
+
+    Returns:
+        str: Stop status
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    recorder = _screen_recorders.pop(client.device_id, None)
+    if not recorder:
+        return f"Not recording screen on {client.device_id}"
+
+    recorder.stop()
+    result = f"Screen recording stopped ({recorder.total_bytes // 1024}KB streamed)"
+    if output_path:
+        data = recorder.clip()
+        if not data:
+            return f"Failed to save clip: no complete keyframe buffered ({result})"
+        with open(output_path, "wb") as f:
+            f.write(data)
+        result += f", clip saved to {output_path}"
+    return result
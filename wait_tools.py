@@ -0,0 +1,234 @@
+"""Blocking wait-for-condition tools for Android.
+
+Each wait runs one long-lived device shell loop and evaluates its output
+on the host, so a single tool call replaces repeated LLM polling.
+"""
+
+import re
+import shlex
+import time
+from langchain.tools import tool
+from typing import Callable, Optional, Tuple
+from ..adb_client import ADBClient
+from ..device_manager import DeviceManager
+from ..logcat_store import parse_logcat_line
+
+_device_manager = DeviceManager()
+
+
+def _wait_for_line(client: ADBClient, script: str, predicate: Callable[[str], bool], timeout: float) -> Tuple[bool, str, float]:
+    """
+    Stream a device shell script until a line satisfies predicate.
+
+    Args:
+        client: ADB client for device
+        script: Shell script run by device sh (usually an endless loop)
+        predicate: Condition evaluated per output line
+        timeout: Maximum seconds to wait
+
+    Returns:
+        Tuple[bool, str, float]: (matched, matching or last line, elapsed seconds)
+    """
+    start = time.monotonic()
+    stream = client.stream(f"shell {shlex.quote(script)}")
+    last = ""
+    try:
+        for line in stream.lines(timeout):
+            if not line.strip():
+                continue
+            last = line.strip()
+            if predicate(line):
+                return True, last, time.monotonic() - start
+    finally:
+        stream.close()
+    return False, last, time.monotonic() - start
+
+
+def _log_wait_script(buffer: str, filter_expr: Optional[str] = None) -> str:
+    """
+    Device script printing its start time, then following logcat from that second.
+
+    `date +%N` gives sub-second precision where toybox supports it; the
+    host drops lines older than the start time (see _new_log_predicate).
+
+    Args:
+        buffer: Log buffer
+        filter_expr: Optional log filter expression
+
+    Returns:
+        str: Shell script for _wait_for_line
+    """
+    script = (f"start=$(date +%s.%N); echo \"start $start\"; "
+              f"logcat -b {buffer} -v threadtime -v epoch -T \"${{start%%.*}}.000\"")
+    if filter_expr:
+        script += f" {filter_expr}"
+    return script
+
+
+def _new_log_predicate(regex: "re.Pattern") -> Callable[[str], bool]:
+    """
+    Match log lines from _log_wait_script logged at or after its start time.
+
+    Args:
+        regex: Pattern searched in each log line
+
+    Returns:
+        Callable[[str], bool]: Line predicate for _wait_for_line
+    """
+    start: Optional[float] = None
+
+    def predicate(line: str) -> bool:
+        nonlocal start
+        if start is None:
+            if line.startswith("start "):
+                seconds, _, fraction = line[len("start "):].strip().partition(".")
+                # Millisecond resolution, as logcat prints; whole seconds without %N support
+                millis = fraction[:3] if fraction[:3].isdigit() else "0"
+                start = int(seconds) + int(millis.ljust(3, "0")) / 1000 if seconds.isdigit() else 0.0
+            return False
+        row = parse_logcat_line(line)
+        return row is not None and row[0] >= start and regex.search(line) is not None
+
+    return predicate
+
+
+def _poll_script(command: str, interval: float) -> str:
+    """Wrap command in an endless device-side loop."""
+    return f"while true; do {command}; sleep {interval}; done"
+
+
+@tool
+def wait_for_activity(activity: str, device_id: Optional[str] = None, timeout: int = 30, interval: float = 0.5) -> str:
+    """Wait until an activity or package is in the foreground.
+
+    Args:
+        activity: Activity or package name (substring of the resumed component)
+        device_id: Device serial number (uses default if None)
+        timeout: Maximum seconds to wait (default: 30)
+        interval: Device-side check interval in seconds (default: 0.5)
+
+    Returns:
+        str: Wait result with elapsed time
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    # mResumedActivity (<= Android 9) / topResumedActivity (10+)
+    script = _poll_script("dumpsys activity activities | grep -E 'ResumedActivity'", interval)
+    matched, line, elapsed = _wait_for_line(client, script, lambda l: "ResumedActivity" in l and activity in l, timeout)
+    if matched:
+        return f"{activity} in foreground after {elapsed:.1f}s"
+    return f"Timeout after {timeout}s waiting for {activity}. Last state: {line or 'unknown'}"
+
+
+@tool
+def wait_for_ui_element(value: str, device_id: Optional[str] = None, timeout: int = 30, interval: float = 1.0) -> str:
+    """Wait until a UI element with given text, resource id or content description is on screen.
+
+    Args:
+        value: Exact text, resource-id or content-desc of the element
+        device_id: Device serial number (uses default if None)
+        timeout: Maximum seconds to wait (default: 30)
+        interval: Device-side check interval in seconds (default: 1.0)
+
+    Returns:
+        str: Wait result with elapsed time
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    attributes = [f'{attr}="{value}"' for attr in ("text", "resource-id", "content-desc")]
+    script = _poll_script("uiautomator dump /dev/tty", interval)
+    matched, _, elapsed = _wait_for_line(client, script, lambda l: any(a in l for a in attributes), timeout)
+    if matched:
+        return f"UI element '{value}' visible after {elapsed:.1f}s"
+    return f"Timeout after {timeout}s waiting for UI element '{value}'"
+
+
+@tool
+def wait_for_log(pattern: str, device_id: Optional[str] = None, timeout: int = 60, filter_expr: Optional[str] = None, buffer: str = "main") -> str:
+    """Wait for a new logcat line matching a regular expression.
+
+    Only lines logged after the call starts are considered.
+
+    Args:
+        pattern: Python regular expression to search for
+        device_id: Device serial number (uses default if None)
+        timeout: Maximum seconds to wait (default: 60)
+        filter_expr: Log filter expression (e.g., "ActivityManager:I *:S")
+        buffer: Log buffer (main, system, crash, events, radio, all)
+
+    Returns:
+        str: Matching log line or timeout
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        return f"Invalid pattern: {e}"
+
+    # Start at device "now" so old buffer content cannot match
+    script = _log_wait_script(buffer, filter_expr)
+    matched, line, elapsed = _wait_for_line(client, script, _new_log_predicate(regex), timeout)
+    if matched:
+        return f"Matched after {elapsed:.1f}s:\n{line}"
+    return f"Timeout after {timeout}s: no log line matched '{pattern}'"
+
+
+@tool
+def wait_for_package(package_name: str, device_id: Optional[str] = None, timeout: int = 120, interval: float = 1.0) -> str:
+    """Wait until a package is installed.
+
+    Args:
+        package_name: Package name to wait for
+        device_id: Device serial number (uses default if None)
+        timeout: Maximum seconds to wait (default: 120)
+        interval: Device-side check interval in seconds (default: 1.0)
+
+    Returns:
+        str: Wait result with elapsed time
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    script = _poll_script(f"pm path {shlex.quote(package_name)} 2>/dev/null", interval)
+    matched, _, elapsed = _wait_for_line(client, script, lambda l: l.startswith("package:"), timeout)
+    if matched:
+        return f"{package_name} installed after {elapsed:.1f}s"
+    return f"Timeout after {timeout}s waiting for {package_name} to be installed"
+
+
+@tool
+def wait_for_boot(device_id: Optional[str] = None, timeout: int = 300, interval: float = 1.0) -> str:
+    """Wait until device has finished booting, e.g. after reboot_device.
+
+    Args:
+        device_id: Device serial number (uses default if None)
+        timeout: Maximum seconds to wait (default: 300)
+        interval: Device-side check interval in seconds (default: 1.0)
+
+    Returns:
+        str: Wait result with elapsed time
+    """
+    client = _device_manager.get_device(device_id)
+    if not client:
+        return f"Device not found: {device_id or 'default'}"
+
+    start = time.monotonic()
+    success, output = client.execute("wait-for-device", timeout=timeout)
+    if not success:
+        return f"Device did not come back: {output}"
+
+    remaining = max(timeout - (time.monotonic() - start), 1)
+    script = _poll_script("getprop sys.boot_completed", interval)
+    matched, _, _ = _wait_for_line(client, script, lambda l: l.strip() == "1", remaining)
+    elapsed = time.monotonic() - start
+    if matched:
+        return f"Boot completed after {elapsed:.1f}s"
+    return f"Timeout after {timeout}s waiting for boot to complete"